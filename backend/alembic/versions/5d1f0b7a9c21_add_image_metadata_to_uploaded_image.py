@@ -0,0 +1,47 @@
+"""Add image metadata columns to uploaded_image
+
+Revision ID: 5d1f0b7a9c21
+Revises: 3551e09fcc16
+Create Date: 2025-11-20 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "5d1f0b7a9c21"
+down_revision = "3551e09fcc16"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "uploaded_image",
+        sa.Column("width", sa.Integer(), nullable=True, comment="픽셀 너비"),
+    )
+    op.add_column(
+        "uploaded_image",
+        sa.Column("height", sa.Integer(), nullable=True, comment="픽셀 높이"),
+    )
+    op.add_column(
+        "uploaded_image",
+        sa.Column("orientation", sa.SmallInteger(), nullable=True, comment="EXIF orientation (1~8)"),
+    )
+    op.add_column(
+        "uploaded_image",
+        sa.Column("captured_at", sa.DateTime(), nullable=True, comment="EXIF 촬영 시각"),
+    )
+    op.add_column(
+        "uploaded_image",
+        sa.Column("perceptual_hash", sa.String(length=16), nullable=True, comment="dHash (64bit hex)"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("uploaded_image", "perceptual_hash")
+    op.drop_column("uploaded_image", "captured_at")
+    op.drop_column("uploaded_image", "orientation")
+    op.drop_column("uploaded_image", "height")
+    op.drop_column("uploaded_image", "width")
@@ -0,0 +1,27 @@
+"""Add blurhash placeholder column to uploaded_image
+
+Revision ID: a7c3e5f1d2b4
+Revises: 5d1f0b7a9c21
+Create Date: 2025-11-20 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "a7c3e5f1d2b4"
+down_revision = "5d1f0b7a9c21"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "uploaded_image",
+        sa.Column("blurhash", sa.String(length=64), nullable=True, comment="BlurHash 플레이스홀더"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("uploaded_image", "blurhash")
@@ -0,0 +1,40 @@
+"""Add ai_usage table for AI token accounting
+
+Revision ID: e1f4a9c27b3d
+Revises: a7c3e5f1d2b4
+Create Date: 2025-11-24 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e1f4a9c27b3d"
+down_revision = "a7c3e5f1d2b4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ai_usage",
+        sa.Column("id", sa.BigInteger(), nullable=False),
+        sa.Column("account", sa.String(length=64), nullable=False, comment="과금 주체 (shop:<id> / user:<id>)"),
+        sa.Column("model", sa.String(length=100), nullable=False, comment="모델명"),
+        sa.Column("usage_date", sa.Date(), nullable=False, comment="사용일 (UTC)"),
+        sa.Column("requests", sa.Integer(), nullable=False),
+        sa.Column("prompt_tokens", sa.BigInteger(), nullable=False),
+        sa.Column("completion_tokens", sa.BigInteger(), nullable=False),
+        sa.Column("total_tokens", sa.BigInteger(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_ai_usage")),
+    )
+    op.create_index(op.f("ix_ai_usage_id"), "ai_usage", ["id"], unique=False)
+    op.create_index("ix_ai_usage_day_account", "ai_usage", ["usage_date", "account"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_ai_usage_day_account", table_name="ai_usage")
+    op.drop_index(op.f("ix_ai_usage_id"), table_name="ai_usage")
+    op.drop_table("ai_usage")
@@ -0,0 +1,27 @@
+"""Add recipe_fingerprint to treatment session
+
+Revision ID: f3b8c1d2e4a5
+Revises: e1f4a9c27b3d
+Create Date: 2025-11-26 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "f3b8c1d2e4a5"
+down_revision = "e1f4a9c27b3d"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "treatment_session",
+        sa.Column("recipe_fingerprint", sa.String(length=64), nullable=True, comment="레시피 계산에 쓰인 측정 데이터/모델 지문"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("treatment_session", "recipe_fingerprint")
@@ -0,0 +1,192 @@
+"""Micro-batching of concurrent embedding calls into shared upstream requests."""
+
+import asyncio
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+
+from app.ai.client import (
+    AIClient,
+    AIClientWrapper,
+    AIRequestError,
+    UsageCollector,
+    collect_usage,
+    current_usage,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) used to bound batch size."""
+    return len(text) // 4 + 1
+
+
+@dataclass
+class _PendingEmbed:
+    texts: List[str]
+    tokens: int
+    future: asyncio.Future
+    usage: Optional[UsageCollector] = None
+
+
+@dataclass
+class _EmbedQueue:
+    options: Dict[str, Any]
+    pending: List[_PendingEmbed] = field(default_factory=list)
+    items: int = 0
+    tokens: int = 0
+    timer: Optional[asyncio.TimerHandle] = None
+
+
+class BatchingAIClient(AIClientWrapper):
+    """Group concurrent `embed` calls into one upstream request.
+
+    Calls with the same options (model, ...) queue up for at most `max_wait_ms`;
+    the queue is sent early once it reaches `max_items` texts or `max_tokens`
+    estimated tokens. Each caller gets back exactly the slice for its texts. A
+    single call larger than the limits is sent on its own, never split.
+    """
+
+    def __init__(
+        self,
+        inner: AIClient,
+        max_items: int = 64,
+        max_tokens: int = 8000,
+        max_wait_ms: float = 5.0,
+    ):
+        super().__init__(inner)
+        self.max_items = max_items
+        self.max_tokens = max_tokens
+        self.max_wait = max_wait_ms / 1000
+        self._queues: Dict[str, _EmbedQueue] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.batched_calls = 0
+        self.batched_items = 0
+        self.flushed_full = 0
+        self.flushed_wait = 0
+
+    async def embed(
+        self,
+        texts: List[str],
+        **kwargs: Any
+    ) -> List[List[float]]:
+        if not texts:
+            return []
+
+        options = {key: value for key, value in kwargs.items() if value is not None}
+        key = json.dumps(options, sort_keys=True, default=str)
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = _EmbedQueue(options=options)
+
+        tokens = sum(estimate_tokens(text) for text in texts)
+        if queue.pending and (
+            queue.items + len(texts) > self.max_items or queue.tokens + tokens > self.max_tokens
+        ):
+            self._flush(key, full=True)
+
+        request = _PendingEmbed(
+            list(texts), tokens, asyncio.get_running_loop().create_future(), current_usage()
+        )
+        queue.pending.append(request)
+        queue.items += len(texts)
+        queue.tokens += tokens
+
+        if queue.items >= self.max_items or queue.tokens >= self.max_tokens:
+            self._flush(key, full=True)
+        elif queue.timer is None:
+            queue.timer = asyncio.get_running_loop().call_later(
+                self.max_wait, self._flush, key, False
+            )
+
+        return await request.future
+
+    def _flush(self, key: str, full: bool) -> None:
+        queue = self._queues.get(key)
+        if queue is None or not queue.pending:
+            return
+        if queue.timer is not None:
+            queue.timer.cancel()
+            queue.timer = None
+
+        batch = queue.pending
+        queue.pending = []
+        queue.items = 0
+        queue.tokens = 0
+        if full:
+            self.flushed_full += 1
+        else:
+            self.flushed_wait += 1
+
+        task = asyncio.get_running_loop().create_task(self._send(batch, queue.options))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: List[_PendingEmbed], options: Dict[str, Any]) -> None:
+        # Callers that were cancelled while queued don't need their texts embedded.
+        live = [request for request in batch if not request.future.done()]
+        if not live:
+            return
+
+        texts = [text for request in live for text in request.texts]
+        self.batches += 1
+        self.batched_calls += len(live)
+        self.batched_items += len(texts)
+
+        try:
+            # The batch task inherits one caller's context; collect here and share out below.
+            with collect_usage() as usage:
+                vectors = await self.inner.embed(texts, **options)
+            if len(vectors) != len(texts):
+                raise AIRequestError(
+                    f"Embedding batch returned {len(vectors)} vectors for {len(texts)} texts"
+                )
+        except asyncio.CancelledError:
+            for request in live:
+                request.future.cancel()
+            raise
+        except Exception as e:
+            for request in live:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            return
+
+        self._share_usage(usage, live)
+        offset = 0
+        for request in live:
+            end = offset + len(request.texts)
+            if not request.future.done():
+                request.future.set_result(vectors[offset:end])
+            offset = end
+
+    @staticmethod
+    def _share_usage(usage: UsageCollector, live: List[_PendingEmbed]) -> None:
+        """Give each caller the part of the batch's usage its texts account for."""
+        weights = [request.tokens for request in live]
+        for model, total in usage.by_model.items():
+            for request, share in zip(live, total.split(weights)):
+                if request.usage is not None:
+                    request.usage.add(model, share)
+
+    async def close(self) -> None:
+        for key in list(self._queues):
+            self._flush(key, full=False)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.inner.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.inner.stats(),
+            "embed_batching": {
+                "batches": self.batches,
+                "calls": self.batched_calls,
+                "items": self.batched_items,
+                "avg_calls_per_batch": round(self.batched_calls / self.batches, 2) if self.batches else 0.0,
+                "flushed_full": self.flushed_full,
+                "flushed_wait": self.flushed_wait,
+            },
+        }
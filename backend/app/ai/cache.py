@@ -0,0 +1,230 @@
+"""Content-addressed response cache for deterministic AI calls."""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.ai.client import AIClient, AIClientWrapper, make_cache_key
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+def is_deterministic(temperature: Optional[float], options: Dict[str, Any]) -> bool:
+    """Only temperature-0, non-streaming, single-choice calls may be cached."""
+    if temperature is None or temperature != 0:
+        return False
+    if options.get("stream"):
+        return False
+    return options.get("n") in (None, 1)
+
+
+class AIResponseCache:
+    """In-memory LRU with TTL, optionally backed by a directory of JSON files.
+
+    The disk tier survives restarts and is shared by workers on the same host;
+    entries found there are promoted back into memory.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        ttl_sec: int = 86400,
+        disk_dir: Optional[str] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_sec = ttl_sec
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.stores = 0
+        self.evictions = 0
+        self.bypassed = 0
+
+    async def get(self, key: str) -> Any:
+        """Return the cached value for `key`, or `_MISSING`."""
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+
+        if self.disk_dir is not None:
+            entry = await asyncio.to_thread(self._read_disk, key, now)
+            if entry is not None:
+                self._remember(key, *entry)
+                self.hits += 1
+                self.disk_hits += 1
+                return entry[1]
+
+        self.misses += 1
+        return _MISSING
+
+    async def set(self, key: str, value: Any) -> None:
+        expires_at = time.time() + self.ttl_sec
+        self._remember(key, expires_at, value)
+        self.stores += 1
+        if self.disk_dir is not None:
+            await asyncio.to_thread(self._write_disk, key, expires_at, value)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "bypassed": self.bypassed,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "disk_enabled": self.disk_dir is not None,
+        }
+
+    def _remember(self, key: str, expires_at: float, value: Any) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / f"{key}.json"
+
+    def _read_disk(self, key: str, now: float) -> Optional[Tuple[float, Any]]:
+        path = self._disk_path(key)
+        try:
+            with path.open("r", encoding="utf-8") as fp:
+                record = json.load(fp)
+            expires_at = float(record["expires_at"])
+            value = record["value"]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError):
+            logger.warning(f"Discarding unreadable AI cache entry {path}")
+            path.unlink(missing_ok=True)
+            return None
+        if expires_at <= now:
+            path.unlink(missing_ok=True)
+            return None
+        return expires_at, value
+
+    def _write_disk(self, key: str, expires_at: float, value: Any) -> None:
+        path = self._disk_path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with tmp_path.open("w", encoding="utf-8") as fp:
+                json.dump({"expires_at": expires_at, "value": value}, fp)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to write AI cache entry {path}: {e}")
+            tmp_path.unlink(missing_ok=True)
+
+
+class CachingAIClient(AIClientWrapper):
+    """Serve repeated deterministic calls from `AIResponseCache`.
+
+    Completions and chats are cached only at temperature 0; embeddings are
+    always deterministic and are cached per input text, so a batch with a few
+    new texts only sends those upstream. Errors are never cached.
+    """
+
+    def __init__(self, inner: AIClient, cache: AIResponseCache):
+        super().__init__(inner)
+        self.cache = cache
+
+    async def complete(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any
+    ) -> str:
+        if not is_deterministic(temperature, kwargs):
+            self.cache.bypassed += 1
+            return await self.inner.complete(prompt, max_tokens=max_tokens, temperature=temperature, **kwargs)
+
+        key = make_cache_key(
+            self.provider,
+            "complete",
+            {"prompt": prompt, "max_tokens": max_tokens, "temperature": temperature, **kwargs},
+        )
+        cached = await self.cache.get(key)
+        if cached is not _MISSING:
+            return cached
+
+        result = await self.inner.complete(prompt, max_tokens=max_tokens, temperature=temperature, **kwargs)
+        await self.cache.set(key, result)
+        return result
+
+    async def chat(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any
+    ) -> str:
+        if not is_deterministic(temperature, kwargs):
+            self.cache.bypassed += 1
+            return await self.inner.chat(messages, max_tokens=max_tokens, temperature=temperature, **kwargs)
+
+        key = make_cache_key(
+            self.provider,
+            "chat",
+            {"messages": messages, "max_tokens": max_tokens, "temperature": temperature, **kwargs},
+        )
+        cached = await self.cache.get(key)
+        if cached is not _MISSING:
+            return cached
+
+        result = await self.inner.chat(messages, max_tokens=max_tokens, temperature=temperature, **kwargs)
+        await self.cache.set(key, result)
+        return result
+
+    async def embed(
+        self,
+        texts: List[str],
+        **kwargs: Any
+    ) -> List[List[float]]:
+        keys = [make_cache_key(self.provider, "embed", {"input": text, **kwargs}) for text in texts]
+        results: List[Any] = [await self.cache.get(key) for key in keys]
+
+        # Send each missing text upstream once, even if it repeats in the batch.
+        pending: Dict[str, int] = {}
+        for text, value in zip(texts, results):
+            if value is _MISSING and text not in pending:
+                pending[text] = len(pending)
+
+        if pending:
+            fetched = await self.inner.embed(list(pending), **kwargs)
+            stored = set()
+            for key, text, value in zip(keys, texts, results):
+                if value is _MISSING and key not in stored:
+                    stored.add(key)
+                    await self.cache.set(key, fetched[pending[text]])
+            results = [
+                fetched[pending[text]] if value is _MISSING else value
+                for text, value in zip(texts, results)
+            ]
+
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.inner.stats(), "cache": self.cache.stats()}
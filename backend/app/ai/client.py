@@ -1,22 +1,22 @@
 """Resilient AI client interface for external model integration."""
 
 import asyncio
+import functools
+import hashlib
+import json
 import logging
+import random
 import time
 import uuid
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Union
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Iterator, List, Optional, TypeVar, Union
 from enum import Enum
 
 import httpx
-from tenacity import (
-    retry,
-    stop_after_attempt,
-    wait_exponential,
-    retry_if_exception_type,
-    before_sleep_log,
-    after_log
-)
 
 from app.config import settings
 
@@ -48,59 +48,509 @@ class AICircuitBreakerError(AIError):
 
 class AIRequestError(AIError):
     """AI request error."""
+    
+    def __init__(
+        self,
+        message: str,
+        status_code: Optional[int] = None,
+        retry_after: Optional[float] = None
+    ):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class AIOverloadedError(AIError):
+    """Request rejected locally because too many AI calls are already queued."""
+    pass
+
+
+class AIBudgetExceededError(AIError):
+    """Request rejected because the caller has used up its AI token budget."""
     pass
 
 
 class CircuitBreaker:
-    """Simple circuit breaker implementation."""
+    """Error-rate circuit breaker over a sliding time window.
+    
+    Outcomes are counted in one-second buckets covering the last `window_sec`
+    seconds. The breaker opens when the window holds at least
+    `failure_threshold` failures and the failure rate reaches
+    `error_rate_threshold`. After `recovery_timeout` seconds it goes HALF_OPEN
+    and lets at most `half_open_max_calls` probe calls through at a time; that
+    many successful probes close it, any failed probe re-opens it. Calls made
+    while it is OPEN (or with the probe budget used up) fail fast with
+    `AICircuitBreakerError`.
+    
+    `is_failure` decides which exceptions count against the upstream; anything
+    else (e.g. a 400 for a bad prompt) is recorded as a success.
+    """
     
     def __init__(
         self,
         failure_threshold: int = 5,
         recovery_timeout: int = 60,
-        expected_exception: type = Exception
+        expected_exception: type = Exception,
+        error_rate_threshold: float = 0.5,
+        window_sec: int = 60,
+        half_open_max_calls: int = 1,
+        name: str = "default",
+        is_failure: Optional[Callable[[BaseException], bool]] = None
     ):
         self.failure_threshold = failure_threshold
         self.recovery_timeout = recovery_timeout
         self.expected_exception = expected_exception
-        self.failure_count = 0
-        self.last_failure_time = None
+        self.error_rate_threshold = error_rate_threshold
+        self.window_sec = window_sec
+        self.half_open_max_calls = half_open_max_calls
+        self.name = name
+        self.is_failure = is_failure
         self.state = "CLOSED"  # CLOSED, OPEN, HALF_OPEN
+        self.opened_at: Optional[float] = None
+        self.last_state_change: Optional[float] = None
+        self.times_opened = 0
+        self.rejected = 0
+        self._buckets: Deque[List[int]] = deque()  # [second, successes, failures]
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+    
+    @property
+    def failure_count(self) -> int:
+        """Failures in the current window."""
+        self._prune(time.monotonic())
+        return sum(bucket[2] for bucket in self._buckets)
+    
+    @property
+    def request_count(self) -> int:
+        self._prune(time.monotonic())
+        return sum(bucket[1] + bucket[2] for bucket in self._buckets)
+    
+    def before_call(self) -> None:
+        """Admit a call or raise `AICircuitBreakerError`."""
+        if self.state == "OPEN":
+            if time.monotonic() - self.opened_at >= self.recovery_timeout:
+                self._transition("HALF_OPEN")
+            else:
+                self.rejected += 1
+                raise AICircuitBreakerError(f"Circuit breaker {self.name} is OPEN")
+        
+        if self.state == "HALF_OPEN":
+            if self._probes_in_flight >= self.half_open_max_calls:
+                self.rejected += 1
+                raise AICircuitBreakerError(f"Circuit breaker {self.name} is HALF_OPEN (probe budget used)")
+            self._probes_in_flight += 1
+    
+    def record_success(self) -> None:
+        if self.state == "HALF_OPEN":
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            self._probe_successes += 1
+            if self._probe_successes >= self.half_open_max_calls:
+                self._transition("CLOSED")
+            return
+        self._add(time.monotonic(), failed=False)
+    
+    def record_failure(self, error: BaseException) -> None:
+        if self.is_failure is not None and not self.is_failure(error):
+            self.record_success()
+            return
+        
+        if self.state == "HALF_OPEN":
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            self._transition("OPEN")
+            return
+        
+        now = time.monotonic()
+        self._add(now, failed=True)
+        if self.state == "CLOSED":
+            failures = self.failure_count
+            if (
+                failures >= self.failure_threshold
+                and failures / self.request_count >= self.error_rate_threshold
+            ):
+                self._transition("OPEN")
+                logger.warning(f"Circuit breaker {self.name} opened after {failures} failures")
+    
+    def record_abandoned(self) -> None:
+        """Release a probe slot for a call that ended without an outcome (cancelled)."""
+        if self.state == "HALF_OPEN":
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
     
     def __call__(self, func):
         async def wrapper(*args, **kwargs):
-            if self.state == "OPEN":
-                if time.time() - self.last_failure_time > self.recovery_timeout:
-                    self.state = "HALF_OPEN"
-                else:
-                    raise AICircuitBreakerError("Circuit breaker is OPEN")
-            
+            self.before_call()
             try:
                 result = await func(*args, **kwargs)
-                if self.state == "HALF_OPEN":
-                    self.state = "CLOSED"
-                    self.failure_count = 0
-                return result
             except self.expected_exception as e:
-                self.failure_count += 1
-                self.last_failure_time = time.time()
-                
-                if self.failure_count >= self.failure_threshold:
-                    self.state = "OPEN"
-                    logger.warning(f"Circuit breaker opened after {self.failure_count} failures")
-                
+                self.record_failure(e)
                 raise e
+            except BaseException:
+                self.record_abandoned()
+                raise
+            self.record_success()
+            return result
         
         return wrapper
+    
+    def stats(self) -> Dict[str, Any]:
+        requests = self.request_count
+        failures = self.failure_count
+        return {
+            "state": self.state,
+            "requests": requests,
+            "failures": failures,
+            "error_rate": round(failures / requests, 4) if requests else 0.0,
+            "rejected": self.rejected,
+            "times_opened": self.times_opened,
+            "seconds_in_state": (
+                round(time.monotonic() - self.last_state_change, 1)
+                if self.last_state_change is not None else None
+            ),
+        }
+    
+    def _transition(self, state: str) -> None:
+        now = time.monotonic()
+        self.state = state
+        self.last_state_change = now
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        if state == "OPEN":
+            self.opened_at = now
+            self.times_opened += 1
+        elif state == "CLOSED":
+            self._buckets.clear()
+        logger.info(f"Circuit breaker {self.name} -> {state}")
+    
+    def _add(self, now: float, failed: bool) -> None:
+        self._prune(now)
+        second = int(now)
+        if not self._buckets or self._buckets[-1][0] != second:
+            self._buckets.append([second, 0, 0])
+        self._buckets[-1][2 if failed else 1] += 1
+    
+    def _prune(self, now: float) -> None:
+        cutoff = int(now) - self.window_sec
+        while self._buckets and self._buckets[0][0] <= cutoff:
+            self._buckets.popleft()
+
+
+def is_upstream_failure(error: BaseException) -> bool:
+    """Timeouts, transport errors, 429 and 5xx count against a provider; other 4xx don't."""
+    if isinstance(error, AIRequestError) and error.status_code is not None:
+        return error.status_code == 429 or error.status_code >= 500
+    return isinstance(error, AIError)
+
+
+T = TypeVar("T")
+
+
+class Deadline:
+    """Point in time by which an AI call (including retries) must finish."""
+    
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+    
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+
+_current_deadline: ContextVar[Optional[Deadline]] = ContextVar("ai_deadline", default=None)
+
+
+@contextmanager
+def ai_deadline(seconds: float) -> Iterator[Deadline]:
+    """Bound every AI call made inside the block to `seconds` from now.
+    
+    Route handlers set this so retries stop once the caller would have given
+    up. A tighter deadline already in effect is kept.
+    """
+    deadline = Deadline(seconds)
+    outer = _current_deadline.get()
+    if outer is not None and outer.expires_at < deadline.expires_at:
+        deadline = outer
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+
+_current_attempt_slot: ContextVar[Optional[Any]] = ContextVar("ai_attempt_slot", default=None)
+
+
+@contextmanager
+def attempt_slot(slot: Any) -> Iterator[Any]:
+    """Let `call_with_retries` hand back `slot` while it waits between attempts.
+    
+    A concurrency limiter sets this around one call so its slot is held per
+    upstream attempt, not through Retry-After and backoff sleeps. The slot has
+    `release(error)`, called with each failed attempt's error, and an async
+    `acquire()`, awaited before the next attempt.
+    """
+    token = _current_attempt_slot.set(slot)
+    try:
+        yield slot
+    finally:
+        _current_attempt_slot.reset(token)
+
+
+class AIUsage:
+    """Token counts reported by a provider."""
+    
+    __slots__ = ("prompt_tokens", "completion_tokens", "total_tokens")
+    
+    def __init__(self, prompt_tokens: int = 0, completion_tokens: int = 0, total_tokens: int = 0):
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.total_tokens = total_tokens
+    
+    @classmethod
+    def from_response(cls, usage: Any) -> Optional["AIUsage"]:
+        """Parse a provider `usage` block (OpenAI or input/output token names)."""
+        if not isinstance(usage, dict):
+            return None
+        try:
+            prompt = int(usage.get("prompt_tokens") or usage.get("input_tokens") or 0)
+            completion = int(usage.get("completion_tokens") or usage.get("output_tokens") or 0)
+            total = int(usage.get("total_tokens") or prompt + completion)
+        except (TypeError, ValueError):
+            return None
+        return cls(prompt, completion, total)
+    
+    def add(self, other: "AIUsage") -> None:
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.total_tokens += other.total_tokens
+    
+    def split(self, weights: List[int]) -> List["AIUsage"]:
+        """Divide the counts in proportion to `weights`; the shares sum to the original."""
+        if not any(weights):
+            weights = [1] * len(weights)
+        total_weight = sum(weights)
+        shares = []
+        remaining = AIUsage(self.prompt_tokens, self.completion_tokens, self.total_tokens)
+        for weight in weights[:-1]:
+            share = AIUsage(
+                self.prompt_tokens * weight // total_weight,
+                self.completion_tokens * weight // total_weight,
+                self.total_tokens * weight // total_weight,
+            )
+            remaining.prompt_tokens -= share.prompt_tokens
+            remaining.completion_tokens -= share.completion_tokens
+            remaining.total_tokens -= share.total_tokens
+            shares.append(share)
+        shares.append(remaining)
+        return shares
+    
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+        }
+
+
+class UsageCollector:
+    """Usage reported by the provider calls made inside a `collect_usage` block, per model."""
+    
+    def __init__(self):
+        self.by_model: Dict[str, AIUsage] = {}
+    
+    def add(self, model: str, usage: AIUsage) -> None:
+        current = self.by_model.get(model)
+        if current is None:
+            current = self.by_model[model] = AIUsage()
+        current.add(usage)
+    
+    def total(self) -> AIUsage:
+        total = AIUsage()
+        for usage in self.by_model.values():
+            total.add(usage)
+        return total
+    
+    def as_dict(self) -> Optional[Dict[str, int]]:
+        """Summed usage, or None when no provider reported any (cache hit, shared call)."""
+        return self.total().as_dict() if self.by_model else None
+
+
+_current_usage: ContextVar[Optional[UsageCollector]] = ContextVar("ai_usage", default=None)
+
+
+@contextmanager
+def collect_usage(collector: Optional[UsageCollector] = None) -> Iterator[UsageCollector]:
+    """Gather the usage of every provider call made inside the block.
+    
+    Calls that run in tasks started inside the block (hedges, single-flight
+    leaders) report here too, since tasks copy the context.
+    """
+    collector = collector if collector is not None else UsageCollector()
+    token = _current_usage.set(collector)
+    try:
+        yield collector
+    finally:
+        _current_usage.reset(token)
+
+
+def current_usage() -> Optional[UsageCollector]:
+    return _current_usage.get()
+
+
+def record_usage(model: Optional[str], usage: Any) -> None:
+    """Report a provider `usage` block to the active collector, if any."""
+    collector = _current_usage.get()
+    if collector is None:
+        return
+    parsed = usage if isinstance(usage, AIUsage) else AIUsage.from_response(usage)
+    if parsed is not None:
+        collector.add(model or "default", parsed)
+
+
+def parse_retry_after(response: httpx.Response) -> Optional[float]:
+    """Seconds to wait from a `Retry-After` header (delta-seconds or HTTP date)."""
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Timeouts, transport errors, 429 and 5xx may succeed on another attempt."""
+    if isinstance(error, (AICircuitBreakerError, AIOverloadedError)):
+        return False
+    return is_upstream_failure(error)
+
+
+def retrying(func):
+    """Retry a provider method with `AIClient.call_with_retries`."""
+    @functools.wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        return await self.call_with_retries(func.__name__, lambda: func(self, *args, **kwargs))
+    return wrapper
+
+
+def guarded(endpoint: str):
+    """Run a provider method through the client's circuit breaker for `endpoint`."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            return await self.circuit_breaker_for(endpoint)(func)(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def build_http_client(timeout: float, headers: Dict[str, str]) -> httpx.AsyncClient:
+    """Create the pooled HTTP client an AI provider client reuses for every call.
+
+    Connections are kept alive between requests so upstream calls don't pay a
+    new TCP/TLS handshake, and HTTP/2 multiplexes concurrent requests over a
+    single connection when the `h2` package is available.
+    """
+    http2 = settings.ai_http2 and _http2_available()
+    if settings.ai_http2 and not http2:
+        logger.warning("AI_HTTP2 is enabled but 'h2' is not installed; falling back to HTTP/1.1")
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(
+            timeout,
+            connect=settings.ai_connect_timeout_sec,
+            pool=settings.ai_pool_timeout_sec,
+        ),
+        limits=httpx.Limits(
+            max_connections=settings.ai_max_connections,
+            max_keepalive_connections=settings.ai_max_keepalive_connections,
+            keepalive_expiry=settings.ai_keepalive_expiry_sec,
+        ),
+        http2=http2,
+        headers=headers,
+    )
+
+
+async def stream_json_events(
+    http_client: httpx.AsyncClient,
+    url: str,
+    payload: Dict[str, Any],
+    label: str,
+) -> AsyncIterator[Dict[str, Any]]:
+    """POST `payload` and yield each JSON event of a streamed response.
+
+    Accepts SSE (`data: {...}` lines, terminated by `data: [DONE]`) and
+    newline-delimited JSON. The body is read only as fast as the caller consumes
+    events, so a slow client slows the upstream read instead of buffering it.
+    Transport errors are mapped to the AIError hierarchy.
+    """
+    try:
+        async with http_client.stream("POST", url, json=payload) as response:
+            if response.is_error:
+                await response.aread()
+                response.raise_for_status()
+            async for line in response.aiter_lines():
+                line = line.strip()
+                if not line or line.startswith(":"):
+                    continue
+                if line.startswith("data:"):
+                    line = line[5:].strip()
+                elif line.startswith(("event:", "id:", "retry:")):
+                    continue
+                if line == "[DONE]":
+                    return
+                yield json.loads(line)
+    except httpx.TimeoutException as e:
+        raise AITimeoutError(f"{label} stream timeout: {e}")
+    except httpx.HTTPStatusError as e:
+        raise AIRequestError(f"{label} stream error {e.response.status_code}: {e.response.text}", status_code=e.response.status_code, retry_after=parse_retry_after(e.response))
+    except (httpx.HTTPError, ValueError) as e:
+        raise AIRequestError(f"{label} stream failed: {e}")
+
+
+def make_cache_key(provider: str, method: str, payload: Dict[str, Any]) -> str:
+    """Hash (provider, method, normalized payload) into a stable cache key.
+
+    The payload is serialized as canonical JSON (sorted keys, no whitespace) with
+    unset options dropped, so argument order and `model=None` don't change the key.
+    The model name is part of the payload.
+    """
+    normalized = {key: value for key, value in payload.items() if value is not None}
+    body = json.dumps(
+        [provider, method, normalized],
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+def _drop_none(options: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop unset options so they don't override payload defaults (e.g. model=None)."""
+    return {key: value for key, value in options.items() if value is not None}
 
 
 class AIClient(ABC):
     """Abstract base class for AI client implementations."""
     
+    provider: str = "unknown"
+    
     def __init__(self, timeout: int = 30, max_retries: int = 3):
         self.timeout = timeout
         self.max_retries = max_retries
-        self.circuit_breaker = CircuitBreaker()
+        self.circuit_breakers: Dict[str, CircuitBreaker] = {}
     
     @abstractmethod
     async def complete(
@@ -138,6 +588,164 @@ class AIClient(ABC):
         """Ping the AI service to check connectivity."""
         pass
     
+    async def stream_complete(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any
+    ) -> AsyncIterator[str]:
+        """Stream a text completion as deltas.
+        
+        Clients without native streaming yield the whole completion as one chunk.
+        """
+        yield await self.complete(prompt, max_tokens=max_tokens, temperature=temperature, **kwargs)
+    
+    async def stream_chat(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any
+    ) -> AsyncIterator[str]:
+        """Stream a chat completion as deltas."""
+        yield await self.chat(messages, max_tokens=max_tokens, temperature=temperature, **kwargs)
+    
+    async def close(self) -> None:
+        """Release resources held by the client."""
+        pass
+    
+    async def _stream_logged(
+        self,
+        method: str,
+        events: AsyncIterator[Dict[str, Any]],
+        breaker: CircuitBreaker,
+        extract: Callable[[Dict[str, Any]], Optional[str]],
+        model: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Yield non-empty deltas from `events`, logging the stream like a request.
+        
+        The stream counts as one call for `breaker`. A `usage` block in any
+        event (OpenAI sends it last with `include_usage`) is recorded.
+        """
+        breaker.before_call()
+        request_id = self._generate_request_id()
+        start_time = time.time()
+        success = False
+        self._log_request(request_id, method, stream=True)
+        try:
+            async for event in events:
+                if event.get("usage"):
+                    record_usage(event.get("model") or model, event["usage"])
+                delta = extract(event)
+                if delta:
+                    yield delta
+            success = True
+        except Exception as e:
+            breaker.record_failure(e)
+            raise
+        except BaseException:
+            breaker.record_abandoned()
+            raise
+        finally:
+            self._log_response(request_id, method, time.time() - start_time, success)
+        breaker.record_success()
+    
+    async def call_with_retries(self, method: str, attempt: Callable[[], Awaitable[T]]) -> T:
+        """Run `attempt` up to `max_retries` times within the current deadline.
+        
+        Retryable errors wait for the upstream's Retry-After, or else a fully
+        jittered exponential backoff. No retry is made when the wait plus
+        another attempt (estimated from the last one) would overrun the
+        deadline, or, without a deadline, when Retry-After exceeds
+        `ai_retry_max_delay_sec`; the last error is raised instead. Each
+        attempt is also cut off at the deadline. A slot set with `attempt_slot`
+        is released during the waits and reacquired before the next attempt.
+        """
+        deadline = current_deadline()
+        attempts = max(1, self.max_retries)
+        for number in range(1, attempts + 1):
+            started = time.monotonic()
+            try:
+                if deadline is None:
+                    return await attempt()
+                remaining = deadline.remaining()
+                if remaining <= 0:
+                    raise AITimeoutError(f"AI {method} deadline exceeded")
+                try:
+                    return await asyncio.wait_for(attempt(), remaining)
+                except asyncio.TimeoutError:
+                    raise AITimeoutError(f"AI {method} deadline exceeded")
+            except AIError as e:
+                if number == attempts or not is_retryable(e):
+                    raise
+                
+                backoff_cap = min(
+                    settings.ai_retry_max_delay_sec,
+                    settings.ai_retry_base_delay_sec * 2 ** (number - 1)
+                )
+                delay = getattr(e, "retry_after", None)
+                if delay is None:
+                    delay = random.uniform(0, backoff_cap)
+                
+                if deadline is None:
+                    # Nothing else bounds the wait; retrying sooner than asked would only be refused again.
+                    if delay > settings.ai_retry_max_delay_sec:
+                        logger.warning(
+                            f"AI {method} not retried: Retry-After {delay:.1f}s exceeds "
+                            f"{settings.ai_retry_max_delay_sec:.1f}s"
+                        )
+                        raise
+                else:
+                    needed = delay + min(time.monotonic() - started, self.timeout)
+                    if needed >= deadline.remaining():
+                        logger.warning(
+                            f"AI {method} not retried: {needed:.1f}s needed, "
+                            f"{max(0.0, deadline.remaining()):.1f}s left"
+                        )
+                        raise
+                
+                logger.warning(f"AI {method} attempt {number} failed ({e}); retrying in {delay:.2f}s")
+                slot = _current_attempt_slot.get()
+                if slot is not None:
+                    slot.release(e)
+                await asyncio.sleep(delay)
+                if slot is not None:
+                    await slot.acquire()
+    
+    def circuit_breaker_for(self, endpoint: str) -> CircuitBreaker:
+        """Return this client's circuit breaker for one upstream endpoint."""
+        breaker = self.circuit_breakers.get(endpoint)
+        if breaker is None:
+            breaker = self.circuit_breakers[endpoint] = CircuitBreaker(
+                failure_threshold=settings.ai_circuit_breaker_threshold,
+                recovery_timeout=settings.ai_circuit_breaker_timeout,
+                error_rate_threshold=settings.ai_circuit_breaker_error_rate,
+                window_sec=settings.ai_circuit_breaker_window_sec,
+                half_open_max_calls=settings.ai_circuit_breaker_half_open_calls,
+                name=f"{self.provider}:{endpoint}",
+                is_failure=is_upstream_failure
+            )
+        return breaker
+    
+    def circuit_breaker_state(self) -> str:
+        """Worst state across this client's breakers."""
+        states = {breaker.state for breaker in self.circuit_breakers.values()}
+        for state in ("OPEN", "HALF_OPEN"):
+            if state in states:
+                return state
+        return "CLOSED"
+    
+    def stats(self) -> Dict[str, Any]:
+        """Runtime metrics reported by /v1/ai/status."""
+        if not self.circuit_breakers:
+            return {}
+        return {
+            "circuit_breakers": {
+                breaker.name: breaker.stats() for breaker in self.circuit_breakers.values()
+            }
+        }
+    
     def _generate_request_id(self) -> str:
         """Generate unique request ID."""
         return str(uuid.uuid4())[:8]
@@ -155,6 +763,8 @@ class AIClient(ABC):
 class OpenAIClient(AIClient):
     """OpenAI API client with resilience features."""
     
+    provider = "openai"
+    
     def __init__(
         self,
         api_key: str,
@@ -165,21 +775,16 @@ class OpenAIClient(AIClient):
         super().__init__(timeout, max_retries)
         self.api_key = api_key
         self.base_url = base_url.rstrip('/')
-        self.client = httpx.AsyncClient(
-            timeout=httpx.Timeout(timeout),
-            headers={
+        self.client = build_http_client(
+            timeout,
+            {
                 "Authorization": f"Bearer {api_key}",
                 "Content-Type": "application/json"
             }
         )
     
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10),
-        retry=retry_if_exception_type((httpx.TimeoutException, httpx.NetworkError)),
-        before_sleep=before_sleep_log(logger, logging.WARNING),
-        after=after_log(logger, logging.INFO)
-    )
+    @retrying
+    @guarded("complete")
     async def complete(
         self,
         prompt: str,
@@ -195,11 +800,11 @@ class OpenAIClient(AIClient):
         
         try:
             payload = {
-                "model": kwargs.get("model", "gpt-3.5-turbo"),
+                "model": kwargs.get("model") or "gpt-3.5-turbo",
                 "prompt": prompt,
                 "max_tokens": max_tokens or 1000,
-                "temperature": temperature or 0.7,
-                **kwargs
+                "temperature": 0.7 if temperature is None else temperature,
+                **_drop_none(kwargs)
             }
             
             response = await self.client.post(
@@ -210,6 +815,7 @@ class OpenAIClient(AIClient):
             
             data = response.json()
             result = data["choices"][0]["text"].strip()
+            record_usage(data.get("model") or payload["model"], data.get("usage"))
             
             duration = time.time() - start_time
             self._log_response(request_id, "complete", duration, True)
@@ -223,19 +829,14 @@ class OpenAIClient(AIClient):
         except httpx.HTTPStatusError as e:
             duration = time.time() - start_time
             self._log_response(request_id, "complete", duration, False)
-            raise AIRequestError(f"OpenAI API error {e.response.status_code}: {e.response.text}")
+            raise AIRequestError(f"OpenAI API error {e.response.status_code}: {e.response.text}", status_code=e.response.status_code, retry_after=parse_retry_after(e.response))
         except Exception as e:
             duration = time.time() - start_time
             self._log_response(request_id, "complete", duration, False)
             raise AIRequestError(f"OpenAI request failed: {e}")
     
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10),
-        retry=retry_if_exception_type((httpx.TimeoutException, httpx.NetworkError)),
-        before_sleep=before_sleep_log(logger, logging.WARNING),
-        after=after_log(logger, logging.INFO)
-    )
+    @retrying
+    @guarded("embed")
     async def embed(
         self,
         texts: List[str],
@@ -249,9 +850,9 @@ class OpenAIClient(AIClient):
         
         try:
             payload = {
-                "model": kwargs.get("model", "text-embedding-ada-002"),
+                "model": kwargs.get("model") or "text-embedding-ada-002",
                 "input": texts,
-                **kwargs
+                **_drop_none(kwargs)
             }
             
             response = await self.client.post(
@@ -262,6 +863,7 @@ class OpenAIClient(AIClient):
             
             data = response.json()
             embeddings = [item["embedding"] for item in data["data"]]
+            record_usage(data.get("model") or payload["model"], data.get("usage"))
             
             duration = time.time() - start_time
             self._log_response(request_id, "embed", duration, True)
@@ -275,19 +877,14 @@ class OpenAIClient(AIClient):
         except httpx.HTTPStatusError as e:
             duration = time.time() - start_time
             self._log_response(request_id, "embed", duration, False)
-            raise AIRequestError(f"OpenAI embeddings error {e.response.status_code}: {e.response.text}")
+            raise AIRequestError(f"OpenAI embeddings error {e.response.status_code}: {e.response.text}", status_code=e.response.status_code, retry_after=parse_retry_after(e.response))
         except Exception as e:
             duration = time.time() - start_time
             self._log_response(request_id, "embed", duration, False)
             raise AIRequestError(f"OpenAI embeddings failed: {e}")
     
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10),
-        retry=retry_if_exception_type((httpx.TimeoutException, httpx.NetworkError)),
-        before_sleep=before_sleep_log(logger, logging.WARNING),
-        after=after_log(logger, logging.INFO)
-    )
+    @retrying
+    @guarded("chat")
     async def chat(
         self,
         messages: List[Dict[str, str]],
@@ -303,11 +900,11 @@ class OpenAIClient(AIClient):
         
         try:
             payload = {
-                "model": kwargs.get("model", "gpt-3.5-turbo"),
+                "model": kwargs.get("model") or "gpt-3.5-turbo",
                 "messages": messages,
                 "max_tokens": max_tokens or 1000,
-                "temperature": temperature or 0.7,
-                **kwargs
+                "temperature": 0.7 if temperature is None else temperature,
+                **_drop_none(kwargs)
             }
             
             response = await self.client.post(
@@ -318,6 +915,7 @@ class OpenAIClient(AIClient):
             
             data = response.json()
             result = data["choices"][0]["message"]["content"].strip()
+            record_usage(data.get("model") or payload["model"], data.get("usage"))
             
             duration = time.time() - start_time
             self._log_response(request_id, "chat", duration, True)
@@ -331,12 +929,66 @@ class OpenAIClient(AIClient):
         except httpx.HTTPStatusError as e:
             duration = time.time() - start_time
             self._log_response(request_id, "chat", duration, False)
-            raise AIRequestError(f"OpenAI chat error {e.response.status_code}: {e.response.text}")
+            raise AIRequestError(f"OpenAI chat error {e.response.status_code}: {e.response.text}", status_code=e.response.status_code, retry_after=parse_retry_after(e.response))
         except Exception as e:
             duration = time.time() - start_time
             self._log_response(request_id, "chat", duration, False)
             raise AIRequestError(f"OpenAI chat failed: {e}")
     
+    async def stream_complete(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any
+    ) -> AsyncIterator[str]:
+        """Stream a completion from the OpenAI API."""
+        payload = {
+            "model": kwargs.get("model") or "gpt-3.5-turbo",
+            "prompt": prompt,
+            "max_tokens": max_tokens or 1000,
+            "temperature": 0.7 if temperature is None else temperature,
+            **_drop_none(kwargs),
+            "stream": True,
+            "stream_options": {"include_usage": True}
+        }
+        events = stream_json_events(self.client, f"{self.base_url}/completions", payload, "OpenAI")
+        async for delta in self._stream_logged(
+            "stream_complete",
+            events,
+            self.circuit_breaker_for("complete"),
+            lambda event: (event.get("choices") or [{}])[0].get("text"),
+            model=payload["model"]
+        ):
+            yield delta
+    
+    async def stream_chat(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any
+    ) -> AsyncIterator[str]:
+        """Stream a chat completion from the OpenAI API."""
+        payload = {
+            "model": kwargs.get("model") or "gpt-3.5-turbo",
+            "messages": messages,
+            "max_tokens": max_tokens or 1000,
+            "temperature": 0.7 if temperature is None else temperature,
+            **_drop_none(kwargs),
+            "stream": True,
+            "stream_options": {"include_usage": True}
+        }
+        events = stream_json_events(self.client, f"{self.base_url}/chat/completions", payload, "OpenAI")
+        async for delta in self._stream_logged(
+            "stream_chat",
+            events,
+            self.circuit_breaker_for("chat"),
+            lambda event: ((event.get("choices") or [{}])[0].get("delta") or {}).get("content"),
+            model=payload["model"]
+        ):
+            yield delta
+    
     async def ping(self) -> bool:
         """Ping OpenAI API."""
         try:
@@ -351,9 +1003,15 @@ class OpenAIClient(AIClient):
         await self.client.aclose()
 
 
+def _generic_delta(event: Dict[str, Any]) -> Optional[str]:
+    return event.get("delta", event.get("text", event.get("response")))
+
+
 class GenericHTTPClient(AIClient):
     """Generic HTTP client for any AI API."""
     
+    provider = "generic"
+    
     def __init__(
         self,
         base_url: str,
@@ -372,18 +1030,10 @@ class GenericHTTPClient(AIClient):
         if headers:
             default_headers.update(headers)
         
-        self.client = httpx.AsyncClient(
-            timeout=httpx.Timeout(timeout),
-            headers=default_headers
-        )
+        self.client = build_http_client(timeout, default_headers)
     
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10),
-        retry=retry_if_exception_type((httpx.TimeoutException, httpx.NetworkError)),
-        before_sleep=before_sleep_log(logger, logging.WARNING),
-        after=after_log(logger, logging.INFO)
-    )
+    @retrying
+    @guarded("complete")
     async def complete(
         self,
         prompt: str,
@@ -401,8 +1051,8 @@ class GenericHTTPClient(AIClient):
             payload = {
                 "prompt": prompt,
                 "max_tokens": max_tokens or 1000,
-                "temperature": temperature or 0.7,
-                **kwargs
+                "temperature": 0.7 if temperature is None else temperature,
+                **_drop_none(kwargs)
             }
             
             response = await self.client.post(
@@ -413,6 +1063,7 @@ class GenericHTTPClient(AIClient):
             
             data = response.json()
             result = data.get("text", data.get("response", "")).strip()
+            record_usage(data.get("model") or payload.get("model"), data.get("usage"))
             
             duration = time.time() - start_time
             self._log_response(request_id, "complete", duration, True)
@@ -426,12 +1077,14 @@ class GenericHTTPClient(AIClient):
         except httpx.HTTPStatusError as e:
             duration = time.time() - start_time
             self._log_response(request_id, "complete", duration, False)
-            raise AIRequestError(f"Generic API error {e.response.status_code}: {e.response.text}")
+            raise AIRequestError(f"Generic API error {e.response.status_code}: {e.response.text}", status_code=e.response.status_code, retry_after=parse_retry_after(e.response))
         except Exception as e:
             duration = time.time() - start_time
             self._log_response(request_id, "complete", duration, False)
             raise AIRequestError(f"Generic API request failed: {e}")
     
+    @retrying
+    @guarded("embed")
     async def embed(
         self,
         texts: List[str],
@@ -446,7 +1099,7 @@ class GenericHTTPClient(AIClient):
         try:
             payload = {
                 "texts": texts,
-                **kwargs
+                **_drop_none(kwargs)
             }
             
             response = await self.client.post(
@@ -457,6 +1110,7 @@ class GenericHTTPClient(AIClient):
             
             data = response.json()
             embeddings = data.get("embeddings", [])
+            record_usage(data.get("model") or payload.get("model"), data.get("usage"))
             
             duration = time.time() - start_time
             self._log_response(request_id, "embed", duration, True)
@@ -467,11 +1121,17 @@ class GenericHTTPClient(AIClient):
             duration = time.time() - start_time
             self._log_response(request_id, "embed", duration, False)
             raise AITimeoutError(f"Generic embeddings timeout: {e}")
+        except httpx.HTTPStatusError as e:
+            duration = time.time() - start_time
+            self._log_response(request_id, "embed", duration, False)
+            raise AIRequestError(f"Generic embeddings error {e.response.status_code}: {e.response.text}", status_code=e.response.status_code, retry_after=parse_retry_after(e.response))
         except Exception as e:
             duration = time.time() - start_time
             self._log_response(request_id, "embed", duration, False)
             raise AIRequestError(f"Generic embeddings failed: {e}")
     
+    @retrying
+    @guarded("chat")
     async def chat(
         self,
         messages: List[Dict[str, str]],
@@ -489,8 +1149,8 @@ class GenericHTTPClient(AIClient):
             payload = {
                 "messages": messages,
                 "max_tokens": max_tokens or 1000,
-                "temperature": temperature or 0.7,
-                **kwargs
+                "temperature": 0.7 if temperature is None else temperature,
+                **_drop_none(kwargs)
             }
             
             response = await self.client.post(
@@ -501,6 +1161,7 @@ class GenericHTTPClient(AIClient):
             
             data = response.json()
             result = data.get("response", data.get("text", "")).strip()
+            record_usage(data.get("model") or payload.get("model"), data.get("usage"))
             
             duration = time.time() - start_time
             self._log_response(request_id, "chat", duration, True)
@@ -511,11 +1172,57 @@ class GenericHTTPClient(AIClient):
             duration = time.time() - start_time
             self._log_response(request_id, "chat", duration, False)
             raise AITimeoutError(f"Generic chat timeout: {e}")
+        except httpx.HTTPStatusError as e:
+            duration = time.time() - start_time
+            self._log_response(request_id, "chat", duration, False)
+            raise AIRequestError(f"Generic chat error {e.response.status_code}: {e.response.text}", status_code=e.response.status_code, retry_after=parse_retry_after(e.response))
         except Exception as e:
             duration = time.time() - start_time
             self._log_response(request_id, "chat", duration, False)
             raise AIRequestError(f"Generic chat failed: {e}")
     
+    async def stream_complete(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any
+    ) -> AsyncIterator[str]:
+        """Stream a completion from the generic HTTP API."""
+        payload = {
+            "prompt": prompt,
+            "max_tokens": max_tokens or 1000,
+            "temperature": 0.7 if temperature is None else temperature,
+            **_drop_none(kwargs),
+            "stream": True
+        }
+        events = stream_json_events(self.client, f"{self.base_url}/complete", payload, "Generic API")
+        async for delta in self._stream_logged(
+            "stream_complete", events, self.circuit_breaker_for("complete"), _generic_delta, model=payload.get("model")
+        ):
+            yield delta
+    
+    async def stream_chat(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any
+    ) -> AsyncIterator[str]:
+        """Stream a chat completion from the generic HTTP API."""
+        payload = {
+            "messages": messages,
+            "max_tokens": max_tokens or 1000,
+            "temperature": 0.7 if temperature is None else temperature,
+            **_drop_none(kwargs),
+            "stream": True
+        }
+        events = stream_json_events(self.client, f"{self.base_url}/chat", payload, "Generic API")
+        async for delta in self._stream_logged(
+            "stream_chat", events, self.circuit_breaker_for("chat"), _generic_delta, model=payload.get("model")
+        ):
+            yield delta
+    
     async def ping(self) -> bool:
         """Ping generic API."""
         try:
@@ -533,6 +1240,8 @@ class GenericHTTPClient(AIClient):
 class MockAIClient(AIClient):
     """Mock AI client for development and testing."""
     
+    provider = "mock"
+    
     def __init__(self, timeout: int = 1, max_retries: int = 1):
         super().__init__(timeout, max_retries)
     
@@ -545,7 +1254,9 @@ class MockAIClient(AIClient):
     ) -> str:
         """Generate mock text completion."""
         await asyncio.sleep(0.1)  # Simulate network delay
-        return f"Mock completion for: {prompt[:50]}..."
+        text = f"Mock completion for: {prompt[:50]}..."
+        self._record_mock_usage(kwargs, prompt, text)
+        return text
     
     async def embed(
         self,
@@ -554,6 +1265,7 @@ class MockAIClient(AIClient):
     ) -> List[List[float]]:
         """Generate mock embeddings."""
         await asyncio.sleep(0.1)  # Simulate network delay
+        self._record_mock_usage(kwargs, " ".join(texts), "")
         return [[0.1, 0.2, 0.3] for _ in texts]
     
     async def chat(
@@ -566,7 +1278,46 @@ class MockAIClient(AIClient):
         """Generate mock chat completion."""
         await asyncio.sleep(0.1)  # Simulate network delay
         last_message = messages[-1]["content"] if messages else "Hello"
-        return f"Mock chat response to: {last_message[:50]}..."
+        text = f"Mock chat response to: {last_message[:50]}..."
+        self._record_mock_usage(kwargs, " ".join(str(m.get("content", "")) for m in messages), text)
+        return text
+    
+    async def stream_complete(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any
+    ) -> AsyncIterator[str]:
+        """Stream the mock completion word by word."""
+        text = await self.complete(prompt, max_tokens=max_tokens, temperature=temperature, **kwargs)
+        async for delta in self._mock_deltas(text):
+            yield delta
+    
+    async def stream_chat(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any
+    ) -> AsyncIterator[str]:
+        """Stream the mock chat response word by word."""
+        text = await self.chat(messages, max_tokens=max_tokens, temperature=temperature, **kwargs)
+        async for delta in self._mock_deltas(text):
+            yield delta
+    
+    @staticmethod
+    def _record_mock_usage(options: Dict[str, Any], prompt: str, completion: str) -> None:
+        # One token per word, so usage accounting can be exercised without a provider.
+        prompt_tokens = len(prompt.split())
+        completion_tokens = len(completion.split())
+        record_usage(options.get("model") or "mock", AIUsage(prompt_tokens, completion_tokens, prompt_tokens + completion_tokens))
+    
+    async def _mock_deltas(self, text: str) -> AsyncIterator[str]:
+        words = text.split(" ")
+        for index, word in enumerate(words):
+            await asyncio.sleep(0.01)  # Simulate token generation
+            yield word if index == len(words) - 1 else f"{word} "
     
     async def ping(self) -> bool:
         """Mock ping - always returns True."""
@@ -574,21 +1325,225 @@ class MockAIClient(AIClient):
         return True
 
 
-def create_ai_client(provider: AIProvider = None) -> AIClient:
-    """Create AI client based on provider."""
+class AIClientWrapper(AIClient):
+    """Base for layers that add behaviour around another AI client.
+
+    Every method delegates to `inner` unless a subclass overrides it, so layers
+    (response cache, ...) can be stacked by `build_ai_client`.
+    """
+    
+    def __init__(self, inner: AIClient):
+        super().__init__(inner.timeout, inner.max_retries)
+        self.inner = inner
+    
+    @property
+    def provider(self) -> str:
+        return self.inner.provider
+    
+    async def complete(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any
+    ) -> str:
+        return await self.inner.complete(prompt, max_tokens=max_tokens, temperature=temperature, **kwargs)
+    
+    async def embed(
+        self,
+        texts: List[str],
+        **kwargs: Any
+    ) -> List[List[float]]:
+        return await self.inner.embed(texts, **kwargs)
+    
+    async def chat(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any
+    ) -> str:
+        return await self.inner.chat(messages, max_tokens=max_tokens, temperature=temperature, **kwargs)
+    
+    async def stream_complete(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any
+    ) -> AsyncIterator[str]:
+        async for delta in self.inner.stream_complete(
+            prompt, max_tokens=max_tokens, temperature=temperature, **kwargs
+        ):
+            yield delta
+    
+    async def stream_chat(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any
+    ) -> AsyncIterator[str]:
+        async for delta in self.inner.stream_chat(
+            messages, max_tokens=max_tokens, temperature=temperature, **kwargs
+        ):
+            yield delta
+    
+    async def ping(self) -> bool:
+        return await self.inner.ping()
+    
+    async def close(self) -> None:
+        await self.inner.close()
+    
+    def circuit_breaker_state(self) -> str:
+        return self.inner.circuit_breaker_state()
+    
+    def stats(self) -> Dict[str, Any]:
+        return self.inner.stats()
+
+
+class SingleFlight:
+    """Share one in-flight call between concurrent callers with the same key.
+    
+    The call runs as its own task, so cancelling one waiter never cancels it
+    for the others; it is cancelled only when every waiter has gone away.
+    Nothing is kept after the call finishes.
+    """
+    
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, int] = {}
+        self.started = 0
+        self.shared = 0
+    
+    async def do(self, key: str, func: Callable[[], Any]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(func())
+            self._calls[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self.started += 1
+        else:
+            self.shared += 1
+        
+        self._waiters[key] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._waiters.get(key) == 1 and not task.done():
+                task.cancel()
+            raise
+        finally:
+            if self._calls.get(key) is task:
+                self._waiters[key] -= 1
+    
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+            del self._waiters[key]
+        if not task.cancelled():
+            task.exception()  # Mark as retrieved even if every waiter left.
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._calls),
+            "started": self.started,
+            "shared": self.shared,
+        }
+
+
+class SingleFlightAIClient(AIClientWrapper):
+    """Coalesce identical concurrent requests into one upstream call.
+    
+    Requests are identical when their cache key (provider, method, normalized
+    payload) matches. Unlike the response cache this also applies to sampled
+    (temperature > 0) calls: callers asking the same thing at the same moment get
+    the same answer, and nothing is reused once the call completes.
+    """
+    
+    def __init__(self, inner: AIClient):
+        super().__init__(inner)
+        self.flights = SingleFlight()
+    
+    async def complete(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any
+    ) -> str:
+        key = make_cache_key(
+            self.provider,
+            "complete",
+            {"prompt": prompt, "max_tokens": max_tokens, "temperature": temperature, **kwargs}
+        )
+        return await self.flights.do(
+            key,
+            lambda: self.inner.complete(prompt, max_tokens=max_tokens, temperature=temperature, **kwargs)
+        )
+    
+    async def embed(
+        self,
+        texts: List[str],
+        **kwargs: Any
+    ) -> List[List[float]]:
+        key = make_cache_key(self.provider, "embed", {"input": texts, **kwargs})
+        return await self.flights.do(key, lambda: self.inner.embed(texts, **kwargs))
+    
+    async def chat(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any
+    ) -> str:
+        key = make_cache_key(
+            self.provider,
+            "chat",
+            {"messages": messages, "max_tokens": max_tokens, "temperature": temperature, **kwargs}
+        )
+        return await self.flights.do(
+            key,
+            lambda: self.inner.chat(messages, max_tokens=max_tokens, temperature=temperature, **kwargs)
+        )
+    
+    def stats(self) -> Dict[str, Any]:
+        return {**self.inner.stats(), "single_flight": self.flights.stats()}
+
+
+def unwrap_ai_client(client: AIClient) -> AIClient:
+    """Return the provider client underneath any wrapper layers."""
+    while isinstance(client, AIClientWrapper):
+        client = client.inner
+    return client
+
+
+def create_ai_client(
+    provider: AIProvider = None,
+    base_url: Optional[str] = None,
+    api_key: Optional[str] = None,
+    timeout: Optional[int] = None
+) -> AIClient:
+    """Create AI client based on provider (connection settings default to AI_*)."""
     provider = provider or AIProvider(settings.ai_provider)
+    base_url = base_url or settings.ai_base_url
+    api_key = settings.ai_api_key if api_key is None else api_key
+    timeout = timeout or settings.ai_timeout_sec
     
     if provider == AIProvider.OPENAI:
         return OpenAIClient(
-            api_key=settings.ai_api_key,
-            base_url=settings.ai_base_url,
-            timeout=settings.ai_timeout_sec
+            api_key=api_key,
+            base_url=base_url,
+            timeout=timeout,
+            max_retries=settings.ai_max_retries
         )
     elif provider == AIProvider.GENERIC:
         return GenericHTTPClient(
-            base_url=settings.ai_base_url,
-            api_key=settings.ai_api_key,
-            timeout=settings.ai_timeout_sec
+            base_url=base_url,
+            api_key=api_key,
+            timeout=timeout,
+            max_retries=settings.ai_max_retries
         )
     elif provider == AIProvider.MOCK:
         return MockAIClient()
@@ -596,15 +1551,107 @@ def create_ai_client(provider: AIProvider = None) -> AIClient:
         raise ValueError(f"Unsupported AI provider: {provider}")
 
 
+def _build_backend(provider: AIProvider = None, **connection: Any) -> AIClient:
+    client = create_ai_client(provider, **connection)
+    
+    # Innermost, so the limit sees each provider's calls; the provider's retries
+    # give the slot back between attempts (see `attempt_slot`).
+    if settings.ai_limiter_enabled:
+        from app.ai.limiter import ConcurrencyLimitedAIClient
+        
+        client = ConcurrencyLimitedAIClient(
+            client,
+            initial_limit=settings.ai_limiter_initial_limit,
+            min_limit=settings.ai_limiter_min_limit,
+            max_limit=settings.ai_limiter_max_limit,
+            max_queue=settings.ai_limiter_max_queue,
+            queue_timeout=settings.ai_limiter_queue_timeout_sec,
+        )
+    
+    return client
+
+
+def build_ai_client(provider: AIProvider = None) -> AIClient:
+    """Create the provider client (or router over AI_BACKENDS) wrapped in the configured layers."""
+    if provider is None and settings.ai_backends:
+        from app.ai.routing import RoutingAIClient
+        
+        client = RoutingAIClient(
+            [
+                (
+                    backend.get("name") or f"{backend['provider']}-{index}",
+                    _build_backend(
+                        AIProvider(backend["provider"]),
+                        base_url=backend.get("base_url"),
+                        api_key=backend.get("api_key"),
+                        timeout=backend.get("timeout_sec"),
+                    ),
+                )
+                for index, backend in enumerate(settings.ai_backends)
+            ],
+            explore_ratio=settings.ai_routing_explore_ratio,
+            max_error_rate=settings.ai_routing_max_error_rate,
+            cooldown_sec=settings.ai_routing_cooldown_sec,
+        )
+    else:
+        client = _build_backend(provider)
+    
+    if settings.ai_embed_batch_enabled:
+        from app.ai.batching import BatchingAIClient
+        
+        client = BatchingAIClient(
+            client,
+            max_items=settings.ai_embed_batch_max_items,
+            max_tokens=settings.ai_embed_batch_max_tokens,
+            max_wait_ms=settings.ai_embed_batch_max_wait_ms,
+        )
+    
+    if settings.ai_hedge_enabled:
+        from app.ai.hedging import HedgingAIClient
+        
+        client = HedgingAIClient(
+            client,
+            percentile=settings.ai_hedge_percentile,
+            min_samples=settings.ai_hedge_min_samples,
+            budget_ratio=settings.ai_hedge_budget_ratio,
+        )
+    
+    if settings.ai_single_flight_enabled:
+        client = SingleFlightAIClient(client)
+    
+    # Outermost so cache hits never wait in a batch or on another caller.
+    if settings.ai_cache_enabled:
+        from app.ai.cache import AIResponseCache, CachingAIClient
+        
+        client = CachingAIClient(
+            client,
+            AIResponseCache(
+                max_entries=settings.ai_cache_max_entries,
+                ttl_sec=settings.ai_cache_ttl_sec,
+                disk_dir=settings.ai_cache_dir or None,
+            ),
+        )
+    
+    return client
+
+
 # Global AI client instance
 ai_client: Optional[AIClient] = None
 
 
+async def init_ai_client() -> AIClient:
+    """Create the global AI client once at application startup."""
+    global ai_client
+    if ai_client is None:
+        ai_client = build_ai_client()
+    return ai_client
+
+
 async def get_ai_client() -> AIClient:
-    """Get the global AI client instance."""
+    """Get the global AI client instance (created lazily outside the app lifespan)."""
     global ai_client
     if ai_client is None:
-        ai_client = create_ai_client()
+        ai_client = build_ai_client()
     return ai_client
 
 
@@ -0,0 +1,184 @@
+"""Hedged AI requests: a second attempt when the first is slower than usual."""
+
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from app.ai.client import AIClient, AIClientWrapper
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyTracker:
+    """Recent latencies of one method, used to pick the hedging delay."""
+
+    def __init__(self, percentile: float = 95.0, window: int = 200, min_samples: int = 20):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def observe(self, latency: float) -> None:
+        self._samples.append(latency)
+
+    def hedge_delay(self) -> Optional[float]:
+        """The configured percentile of recent latency, or None until enough samples exist."""
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, math.ceil(self.percentile / 100 * len(ordered)) - 1)
+        return ordered[max(0, index)]
+
+
+class HedgeBudget:
+    """Token bucket: every request earns `ratio` of a hedge, capped at `burst`."""
+
+    def __init__(self, ratio: float = 0.1, burst: float = 10.0):
+        self.ratio = ratio
+        self.burst = burst
+        self.tokens = burst
+
+    def earn(self) -> None:
+        self.tokens = min(self.burst, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class _MethodHedging:
+    def __init__(self, percentile: float, min_samples: int, budget_ratio: float, budget_burst: float):
+        self.latency = LatencyTracker(percentile=percentile, min_samples=min_samples)
+        self.budget = HedgeBudget(ratio=budget_ratio, burst=budget_burst)
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.budget_exhausted = 0
+
+    def stats(self) -> Dict[str, Any]:
+        delay = self.latency.hedge_delay()
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "budget_exhausted": self.budget_exhausted,
+            "hedge_delay_ms": round(delay * 1000, 1) if delay is not None else None,
+        }
+
+
+async def _timed(call: Callable[[], Awaitable[Any]]) -> tuple:
+    start = time.monotonic()
+    result = await call()
+    return result, time.monotonic() - start
+
+
+class HedgingAIClient(AIClientWrapper):
+    """Send a second attempt when the first hasn't answered by the latency percentile.
+
+    Whichever attempt succeeds first wins and the other is cancelled; if one
+    attempt fails the other is still awaited. Hedges are limited per method by a
+    `HedgeBudget`, so at most about `budget_ratio` extra load is added. Hedging
+    starts once `min_samples` latencies have been observed for the method.
+    """
+
+    def __init__(
+        self,
+        inner: AIClient,
+        percentile: float = 95.0,
+        min_samples: int = 20,
+        budget_ratio: float = 0.1,
+        budget_burst: float = 10.0,
+    ):
+        super().__init__(inner)
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.budget_ratio = budget_ratio
+        self.budget_burst = budget_burst
+        self.methods: Dict[str, _MethodHedging] = {}
+
+    def _method(self, name: str) -> _MethodHedging:
+        method = self.methods.get(name)
+        if method is None:
+            method = self.methods[name] = _MethodHedging(
+                self.percentile, self.min_samples, self.budget_ratio, self.budget_burst
+            )
+        return method
+
+    async def _hedged(self, name: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        method = self._method(name)
+        method.requests += 1
+        method.budget.earn()
+        delay = method.latency.hedge_delay()
+
+        primary = asyncio.ensure_future(_timed(call))
+        attempts = [primary]
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait({primary}, timeout=delay)
+                if not done:
+                    if method.budget.try_spend():
+                        method.hedged += 1
+                        attempts.append(asyncio.ensure_future(_timed(call)))
+                    else:
+                        method.budget_exhausted += 1
+
+            pending = set(attempts)
+            first_error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    error = task.exception()
+                    if error is None:
+                        result, latency = task.result()
+                        method.latency.observe(latency)
+                        if task is not primary:
+                            method.hedge_wins += 1
+                        return result
+                    if first_error is None or task is primary:
+                        first_error = error
+            raise first_error
+        finally:
+            for task in attempts:
+                if not task.done():
+                    task.cancel()
+
+    async def complete(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any
+    ) -> str:
+        return await self._hedged(
+            "complete",
+            lambda: self.inner.complete(prompt, max_tokens=max_tokens, temperature=temperature, **kwargs),
+        )
+
+    async def embed(
+        self,
+        texts: List[str],
+        **kwargs: Any
+    ) -> List[List[float]]:
+        return await self._hedged("embed", lambda: self.inner.embed(texts, **kwargs))
+
+    async def chat(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any
+    ) -> str:
+        return await self._hedged(
+            "chat",
+            lambda: self.inner.chat(messages, max_tokens=max_tokens, temperature=temperature, **kwargs),
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.inner.stats(),
+            "hedging": {name: method.stats() for name, method in self.methods.items()},
+        }
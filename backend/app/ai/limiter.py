@@ -0,0 +1,263 @@
+"""Adaptive (AIMD) concurrency limiting for upstream AI calls."""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from app.ai.client import (
+    AIClient,
+    AIClientWrapper,
+    AIOverloadedError,
+    AIRequestError,
+    AITimeoutError,
+    attempt_slot,
+)
+
+logger = logging.getLogger(__name__)
+
+_LATENCY_ALPHA = 0.05
+
+
+class AdaptiveLimiter:
+    """Concurrency limit that grows while the upstream is healthy and backs off under pressure.
+
+    Additive increase: a success on a saturated limiter raises the limit by
+    `1/limit` (about +1 per limit's worth of calls). Multiplicative decrease:
+    a 429, a timeout, or a latency above `latency_tolerance` times the long-run
+    average multiplies the limit by `backoff`, at most once per average latency
+    so one burst of errors counts as one congestion signal.
+
+    Callers over the limit wait in a bounded FIFO queue; when it is full, or the
+    wait exceeds `queue_timeout`, they get `AIOverloadedError` immediately.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial_limit: int = 20,
+        min_limit: int = 1,
+        max_limit: int = 200,
+        max_queue: int = 100,
+        queue_timeout: float = 5.0,
+        latency_tolerance: float = 2.0,
+        backoff: float = 0.9,
+    ):
+        self.name = name
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.latency_tolerance = latency_tolerance
+        self.backoff = backoff
+        self.in_flight = 0
+        self.avg_latency: Optional[float] = None
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+        self.rejected = 0
+        self.decreases = 0
+
+    async def acquire(self) -> None:
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise AIOverloadedError(f"AI concurrency limit reached for {self.name} (queue full)")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._abandon(waiter)
+            self.rejected += 1
+            raise AIOverloadedError(
+                f"AI concurrency limit reached for {self.name} (queued over {self.queue_timeout}s)"
+            )
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+
+    def release(self, latency: float, congested: bool) -> None:
+        saturated = self.in_flight >= int(self.limit)
+        self.in_flight -= 1
+
+        now = time.monotonic()
+        slow = self.avg_latency is not None and latency > self.avg_latency * self.latency_tolerance
+        if congested or slow:
+            if now - self._last_decrease >= (self.avg_latency or 0.0):
+                self.limit = max(float(self.min_limit), self.limit * self.backoff)
+                self._last_decrease = now
+                self.decreases += 1
+                logger.info(f"AI limiter {self.name}: limit lowered to {int(self.limit)}")
+        elif saturated:
+            self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+
+        if not congested:
+            self.avg_latency = (
+                latency
+                if self.avg_latency is None
+                else self.avg_latency + _LATENCY_ALPHA * (latency - self.avg_latency)
+            )
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def _abandon(self, waiter: asyncio.Future) -> None:
+        if waiter.done() and not waiter.cancelled():
+            # The slot was handed over just as the caller gave up; pass it on.
+            self.in_flight -= 1
+            self._wake()
+        elif waiter in self._waiters:
+            self._waiters.remove(waiter)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "rejected": self.rejected,
+            "decreases": self.decreases,
+            "avg_latency_ms": round(self.avg_latency * 1000, 1) if self.avg_latency is not None else None,
+        }
+
+
+def _is_congestion(error: BaseException) -> bool:
+    if isinstance(error, AITimeoutError):
+        return True
+    return isinstance(error, AIRequestError) and error.status_code == 429
+
+
+class _Slot:
+    """One call's hold on a limiter, released and reacquired around each retry wait."""
+
+    def __init__(self, limiter: AdaptiveLimiter):
+        self.limiter = limiter
+        self.held = False
+        self.start = 0.0
+
+    async def acquire(self) -> None:
+        await self.limiter.acquire()
+        self.held = True
+        self.start = time.monotonic()
+
+    def release(self, error: Optional[BaseException] = None) -> None:
+        if self.held:
+            self.held = False
+            congested = error is not None and _is_congestion(error)
+            self.limiter.release(time.monotonic() - self.start, congested)
+
+
+class ConcurrencyLimitedAIClient(AIClientWrapper):
+    """Apply an `AdaptiveLimiter` per (provider, model) to every upstream call."""
+
+    def __init__(self, inner: AIClient, **limiter_options: Any):
+        super().__init__(inner)
+        self.limiter_options = limiter_options
+        self.limiters: Dict[Tuple[str, str], AdaptiveLimiter] = {}
+
+    def limiter_for(self, model: Optional[str]) -> AdaptiveLimiter:
+        key = (self.provider, model or "default")
+        limiter = self.limiters.get(key)
+        if limiter is None:
+            limiter = self.limiters[key] = AdaptiveLimiter(f"{key[0]}/{key[1]}", **self.limiter_options)
+        return limiter
+
+    async def _call(self, model: Optional[str], call: Callable[[], Awaitable[Any]]) -> Any:
+        slot = _Slot(self.limiter_for(model))
+        await slot.acquire()
+        try:
+            with attempt_slot(slot):
+                return await call()
+        except Exception as e:
+            slot.release(e)
+            raise
+        finally:
+            slot.release()
+
+    async def complete(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any
+    ) -> str:
+        return await self._call(
+            kwargs.get("model"),
+            lambda: self.inner.complete(prompt, max_tokens=max_tokens, temperature=temperature, **kwargs),
+        )
+
+    async def embed(
+        self,
+        texts: List[str],
+        **kwargs: Any
+    ) -> List[List[float]]:
+        return await self._call(kwargs.get("model"), lambda: self.inner.embed(texts, **kwargs))
+
+    async def chat(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any
+    ) -> str:
+        return await self._call(
+            kwargs.get("model"),
+            lambda: self.inner.chat(messages, max_tokens=max_tokens, temperature=temperature, **kwargs),
+        )
+
+    async def _stream(self, model: Optional[str], deltas: AsyncIterator[str]) -> AsyncIterator[str]:
+        # A stream holds its slot until the last delta; latency is time to first delta.
+        limiter = self.limiter_for(model)
+        await limiter.acquire()
+        start = time.monotonic()
+        latency: Optional[float] = None
+        congested = False
+        try:
+            async for delta in deltas:
+                if latency is None:
+                    latency = time.monotonic() - start
+                yield delta
+        except Exception as e:
+            congested = _is_congestion(e)
+            raise
+        finally:
+            await deltas.aclose()
+            limiter.release(latency if latency is not None else time.monotonic() - start, congested)
+
+    async def stream_complete(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any
+    ) -> AsyncIterator[str]:
+        deltas = self.inner.stream_complete(prompt, max_tokens=max_tokens, temperature=temperature, **kwargs)
+        async for delta in self._stream(kwargs.get("model"), deltas):
+            yield delta
+
+    async def stream_chat(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any
+    ) -> AsyncIterator[str]:
+        deltas = self.inner.stream_chat(messages, max_tokens=max_tokens, temperature=temperature, **kwargs)
+        async for delta in self._stream(kwargs.get("model"), deltas):
+            yield delta
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.inner.stats(),
+            "concurrency": {limiter.name: limiter.stats() for limiter in self.limiters.values()},
+        }
@@ -0,0 +1,245 @@
+"""Latency-aware routing across several AI backends with automatic failover."""
+
+import logging
+import random
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.ai.client import (
+    AICircuitBreakerError,
+    AIClient,
+    AIError,
+    AIOverloadedError,
+    current_deadline,
+    is_retryable,
+)
+
+logger = logging.getLogger(__name__)
+
+_EWMA_ALPHA = 0.2
+
+
+def _should_fail_over(error: BaseException) -> bool:
+    """Another backend may succeed where this one was down, slow, or shedding load."""
+    return isinstance(error, (AICircuitBreakerError, AIOverloadedError)) or is_retryable(error)
+
+
+class Backend:
+    """One routed AI client and its observed health."""
+
+    def __init__(self, name: str, client: AIClient, max_error_rate: float, cooldown_sec: float):
+        self.name = name
+        self.client = client
+        self.max_error_rate = max_error_rate
+        self.cooldown_sec = cooldown_sec
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.unhealthy_until = 0.0
+        self.requests = 0
+        self.failures = 0
+
+    def healthy(self, now: float) -> bool:
+        return now >= self.unhealthy_until
+
+    def record_success(self, latency: float) -> None:
+        self.requests += 1
+        self.error_rate *= 1 - _EWMA_ALPHA
+        self.latency = latency if self.latency is None else self.latency + _EWMA_ALPHA * (latency - self.latency)
+
+    def record_failure(self) -> None:
+        self.requests += 1
+        self.failures += 1
+        self.error_rate = self.error_rate * (1 - _EWMA_ALPHA) + _EWMA_ALPHA
+        if self.error_rate >= self.max_error_rate:
+            self.unhealthy_until = time.monotonic() + self.cooldown_sec
+            logger.warning(
+                f"AI backend {self.name} marked unhealthy for {self.cooldown_sec}s "
+                f"(error rate {self.error_rate:.2f})"
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "healthy": self.healthy(time.monotonic()),
+            "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "error_rate": round(self.error_rate, 4),
+            "requests": self.requests,
+            "failures": self.failures,
+            **self.client.stats(),
+        }
+
+
+class RoutingAIClient(AIClient):
+    """Send each call to the fastest healthy backend and fail over on upstream errors.
+
+    Backends are ordered by EWMA latency (untried backends first so they get
+    measured); a backend whose EWMA error rate reaches `max_error_rate` is
+    skipped for `cooldown_sec`, then tried again. `explore_ratio` of calls go to
+    a random healthy backend so latency estimates for the others stay current.
+    Unhealthy backends are still tried last rather than failing outright.
+
+    Backends should serve interchangeable models: cached responses and
+    embeddings are shared across them.
+    """
+
+    provider = "router"
+
+    def __init__(
+        self,
+        backends: Sequence[Tuple[str, AIClient]],
+        explore_ratio: float = 0.05,
+        max_error_rate: float = 0.5,
+        cooldown_sec: float = 10.0,
+    ):
+        if not backends:
+            raise ValueError("RoutingAIClient needs at least one backend")
+        first = backends[0][1]
+        super().__init__(first.timeout, first.max_retries)
+        self.backends = [
+            Backend(name, client, max_error_rate=max_error_rate, cooldown_sec=cooldown_sec)
+            for name, client in backends
+        ]
+        self.explore_ratio = explore_ratio
+        self.failovers = 0
+
+    def candidates(self) -> List[Backend]:
+        now = time.monotonic()
+        healthy = [backend for backend in self.backends if backend.healthy(now)]
+        unhealthy = [backend for backend in self.backends if not backend.healthy(now)]
+        healthy.sort(key=lambda backend: -1.0 if backend.latency is None else backend.latency)
+        if len(healthy) > 1 and random.random() < self.explore_ratio:
+            explored = healthy.pop(random.randrange(1, len(healthy)))
+            healthy.insert(0, explored)
+        unhealthy.sort(key=lambda backend: backend.unhealthy_until)
+        return healthy + unhealthy
+
+    async def _route(self, call: Callable[[AIClient], Awaitable[Any]]) -> Any:
+        last_error: Optional[BaseException] = None
+        for index, backend in enumerate(self.candidates()):
+            if index:
+                deadline = current_deadline()
+                if deadline is not None and deadline.remaining() <= 0:
+                    break
+                self.failovers += 1
+            start = time.monotonic()
+            try:
+                result = await call(backend.client)
+            except AIError as e:
+                if not _should_fail_over(e):
+                    backend.record_success(time.monotonic() - start)
+                    raise
+                backend.record_failure()
+                last_error = e
+                logger.warning(f"AI backend {backend.name} failed ({e}); trying next backend")
+                continue
+            backend.record_success(time.monotonic() - start)
+            return result
+        raise last_error
+
+    async def _route_stream(self, open_stream: Callable[[AIClient], AsyncIterator[str]]) -> AsyncIterator[str]:
+        # Fail over only until the first delta; after that the output is committed.
+        last_error: Optional[BaseException] = None
+        for index, backend in enumerate(self.candidates()):
+            if index:
+                self.failovers += 1
+            start = time.monotonic()
+            deltas = open_stream(backend.client)
+            try:
+                first = await deltas.__anext__()
+            except StopAsyncIteration:
+                backend.record_success(time.monotonic() - start)
+                return
+            except AIError as e:
+                await deltas.aclose()
+                if not _should_fail_over(e):
+                    raise
+                backend.record_failure()
+                last_error = e
+                continue
+            backend.record_success(time.monotonic() - start)
+            try:
+                yield first
+                async for delta in deltas:
+                    yield delta
+            finally:
+                await deltas.aclose()
+            return
+        raise last_error
+
+    async def complete(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any
+    ) -> str:
+        return await self._route(
+            lambda client: client.complete(prompt, max_tokens=max_tokens, temperature=temperature, **kwargs)
+        )
+
+    async def embed(
+        self,
+        texts: List[str],
+        **kwargs: Any
+    ) -> List[List[float]]:
+        return await self._route(lambda client: client.embed(texts, **kwargs))
+
+    async def chat(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any
+    ) -> str:
+        return await self._route(
+            lambda client: client.chat(messages, max_tokens=max_tokens, temperature=temperature, **kwargs)
+        )
+
+    async def stream_complete(
+        self,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any
+    ) -> AsyncIterator[str]:
+        async for delta in self._route_stream(
+            lambda client: client.stream_complete(prompt, max_tokens=max_tokens, temperature=temperature, **kwargs)
+        ):
+            yield delta
+
+    async def stream_chat(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs: Any
+    ) -> AsyncIterator[str]:
+        async for delta in self._route_stream(
+            lambda client: client.stream_chat(messages, max_tokens=max_tokens, temperature=temperature, **kwargs)
+        ):
+            yield delta
+
+    async def ping(self) -> bool:
+        for backend in self.candidates():
+            if await backend.client.ping():
+                return True
+        return False
+
+    async def close(self) -> None:
+        for backend in self.backends:
+            await backend.client.close()
+
+    def circuit_breaker_state(self) -> str:
+        """Best state across backends: the router still serves while any backend is closed."""
+        states = {backend.client.circuit_breaker_state() for backend in self.backends}
+        for state in ("CLOSED", "HALF_OPEN"):
+            if state in states:
+                return state
+        return "OPEN"
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "routing": {
+                "failovers": self.failovers,
+                "backends": {backend.name: backend.stats() for backend in self.backends},
+            }
+        }
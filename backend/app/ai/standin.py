@@ -0,0 +1,313 @@
+"""Local stand-in for an upstream AI provider, for offline benchmarks and tests.
+
+Speaks both protocols the provider clients use:
+
+- OpenAI-compatible (`OpenAIClient`, base URL `http://host:port/v1`):
+  `/v1/completions`, `/v1/chat/completions`, `/v1/embeddings`, `/v1/models`
+- generic (`GenericHTTPClient`, base URL `http://host:port`):
+  `/complete`, `/chat`, `/embeddings`, `/ping`
+
+Latency, error injection, hangs and rate limits are set by `StandinConfig` and
+can be changed at runtime through `PUT /_standin/config`; `GET /_standin/stats`
+returns request counters. Responses are deterministic for a given input.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import time
+from dataclasses import asdict, dataclass, fields
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+
+@dataclass
+class StandinConfig:
+    """Behaviour of the stand-in provider.
+
+    `latency` is one of `fixed` (always `latency_ms`), `uniform`
+    (`latency_ms` +/- 50%) or `lognormal` (median `latency_ms`, spread
+    `latency_sigma`; long tail like real providers).
+    """
+
+    latency: str = "lognormal"
+    latency_ms: float = 200.0
+    latency_sigma: float = 0.6
+    token_delay_ms: float = 20.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    hang_rate: float = 0.0
+    hang_sec: float = 60.0
+    rate_limit_rps: float = 0.0
+    rate_limit_burst: float = 10.0
+    retry_after_sec: float = 1.0
+    embedding_dim: int = 8
+    seed: Optional[int] = None
+
+    def update(self, values: Dict[str, Any]) -> None:
+        names = {field.name for field in fields(self)}
+        for key, value in values.items():
+            if key in names:
+                setattr(self, key, value)
+
+
+class _TokenBucket:
+    def __init__(self):
+        self.tokens: Optional[float] = None
+        self.updated = time.monotonic()
+
+    def take(self, rate: float, burst: float) -> bool:
+        now = time.monotonic()
+        if self.tokens is None:
+            self.tokens = burst
+        self.tokens = min(burst, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+def _embedding(text: str, dim: int) -> List[float]:
+    digest = hashlib.sha256(text.encode("utf-8")).digest()
+    values = [(digest[i % len(digest)] / 255.0) * 2 - 1 for i in range(dim)]
+    norm = math.sqrt(sum(v * v for v in values)) or 1.0
+    return [round(v / norm, 6) for v in values]
+
+
+def _reply_words(source: str, max_tokens: Optional[int]) -> List[str]:
+    words = f"Stand-in reply to: {source}".split()
+    limit = max(1, min(max_tokens or 64, 64))
+    return words[:limit]
+
+
+def _last_message(messages: List[Dict[str, Any]]) -> str:
+    return str(messages[-1].get("content", "")) if messages else ""
+
+
+def _usage(prompt: str, words: List[str]) -> Dict[str, int]:
+    prompt_tokens = len(prompt.split())
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": len(words),
+        "total_tokens": prompt_tokens + len(words),
+    }
+
+
+def _messages_text(messages: List[Dict[str, Any]]) -> str:
+    return " ".join(str(message.get("content", "")) for message in messages)
+
+
+def _include_usage(payload: Dict[str, Any]) -> bool:
+    return bool((payload.get("stream_options") or {}).get("include_usage"))
+
+
+def create_standin_app(config: Optional[StandinConfig] = None) -> FastAPI:
+    """Build the stand-in ASGI app."""
+    config = config or StandinConfig()
+    rng = random.Random(config.seed)
+    bucket = _TokenBucket()
+    counters: Dict[str, int] = {}
+    app = FastAPI(title="AI provider stand-in")
+
+    def count(key: str) -> None:
+        counters[key] = counters.get(key, 0) + 1
+
+    def latency() -> float:
+        base = config.latency_ms / 1000
+        if config.latency == "fixed":
+            return base
+        if config.latency == "uniform":
+            return rng.uniform(base * 0.5, base * 1.5)
+        return rng.lognormvariate(math.log(max(base, 1e-6)), config.latency_sigma)
+
+    async def admit() -> Optional[Response]:
+        """Apply rate limit, error and hang injection, then the latency."""
+        count("requests")
+        if config.rate_limit_rps > 0 and not bucket.take(config.rate_limit_rps, config.rate_limit_burst):
+            count("rate_limited")
+            return JSONResponse(
+                {"error": {"message": "Rate limit exceeded", "type": "rate_limit"}},
+                status_code=429,
+                headers={"Retry-After": str(config.retry_after_sec)},
+            )
+        if config.hang_rate and rng.random() < config.hang_rate:
+            count("hung")
+            await asyncio.sleep(config.hang_sec)
+        if config.error_rate and rng.random() < config.error_rate:
+            count("errors")
+            return JSONResponse(
+                {"error": {"message": "Injected upstream error", "type": "server_error"}},
+                status_code=config.error_status,
+            )
+        await asyncio.sleep(latency())
+        return None
+
+    def sse(events: AsyncIterator[Dict[str, Any]], done_marker: bool) -> StreamingResponse:
+        async def body() -> AsyncIterator[str]:
+            async for event in events:
+                yield f"data: {json.dumps(event)}\n\n"
+            if done_marker:
+                yield "data: [DONE]\n\n"
+
+        return StreamingResponse(body(), media_type="text/event-stream")
+
+    async def paced(words: List[str]) -> AsyncIterator[str]:
+        for index, word in enumerate(words):
+            if index:
+                await asyncio.sleep(config.token_delay_ms / 1000)
+            yield word if index == len(words) - 1 else f"{word} "
+
+    # OpenAI-compatible protocol
+
+    @app.get("/v1/models")
+    async def openai_models():
+        return {"object": "list", "data": [{"id": "standin", "object": "model"}]}
+
+    @app.post("/v1/completions")
+    async def openai_completions(request: Request):
+        payload = await request.json()
+        rejected = await admit()
+        if rejected:
+            return rejected
+        words = _reply_words(str(payload.get("prompt", "")), payload.get("max_tokens"))
+        model = payload.get("model", "standin")
+        if payload.get("stream"):
+            count("streams")
+
+            async def events():
+                async for delta in paced(words):
+                    yield {"object": "text_completion", "model": model, "choices": [{"index": 0, "text": delta}]}
+                if _include_usage(payload):
+                    yield {"object": "text_completion", "model": model, "choices": [], "usage": _usage(str(payload.get("prompt", "")), words)}
+
+            return sse(events(), done_marker=True)
+        return {
+            "object": "text_completion",
+            "model": model,
+            "choices": [{"index": 0, "text": " ".join(words), "finish_reason": "stop"}],
+            "usage": _usage(str(payload.get("prompt", "")), words),
+        }
+
+    @app.post("/v1/chat/completions")
+    async def openai_chat(request: Request):
+        payload = await request.json()
+        rejected = await admit()
+        if rejected:
+            return rejected
+        words = _reply_words(_last_message(payload.get("messages", [])), payload.get("max_tokens"))
+        model = payload.get("model", "standin")
+        if payload.get("stream"):
+            count("streams")
+
+            async def events():
+                yield {"object": "chat.completion.chunk", "model": model, "choices": [{"index": 0, "delta": {"role": "assistant"}}]}
+                async for delta in paced(words):
+                    yield {"object": "chat.completion.chunk", "model": model, "choices": [{"index": 0, "delta": {"content": delta}}]}
+                if _include_usage(payload):
+                    yield {"object": "chat.completion.chunk", "model": model, "choices": [], "usage": _usage(_messages_text(payload.get("messages", [])), words)}
+
+            return sse(events(), done_marker=True)
+        return {
+            "object": "chat.completion",
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": " ".join(words)}, "finish_reason": "stop"}],
+            "usage": _usage(_messages_text(payload.get("messages", [])), words),
+        }
+
+    @app.post("/v1/embeddings")
+    async def openai_embeddings(request: Request):
+        payload = await request.json()
+        rejected = await admit()
+        if rejected:
+            return rejected
+        texts = payload.get("input", [])
+        if isinstance(texts, str):
+            texts = [texts]
+        return {
+            "object": "list",
+            "model": payload.get("model", "standin"),
+            "data": [
+                {"object": "embedding", "index": i, "embedding": _embedding(text, config.embedding_dim)}
+                for i, text in enumerate(texts)
+            ],
+            "usage": _usage(" ".join(texts), []),
+        }
+
+    # Generic protocol
+
+    @app.get("/ping")
+    async def generic_ping():
+        return {"status": "ok"}
+
+    @app.post("/complete")
+    async def generic_complete(request: Request):
+        payload = await request.json()
+        rejected = await admit()
+        if rejected:
+            return rejected
+        words = _reply_words(str(payload.get("prompt", "")), payload.get("max_tokens"))
+        if payload.get("stream"):
+            count("streams")
+
+            async def events():
+                async for delta in paced(words):
+                    yield {"delta": delta}
+
+            return sse(events(), done_marker=False)
+        return {"text": " ".join(words), "usage": _usage(str(payload.get("prompt", "")), words)}
+
+    @app.post("/chat")
+    async def generic_chat(request: Request):
+        payload = await request.json()
+        rejected = await admit()
+        if rejected:
+            return rejected
+        words = _reply_words(_last_message(payload.get("messages", [])), payload.get("max_tokens"))
+        if payload.get("stream"):
+            count("streams")
+
+            async def events():
+                async for delta in paced(words):
+                    yield {"delta": delta}
+
+            return sse(events(), done_marker=False)
+        return {"response": " ".join(words), "usage": _usage(_messages_text(payload.get("messages", [])), words)}
+
+    @app.post("/embeddings")
+    async def generic_embeddings(request: Request):
+        payload = await request.json()
+        rejected = await admit()
+        if rejected:
+            return rejected
+        texts = payload.get("texts", [])
+        return {
+            "embeddings": [_embedding(text, config.embedding_dim) for text in texts],
+            "usage": _usage(" ".join(texts), []),
+        }
+
+    # Control
+
+    @app.get("/_standin/config")
+    async def get_config():
+        return asdict(config)
+
+    @app.put("/_standin/config")
+    async def put_config(request: Request):
+        config.update(await request.json())
+        return asdict(config)
+
+    @app.get("/_standin/stats")
+    async def get_stats():
+        return dict(counters)
+
+    @app.post("/_standin/stats/reset")
+    async def reset_stats():
+        counters.clear()
+        return {}
+
+    return app
@@ -0,0 +1,247 @@
+"""Per-account AI token accounting with in-memory counters and batched persistence."""
+
+import asyncio
+import logging
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Tuple, Union
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.ai.client import AIBudgetExceededError, AIUsage, UsageCollector, collect_usage
+from app.config import settings
+from app.db.models.shop import Shop
+from app.db.models.user import User
+from app.db.repositories.ai_usage_repo import AIUsageRepository
+
+logger = logging.getLogger(__name__)
+
+
+def _utc_today() -> date:
+    return datetime.utcnow().date()
+
+
+def usage_account(principal: Union[Shop, User]) -> str:
+    """Accounting and budget key for an authenticated shop or user."""
+    if isinstance(principal, Shop):
+        return f"shop:{principal.id}"
+    return f"user:{principal.id}"
+
+
+@dataclass
+class _Counter:
+    requests: int = 0
+    usage: AIUsage = field(default_factory=AIUsage)
+
+    def add(self, other: "_Counter") -> None:
+        self.requests += other.requests
+        self.usage.add(other.usage)
+
+
+class UsageMeter:
+    """Count AI token usage per (account, model) in memory and persist it in batches.
+
+    `record` only touches dictionaries; `flush` writes everything recorded since
+    the previous flush with one INSERT and then reloads each account's total for
+    the day, so usage from other workers is seen at the next flush. Budgets are
+    checked against that total plus what this process has not flushed yet, so
+    enforcement never needs a database round trip but may overshoot by up to one
+    flush interval of traffic across workers.
+    """
+
+    def __init__(
+        self,
+        *,
+        daily_budget: int = 0,
+        budgets: Optional[Dict[str, int]] = None,
+        enabled: bool = True,
+        repository: Optional[AIUsageRepository] = None,
+    ):
+        self.daily_budget = daily_budget
+        self.budgets = dict(budgets or {})
+        self.enabled = enabled
+        self.repository = repository or AIUsageRepository()
+        self._day = _utc_today()
+        self._pending: Dict[Tuple[date, str, str], _Counter] = {}
+        self._stored: Dict[str, int] = {}
+        self._unstored: Dict[str, int] = {}
+        self._by_model: Dict[str, _Counter] = {}
+        self.flushes = 0
+        self.flush_failures = 0
+        self.rejected = 0
+        self.last_flush_at: Optional[datetime] = None
+
+    def budget_for(self, account: str) -> int:
+        return self.budgets.get(account, self.daily_budget)
+
+    def used_today(self, account: str) -> int:
+        self._roll_day()
+        return self._stored.get(account, 0) + self._unstored.get(account, 0)
+
+    def check_budget(self, account: str) -> None:
+        """Raise `AIBudgetExceededError` if `account` has used its tokens for today."""
+        if not self.enabled:
+            return
+        budget = self.budget_for(account)
+        if budget > 0 and self.used_today(account) >= budget:
+            self.rejected += 1
+            raise AIBudgetExceededError(f"Daily AI token budget of {budget} exhausted for {account}")
+
+    def record(self, account: str, usage: UsageCollector) -> None:
+        if not self.enabled or not usage.by_model:
+            return
+        self._roll_day()
+        for model, tokens in usage.by_model.items():
+            counter = _Counter(1, AIUsage(tokens.prompt_tokens, tokens.completion_tokens, tokens.total_tokens))
+            self._pending.setdefault((self._day, account, model), _Counter()).add(counter)
+            self._by_model.setdefault(model, _Counter()).add(counter)
+            self._unstored[account] = self._unstored.get(account, 0) + tokens.total_tokens
+
+    async def flush(self, db: AsyncSession) -> int:
+        """Write pending counters as one batch and refresh today's totals; returns rows written."""
+        batch, self._pending = self._pending, {}
+        rows = [
+            {
+                "account": account,
+                "model": model,
+                "usage_date": day,
+                "requests": counter.requests,
+                "prompt_tokens": counter.usage.prompt_tokens,
+                "completion_tokens": counter.usage.completion_tokens,
+                "total_tokens": counter.usage.total_tokens,
+            }
+            for (day, account, model), counter in batch.items()
+        ]
+        try:
+            await self.repository.add_batch(db, rows)
+        except Exception:
+            await db.rollback()
+            # Keep the counts for the next attempt.
+            for key, counter in batch.items():
+                self._pending.setdefault(key, _Counter()).add(counter)
+            self.flush_failures += 1
+            raise
+        self.flushes += 1
+        self.last_flush_at = datetime.utcnow()
+
+        self._roll_day()
+        day = self._day
+        stored = await self.repository.daily_totals(db, day)
+        if day == self._day:
+            self._stored = stored
+            # Only what was recorded while this flush ran is still outside the database.
+            self._unstored = {}
+            for (pending_day, account, _), counter in self._pending.items():
+                if pending_day == day:
+                    self._unstored[account] = self._unstored.get(account, 0) + counter.usage.total_tokens
+        return len(rows)
+
+    def _roll_day(self) -> None:
+        today = _utc_today()
+        if today != self._day:
+            self._day = today
+            self._stored = {}
+            self._unstored = {}
+
+    def stats(self) -> Dict[str, Any]:
+        self._roll_day()
+        accounts = set(self._stored) | set(self._unstored)
+        over_budget = sum(
+            1 for account in accounts
+            if self.budget_for(account) > 0 and self.used_today(account) >= self.budget_for(account)
+        )
+        return {
+            "enabled": self.enabled,
+            "daily_token_budget": self.daily_budget,
+            "tokens_today": sum(self.used_today(account) for account in accounts),
+            "accounts_today": len(accounts),
+            "accounts_over_budget": over_budget,
+            "rejected": self.rejected,
+            "pending_rows": len(self._pending),
+            "flushes": self.flushes,
+            "flush_failures": self.flush_failures,
+            "last_flush_at": self.last_flush_at.isoformat() if self.last_flush_at else None,
+            "models": {
+                model: {"requests": counter.requests, **counter.usage.as_dict()}
+                for model, counter in self._by_model.items()
+            },
+        }
+
+
+_usage_meter: Optional[UsageMeter] = None
+
+
+def get_usage_meter() -> UsageMeter:
+    """Get the process-wide usage meter, creating it from settings on first use."""
+    global _usage_meter
+    if _usage_meter is None:
+        _usage_meter = UsageMeter(
+            daily_budget=settings.ai_daily_token_budget,
+            budgets=settings.ai_token_budgets,
+            enabled=settings.ai_usage_enabled,
+        )
+    return _usage_meter
+
+
+def set_usage_meter(meter: Optional[UsageMeter]) -> None:
+    """Replace the process-wide usage meter (for testing)."""
+    global _usage_meter
+    _usage_meter = meter
+
+
+@contextmanager
+def metered(account: str) -> Iterator[UsageCollector]:
+    """Check `account`'s budget, then collect and record the usage of the calls in the block."""
+    meter = get_usage_meter()
+    meter.check_budget(account)
+    with collect_usage() as usage:
+        try:
+            yield usage
+        finally:
+            meter.record(account, usage)
+
+
+async def metered_stream(account: str, deltas: AsyncIterator[str]) -> AsyncIterator[str]:
+    """`metered` for a delta stream.
+
+    The stream is consumed from the response task rather than the route
+    handler, so the collector is installed around each step instead of once.
+    """
+    meter = get_usage_meter()
+    meter.check_budget(account)
+    usage = UsageCollector()
+    try:
+        while True:
+            with collect_usage(usage):
+                try:
+                    delta = await deltas.__anext__()
+                except StopAsyncIteration:
+                    break
+            yield delta
+    finally:
+        await deltas.aclose()
+        meter.record(account, usage)
+
+
+async def run_usage_flush_loop(stop_event: asyncio.Event) -> None:
+    """Flush usage counters every `ai_usage_flush_interval_sec` until `stop_event` is set.
+
+    The first flush runs immediately to load today's totals; a last one runs on
+    shutdown so no counts are lost.
+    """
+    from app.db.session import AsyncSessionLocal
+
+    meter = get_usage_meter()
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                await meter.flush(db)
+        except Exception as e:
+            logger.error(f"AI usage flush failed: {e}")
+        if stop_event.is_set():
+            return
+        try:
+            await asyncio.wait_for(stop_event.wait(), timeout=settings.ai_usage_flush_interval_sec)
+        except asyncio.TimeoutError:
+            pass
@@ -1,20 +1,28 @@
 """AI service routes for text completion and embeddings."""
 
-from typing import List, Optional
+import json
+from typing import AsyncIterator, List, Optional, Union
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
 from app.ai.client import (
+    ai_deadline,
     get_ai_client,
     AIClient,
+    AIBudgetExceededError,
     AIError,
     AITimeoutError,
     AICircuitBreakerError,
+    AIOverloadedError,
     AIRequestError
 )
-from app.core.auth import get_current_user
+from app.ai.usage import get_usage_meter, metered, metered_stream, usage_account
+from app.config import settings
+from app.core.auth import get_current_user_or_shop
 from app.core.exceptions import BaseAPIException
+from app.db.models.shop import Shop
 from app.db.models.user import User
 from app.schemas.common import ErrorCode, ErrorResponse, SuccessResponse
 
@@ -121,6 +129,45 @@ class ChatResponse(BaseModel):
         }
 
 
+def _to_api_exception(error: AIError, label: str) -> BaseAPIException:
+    """Map an AI client error to the API error returned by the /v1/ai routes."""
+    if isinstance(error, AITimeoutError):
+        return BaseAPIException(
+            message=f"{label} timed out. Please try again.",
+            error_code=ErrorCode.INTERNAL_ERROR,
+            status_code=status.HTTP_408_REQUEST_TIMEOUT
+        )
+    if isinstance(error, AIBudgetExceededError):
+        return BaseAPIException(
+            message="Daily AI usage limit reached. Please try again tomorrow.",
+            error_code=ErrorCode.QUOTA_EXCEEDED,
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS
+        )
+    if isinstance(error, AIOverloadedError):
+        return BaseAPIException(
+            message="AI service is busy. Please try again shortly.",
+            error_code=ErrorCode.INTERNAL_ERROR,
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+    if isinstance(error, AICircuitBreakerError):
+        return BaseAPIException(
+            message="AI service is temporarily unavailable. Please try again later.",
+            error_code=ErrorCode.INTERNAL_ERROR,
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+    if isinstance(error, AIRequestError):
+        return BaseAPIException(
+            message=f"{label} failed: {str(error)}",
+            error_code=ErrorCode.INTERNAL_ERROR,
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+    return BaseAPIException(
+        message=f"AI service error: {str(error)}",
+        error_code=ErrorCode.INTERNAL_ERROR,
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+
+
 @router.post(
     "/complete",
     response_model=CompletionResponse,
@@ -131,53 +178,33 @@ class ChatResponse(BaseModel):
         400: {"description": "Invalid request"},
         401: {"description": "Unauthorized"},
         408: {"description": "Request timeout"},
+        429: {"description": "Daily AI token budget exhausted"},
         503: {"description": "AI service unavailable"}
     }
 )
 async def complete_text(
     request: CompletionRequest,
-    current_user: User = Depends(get_current_user),
+    principal: Union[User, Shop] = Depends(get_current_user_or_shop),
     ai_client: AIClient = Depends(get_ai_client)
 ) -> CompletionResponse:
     """Generate text completion from a prompt."""
     try:
-        text = await ai_client.complete(
-            prompt=request.prompt,
-            max_tokens=request.max_tokens,
-            temperature=request.temperature,
-            model=request.model
-        )
+        with ai_deadline(settings.ai_request_deadline_sec), metered(usage_account(principal)) as usage:
+            text = await ai_client.complete(
+                prompt=request.prompt,
+                max_tokens=request.max_tokens,
+                temperature=request.temperature,
+                model=request.model
+            )
         
         return CompletionResponse(
             text=text,
             model=request.model or "default",
-            usage=None  # Usage info would come from the AI client response
+            usage=usage.as_dict()
         )
         
-    except AITimeoutError as e:
-        raise BaseAPIException(
-            message="AI request timed out. Please try again.",
-            error_code=ErrorCode.INTERNAL_ERROR,
-            status_code=status.HTTP_408_REQUEST_TIMEOUT
-        )
-    except AICircuitBreakerError as e:
-        raise BaseAPIException(
-            message="AI service is temporarily unavailable. Please try again later.",
-            error_code=ErrorCode.INTERNAL_ERROR,
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE
-        )
-    except AIRequestError as e:
-        raise BaseAPIException(
-            message=f"AI request failed: {str(e)}",
-            error_code=ErrorCode.INTERNAL_ERROR,
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE
-        )
     except AIError as e:
-        raise BaseAPIException(
-            message=f"AI service error: {str(e)}",
-            error_code=ErrorCode.INTERNAL_ERROR,
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE
-        )
+        raise _to_api_exception(e, "AI request")
 
 
 @router.post(
@@ -190,51 +217,31 @@ async def complete_text(
         400: {"description": "Invalid request"},
         401: {"description": "Unauthorized"},
         408: {"description": "Request timeout"},
+        429: {"description": "Daily AI token budget exhausted"},
         503: {"description": "AI service unavailable"}
     }
 )
 async def generate_embeddings(
     request: EmbeddingRequest,
-    current_user: User = Depends(get_current_user),
+    principal: Union[User, Shop] = Depends(get_current_user_or_shop),
     ai_client: AIClient = Depends(get_ai_client)
 ) -> EmbeddingResponse:
     """Generate embeddings for input texts."""
     try:
-        embeddings = await ai_client.embed(
-            texts=request.texts,
-            model=request.model
-        )
+        with ai_deadline(settings.ai_request_deadline_sec), metered(usage_account(principal)) as usage:
+            embeddings = await ai_client.embed(
+                texts=request.texts,
+                model=request.model
+            )
         
         return EmbeddingResponse(
             embeddings=embeddings,
             model=request.model or "default",
-            usage=None  # Usage info would come from the AI client response
+            usage=usage.as_dict()
         )
         
-    except AITimeoutError as e:
-        raise BaseAPIException(
-            message="AI embeddings request timed out. Please try again.",
-            error_code=ErrorCode.INTERNAL_ERROR,
-            status_code=status.HTTP_408_REQUEST_TIMEOUT
-        )
-    except AICircuitBreakerError as e:
-        raise BaseAPIException(
-            message="AI service is temporarily unavailable. Please try again later.",
-            error_code=ErrorCode.INTERNAL_ERROR,
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE
-        )
-    except AIRequestError as e:
-        raise BaseAPIException(
-            message=f"AI embeddings request failed: {str(e)}",
-            error_code=ErrorCode.INTERNAL_ERROR,
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE
-        )
     except AIError as e:
-        raise BaseAPIException(
-            message=f"AI service error: {str(e)}",
-            error_code=ErrorCode.INTERNAL_ERROR,
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE
-        )
+        raise _to_api_exception(e, "AI embeddings request")
 
 
 @router.post(
@@ -247,53 +254,136 @@ async def generate_embeddings(
         400: {"description": "Invalid request"},
         401: {"description": "Unauthorized"},
         408: {"description": "Request timeout"},
+        429: {"description": "Daily AI token budget exhausted"},
         503: {"description": "AI service unavailable"}
     }
 )
 async def chat_completion(
     request: ChatRequest,
-    current_user: User = Depends(get_current_user),
+    principal: Union[User, Shop] = Depends(get_current_user_or_shop),
     ai_client: AIClient = Depends(get_ai_client)
 ) -> ChatResponse:
     """Generate chat completion from messages."""
     try:
-        response = await ai_client.chat(
-            messages=request.messages,
-            max_tokens=request.max_tokens,
-            temperature=request.temperature,
-            model=request.model
-        )
+        with ai_deadline(settings.ai_request_deadline_sec), metered(usage_account(principal)) as usage:
+            response = await ai_client.chat(
+                messages=request.messages,
+                max_tokens=request.max_tokens,
+                temperature=request.temperature,
+                model=request.model
+            )
         
         return ChatResponse(
             response=response,
             model=request.model or "default",
-            usage=None  # Usage info would come from the AI client response
+            usage=usage.as_dict()
         )
         
-    except AITimeoutError as e:
-        raise BaseAPIException(
-            message="AI chat request timed out. Please try again.",
-            error_code=ErrorCode.INTERNAL_ERROR,
-            status_code=status.HTTP_408_REQUEST_TIMEOUT
-        )
-    except AICircuitBreakerError as e:
-        raise BaseAPIException(
-            message="AI service is temporarily unavailable. Please try again later.",
-            error_code=ErrorCode.INTERNAL_ERROR,
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE
-        )
-    except AIRequestError as e:
-        raise BaseAPIException(
-            message=f"AI chat request failed: {str(e)}",
-            error_code=ErrorCode.INTERNAL_ERROR,
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE
-        )
     except AIError as e:
-        raise BaseAPIException(
-            message=f"AI service error: {str(e)}",
-            error_code=ErrorCode.INTERNAL_ERROR,
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE
-        )
+        raise _to_api_exception(e, "AI chat request")
+
+
+def _sse(data: dict, event: Optional[str] = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _sse_response(deltas: AsyncIterator[str], label: str, model: str) -> StreamingResponse:
+    """Turn a delta iterator into an SSE response.
+    
+    The first delta is awaited before responding so that failures before any
+    output (timeout, open circuit, upstream 4xx/5xx) keep their HTTP status.
+    Failures after streaming has started are sent as an `error` event. The
+    generator is pulled only when the previous event has been sent, so a slow
+    client also slows the upstream read.
+    """
+    try:
+        first = await deltas.__anext__()
+    except StopAsyncIteration:
+        first = None
+    except AIError as e:
+        await deltas.aclose()
+        raise _to_api_exception(e, label)
+    
+    async def events() -> AsyncIterator[str]:
+        try:
+            if first:
+                yield _sse({"delta": first})
+            async for delta in deltas:
+                yield _sse({"delta": delta})
+        except AIError as e:
+            error = _to_api_exception(e, label)
+            yield _sse({"message": error.message, "status_code": error.status_code}, event="error")
+            return
+        finally:
+            await deltas.aclose()
+        yield _sse({"model": model}, event="done")
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # nginx buffers proxied responses by default; SSE must be flushed per event.
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
+@router.post(
+    "/complete/stream",
+    summary="Streaming Text Completion",
+    description="Stream a text completion as server-sent events (`data: {\"delta\": ...}`)",
+    responses={
+        200: {"description": "Completion stream", "content": {"text/event-stream": {}}},
+        401: {"description": "Unauthorized"},
+        408: {"description": "Request timeout"},
+        429: {"description": "Daily AI token budget exhausted"},
+        503: {"description": "AI service unavailable"}
+    }
+)
+async def stream_complete_text(
+    request: CompletionRequest,
+    principal: Union[User, Shop] = Depends(get_current_user_or_shop),
+    ai_client: AIClient = Depends(get_ai_client)
+) -> StreamingResponse:
+    """Stream a text completion from a prompt."""
+    deltas = ai_client.stream_complete(
+        prompt=request.prompt,
+        max_tokens=request.max_tokens,
+        temperature=request.temperature,
+        model=request.model
+    )
+    deltas = metered_stream(usage_account(principal), deltas)
+    return await _sse_response(deltas, "AI request", request.model or "default")
+
+
+@router.post(
+    "/chat/stream",
+    summary="Streaming Chat Completion",
+    description="Stream a chat completion as server-sent events (`data: {\"delta\": ...}`)",
+    responses={
+        200: {"description": "Chat completion stream", "content": {"text/event-stream": {}}},
+        401: {"description": "Unauthorized"},
+        408: {"description": "Request timeout"},
+        429: {"description": "Daily AI token budget exhausted"},
+        503: {"description": "AI service unavailable"}
+    }
+)
+async def stream_chat_completion(
+    request: ChatRequest,
+    principal: Union[User, Shop] = Depends(get_current_user_or_shop),
+    ai_client: AIClient = Depends(get_ai_client)
+) -> StreamingResponse:
+    """Stream a chat completion from messages."""
+    deltas = ai_client.stream_chat(
+        messages=request.messages,
+        max_tokens=request.max_tokens,
+        temperature=request.temperature,
+        model=request.model
+    )
+    deltas = metered_stream(usage_account(principal), deltas)
+    return await _sse_response(deltas, "AI chat request", request.model or "default")
 
 
 @router.get(
@@ -349,16 +439,13 @@ async def get_ai_status(
         # Test ping
         is_available = await ai_client.ping()
         
-        # Get circuit breaker status
-        circuit_breaker_status = "unknown"
-        if hasattr(ai_client, 'circuit_breaker'):
-            circuit_breaker_status = ai_client.circuit_breaker.state
-        
         status_data = {
             "available": is_available,
-            "circuit_breaker_state": circuit_breaker_status,
+            "circuit_breaker_state": ai_client.circuit_breaker_state(),
             "timeout": getattr(ai_client, 'timeout', 'unknown'),
-            "max_retries": getattr(ai_client, 'max_retries', 'unknown')
+            "max_retries": getattr(ai_client, 'max_retries', 'unknown'),
+            **ai_client.stats(),
+            "usage": get_usage_meter().stats()
         }
         
         return SuccessResponse(
@@ -1,15 +1,21 @@
 """FastAPI router for color recipes domain."""
 
-from app.schemas.color_recipes_request import Request25 as color_recipes_request_25, Request26 as color_recipes_request_26
+import json
+import logging
+
+from app.schemas.color_recipes_request import Request25 as color_recipes_request_25, Request26 as color_recipes_request_26, ColorRecipeRecomputeRequest
 from app.schemas.color_recipes_response import Response25 as color_recipes_response_25, Response26 as color_recipes_response_26
-from app.services.color_recipes_service import ColorRecipesService
+from app.services.color_recipes_service import ColorRecipesService, RecipeRecomputeReport
 from app.core.auth import get_current_shop
 from app.db.models.shop import Shop
 from fastapi import APIRouter, Depends, HTTPException, status, Path
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.db.session import get_db
+from app.db.session import AsyncSessionLocal, get_db
 from typing import List, Optional
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/v1", tags=["color-recipes"])
 
 @router.post("/color-recipes", summary="컬러 레시피 등록 (AI 추천)")
@@ -40,6 +46,54 @@ async def create_api_v1_color_recipes(
         created_at=result.created_at.isoformat() if result.created_at else None
     )
 
+@router.post(
+    "/color-recipes/recompute",
+    summary="컬러 레시피 일괄 재계산",
+    response_class=StreamingResponse,
+    responses={200: {"description": "진행 상황 (NDJSON)", "content": {"application/x-ndjson": {}}}}
+)
+async def recompute_api_v1_color_recipes(
+    request: ColorRecipeRecomputeRequest,
+    current_shop: Shop = Depends(get_current_shop)
+) -> StreamingResponse:
+    """
+    컬러 레시피 일괄 재계산
+    
+    추천 모델이 바뀌었을 때 로그인한 Shop의 시술 회차 레시피를 다시 계산합니다.
+    - 완료된 회차는 실제 사용한 레시피이므로 include_completed=true일 때만 덮어씀
+    - 회차를 batch_size 단위(keyset)로 읽고, 배치마다 측정 데이터 1회 조회 / 일괄 추론 / 일괄 UPDATE
+    - 배치가 끝날 때마다 진행 상황을 한 줄(JSON)씩 스트리밍하고, 마지막 줄은 "done": true
+    - 도중에 실패하면 마지막 줄에 "error"가 포함되며, last_session_id를 after_id로 넘겨 재개
+    """
+    service = ColorRecipesService()
+    
+    shop_id = current_shop.id
+    
+    async def progress():
+        # The body streams after the endpoint returns, so it cannot rely on the
+        # request-scoped session from get_db; it owns one for its whole run.
+        report = RecipeRecomputeReport(dry_run=request.dry_run)
+        try:
+            async with AsyncSessionLocal() as db:
+                async for report in service.recompute_color_recipes(
+                    db,
+                    shop_id=shop_id,
+                    batch_size=request.batch_size,
+                    after_id=request.after_id,
+                    dry_run=request.dry_run,
+                    include_completed=request.include_completed
+                ):
+                    yield json.dumps({**report.as_dict(), "done": False}) + "\n"
+        except Exception as e:
+            # The 200 status is already sent; end with a line the client can tell
+            # from a dropped connection, holding the last_session_id to resume from.
+            logger.error(f"Color recipe recomputation failed after session {report.last_session_id}: {e}")
+            yield json.dumps({**report.as_dict(), "done": True, "error": str(e)}) + "\n"
+            return
+        yield json.dumps({**report.as_dict(), "done": True}) + "\n"
+    
+    return StreamingResponse(progress(), media_type="application/x-ndjson")
+
 @router.get("/color-recipes/{session_id}", summary="레시피 조회")
 async def get_api_v1_color_recipes_by_session_id(
     session_id: int = Path(..., description="시술 회차 ID"),
@@ -58,5 +112,6 @@ async def get_api_v1_color_recipes_by_session_id(
         melanin=str(result.melanin) if result.melanin is not None else "0",
         white=str(result.white) if result.white is not None else "0",
         red=str(result.red) if result.red is not None else "0",
-        yellow=str(result.yellow) if result.yellow is not None else "0"
+        yellow=str(result.yellow) if result.yellow is not None else "0",
+        color_difference=await service.get_color_difference(db, session_id)
     )
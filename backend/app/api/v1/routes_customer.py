@@ -3,6 +3,7 @@
 from app.schemas.customer_request import Request6 as customer_request_6, Request7 as customer_request_7, Request8 as customer_request_8, Request9 as customer_request_9, Request10 as customer_request_10, Request11 as customer_request_11
 from app.schemas.customer_response import Response6 as customer_response_6, Response7 as customer_response_7, Response8 as customer_response_8, Response9 as customer_response_9, Response10 as customer_response_10, Response11 as customer_response_11
 from app.services.customer_service import CustomerService
+from app.services.upload_service import serialize_image_metadata
 from app.core.auth import get_current_shop
 from app.db.models.shop import Shop
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Body
@@ -49,6 +50,7 @@ def _format_customer_summary(customer, include_images: bool = False) -> dict:
                 "url": uploaded.public_url if uploaded else None,
                 "thumbnail_url": uploaded.thumbnail_url if uploaded else None,
                 "type": mapping.photo_type,
+                **serialize_image_metadata(uploaded),
             }
             photo_type = (mapping.photo_type or "BEFORE").upper()
             if photo_type == "AFTER":
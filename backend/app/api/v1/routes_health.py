@@ -12,7 +12,7 @@ from sqlalchemy import text
 from app.config import settings
 from app.db.session import get_db
 from app.schemas.common import HealthResponse, ServiceHealth, HealthStatus
-from app.ai.client import AIClient
+from app.ai.client import get_ai_client
 
 router = APIRouter(prefix="/v1/health", tags=["Health"])
 
@@ -52,10 +52,10 @@ async def check_ai_service() -> ServiceHealth:
     start_time = time.time()
     
     try:
-        ai_client = AIClient()
-        
-        # Simple ping to AI service
-        await ai_client.ping()
+        # Reuse the shared client so probes don't open new connections
+        ai_client = await get_ai_client()
+        if not await ai_client.ping():
+            raise RuntimeError("AI service did not respond to ping")
         
         response_time = (time.time() - start_time) * 1000
         
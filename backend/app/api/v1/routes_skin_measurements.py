@@ -1,7 +1,7 @@
 """FastAPI router for skin measurements domain."""
 
-from app.schemas.skin_measurements_request import Request22 as skin_measurements_request_22, Request23 as skin_measurements_request_23, Request24 as skin_measurements_request_24
-from app.schemas.skin_measurements_response import Response22 as skin_measurements_response_22, Response23 as skin_measurements_response_23, Response24 as skin_measurements_response_24
+from app.schemas.skin_measurements_request import Request22 as skin_measurements_request_22, Request23 as skin_measurements_request_23, Request24 as skin_measurements_request_24, PhotoMeasurementRequest
+from app.schemas.skin_measurements_response import Response22 as skin_measurements_response_22, Response23 as skin_measurements_response_23, Response24 as skin_measurements_response_24, PhotoMeasurementItem, PhotoMeasurementResponse
 from app.services.skin_measurements_service import SkinMeasurementsService
 from app.core.auth import get_current_shop
 from app.db.models.shop import Shop
@@ -51,13 +51,58 @@ async def create_api_v1_skin_measurements(
         yellow=result.yellow,
     )
 
+@router.post("/skin-measurements/photo", summary="사진 영역에서 피부색 데이터 추출 및 등록")
+async def create_api_v1_skin_measurements_photo(
+    request: PhotoMeasurementRequest,
+    current_shop: Shop = Depends(get_current_shop),
+    db: AsyncSession = Depends(get_db)
+) -> PhotoMeasurementResponse:
+    """
+    업로드된 사진의 정상/병변 영역(사각형 또는 다각형)에서 L, a, b 값을 추출해 측정 데이터로 등록
+    
+    영역 픽셀을 sRGB에서 Lab(D65)으로 변환하고, 포화 픽셀과 이상치(MAD 기준)를 제외한 뒤 트림 평균을 사용합니다.
+    추출은 별도 프로세스 풀에서 실행됩니다.
+    """
+    service = SkinMeasurementsService()
+    request_dict = request.model_dump()
+    # Map type to region_type
+    for region in request_dict["regions"]:
+        region["region_type"] = region.pop("type")
+    if request_dict.get("measured_at"):
+        request_dict["measured_at"] = datetime.fromisoformat(request_dict["measured_at"].replace("Z", "+00:00"))
+    
+    created = await service.create_skin_measurements_from_photo(db, request_dict, shop_id=current_shop.id)
+    return PhotoMeasurementResponse(
+        measurements=[
+            PhotoMeasurementItem(
+                measurement_id=str(measurement.id),
+                type=measurement.region_type,
+                L=reading["l_value"],
+                a=reading["a_value"],
+                b=reading["b_value"],
+                std=reading["std"],
+                pixel_count=reading["pixel_count"],
+                used_count=reading["used_count"],
+                melanin=measurement.melanin,
+                white=measurement.white,
+                red=measurement.red,
+                yellow=measurement.yellow,
+            )
+            for measurement, reading in created
+        ]
+    )
+
 @router.get("/skin-measurements", summary="회차별 측정 데이터 목록")
 async def list_api_v1_skin_measurements(
     session_id: Optional[int] = None,
     current_shop: Shop = Depends(get_current_shop),
     db: AsyncSession = Depends(get_db)
 ):
-    """회차별 측정 데이터 목록 (로그인한 Shop의 측정 데이터만 조회)"""
+    """
+    회차별 측정 데이터 목록 (로그인한 Shop의 측정 데이터만 조회)
+    
+    color_difference: 회차별 병변(LESION)과 정상(NORMAL) 피부의 색차 (CIEDE2000 / CIE76)
+    """
     service = SkinMeasurementsService()
     measurements = await service.list_skin_measurements(db, session_id=session_id, shop_id=current_shop.id)
     
@@ -78,7 +123,10 @@ async def list_api_v1_skin_measurements(
         for m in measurements
     ]
     
-    return {"measurements": measurements_list}
+    return {
+        "measurements": measurements_list,
+        "color_difference": await service.summarize_color_difference(db, measurements)
+    }
 
 @router.delete("/skin-measurements/{id}", summary="측정 데이터 삭제")
 async def delete_api_v1_skin_measurements_by_id(
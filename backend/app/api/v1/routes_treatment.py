@@ -3,6 +3,7 @@
 from app.schemas.treatment_request import Request11 as treatment_request_11, Request12 as treatment_request_12, Request13 as treatment_request_13, Request14 as treatment_request_14, Request15 as treatment_request_15
 from app.schemas.treatment_response import Response11 as treatment_response_11, Response12 as treatment_response_12, Response13 as treatment_response_13, Response14 as treatment_response_14, Response15 as treatment_response_15
 from app.services.treatment_service import TreatmentService
+from app.services.upload_service import serialize_image_metadata
 from app.core.auth import get_current_shop
 from app.db.models.shop import Shop
 from app.core.exceptions import ForbiddenException
@@ -33,6 +34,7 @@ def _serialize_treatment_sessions(treatment) -> List[dict]:
                     "url": uploaded.public_url if uploaded else None,
                     "thumbnail_url": uploaded.thumbnail_url if uploaded else None,
                     "type": mapping.photo_type,
+                    **serialize_image_metadata(uploaded),
                 }
             )
         
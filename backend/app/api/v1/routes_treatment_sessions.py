@@ -11,6 +11,7 @@ from app.schemas.treatment_sessions_response import (
     SessionImageOutput,
 )
 from app.services.treatment_sessions_service import TreatmentSessionsService
+from app.services.upload_service import serialize_image_metadata
 from app.core.auth import get_current_shop
 from app.db.models.shop import Shop
 from fastapi import APIRouter, Depends, HTTPException, Path, status
@@ -33,6 +34,7 @@ def _serialize_session_images(session) -> List[dict]:
                 "url": uploaded.public_url if uploaded else None,
                 "thumbnail_url": uploaded.thumbnail_url if uploaded else None,
                 "type": mapping.photo_type,
+                **serialize_image_metadata(uploaded),
             }
         )
     return serialized
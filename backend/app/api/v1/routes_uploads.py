@@ -2,16 +2,18 @@
 
 from typing import List
 
-from fastapi import APIRouter, Depends, File, HTTPException, Response, UploadFile, status
+from fastapi import APIRouter, Depends, File, HTTPException, Request, Response, UploadFile, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
 from app.core.auth import get_current_shop
+from app.core.file_serving import build_file_response, resolve_under_root
+from app.core.uploads import get_upload_root
 from app.db.models.shop import Shop
 from app.db.session import get_db
 from app.db.repositories.uploaded_image_repo import UploadedImageRepository
 from app.schemas.uploads_response import UploadImagesResponse, UploadedImageItem
-from app.services.upload_service import UploadService
+from app.services.upload_service import UploadService, serialize_image_metadata
 
 router = APIRouter(prefix="/v1/uploads", tags=["uploads"])
 
@@ -54,6 +56,7 @@ async def upload_images(
                 url=record.public_url,
                 original_filename=record.original_filename,
                 thumbnail_url=record.thumbnail_url,
+                **serialize_image_metadata(record),
             )
             for record in records
         ]
@@ -67,6 +70,7 @@ async def upload_images(
 )
 async def download_image(
     image_path: str,
+    request: Request,
     current_shop: Shop = Depends(get_current_shop),
     db: AsyncSession = Depends(get_db),
 ) -> Response:
@@ -93,10 +97,30 @@ async def download_image(
             detail="이미지를 찾을 수 없거나 접근 권한이 없습니다.",
         )
     
+    # 썸네일 URL로 요청된 경우 썸네일 파일을 서빙
+    served_path = image.storage_path
+    if getattr(image, "thumbnail_url", None) == full_url and image.thumbnail_storage_path:
+        served_path = image.thumbnail_storage_path
+
+    if settings.upload_serve_mode.lower() == "direct":
+        # Nginx 없이 앱에서 직접 서빙 (Range / ETag / If-Modified-Since 지원)
+        file_path = resolve_under_root(get_upload_root(settings.upload_root), served_path)
+        if file_path is None or not file_path.is_file():
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="이미지를 찾을 수 없거나 접근 권한이 없습니다.",
+            )
+        return build_file_response(
+            request,
+            file_path,
+            media_type=image.content_type,
+            cache_control=f"private, max-age={settings.upload_cache_max_age}, immutable",
+        )
+
     # X-Accel-Redirect 헤더 설정
     # Nginx의 internal location으로 전달할 경로
     # storage_path는 이미 "images/filename.jpg" 형식
-    internal_path = f"/_protected/{image.storage_path}"
+    internal_path = f"/_protected/{served_path}"
     
     response = Response(status_code=200)
     response.headers["X-Accel-Redirect"] = internal_path
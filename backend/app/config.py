@@ -1,6 +1,6 @@
 """FastAPI application configuration using Pydantic Settings."""
 
-from typing import List
+from typing import Any, Dict, List
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -62,22 +62,184 @@ class Settings(BaseSettings):
         default="",
         description="AI API key"
     )
+    ai_backends: List[Dict[str, Any]] = Field(
+        default=[],
+        description=(
+            "Backends to route AI calls between, as JSON: "
+            '[{"name": "primary", "provider": "openai", "base_url": "...", "api_key": "...", "timeout_sec": 30}]. '
+            "Empty uses the single AI_PROVIDER"
+        )
+    )
+    ai_routing_explore_ratio: float = Field(
+        default=0.05,
+        description="Fraction of routed AI calls sent to a random healthy backend to refresh its latency"
+    )
+    ai_routing_max_error_rate: float = Field(
+        default=0.5,
+        description="EWMA error rate at which a routed AI backend is taken out of rotation"
+    )
+    ai_routing_cooldown_sec: float = Field(
+        default=10.0,
+        description="Seconds an unhealthy AI backend stays out of rotation"
+    )
     ai_timeout_sec: int = Field(
         default=30,
         description="AI request timeout in seconds"
     )
     ai_max_retries: int = Field(
         default=3,
-        description="Maximum number of retries for AI requests"
+        description="Maximum number of attempts for AI requests (including the first)"
+    )
+    ai_retry_base_delay_sec: float = Field(
+        default=0.5,
+        description="Base delay for jittered exponential backoff between AI retries"
+    )
+    ai_retry_max_delay_sec: float = Field(
+        default=4.0,
+        description="Upper bound for the backoff delay between AI retries, and for Retry-After outside a deadline"
+    )
+    ai_request_deadline_sec: float = Field(
+        default=20.0,
+        description="Total time budget for one /v1/ai request, including retries"
     )
     ai_circuit_breaker_threshold: int = Field(
         default=5,
-        description="Circuit breaker failure threshold"
+        description="Minimum failures in the window before the circuit breaker can open"
     )
     ai_circuit_breaker_timeout: int = Field(
         default=60,
         description="Circuit breaker recovery timeout in seconds"
     )
+    ai_circuit_breaker_error_rate: float = Field(
+        default=0.5,
+        description="Failure rate within the window that opens the circuit breaker"
+    )
+    ai_circuit_breaker_window_sec: int = Field(
+        default=30,
+        description="Sliding window in seconds over which the failure rate is measured"
+    )
+    ai_circuit_breaker_half_open_calls: int = Field(
+        default=2,
+        description="Probe calls allowed (and successes required) while HALF_OPEN"
+    )
+    ai_max_connections: int = Field(
+        default=100,
+        description="Maximum concurrent connections in the shared AI HTTP pool"
+    )
+    ai_max_keepalive_connections: int = Field(
+        default=20,
+        description="Maximum idle keep-alive connections kept in the AI HTTP pool"
+    )
+    ai_keepalive_expiry_sec: float = Field(
+        default=30.0,
+        description="Seconds an idle AI keep-alive connection is kept open"
+    )
+    ai_connect_timeout_sec: float = Field(
+        default=5.0,
+        description="Connect timeout for AI HTTP requests in seconds"
+    )
+    ai_pool_timeout_sec: float = Field(
+        default=5.0,
+        description="Seconds to wait for a free connection from the AI HTTP pool"
+    )
+    ai_http2: bool = Field(
+        default=True,
+        description="Use HTTP/2 for AI requests when the h2 package is installed"
+    )
+    ai_limiter_enabled: bool = Field(
+        default=True,
+        description="Adaptively limit concurrent upstream AI calls per provider and model"
+    )
+    ai_limiter_initial_limit: int = Field(
+        default=20,
+        description="Starting concurrency limit for each provider/model"
+    )
+    ai_limiter_min_limit: int = Field(
+        default=1,
+        description="Lowest concurrency limit the adaptive limiter backs off to"
+    )
+    ai_limiter_max_limit: int = Field(
+        default=200,
+        description="Highest concurrency limit the adaptive limiter grows to"
+    )
+    ai_limiter_max_queue: int = Field(
+        default=100,
+        description="Calls allowed to wait for a slot before new calls are rejected"
+    )
+    ai_limiter_queue_timeout_sec: float = Field(
+        default=5.0,
+        description="Seconds a call may wait for a slot before it is rejected"
+    )
+    ai_embed_batch_enabled: bool = Field(
+        default=True,
+        description="Group concurrent embedding calls into shared upstream requests"
+    )
+    ai_embed_batch_max_items: int = Field(
+        default=64,
+        description="Maximum texts per upstream embedding batch"
+    )
+    ai_embed_batch_max_tokens: int = Field(
+        default=8000,
+        description="Maximum estimated tokens per upstream embedding batch"
+    )
+    ai_embed_batch_max_wait_ms: float = Field(
+        default=5.0,
+        description="Milliseconds an embedding call waits for others to join its batch"
+    )
+    ai_hedge_enabled: bool = Field(
+        default=False,
+        description="Send a second AI attempt when the first is slower than the hedge percentile"
+    )
+    ai_hedge_percentile: float = Field(
+        default=95.0,
+        description="Latency percentile (per method) after which a hedged attempt is sent"
+    )
+    ai_hedge_min_samples: int = Field(
+        default=20,
+        description="Observed latencies required per method before hedging starts"
+    )
+    ai_hedge_budget_ratio: float = Field(
+        default=0.1,
+        description="Maximum hedged attempts as a fraction of requests, per method"
+    )
+    ai_single_flight_enabled: bool = Field(
+        default=True,
+        description="Share one upstream call between identical concurrent AI requests"
+    )
+    ai_cache_enabled: bool = Field(
+        default=True,
+        description="Cache deterministic AI responses (temperature 0 completions, embeddings)"
+    )
+    ai_cache_max_entries: int = Field(
+        default=10000,
+        description="Maximum entries kept in the in-memory AI response cache (LRU)"
+    )
+    ai_cache_ttl_sec: int = Field(
+        default=86400,
+        description="Seconds a cached AI response stays valid"
+    )
+    ai_cache_dir: str = Field(
+        default="",
+        description="Directory for the on-disk AI response cache tier (empty disables it)"
+    )
+
+    # AI usage accounting
+    ai_usage_enabled: bool = Field(
+        default=True,
+        description="Count AI token usage per account and model and flush it to the database"
+    )
+    ai_usage_flush_interval_sec: int = Field(
+        default=10,
+        description="Seconds between batched writes of AI usage counters"
+    )
+    ai_daily_token_budget: int = Field(
+        default=0,
+        description="AI tokens each account may use per UTC day (0 = unlimited)"
+    )
+    ai_token_budgets: Dict[str, int] = Field(
+        default={},
+        description='Per-account daily AI token budgets overriding the default, e.g. {"shop:12": 500000}'
+    )
 
     # File uploads
     upload_root: str = Field(
@@ -92,6 +254,108 @@ class Settings(BaseSettings):
         default="local",
         description="Storage backend for uploaded files (local, s3, oci, ...)"
     )
+    upload_serve_mode: str = Field(
+        default="accel",
+        description="How downloads are served: accel (nginx X-Accel-Redirect) or direct (app streams the file)"
+    )
+    upload_cache_max_age: int = Field(
+        default=31536000,
+        description="Cache max-age in seconds for directly served uploads (stored files are immutable)"
+    )
+    upload_sharded_layout: bool = Field(
+        default=True,
+        description="Store new uploads under hash fan-out directories (images/ab/cd/<name>)"
+    )
+
+    # Uploaded image garbage collection
+    image_gc_enabled: bool = Field(
+        default=False,
+        description="Run the orphaned/soft-deleted image sweeper in the background"
+    )
+    image_gc_interval_sec: int = Field(
+        default=3600,
+        description="Seconds between background image sweeps"
+    )
+    image_gc_grace_period_minutes: int = Field(
+        default=1440,
+        description="Only sweep images older than this many minutes"
+    )
+    image_gc_batch_size: int = Field(
+        default=500,
+        description="Number of image rows examined per sweep batch"
+    )
+    image_gc_concurrency: int = Field(
+        default=8,
+        description="Maximum concurrent file deletions during a sweep"
+    )
+    image_gc_dry_run: bool = Field(
+        default=False,
+        description="Report what the background sweeper would delete without deleting"
+    )
+
+    # Color recipe recommendation
+    color_recipe_model: str = Field(
+        default="mock",
+        description="Color recipe recommender: mock (linear formula), knn (nearest past completed sessions) or local (model file)"
+    )
+    color_recipe_knn_k: int = Field(
+        default=8,
+        description="Number of past sessions that vote on a k-NN recipe recommendation"
+    )
+    color_recipe_knn_region_weight: float = Field(
+        default=100.0,
+        description="Distance added between NORMAL and LESION readings in the k-NN index"
+    )
+    color_recipe_knn_refresh_interval_sec: int = Field(
+        default=60,
+        description="Seconds between loads of newly completed sessions into the k-NN index"
+    )
+    color_recipe_knn_rebuild_threshold: int = Field(
+        default=2000,
+        description="Changed points kept outside the k-NN tree before it is rebuilt"
+    )
+    color_recipe_model_path: str = Field(
+        default="",
+        description="Model file (.npz or .onnx) served when color_recipe_model is local"
+    )
+    color_recipe_model_workers: int = Field(
+        default=2,
+        description="Worker processes that keep the local recipe model loaded"
+    )
+    color_recipe_model_max_batch: int = Field(
+        default=256,
+        description="Rows merged into one local model call; larger calls are split across workers"
+    )
+    color_recipe_model_max_wait_ms: float = Field(
+        default=2.0,
+        description="How long a small local model call waits for others to batch with"
+    )
+    color_recipe_lut_path: str = Field(
+        default="",
+        description="Precomputed recipe lookup table file (make build-recipe-lut); empty runs the model on every call"
+    )
+    color_recipe_lut_interpolation: str = Field(
+        default="nearest",
+        description="Lookup table interpolation: nearest or trilinear"
+    )
+
+    # Skin color extraction from photos
+    photo_color_workers: int = Field(
+        default=2,
+        description="Worker processes that extract Lab colors from photo regions (0 runs them in a thread)"
+    )
+    photo_color_trim: float = Field(
+        default=0.1,
+        description="Fraction of pixels cut from each end of every Lab channel before averaging"
+    )
+    photo_color_outlier_threshold: float = Field(
+        default=3.5,
+        description="Pixels further than this many scaled MADs from the region median are rejected"
+    )
+    photo_color_max_pixels: int = Field(
+        default=200000,
+        description="Larger regions are subsampled to about this many pixels"
+    )
 
     # Database Seeding
     seed_on_start: bool = Field(
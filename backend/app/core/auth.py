@@ -3,7 +3,7 @@
 import hashlib
 import secrets
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import List, Optional, Union
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
@@ -263,3 +263,17 @@ async def get_current_shop(
         raise UnauthorizedException("Shop is deleted")
     
     return shop
+
+
+async def get_current_user_or_shop(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+    db: AsyncSession = Depends(get_db)
+) -> Union[User, Shop]:
+    """Get the authenticated user or shop, depending on the token type."""
+    if not credentials:
+        raise UnauthorizedException("Not authenticated")
+    
+    payload = verify_token(credentials.credentials)
+    if payload and payload.get("type") == "shop_access":
+        return await get_current_shop(credentials, db)
+    return await get_current_user(credentials, db)
@@ -0,0 +1,69 @@
+"""Direct file responses for deployments without an X-Accel-Redirect proxy."""
+
+from __future__ import annotations
+
+import os
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+
+from fastapi import Request, Response, status
+from fastapi.responses import FileResponse
+
+
+def resolve_under_root(root: Path, relative_path: str) -> Path | None:
+    """Resolve `relative_path` inside `root`, rejecting traversal outside of it."""
+    root = root.resolve()
+    candidate = (root / relative_path).resolve()
+    if candidate != root and root not in candidate.parents:
+        return None
+    return candidate
+
+
+def _is_not_modified(request: Request, etag: str, stat_result: os.stat_result) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return int(stat_result.st_mtime) <= since.timestamp()
+    return False
+
+
+def build_file_response(
+    request: Request,
+    path: Path,
+    *,
+    media_type: str | None,
+    cache_control: str,
+) -> Response:
+    """Return a file response with ETag/Last-Modified, conditional GET and Range.
+
+    Full-file bodies are handed to the server via `http.response.pathsend` when it
+    supports it (sendfile), otherwise streamed in chunks off the event loop. Range
+    requests (including `If-Range`) are handled by Starlette's `FileResponse`.
+    """
+    stat_result = path.stat()
+    response = FileResponse(
+        path,
+        media_type=media_type or "application/octet-stream",
+        stat_result=stat_result,
+        headers={"Cache-Control": cache_control},
+    )
+
+    etag = response.headers["etag"]
+    if _is_not_modified(request, etag, stat_result):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={
+                "ETag": etag,
+                "Last-Modified": response.headers["last-modified"],
+                "Cache-Control": cache_control,
+            },
+        )
+    return response
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from datetime import datetime
 from typing import Protocol
 
 from fastapi import UploadFile
@@ -19,6 +20,12 @@ class StoredFile:
     thumbnail_storage_path: str | None = None
     thumbnail_url: str | None = None
     thumbnail_size: int | None = None
+    width: int | None = None
+    height: int | None = None
+    orientation: int | None = None
+    captured_at: datetime | None = None
+    perceptual_hash: str | None = None
+    blurhash: str | None = None
 
 
 class BaseStorage(Protocol):
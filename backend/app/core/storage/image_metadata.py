@@ -0,0 +1,82 @@
+"""Image metadata extracted once at upload time."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+
+from PIL import Image
+
+_EXIF_ORIENTATION = 0x0112
+_EXIF_DATETIME = 0x0132
+_EXIF_IFD = 0x8769
+_EXIF_DATETIME_ORIGINAL = 0x9003
+_EXIF_DATETIME_FORMAT = "%Y:%m:%d %H:%M:%S"
+_HASH_SIZE = 8
+
+
+@dataclass(slots=True)
+class ImageMetadata:
+    """Pixel dimensions, EXIF orientation/capture time and a perceptual hash.
+
+    `width`/`height` are the stored pixel dimensions; orientations 5-8 mean the
+    image is displayed rotated by 90 degrees, so clients should swap them.
+    """
+
+    width: int | None = None
+    height: int | None = None
+    orientation: int | None = None
+    captured_at: datetime | None = None
+    perceptual_hash: str | None = None
+
+
+def extract_image_metadata(image: Image.Image) -> ImageMetadata:
+    """Extract metadata from an already decoded image."""
+    width, height = image.size
+    orientation = None
+    captured_at = None
+    try:
+        exif = image.getexif()
+    except Exception:
+        exif = None
+    if exif:
+        raw_orientation = exif.get(_EXIF_ORIENTATION)
+        if isinstance(raw_orientation, int) and 1 <= raw_orientation <= 8:
+            orientation = raw_orientation
+        raw_datetime = exif.get_ifd(_EXIF_IFD).get(_EXIF_DATETIME_ORIGINAL) or exif.get(
+            _EXIF_DATETIME
+        )
+        captured_at = _parse_exif_datetime(raw_datetime)
+
+    return ImageMetadata(
+        width=width or None,
+        height=height or None,
+        orientation=orientation,
+        captured_at=captured_at,
+        perceptual_hash=difference_hash(image) if width and height else None,
+    )
+
+
+def difference_hash(image: Image.Image) -> str:
+    """Return a 64-bit difference hash (dHash) as 16 hex characters.
+
+    Near-duplicate photos differ in only a few bits, so the Hamming distance
+    between two hashes is a cheap similarity measure.
+    """
+    small = image.convert("L").resize((_HASH_SIZE + 1, _HASH_SIZE), Image.BILINEAR)
+    pixels = small.tobytes()
+    bits = 0
+    for row in range(_HASH_SIZE):
+        offset = row * (_HASH_SIZE + 1)
+        for col in range(_HASH_SIZE):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return f"{bits:016x}"
+
+
+def _parse_exif_datetime(value: object) -> datetime | None:
+    if not isinstance(value, str):
+        return None
+    try:
+        return datetime.strptime(value.strip("\x00 ").strip(), _EXIF_DATETIME_FORMAT)
+    except ValueError:
+        return None
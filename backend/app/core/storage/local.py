@@ -2,7 +2,10 @@
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
 from pathlib import Path
+from typing import Any
 from uuid import uuid4
 
 from fastapi import UploadFile
@@ -10,24 +13,63 @@ from PIL import Image, UnidentifiedImageError
 
 from app.config import settings
 from app.core.storage.base import BaseStorage, StoredFile
+from app.core.storage.image_metadata import ImageMetadata, extract_image_metadata
+from app.core.storage.placeholder import encode_blurhash
 from app.core.uploads import get_upload_root
 
 _DEFAULT_CHUNK_SIZE = 1024 * 1024
 _THUMBNAIL_WIDTH = 100
 _RESAMPLING_FILTER = getattr(Image, "Resampling", Image).LANCZOS
+_SHARD_LEVELS = 2
+_SHARD_WIDTH = 2
+
+
+def sharded_relative_path(directory: str, name: str) -> str:
+    """Return `directory/ab/cd/name`, fanned out by a hash of the file name.
+
+    Two levels of 256 buckets keep each directory small even with millions of
+    files, which keeps lookups, backups and listings fast.
+    """
+    digest = hashlib.md5(name.encode("utf-8")).hexdigest()
+    shards = [
+        digest[i * _SHARD_WIDTH:(i + 1) * _SHARD_WIDTH] for i in range(_SHARD_LEVELS)
+    ]
+    return "/".join([directory.rstrip("/"), *shards, name])
+
+
+def is_sharded_path(directory: str, storage_path: str) -> bool:
+    """Return True if `storage_path` already lives in a fan-out subdirectory."""
+    prefix = directory.rstrip("/") + "/"
+    if not storage_path.startswith(prefix):
+        return False
+    parts = storage_path[len(prefix):].split("/")
+    return len(parts) == _SHARD_LEVELS + 1 and all(
+        len(part) == _SHARD_WIDTH for part in parts[:-1]
+    )
 
 
 class LocalStorage(BaseStorage):
     """Store uploaded files on the local filesystem."""
 
-    def __init__(self, *, root_dir: Path | None = None, url_prefix: str | None = None) -> None:
+    def __init__(
+        self,
+        *,
+        root_dir: Path | None = None,
+        url_prefix: str | None = None,
+        sharded: bool | None = None,
+    ) -> None:
         self._upload_root = root_dir or get_upload_root(settings.upload_root)
         self._url_prefix = (url_prefix or settings.upload_url_prefix).rstrip("/")
+        self._sharded = settings.upload_sharded_layout if sharded is None else sharded
+
+    @property
+    def upload_root(self) -> Path:
+        return self._upload_root
 
     async def save(self, file: UploadFile, *, suffix: str | None = None) -> StoredFile:
         suffix = suffix or Path(file.filename or "").suffix or ".jpg"
         unique_name = f"{uuid4().hex}{suffix}"
-        destination = self._upload_root / "images" / unique_name
+        destination = self._upload_root / self._relative_path("images", unique_name)
         destination.parent.mkdir(parents=True, exist_ok=True)
 
         total_bytes = 0
@@ -42,6 +84,7 @@ class LocalStorage(BaseStorage):
         await file.close()
 
         thumbnail_meta = self._create_thumbnail(destination, suffix=suffix)
+        image_meta: ImageMetadata = thumbnail_meta.get("metadata") or ImageMetadata()
 
         storage_path = destination.relative_to(self._upload_root).as_posix()
         public_url = self._format_public_url(storage_path)
@@ -53,12 +96,27 @@ class LocalStorage(BaseStorage):
             thumbnail_storage_path=thumbnail_meta.get("storage_path"),
             thumbnail_url=thumbnail_meta.get("public_url"),
             thumbnail_size=thumbnail_meta.get("size"),
+            width=image_meta.width,
+            height=image_meta.height,
+            orientation=image_meta.orientation,
+            captured_at=image_meta.captured_at,
+            perceptual_hash=image_meta.perceptual_hash,
+            blurhash=thumbnail_meta.get("blurhash"),
         )
 
     async def delete(self, storage_path: str) -> None:
         target = self._upload_root / storage_path
-        if target.exists():
-            target.unlink()
+        # unlink can block on slow or network filesystems; keep it off the event loop.
+        await asyncio.to_thread(target.unlink, missing_ok=True)
+
+    def public_url_for(self, storage_path: str) -> str:
+        """Return the public URL for a storage path inside this root."""
+        return self._format_public_url(storage_path)
+
+    def _relative_path(self, directory: str, name: str) -> str:
+        if self._sharded:
+            return sharded_relative_path(directory, name)
+        return f"{directory}/{name}"
 
     def _format_public_url(self, storage_path: str) -> str:
         if not self._url_prefix.startswith("/"):
@@ -67,14 +125,19 @@ class LocalStorage(BaseStorage):
             prefix = self._url_prefix
         return f"{prefix}/{storage_path}"
 
-    def _create_thumbnail(self, source: Path, *, suffix: str) -> dict[str, str | int | None]:
-        """Create a thumbnail image stored in the same root and return metadata."""
+    def _create_thumbnail(self, source: Path, *, suffix: str) -> dict[str, Any]:
+        """Create a thumbnail image stored in the same root and return metadata.
+
+        The decoded original is also used to extract `ImageMetadata`, so nothing
+        downstream has to open the file again.
+        """
         try:
             with Image.open(source) as image:
                 image.load()
                 width, height = image.size
                 if width == 0 or height == 0:
                     return {"storage_path": None, "public_url": None, "size": None}
+                metadata = extract_image_metadata(image)
 
                 target_width = min(_THUMBNAIL_WIDTH, width)
                 if width <= target_width:
@@ -87,11 +150,16 @@ class LocalStorage(BaseStorage):
                         _RESAMPLING_FILTER,
                     )
 
+                # The thumbnail is already small, so the placeholder costs a few ms.
+                blurhash = encode_blurhash(thumb)
+
                 if (suffix or "").lower() in (".jpg", ".jpeg") and thumb.mode != "RGB":
                     thumb = thumb.convert("RGB")
 
                 thumbnail_name = f"{source.stem}_thumb{suffix}"
-                destination = self._upload_root / "images" / "thumbnails" / thumbnail_name
+                destination = self._upload_root / self._relative_path(
+                    "images/thumbnails", thumbnail_name
+                )
                 destination.parent.mkdir(parents=True, exist_ok=True)
 
                 save_kwargs: dict[str, int | bool] = {}
@@ -112,6 +180,8 @@ class LocalStorage(BaseStorage):
                     "storage_path": storage_path,
                     "public_url": self._format_public_url(storage_path),
                     "size": destination.stat().st_size,
+                    "metadata": metadata,
+                    "blurhash": blurhash,
                 }
         except (UnidentifiedImageError, OSError):
             return {"storage_path": None, "public_url": None, "size": None}
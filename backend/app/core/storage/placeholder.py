@@ -0,0 +1,106 @@
+"""BlurHash placeholders so clients can paint image grids before downloading."""
+
+from __future__ import annotations
+
+import math
+
+from PIL import Image
+
+_BASE83_CHARS = (
+    "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+)
+_X_COMPONENTS = 4
+_Y_COMPONENTS = 3
+_SAMPLE_SIZE = 32
+
+# sRGB byte -> linear lookup; avoids 3 pow() calls per pixel.
+_SRGB_TO_LINEAR = [
+    (v / 255) / 12.92 if v / 255 <= 0.04045 else (((v / 255) + 0.055) / 1.055) ** 2.4
+    for v in range(256)
+]
+
+
+def _encode83(value: int, length: int) -> str:
+    return "".join(
+        _BASE83_CHARS[(value // 83 ** (length - i - 1)) % 83] for i in range(length)
+    )
+
+
+def _linear_to_srgb(value: float) -> int:
+    v = max(0.0, min(1.0, value))
+    if v <= 0.0031308:
+        return int(v * 12.92 * 255 + 0.5)
+    return int((1.055 * v ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def _sign_pow(value: float, exponent: float) -> float:
+    return math.copysign(abs(value) ** exponent, value)
+
+
+def encode_blurhash(
+    image: Image.Image,
+    *,
+    x_components: int = _X_COMPONENTS,
+    y_components: int = _Y_COMPONENTS,
+) -> str:
+    """Encode `image` as a BlurHash string (28 characters for 4x3 components).
+
+    The image is first reduced to at most 32px per side; BlurHash only keeps a
+    handful of low-frequency components, so the downscale does not change it visibly.
+    """
+    sample = image.convert("RGB")
+    sample.thumbnail((_SAMPLE_SIZE, _SAMPLE_SIZE))
+    width, height = sample.size
+    raw = sample.tobytes()
+    pixels = [
+        (_SRGB_TO_LINEAR[raw[k]], _SRGB_TO_LINEAR[raw[k + 1]], _SRGB_TO_LINEAR[raw[k + 2]])
+        for k in range(0, len(raw), 3)
+    ]
+
+    cos_x = [
+        [math.cos(math.pi * i * x / width) for x in range(width)] for i in range(x_components)
+    ]
+    cos_y = [
+        [math.cos(math.pi * j * y / height) for y in range(height)] for j in range(y_components)
+    ]
+
+    factors: list[tuple[float, float, float]] = []
+    for j in range(y_components):
+        for i in range(x_components):
+            normalisation = 1.0 if i == 0 and j == 0 else 2.0
+            r = g = b = 0.0
+            for y in range(height):
+                row_basis = cos_y[j][y]
+                offset = y * width
+                for x in range(width):
+                    basis = row_basis * cos_x[i][x]
+                    pr, pg, pb = pixels[offset + x]
+                    r += basis * pr
+                    g += basis * pg
+                    b += basis * pb
+            scale = normalisation / (width * height)
+            factors.append((r * scale, g * scale, b * scale))
+
+    dc, ac = factors[0], factors[1:]
+    result = _encode83((x_components - 1) + (y_components - 1) * 9, 1)
+
+    if ac:
+        actual_max = max(abs(component) for factor in ac for component in factor)
+        quantised_max = int(max(0, min(82, math.floor(actual_max * 166 - 0.5))))
+        maximum_value = (quantised_max + 1) / 166
+        result += _encode83(quantised_max, 1)
+    else:
+        maximum_value = 1.0
+        result += _encode83(0, 1)
+
+    result += _encode83(
+        (_linear_to_srgb(dc[0]) << 16) + (_linear_to_srgb(dc[1]) << 8) + _linear_to_srgb(dc[2]),
+        4,
+    )
+    for factor in ac:
+        quantised = [
+            int(max(0, min(18, math.floor(_sign_pow(c / maximum_value, 0.5) * 9 + 9.5))))
+            for c in factor
+        ]
+        result += _encode83(quantised[0] * 19 * 19 + quantised[1] * 19 + quantised[2], 2)
+    return result
@@ -1,6 +1,7 @@
 """Database models package."""
 
 # Import all models here to ensure they are registered with SQLAlchemy
+from app.db.models.ai_usage import AIUsageRecord  # noqa: F401
 from app.db.models.customer import Customer  # noqa: F401
 from app.db.models.shop import Shop  # noqa: F401
 from app.db.models.skin_color_measurement import SkinColorMeasurement  # noqa: F401
@@ -12,6 +13,7 @@ from app.db.models.uploaded_image import UploadedImage  # noqa: F401
 from app.db.models.user import User  # noqa: F401
 
 __all__ = [
+    'AIUsageRecord',
     'Customer',
     'Shop',
     'SkinColorMeasurement',
@@ -0,0 +1,31 @@
+"""Database model for aggregated AI token usage."""
+
+from datetime import date, datetime
+
+from sqlalchemy import BigInteger, Date, DateTime, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class AIUsageRecord(Base):
+    """Token usage of one account and model, accumulated over one flush interval.
+
+    Rows are append-only; an account's usage for a day is the sum of its rows.
+    """
+
+    __tablename__ = "ai_usage"
+    __table_args__ = (Index("ix_ai_usage_day_account", "usage_date", "account"),)
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, index=True)
+    account: Mapped[str] = mapped_column(String(64), nullable=False, comment="과금 주체 (shop:<id> / user:<id>)")
+    model: Mapped[str] = mapped_column(String(100), nullable=False, comment="모델명")
+    usage_date: Mapped[date] = mapped_column(Date, nullable=False, comment="사용일 (UTC)")
+    requests: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    prompt_tokens: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    completion_tokens: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    total_tokens: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self) -> str:  # pragma: no cover - debug helper
+        return f"<AIUsageRecord(account='{self.account}', model='{self.model}', total_tokens={self.total_tokens})>"
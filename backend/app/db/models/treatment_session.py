@@ -29,6 +29,7 @@ class TreatmentSession(Base):
     white: Mapped[Optional[int]] = mapped_column(Integer, comment="화이트 투입량 (0~9)")
     red: Mapped[Optional[int]] = mapped_column(Integer, comment="레드 투입량 (0~9)")
     yellow: Mapped[Optional[int]] = mapped_column(Integer, comment="옐로우 투입량 (0~9)")
+    recipe_fingerprint: Mapped[Optional[str]] = mapped_column(String(64), comment="레시피 계산에 쓰인 측정 데이터/모델 지문")
     is_completed: Mapped[Optional[bool]] = mapped_column(Boolean, comment="시술 완료 여부")
     is_result_entered: Mapped[Optional[int]] = mapped_column(SmallInteger, comment="시술 결과 입력 저장 여부")
     note: Mapped[Optional[str]] = mapped_column(Text, comment="특이사항")
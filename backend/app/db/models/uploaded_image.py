@@ -4,7 +4,7 @@ from datetime import datetime
 
 from typing import Optional
 
-from sqlalchemy import BigInteger, Boolean, DateTime, Integer, String
+from sqlalchemy import BigInteger, Boolean, DateTime, Integer, SmallInteger, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -24,6 +24,12 @@ class UploadedImage(Base):
     content_type: Mapped[Optional[str]] = mapped_column(String(128))
     file_size: Mapped[Optional[int]] = mapped_column(Integer)
     thumbnail_size: Mapped[Optional[int]] = mapped_column(Integer)
+    width: Mapped[Optional[int]] = mapped_column(Integer, comment="픽셀 너비")
+    height: Mapped[Optional[int]] = mapped_column(Integer, comment="픽셀 높이")
+    orientation: Mapped[Optional[int]] = mapped_column(SmallInteger, comment="EXIF orientation (1~8)")
+    captured_at: Mapped[Optional[datetime]] = mapped_column(DateTime, comment="EXIF 촬영 시각")
+    perceptual_hash: Mapped[Optional[str]] = mapped_column(String(16), comment="dHash (64bit hex)")
+    blurhash: Mapped[Optional[str]] = mapped_column(String(64), comment="BlurHash 플레이스홀더")
     storage_backend: Mapped[str] = mapped_column(String(50), default="local")
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     is_deleted: Mapped[bool] = mapped_column(Boolean, default=False)
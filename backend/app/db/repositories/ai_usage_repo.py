@@ -0,0 +1,30 @@
+"""Repository for aggregated AI token usage."""
+
+from datetime import date
+from typing import Dict, Sequence
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.ai_usage import AIUsageRecord
+
+
+class AIUsageRepository:
+    """Batch writes and per-day totals for `AIUsageRecord` rows."""
+
+    async def add_batch(self, db: AsyncSession, rows: Sequence[dict]) -> None:
+        """Insert many usage rows with a single statement."""
+        if not rows:
+            return
+        await db.execute(insert(AIUsageRecord), list(rows))
+        await db.commit()
+
+    async def daily_totals(self, db: AsyncSession, usage_date: date) -> Dict[str, int]:
+        """Total tokens per account on `usage_date`."""
+        stmt = (
+            select(AIUsageRecord.account, func.sum(AIUsageRecord.total_tokens))
+            .where(AIUsageRecord.usage_date == usage_date)
+            .group_by(AIUsageRecord.account)
+        )
+        result = await db.execute(stmt)
+        return {account: int(total or 0) for account, total in result.all()}
@@ -46,10 +46,35 @@ class SkinMeasurementsRepository:
         if shop_id:
             query = query.where(Customer.shop_id == shop_id)
         
-        query = query.offset(skip).limit(limit)
+        query = query.order_by(SkinColorMeasurement.id).offset(skip).limit(limit)
         result = await db.execute(query)
         return result.scalars().all()
     
+    async def get_lab_by_session_ids(self, db: AsyncSession, session_ids: List[int]) -> List[Any]:
+        """Get (id, session_id, l_value, a_value, b_value, region_type) of active measurements for many sessions.
+        
+        Rows are ordered by session and then measurement ID.
+        """
+        from sqlalchemy import or_
+        
+        if not session_ids:
+            return []
+        query = (
+            select(
+                SkinColorMeasurement.id,
+                SkinColorMeasurement.session_id,
+                SkinColorMeasurement.l_value,
+                SkinColorMeasurement.a_value,
+                SkinColorMeasurement.b_value,
+                SkinColorMeasurement.region_type,
+            )
+            .where(SkinColorMeasurement.session_id.in_(session_ids))
+            .where(or_(SkinColorMeasurement.is_deleted == False, SkinColorMeasurement.is_deleted.is_(None)))
+            .order_by(SkinColorMeasurement.session_id, SkinColorMeasurement.id)
+        )
+        result = await db.execute(query)
+        return list(result.all())
+    
     async def create(self, db: AsyncSession, measurement_data: dict) -> SkinColorMeasurement:
         """Create new skin measurement."""
         measurement = SkinColorMeasurement(**measurement_data)
@@ -58,6 +83,19 @@ class SkinMeasurementsRepository:
         await db.refresh(measurement)
         return measurement
     
+    async def create_many(self, db: AsyncSession, measurements_data: List[dict]) -> List[SkinColorMeasurement]:
+        """Create several skin measurements in one commit; none are kept if any fails."""
+        measurements = [SkinColorMeasurement(**data) for data in measurements_data]
+        db.add_all(measurements)
+        try:
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+        for measurement in measurements:
+            await db.refresh(measurement)
+        return measurements
+    
     async def delete(self, db: AsyncSession, measurement_id: int) -> bool:
         """Delete skin measurement by ID (soft delete)."""
         result = await db.execute(
@@ -1,5 +1,7 @@
 """Repository layer for treatment sessions domain."""
 
+from datetime import datetime
+
 from app.db.models.treatment_session import TreatmentSession
 from app.db.models.treatment_session_image import TreatmentSessionImage
 from sqlalchemy import select, update, delete, insert
@@ -65,6 +67,109 @@ class TreatmentSessionsRepository:
         result = await db.execute(query)
         return result.scalars().all()
     
+    async def get_ids_after(
+        self,
+        db: AsyncSession,
+        after_id: int = 0,
+        limit: int = 500,
+        shop_id: Optional[int] = None,
+        include_completed: bool = False
+    ) -> List[int]:
+        """Get the next `limit` active session IDs above `after_id` (keyset pagination).
+        
+        Completed sessions are left out unless `include_completed` is set.
+        """
+        from app.db.models.treatment import Treatment
+        from app.db.models.customer import Customer
+        from sqlalchemy import or_
+        
+        query = (
+            select(TreatmentSession.id)
+            .join(Treatment)
+            .join(Customer)
+            .where(TreatmentSession.id > after_id)
+            .where(or_(TreatmentSession.is_deleted == False, TreatmentSession.is_deleted.is_(None)))
+            .where(or_(Treatment.is_deleted == False, Treatment.is_deleted.is_(None)))
+        )
+        
+        if shop_id:
+            query = query.where(Customer.shop_id == shop_id)
+        if not include_completed:
+            query = query.where(or_(TreatmentSession.is_completed == False, TreatmentSession.is_completed.is_(None)))
+        
+        query = query.order_by(TreatmentSession.id).limit(limit)
+        result = await db.execute(query)
+        return list(result.scalars())
+    
+    async def get_completed_recipes_after(self, db: AsyncSession, after_id: int = 0, limit: int = 1000) -> List[Any]:
+        """Get (id, updated_at, is_completed, is_deleted, melanin, white, red, yellow) of active completed sessions above `after_id`."""
+        from sqlalchemy import or_
+    
+        query = (
+            select(*self._recipe_columns())
+            .where(TreatmentSession.id > after_id)
+            .where(TreatmentSession.is_completed == True)
+            .where(or_(TreatmentSession.is_deleted == False, TreatmentSession.is_deleted.is_(None)))
+            .order_by(TreatmentSession.id)
+            .limit(limit)
+        )
+        result = await db.execute(query)
+        return list(result.all())
+    
+    async def get_updated_since(self, db: AsyncSession, since: datetime, after_id: int = 0, limit: int = 1000) -> List[Any]:
+        """Get the recipe columns of sessions updated at or after `since`, deleted or not.
+    
+        Keyset pagination on (updated_at, id): pass the last row's `updated_at`
+        as `since` and its `id` as `after_id` to read the next page.
+        """
+        from sqlalchemy import and_, or_
+    
+        query = (
+            select(*self._recipe_columns())
+            .where(
+                or_(
+                    TreatmentSession.updated_at > since,
+                    and_(TreatmentSession.updated_at == since, TreatmentSession.id > after_id),
+                )
+            )
+            .order_by(TreatmentSession.updated_at, TreatmentSession.id)
+            .limit(limit)
+        )
+        result = await db.execute(query)
+        return list(result.all())
+    
+    @staticmethod
+    def _recipe_columns():
+        return (
+            TreatmentSession.id,
+            TreatmentSession.updated_at,
+            TreatmentSession.is_completed,
+            TreatmentSession.is_deleted,
+            TreatmentSession.melanin,
+            TreatmentSession.white,
+            TreatmentSession.red,
+            TreatmentSession.yellow,
+        )
+    
+    async def bulk_update_recipes(self, db: AsyncSession, recipes: List[dict]) -> None:
+        """Update the color recipe of many sessions in one executemany UPDATE.
+        
+        Each item holds `id` plus the `melanin`/`white`/`red`/`yellow` values
+        (and optionally `recipe_fingerprint`).
+        """
+        if not recipes:
+            return
+        await db.execute(update(TreatmentSession), recipes)
+        await db.commit()
+    
+    async def clear_recipe_fingerprint(self, db: AsyncSession, session_id: int) -> None:
+        """Mark a session's stored recipe as stale; committed with the caller's next commit."""
+        await db.execute(
+            update(TreatmentSession)
+            .where(TreatmentSession.id == session_id)
+            .values(recipe_fingerprint=None)
+        )
+    
     async def create(self, db: AsyncSession, session_data: dict) -> TreatmentSession:
         """Create new treatment session."""
         session = TreatmentSession(**session_data)
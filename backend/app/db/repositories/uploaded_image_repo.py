@@ -1,8 +1,9 @@
 """Repository for uploaded image metadata."""
 
+from datetime import datetime
 from typing import Iterable, Sequence
 
-from sqlalchemy import select, update
+from sqlalchemy import delete, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models.uploaded_image import UploadedImage
@@ -71,6 +72,73 @@ class UploadedImageRepository:
         result = await db.execute(stmt)
         return list(result.scalars())
 
+    async def get_gc_candidates(
+        self,
+        db: AsyncSession,
+        *,
+        created_before: datetime,
+        after_id: int = 0,
+        limit: int = 500,
+    ) -> list[UploadedImage]:
+        """Return soft-deleted or unlinked images older than `created_before`.
+
+        Uses keyset pagination on the primary key so each batch is an index
+        range scan regardless of how far the sweep has progressed.
+        """
+        linked = (
+            select(TreatmentSessionImage.id)
+            .where(TreatmentSessionImage.uploaded_image_id == UploadedImage.id)
+            .exists()
+        )
+        stmt = (
+            select(UploadedImage)
+            .where(UploadedImage.id > after_id)
+            .where(UploadedImage.created_at < created_before)
+            .where(or_(UploadedImage.is_deleted == True, ~linked))  # noqa: E712
+            .order_by(UploadedImage.id)
+            .limit(limit)
+        )
+        result = await db.execute(stmt)
+        return list(result.scalars())
+
+    async def hard_delete(self, db: AsyncSession, image_ids: Iterable[int]) -> int:
+        """Delete image rows (and any leftover session mappings) in bulk."""
+        ids = tuple(image_ids)
+        if not ids:
+            return 0
+        await db.execute(
+            delete(TreatmentSessionImage).where(
+                TreatmentSessionImage.uploaded_image_id.in_(ids)
+            )
+        )
+        result = await db.execute(delete(UploadedImage).where(UploadedImage.id.in_(ids)))
+        await db.commit()
+        return result.rowcount or 0
+
+    async def get_batch_after(
+        self,
+        db: AsyncSession,
+        *,
+        after_id: int = 0,
+        limit: int = 500,
+    ) -> list[UploadedImage]:
+        """Return the next keyset batch of images ordered by primary key."""
+        stmt = (
+            select(UploadedImage)
+            .where(UploadedImage.id > after_id)
+            .order_by(UploadedImage.id)
+            .limit(limit)
+        )
+        result = await db.execute(stmt)
+        return list(result.scalars())
+
+    async def bulk_update(self, db: AsyncSession, rows: Sequence[dict]) -> None:
+        """Apply per-row column updates (each dict must contain `id`) in one statement."""
+        if not rows:
+            return
+        await db.execute(update(UploadedImage), list(rows))
+        await db.commit()
+
     async def get_by_id_with_shop_check(
         self,
         db: AsyncSession,
@@ -1,5 +1,6 @@
 """FastAPI application with routers and middleware."""
 
+import asyncio
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
@@ -20,10 +21,12 @@ from app.api.v1 import (
     routes_treatment_photos,
     routes_uploads,
 )
+from app.ai.client import close_ai_client, init_ai_client
 from app.config import settings
 from app.core.exceptions import register_exception_handlers
 from app.core.uploads import get_upload_root
 from app.db.session import create_tables
+from app.services.photo_color_extraction import shutdown_extraction_pool
 
 
 @asynccontextmanager
@@ -31,6 +34,9 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """Application lifespan manager."""
     # Startup
     create_tables()
+
+    # Shared, pooled AI client for the lifetime of the app
+    await init_ai_client()
     
     # Auto-seed database if enabled
     if settings.seed_on_start:
@@ -40,10 +46,50 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
             print("✅ Database seeded successfully on startup")
         except Exception as e:
             print(f"⚠️  Failed to seed database on startup: {e}")
+
+    # Background sweeper for orphaned / soft-deleted images
+    gc_stop = asyncio.Event()
+    gc_task = None
+    if settings.image_gc_enabled:
+        from app.services.image_gc_service import run_image_gc_loop
+        gc_task = asyncio.create_task(run_image_gc_loop(gc_stop))
+    
+    # Batched writes of AI token usage counters
+    usage_stop = asyncio.Event()
+    usage_task = None
+    if settings.ai_usage_enabled:
+        from app.ai.usage import run_usage_flush_loop
+        usage_task = asyncio.create_task(run_usage_flush_loop(usage_stop))
+    
+    # Incremental loads of completed sessions into the k-NN recipe index
+    recipe_index_stop = asyncio.Event()
+    recipe_index_task = None
+    if settings.color_recipe_model == "knn":
+        from app.services.color_recipe_index import run_recipe_index_refresh_loop
+        recipe_index_task = asyncio.create_task(run_recipe_index_refresh_loop(recipe_index_stop))
+    
+    # Warm worker processes for a local recipe model
+    recipe_model_pool = None
+    if settings.color_recipe_model == "local":
+        from app.services.color_recipe_runner import get_model_pool
+        recipe_model_pool = get_model_pool()
+        await recipe_model_pool.start()
     
     yield
     # Shutdown
-    pass
+    gc_stop.set()
+    if gc_task is not None:
+        await gc_task
+    usage_stop.set()
+    if usage_task is not None:
+        await usage_task
+    recipe_index_stop.set()
+    if recipe_index_task is not None:
+        await recipe_index_task
+    if recipe_model_pool is not None:
+        await recipe_model_pool.close()
+    shutdown_extraction_pool()
+    await close_ai_client()
 
 
 # Create FastAPI app
@@ -13,3 +13,11 @@ class Request26(BaseModel):
     
 
 
+
+class ColorRecipeRecomputeRequest(BaseModel):
+    """Schema for bulk color recipe recomputation - 전체 회차 레시피 재계산 요청"""
+    
+    batch_size: int = Field(500, ge=1, le=5000, description="한 번에 처리할 회차 수")
+    after_id: int = Field(0, ge=0, description="이 회차 ID 이후부터 처리 (중단된 작업 재개용)")
+    dry_run: bool = Field(False, description="저장하지 않고 처리 결과만 보고")
+    include_completed: bool = Field(False, description="완료된 회차의 레시피도 덮어쓰기 (기본값: 완료 회차는 유지)")
@@ -3,6 +3,8 @@
 from pydantic import BaseModel, Field
 from typing import List, Optional, Any
 
+from app.schemas.skin_measurements_response import ColorDifferenceSummary
+
 class Response25(BaseModel):
     """Schema for color recipes_response_25"""
     
@@ -16,4 +18,5 @@ class Response26(BaseModel):
     white: Optional[str] = Field(None)
     red: Optional[str] = Field(None)
     yellow: Optional[str] = Field(None)
+    color_difference: Optional[ColorDifferenceSummary] = Field(None, description="병변/정상 피부 색차 (측정 데이터가 있을 때)")
 
@@ -33,6 +33,7 @@ class ErrorCode(str, Enum):
     TOKEN_INVALID = "TOKEN_INVALID"
     USER_INACTIVE = "USER_INACTIVE"
     INVALID_CREDENTIALS = "INVALID_CREDENTIALS"
+    QUOTA_EXCEEDED = "QUOTA_EXCEEDED"
 
 
 class ErrorDetail(BaseModel):
@@ -3,13 +3,15 @@
 from pydantic import BaseModel, Field
 from typing import List, Optional, Any
 
+from app.schemas.uploads_response import ImageMetadataFields
+
 class Response6(BaseModel):
     """Schema for customer_response_6"""
     
     customer_id: Optional[str] = Field(None)
     created_at: Optional[str] = Field(None)
 
-class TreatmentSessionImageInfo(BaseModel):
+class TreatmentSessionImageInfo(ImageMetadataFields):
     """Detailed info for treatment session images."""
 
     image_id: Optional[str] = Field(None)
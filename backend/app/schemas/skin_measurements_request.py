@@ -25,3 +25,19 @@ class Request24(BaseModel):
     
 
 
+
+class PhotoRegion(BaseModel):
+    """Region of interest in an uploaded photo - 사진 측정 영역"""
+    
+    type: str = Field(..., description="측정 타입 (NORMAL 또는 LESION)")
+    rect: Optional[List[float]] = Field(None, min_length=4, max_length=4, description="사각형 영역 [x, y, width, height] (픽셀)")
+    polygon: Optional[List[List[float]]] = Field(None, min_length=3, description="다각형 영역 [[x, y], ...] (픽셀)")
+    measurement_point: Optional[str] = Field(None, description="측정 위치")
+
+class PhotoMeasurementRequest(BaseModel):
+    """Skin color extraction from an uploaded photo - 사진 기반 피부색 측정"""
+    
+    session_id: int = Field(..., description="시술 회차 ID")
+    image_id: int = Field(..., description="업로드된 이미지 ID")
+    regions: List[PhotoRegion] = Field(..., min_length=1, max_length=20, description="측정 영역 목록 (EXIF 회전이 적용된 이미지 기준 좌표)")
+    measured_at: Optional[str] = Field(None, description="측정 시각 (ISO format)")
@@ -30,3 +30,33 @@ class Response24(BaseModel):
     
     deleted_at: Optional[str] = Field(None)
 
+class ColorDifferenceSummary(BaseModel):
+    """Lesion-vs-normal color difference of one treatment session - 병변/정상 피부 색차"""
+    
+    session_id: int = Field(..., description="시술 회차 ID")
+    normal_count: int = Field(0, description="정상(NORMAL) 측정 수")
+    lesion_count: int = Field(0, description="병변(LESION) 측정 수")
+    delta_e_2000: Optional[float] = Field(None, description="병변 평균과 정상 평균의 CIEDE2000 색차 (ΔE00)")
+    delta_e_76: Optional[float] = Field(None, description="병변 평균과 정상 평균의 CIE76 색차 (ΔE*ab)")
+    max_delta_e_2000: Optional[float] = Field(None, description="정상 평균과 가장 차이 나는 병변 측정의 ΔE00")
+
+class PhotoMeasurementItem(BaseModel):
+    """Skin measurement extracted from one photo region - 사진 영역별 측정 결과"""
+    
+    measurement_id: str = Field(..., description="생성된 측정 데이터 ID")
+    type: Optional[str] = Field(None, description="측정 타입 (NORMAL 또는 LESION)")
+    L: float = Field(..., description="L 값 (트림 평균)")
+    a: float = Field(..., description="a 값 (트림 평균)")
+    b: float = Field(..., description="b 값 (트림 평균)")
+    std: List[float] = Field(..., description="이상치 제거 후 L, a, b 표준편차")
+    pixel_count: int = Field(..., description="영역 픽셀 수")
+    used_count: int = Field(..., description="이상치 제거 후 사용된 픽셀 수 (표본 추출 시 표본 기준)")
+    melanin: Optional[int] = Field(None, description="추론된 멜라닌 투입량 (0~9)")
+    white: Optional[int] = Field(None, description="추론된 화이트 투입량 (0~9)")
+    red: Optional[int] = Field(None, description="추론된 레드 투입량 (0~9)")
+    yellow: Optional[int] = Field(None, description="추론된 옐로우 투입량 (0~9)")
+
+class PhotoMeasurementResponse(BaseModel):
+    """Schema for skin measurements created from a photo"""
+    
+    measurements: List[PhotoMeasurementItem] = Field(default_factory=list)
@@ -3,8 +3,10 @@
 from pydantic import BaseModel, Field
 from typing import List, Optional, Any
 
+from app.schemas.uploads_response import ImageMetadataFields
 
-class SessionImageOutput(BaseModel):
+
+class SessionImageOutput(ImageMetadataFields):
     """세션 이미지 정보."""
 
     image_id: Optional[str] = Field(None)
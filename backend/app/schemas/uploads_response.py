@@ -4,7 +4,18 @@ from pydantic import BaseModel, Field
 from typing import List, Optional
 
 
-class UploadedImageItem(BaseModel):
+class ImageMetadataFields(BaseModel):
+    """업로드 시 추출된 이미지 메타데이터."""
+
+    width: Optional[int] = Field(None, description="픽셀 너비")
+    height: Optional[int] = Field(None, description="픽셀 높이")
+    orientation: Optional[int] = Field(None, description="EXIF orientation (1~8, 5~8은 가로/세로 교체)")
+    captured_at: Optional[str] = Field(None, description="EXIF 촬영 시각 (ISO format)")
+    perceptual_hash: Optional[str] = Field(None, description="dHash (64bit hex)")
+    blurhash: Optional[str] = Field(None, description="BlurHash 플레이스홀더 (이미지 로딩 전 표시용)")
+
+
+class UploadedImageItem(ImageMetadataFields):
     image_id: str = Field(..., description="업로드된 이미지 ID")
     url: str = Field(..., description="이미지 접근 URL")
     original_filename: Optional[str] = Field(None, description="원본 파일명")
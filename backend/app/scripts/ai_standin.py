@@ -0,0 +1,41 @@
+"""Run the local AI provider stand-in server."""
+
+import click
+import uvicorn
+
+from app.ai.standin import StandinConfig, create_standin_app
+
+
+@click.command()
+@click.option('--host', default='127.0.0.1', show_default=True)
+@click.option('--port', default=9100, show_default=True)
+@click.option(
+    '--latency',
+    type=click.Choice(['fixed', 'uniform', 'lognormal']),
+    default='lognormal',
+    show_default=True,
+    help='Latency distribution',
+)
+@click.option('--latency-ms', default=200.0, show_default=True, help='Fixed/mean/median latency')
+@click.option('--latency-sigma', default=0.6, show_default=True, help='Lognormal spread (tail heaviness)')
+@click.option('--token-delay-ms', default=20.0, show_default=True, help='Delay between streamed deltas')
+@click.option('--error-rate', default=0.0, show_default=True, help='Fraction of requests answered with --error-status')
+@click.option('--error-status', default=503, show_default=True)
+@click.option('--hang-rate', default=0.0, show_default=True, help='Fraction of requests that stall for --hang-sec')
+@click.option('--hang-sec', default=60.0, show_default=True)
+@click.option('--rate-limit-rps', default=0.0, show_default=True, help='Requests/s before 429s (0 disables)')
+@click.option('--rate-limit-burst', default=10.0, show_default=True)
+@click.option('--retry-after-sec', default=1.0, show_default=True, help='Retry-After sent with 429s')
+@click.option('--seed', type=int, default=None, help='Random seed for reproducible runs')
+def main(host: str, port: int, **options):
+    """Serve OpenAI-compatible (/v1/...) and generic (/complete, /chat, ...) AI endpoints.
+
+    Point the backend at it with AI_PROVIDER=openai AI_BASE_URL=http://HOST:PORT/v1
+    or AI_PROVIDER=generic AI_BASE_URL=http://HOST:PORT.
+    """
+    app = create_standin_app(StandinConfig(**options))
+    uvicorn.run(app, host=host, port=port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
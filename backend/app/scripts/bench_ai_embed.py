@@ -0,0 +1,105 @@
+"""Load benchmark: embedding throughput with and without micro-batching.
+
+Runs many small concurrent `embed` calls against the mock provider. The mock is
+wrapped in a semaphore that models the upstream's limit on in-flight requests
+(connection pool / provider rate limit); that limit is what batching relieves.
+"""
+
+import asyncio
+import sys
+import time
+
+import click
+
+from app.ai.batching import BatchingAIClient
+from app.ai.client import AIClient, AIClientWrapper, MockAIClient
+
+
+class _LimitedUpstream(AIClientWrapper):
+    """Mock provider that serves at most `limit` requests at a time."""
+
+    def __init__(self, inner: AIClient, limit: int):
+        super().__init__(inner)
+        self._semaphore = asyncio.Semaphore(limit)
+        self.requests = 0
+
+    async def embed(self, texts, **kwargs):
+        async with self._semaphore:
+            self.requests += 1
+            return await self.inner.embed(texts, **kwargs)
+
+
+async def _run(client: AIClient, calls: int, concurrency: int, texts_per_call: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(index: int) -> None:
+        async with semaphore:
+            texts = [f"text {index}-{i}" for i in range(texts_per_call)]
+            vectors = await client.embed(texts)
+            assert len(vectors) == len(texts)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    return time.perf_counter() - start
+
+
+async def bench_embed(
+    *,
+    calls: int,
+    concurrency: int,
+    texts_per_call: int,
+    upstream_limit: int,
+    max_items: int,
+    max_wait_ms: float,
+) -> list:
+    results = []
+    for label, batched in (("direct", False), ("batched", True)):
+        upstream = _LimitedUpstream(MockAIClient(), upstream_limit)
+        client: AIClient = upstream
+        if batched:
+            client = BatchingAIClient(upstream, max_items=max_items, max_wait_ms=max_wait_ms)
+        elapsed = await _run(client, calls, concurrency, texts_per_call)
+        results.append(
+            {
+                "mode": label,
+                "seconds": elapsed,
+                "calls_per_sec": calls / elapsed,
+                "upstream_requests": upstream.requests,
+            }
+        )
+    return results
+
+
+@click.command()
+@click.option('--calls', default=2000, show_default=True, help='Number of embed calls')
+@click.option('--concurrency', default=200, show_default=True, help='Concurrent callers')
+@click.option('--texts-per-call', default=2, show_default=True, help='Texts per embed call')
+@click.option('--upstream-limit', default=8, show_default=True, help='Concurrent requests the mock upstream accepts')
+@click.option('--max-items', default=64, show_default=True, help='Batch size limit')
+@click.option('--max-wait-ms', default=5.0, show_default=True, help='Batch wait window')
+def main(calls, concurrency, texts_per_call, upstream_limit, max_items, max_wait_ms):
+    """Compare direct and micro-batched embedding throughput against the mock provider."""
+    try:
+        results = asyncio.run(
+            bench_embed(
+                calls=calls,
+                concurrency=concurrency,
+                texts_per_call=texts_per_call,
+                upstream_limit=upstream_limit,
+                max_items=max_items,
+                max_wait_ms=max_wait_ms,
+            )
+        )
+    except KeyboardInterrupt:
+        sys.exit(1)
+
+    for row in results:
+        click.echo(
+            f"{row['mode']:>8}: {row['seconds']:.2f}s  {row['calls_per_sec']:.0f} calls/s  "
+            f"upstream_requests={row['upstream_requests']}"
+        )
+    click.echo(f"speedup: {results[0]['seconds'] / results[1]['seconds']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
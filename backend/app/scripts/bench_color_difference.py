@@ -0,0 +1,83 @@
+"""Benchmark: vectorized CIEDE2000 / CIE76 color differences.
+
+For each size N, times one `delta_e_2000` and one `delta_e_76` call over N
+Lab pairs and reports the cost per pair. The N=1 row is the cost of calling
+the kernel once per pair, so "vs N=1" is the gain from batching. A last row
+times `session_color_differences` over N readings split into sessions of 6.
+"""
+
+import sys
+import time
+
+import click
+import numpy as np
+
+from app.services.color_difference import delta_e_76, delta_e_2000, session_color_differences
+
+
+def _lab(rng: np.random.Generator, size: int) -> np.ndarray:
+    return np.column_stack(
+        [rng.uniform(20, 90, size), rng.uniform(-10, 30, size), rng.uniform(-10, 40, size)]
+    )
+
+
+def _per_pair_us(kernel, lab1: np.ndarray, lab2: np.ndarray, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        kernel(lab1, lab2)
+    return (time.perf_counter() - start) / repeat / len(lab1) * 1e6
+
+
+def bench_color_difference(*, sizes, seed: int) -> list:
+    rng = np.random.default_rng(seed)
+    # Warm up so the N=1 row doesn't measure first-call overhead.
+    delta_e_2000(_lab(rng, 8), _lab(rng, 8))
+
+    results = []
+    for size in sizes:
+        lab1, lab2 = _lab(rng, size), _lab(rng, size)
+        repeat = max(1, 100_000 // size)
+        results.append(
+            {
+                "size": size,
+                "delta_e_2000_us": _per_pair_us(delta_e_2000, lab1, lab2, repeat),
+                "delta_e_76_us": _per_pair_us(delta_e_76, lab1, lab2, repeat),
+            }
+        )
+
+    size = max(sizes)
+    lab = _lab(rng, size)
+    regions = rng.choice(["NORMAL", "LESION"], size).tolist()
+    groups = np.arange(size) // 6
+    start = time.perf_counter()
+    session_color_differences(lab, regions, groups=groups)
+    session_us = (time.perf_counter() - start) / size * 1e6
+    return results, {"size": size, "sessions": int(groups[-1]) + 1, "per_reading_us": session_us}
+
+
+@click.command()
+@click.option('--sizes', default="1,100,10000,1000000", show_default=True, help='Comma-separated pair counts')
+@click.option('--seed', default=42, show_default=True, help='Random seed for the synthetic Lab values')
+def main(sizes, seed):
+    """Report per-pair cost of the vectorized color difference kernels."""
+    try:
+        results, sessions = bench_color_difference(sizes=[int(size) for size in sizes.split(",")], seed=seed)
+    except KeyboardInterrupt:
+        sys.exit(1)
+
+    single = results[0]
+    for row in results:
+        click.echo(
+            f"N={row['size']:<8} us/pair: ciede2000 {row['delta_e_2000_us']:9.4f} "
+            f"(vs N={single['size']} {single['delta_e_2000_us'] / row['delta_e_2000_us']:7.1f}x)  "
+            f"cie76 {row['delta_e_76_us']:9.4f} "
+            f"(vs N={single['size']} {single['delta_e_76_us'] / row['delta_e_76_us']:7.1f}x)"
+        )
+    click.echo(
+        f"session summary: {sessions['size']} readings in {sessions['sessions']} sessions, "
+        f"{sessions['per_reading_us']:.4f} us/reading"
+    )
+
+
+if __name__ == "__main__":
+    main()
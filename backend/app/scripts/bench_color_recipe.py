@@ -0,0 +1,116 @@
+"""Benchmark: scalar vs vectorized color recipe computation.
+
+For each size N, times one recipe per measurement both ways:
+
+- `linear`: `MockColorRecipeAIService.recommend_color_recipe` per measurement
+  vs one `recommend_batch` call with a group per measurement
+- `measurement`: `SkinMeasurementsService._infer_color_recipe` per measurement
+  vs one `infer_color_recipes` call
+
+and checks that both give identical recipes. Batch cost is reported as the
+NumPy kernel alone and including `lab_array` (building the array from objects).
+"""
+
+import asyncio
+import random
+import sys
+import time
+
+import click
+import numpy as np
+
+from app.services.color_recipe_ai_service import MockColorRecipeAIService, SkinMeasurementData
+from app.services.color_recipe_engine import lab_array
+from app.services.skin_measurements_service import SkinMeasurementsService
+
+
+def _measurements(count: int, seed: int):
+    rng = random.Random(seed)
+    return [
+        SkinMeasurementData(
+            l_value=rng.uniform(20, 90),
+            a_value=rng.uniform(-10, 30),
+            b_value=rng.uniform(-10, 40),
+            region_type=rng.choice(["NORMAL", "LESION"]),
+        )
+        for _ in range(count)
+    ]
+
+
+async def bench_color_recipe(*, sizes, seed: int) -> list:
+    ai_service = MockColorRecipeAIService()
+    measurement_service = SkinMeasurementsService()
+    # Warm up NumPy so the N=1 row doesn't measure first-call overhead.
+    warm = lab_array(_measurements(8, seed))
+    await ai_service.recommend_batch(warm, groups=np.arange(8))
+    measurement_service.infer_color_recipes(warm)
+
+    results = []
+    for size in sizes:
+        measurements = _measurements(size, seed)
+
+        start = time.perf_counter()
+        lab = lab_array(measurements)
+        convert = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batch = await ai_service.recommend_batch(lab, groups=np.arange(size))
+        linear_batch = time.perf_counter() - start
+
+        start = time.perf_counter()
+        scalar = [await ai_service.recommend_color_recipe([m]) for m in measurements]
+        linear_scalar = time.perf_counter() - start
+        assert batch.tolist() == [[r.melanin, r.white, r.red, r.yellow] for r in scalar]
+
+        start = time.perf_counter()
+        inferred = measurement_service.infer_color_recipes(lab)
+        measurement_batch = time.perf_counter() - start
+
+        start = time.perf_counter()
+        payloads = [
+            await measurement_service._infer_color_recipe(
+                {"l_value": m.l_value, "a_value": m.a_value, "b_value": m.b_value}
+            )
+            for m in measurements
+        ]
+        measurement_scalar = time.perf_counter() - start
+        assert inferred.tolist() == [[p["melanin"], p["white"], p["red"], p["yellow"]] for p in payloads]
+
+        for kernel, scalar_sec, batch_sec in (
+            ("linear", linear_scalar, linear_batch),
+            ("measurement", measurement_scalar, measurement_batch),
+        ):
+            results.append(
+                {
+                    "kernel": kernel,
+                    "size": size,
+                    "scalar_us": scalar_sec / size * 1e6,
+                    "batch_us": batch_sec / size * 1e6,
+                    "batch_with_convert_us": (batch_sec + convert) / size * 1e6,
+                }
+            )
+    return results
+
+
+@click.command()
+@click.option('--sizes', default="1,100,100000", show_default=True, help='Comma-separated measurement counts')
+@click.option('--seed', default=42, show_default=True, help='Random seed for the synthetic measurements')
+def main(sizes, seed):
+    """Compare per-measurement cost of scalar and vectorized color recipe computation."""
+    try:
+        results = asyncio.run(
+            bench_color_recipe(sizes=[int(size) for size in sizes.split(",")], seed=seed)
+        )
+    except KeyboardInterrupt:
+        sys.exit(1)
+
+    for row in results:
+        click.echo(
+            f"{row['kernel']:>11} N={row['size']:<7} us/measurement: scalar {row['scalar_us']:8.2f}  "
+            f"batch {row['batch_us']:8.3f}  batch+convert {row['batch_with_convert_us']:8.3f}  "
+            f"speedup {row['scalar_us'] / row['batch_us']:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
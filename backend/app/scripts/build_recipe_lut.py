@@ -0,0 +1,78 @@
+"""Build the precomputed color recipe lookup table from the active recipe model."""
+
+import asyncio
+import logging
+import os
+import sys
+import time
+
+import click
+
+from app.config import settings
+from app.services.color_recipe_ai_service import get_color_recipe_ai_service
+from app.services.color_recipe_lut import build_lookup_table
+
+logger = logging.getLogger(__name__)
+
+
+async def build_recipe_lut(*, output: str, l_step: float, ab_step: float, ab_range: float) -> dict:
+    """Evaluate `settings.color_recipe_model` over the Lab grid and write the table to `output`."""
+    if settings.color_recipe_model == "knn":
+        from app.db.session import AsyncSessionLocal
+        from app.services.color_recipe_index import get_recipe_index, refresh_recipe_index
+
+        async with AsyncSessionLocal() as db:
+            await refresh_recipe_index(db, get_recipe_index())
+        logger.info(f"Loaded {len(get_recipe_index())} completed sessions into the k-NN index")
+
+    service = get_color_recipe_ai_service(use_lookup_table=False)
+    return await build_lookup_table(
+        service,
+        output,
+        l_step=l_step,
+        ab_step=ab_step,
+        ab_range=ab_range,
+        model=settings.color_recipe_model,
+    )
+
+
+@click.command()
+@click.option(
+    '--output',
+    default=settings.color_recipe_lut_path or "data/color_recipe_lut.bin",
+    show_default=True,
+    help='Table file to write (replaced atomically)',
+)
+@click.option('--l-step', default=1.0, show_default=True, help='Grid step along L (0..100)')
+@click.option('--ab-step', default=1.0, show_default=True, help='Grid step along a and b')
+@click.option('--ab-range', default=64.0, show_default=True, help='Grid covers a, b in [-range, range]')
+@click.option('--env', default='.env', help='Environment file to load (default: .env)')
+def main(output: str, l_step: float, ab_step: float, ab_range: float, env: str):
+    """Precompute recipes over a quantized Lab grid per region into a memory-mappable file."""
+    if os.path.exists(env):
+        from dotenv import load_dotenv
+        load_dotenv(env)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    start = time.perf_counter()
+    try:
+        header = asyncio.run(build_recipe_lut(output=output, l_step=l_step, ab_step=ab_step, ab_range=ab_range))
+    except KeyboardInterrupt:
+        logger.info("Operation cancelled by user")
+        sys.exit(1)
+    except Exception as e:
+        logger.error(f"Recipe lookup table build failed: {e}")
+        sys.exit(1)
+
+    click.echo(
+        f"model={header['model']} shape={header['shape']} size={os.path.getsize(output)} bytes "
+        f"in {time.perf_counter() - start:.1f}s -> {output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Sweep orphaned and soft-deleted uploaded images from storage and the database."""
+
+import asyncio
+import logging
+import os
+import sys
+from datetime import timedelta
+
+import click
+
+from app.config import settings
+from app.db.session import AsyncSessionLocal
+from app.services.image_gc_service import ImageGarbageCollector
+
+logger = logging.getLogger(__name__)
+
+
+async def gc_images(
+    *,
+    dry_run: bool,
+    grace_minutes: int,
+    batch_size: int,
+    concurrency: int,
+) -> dict:
+    """Run a single image GC sweep and return its report."""
+    collector = ImageGarbageCollector(
+        grace_period=timedelta(minutes=grace_minutes),
+        batch_size=batch_size,
+        concurrency=concurrency,
+    )
+    async with AsyncSessionLocal() as db:
+        report = await collector.sweep(db, dry_run=dry_run)
+    return report.as_dict()
+
+
+@click.command()
+@click.option('--dry-run', is_flag=True, help='Report what would be deleted without deleting')
+@click.option(
+    '--grace-minutes',
+    default=settings.image_gc_grace_period_minutes,
+    show_default=True,
+    help='Only sweep images older than this many minutes',
+)
+@click.option(
+    '--batch-size',
+    default=settings.image_gc_batch_size,
+    show_default=True,
+    help='Rows examined per batch',
+)
+@click.option(
+    '--concurrency',
+    default=settings.image_gc_concurrency,
+    show_default=True,
+    help='Maximum concurrent file deletions',
+)
+@click.option('--env', default='.env', help='Environment file to load (default: .env)')
+def main(dry_run: bool, grace_minutes: int, batch_size: int, concurrency: int, env: str):
+    """Delete images that were never attached to a session or were soft-deleted."""
+    if os.path.exists(env):
+        from dotenv import load_dotenv
+        load_dotenv(env)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    try:
+        report = asyncio.run(
+            gc_images(
+                dry_run=dry_run,
+                grace_minutes=grace_minutes,
+                batch_size=batch_size,
+                concurrency=concurrency,
+            )
+        )
+    except KeyboardInterrupt:
+        logger.info("Operation cancelled by user")
+        sys.exit(1)
+    except Exception as e:
+        logger.error(f"Image GC failed: {e}")
+        sys.exit(1)
+
+    prefix = "[dry-run] " if report["dry_run"] else ""
+    click.echo(
+        f"{prefix}scanned={report['scanned']} deleted={report['deleted']} "
+        f"failed={report['failed']} reclaimed_bytes={report['reclaimed_bytes']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
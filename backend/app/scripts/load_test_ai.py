@@ -0,0 +1,172 @@
+"""Load-test harness for the /v1/ai/* routes.
+
+Drives a running API (typically configured against `make ai-standin`) with a
+fixed number of concurrent callers and reports throughput, latency
+percentiles and status codes, followed by the layer metrics from
+`/v1/ai/status`.
+"""
+
+import asyncio
+import json
+import statistics
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+import click
+import httpx
+
+_ENDPOINTS = {
+    "complete": "/v1/ai/complete",
+    "chat": "/v1/ai/chat",
+    "embed": "/v1/ai/embed",
+    "complete-stream": "/v1/ai/complete/stream",
+    "chat-stream": "/v1/ai/chat/stream",
+}
+
+
+def _payload(endpoint: str, index: int, distinct: int, temperature: Optional[float]) -> Dict:
+    text = f"load test prompt {index % distinct}"
+    if endpoint == "embed":
+        return {"texts": [text]}
+    body: Dict = {"max_tokens": 32}
+    if temperature is not None:
+        body["temperature"] = temperature
+    if endpoint.startswith("chat"):
+        body["messages"] = [{"role": "user", "content": text}]
+    else:
+        body["prompt"] = text
+    return body
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def _login(client: httpx.AsyncClient, email: str, password: str) -> str:
+    response = await client.post("/v1/auth/login", json={"email": email, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def run_load(
+    *,
+    base_url: str,
+    endpoint: str,
+    requests: int,
+    concurrency: int,
+    distinct: int,
+    temperature: Optional[float],
+    token: Optional[str],
+    email: Optional[str],
+    password: Optional[str],
+) -> Dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        if token is None and email:
+            token = await _login(client, email, password or "")
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+
+        path = _ENDPOINTS[endpoint]
+        streaming = endpoint.endswith("-stream")
+        latencies: List[float] = []
+        first_byte: List[float] = []
+        statuses: Counter = Counter()
+        queue: asyncio.Queue = asyncio.Queue()
+        for index in range(requests):
+            queue.put_nowait(index)
+
+        async def worker() -> None:
+            while True:
+                try:
+                    index = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                body = _payload(endpoint, index, distinct, temperature)
+                start = time.perf_counter()
+                try:
+                    if streaming:
+                        async with client.stream("POST", path, json=body, headers=headers) as response:
+                            ttfb = None
+                            async for _ in response.aiter_bytes():
+                                if ttfb is None:
+                                    ttfb = time.perf_counter() - start
+                            status = response.status_code
+                        if ttfb is not None:
+                            first_byte.append(ttfb)
+                    else:
+                        response = await client.post(path, json=body, headers=headers)
+                        status = response.status_code
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                latencies.append(time.perf_counter() - start)
+                statuses[str(status)] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+        status_response = await client.get("/v1/ai/status")
+        ai_status = status_response.json().get("data") if status_response.status_code == 200 else None
+
+    report = {
+        "endpoint": endpoint,
+        "requests": requests,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "requests_per_sec": round(requests / elapsed, 1) if elapsed else 0.0,
+        "statuses": dict(statuses),
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies) * 1000, 1) if latencies else 0.0,
+            "p50": round(_percentile(latencies, 50) * 1000, 1),
+            "p95": round(_percentile(latencies, 95) * 1000, 1),
+            "p99": round(_percentile(latencies, 99) * 1000, 1),
+            "max": round(max(latencies, default=0.0) * 1000, 1),
+        },
+        "ai_status": ai_status,
+    }
+    if streaming:
+        report["first_byte_ms"] = {
+            "p50": round(_percentile(first_byte, 50) * 1000, 1),
+            "p95": round(_percentile(first_byte, 95) * 1000, 1),
+        }
+    return report
+
+
+@click.command()
+@click.option('--base-url', default='http://localhost:8000', show_default=True, help='API under test')
+@click.option('--endpoint', type=click.Choice(sorted(_ENDPOINTS)), default='complete', show_default=True)
+@click.option('--requests', 'request_count', default=500, show_default=True, help='Total requests')
+@click.option('--concurrency', default=50, show_default=True, help='Concurrent callers')
+@click.option('--distinct', default=1000000, show_default=True, help='Distinct prompts (lower = more cache/single-flight hits)')
+@click.option('--temperature', type=float, default=None, help='Sampling temperature (0 makes responses cacheable)')
+@click.option('--token', default=None, help='Bearer token')
+@click.option('--email', default=None, help='Log in with this user instead of --token')
+@click.option('--password', default=None)
+def main(base_url, endpoint, request_count, concurrency, distinct, temperature, token, email, password):
+    """Drive /v1/ai/* with concurrent callers and print a JSON report."""
+    try:
+        report = asyncio.run(
+            run_load(
+                base_url=base_url,
+                endpoint=endpoint,
+                requests=request_count,
+                concurrency=concurrency,
+                distinct=distinct,
+                temperature=temperature,
+                token=token,
+                email=email,
+                password=password,
+            )
+        )
+    except KeyboardInterrupt:
+        sys.exit(1)
+    click.echo(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Move flat-layout uploaded images into the hash-sharded directory layout.
+
+The migration is online: each file is first hard-linked (or copied) to its new
+location, the batch of `uploaded_image` rows is updated in one statement, and
+only then are the old paths removed. Requests keep resolving either the old or
+the new path at every point in between.
+"""
+
+import asyncio
+import logging
+import os
+import shutil
+import sys
+from pathlib import Path
+from typing import Optional
+
+import click
+
+from app.core.storage.local import LocalStorage, sharded_relative_path
+from app.db.session import AsyncSessionLocal
+from app.db.repositories.uploaded_image_repo import UploadedImageRepository
+
+logger = logging.getLogger(__name__)
+
+_ORIGINALS_DIR = "images"
+_THUMBNAILS_DIR = "images/thumbnails"
+
+
+def _flat_target(directory: str, storage_path: Optional[str]) -> Optional[str]:
+    """Return the sharded path for a file stored directly in `directory`."""
+    if not storage_path:
+        return None
+    prefix = f"{directory}/"
+    if not storage_path.startswith(prefix):
+        return None
+    name = storage_path[len(prefix):]
+    if not name or "/" in name:
+        return None
+    return sharded_relative_path(directory, name)
+
+
+def _link_or_copy(root: Path, source: str, target: str) -> bool:
+    src = root / source
+    dst = root / target
+    if not src.exists():
+        return dst.exists()
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if dst.exists():
+        return True
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+    return True
+
+
+def _unlink(root: Path, storage_path: str) -> None:
+    (root / storage_path).unlink(missing_ok=True)
+
+
+async def migrate_image_layout(*, batch_size: int = 500, dry_run: bool = False) -> dict:
+    """Migrate every flat-layout image, returning counts of the work done."""
+    storage = LocalStorage(sharded=True)
+    root = storage.upload_root
+    repository = UploadedImageRepository()
+    stats = {"scanned": 0, "migrated": 0, "skipped": 0}
+    last_id = 0
+
+    async with AsyncSessionLocal() as db:
+        while True:
+            batch = await repository.get_batch_after(db, after_id=last_id, limit=batch_size)
+            if not batch:
+                break
+            last_id = batch[-1].id
+            stats["scanned"] += len(batch)
+
+            updates: list[dict] = []
+            stale_paths: list[str] = []
+            for image in batch:
+                new_path = _flat_target(_ORIGINALS_DIR, image.storage_path)
+                new_thumb = _flat_target(_THUMBNAILS_DIR, image.thumbnail_storage_path)
+                if new_path is None and new_thumb is None:
+                    continue
+                if dry_run:
+                    stats["migrated"] += 1
+                    continue
+
+                row: dict = {"id": image.id}
+                if new_path is not None:
+                    if not await asyncio.to_thread(_link_or_copy, root, image.storage_path, new_path):
+                        logger.warning(f"Missing file for image {image.id}: {image.storage_path}")
+                        stats["skipped"] += 1
+                        continue
+                    row["storage_path"] = new_path
+                    row["public_url"] = storage.public_url_for(new_path)
+                    stale_paths.append(image.storage_path)
+                if new_thumb is not None and await asyncio.to_thread(
+                    _link_or_copy, root, image.thumbnail_storage_path, new_thumb
+                ):
+                    row["thumbnail_storage_path"] = new_thumb
+                    row["thumbnail_url"] = storage.public_url_for(new_thumb)
+                    stale_paths.append(image.thumbnail_storage_path)
+                if len(row) > 1:
+                    updates.append(row)
+
+            if updates:
+                await repository.bulk_update(db, updates)
+                stats["migrated"] += len(updates)
+                for path in stale_paths:
+                    await asyncio.to_thread(_unlink, root, path)
+
+            logger.info(
+                f"Image layout migration progress: scanned={stats['scanned']} "
+                f"migrated={stats['migrated']} skipped={stats['skipped']} last_id={last_id}"
+            )
+            if len(batch) < batch_size:
+                break
+
+    return stats
+
+
+@click.command()
+@click.option('--batch-size', default=500, show_default=True, help='Rows migrated per batch')
+@click.option('--dry-run', is_flag=True, help='Count flat-layout images without moving them')
+@click.option('--env', default='.env', help='Environment file to load (default: .env)')
+def main(batch_size: int, dry_run: bool, env: str):
+    """Move flat-layout uploads to the sharded layout and update their URLs."""
+    if os.path.exists(env):
+        from dotenv import load_dotenv
+        load_dotenv(env)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    try:
+        stats = asyncio.run(migrate_image_layout(batch_size=batch_size, dry_run=dry_run))
+    except KeyboardInterrupt:
+        logger.info("Operation cancelled by user")
+        sys.exit(1)
+    except Exception as e:
+        logger.error(f"Image layout migration failed: {e}")
+        sys.exit(1)
+
+    prefix = "[dry-run] " if dry_run else ""
+    click.echo(
+        f"{prefix}scanned={stats['scanned']} migrated={stats['migrated']} "
+        f"skipped={stats['skipped']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
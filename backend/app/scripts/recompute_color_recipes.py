@@ -0,0 +1,93 @@
+"""Recompute the color recipe of every open treatment session after a model change."""
+
+import asyncio
+import logging
+import os
+import sys
+from typing import Optional
+
+import click
+
+from app.db.session import AsyncSessionLocal
+from app.services.color_recipes_service import ColorRecipesService
+
+logger = logging.getLogger(__name__)
+
+
+async def recompute_color_recipes(
+    *,
+    shop_id: Optional[int],
+    batch_size: int,
+    after_id: int,
+    dry_run: bool,
+    include_completed: bool = False,
+) -> dict:
+    """Run a full recomputation, logging progress per batch, and return the final report."""
+    service = ColorRecipesService()
+    report = None
+    async with AsyncSessionLocal() as db:
+        async for report in service.recompute_color_recipes(
+            db,
+            shop_id=shop_id,
+            batch_size=batch_size,
+            after_id=after_id,
+            dry_run=dry_run,
+            include_completed=include_completed,
+        ):
+            logger.info(
+                f"batch {report.batches}: scanned={report.scanned} updated={report.updated} "
+                f"skipped={report.skipped} last_session_id={report.last_session_id}"
+            )
+    if report is None:
+        return {"scanned": 0, "updated": 0, "skipped": 0, "batches": 0, "last_session_id": None, "dry_run": dry_run}
+    return report.as_dict()
+
+
+@click.command()
+@click.option('--shop-id', type=int, default=None, help='Only recompute sessions of this shop')
+@click.option('--batch-size', default=500, show_default=True, help='Sessions per batch (one query and one UPDATE each)')
+@click.option('--after-id', default=0, show_default=True, help='Resume after this session ID')
+@click.option('--dry-run', is_flag=True, help='Compute recipes without writing them')
+@click.option(
+    '--include-completed',
+    is_flag=True,
+    help='Also overwrite the recipes of completed sessions (kept by default; the k-NN model learns from them)',
+)
+@click.option('--env', default='.env', help='Environment file to load (default: .env)')
+def main(shop_id: Optional[int], batch_size: int, after_id: int, dry_run: bool, include_completed: bool, env: str):
+    """Recompute color recipes in keyset batches; re-run with --after-id to resume."""
+    if os.path.exists(env):
+        from dotenv import load_dotenv
+        load_dotenv(env)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    try:
+        report = asyncio.run(
+            recompute_color_recipes(
+                shop_id=shop_id,
+                batch_size=batch_size,
+                after_id=after_id,
+                dry_run=dry_run,
+                include_completed=include_completed,
+            )
+        )
+    except KeyboardInterrupt:
+        logger.info("Operation cancelled by user")
+        sys.exit(1)
+    except Exception as e:
+        logger.error(f"Color recipe recomputation failed: {e}")
+        sys.exit(1)
+
+    prefix = "[dry-run] " if report["dry_run"] else ""
+    click.echo(
+        f"{prefix}scanned={report['scanned']} updated={report['updated']} "
+        f"skipped={report['skipped']} batches={report['batches']} last_session_id={report['last_session_id']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Fit a local color recipe model on completed sessions and save it as a NumPy `.npz` file."""
+
+import asyncio
+import logging
+import os
+import sys
+from pathlib import Path
+
+import click
+import numpy as np
+
+from app.config import settings
+from app.services.color_recipe_engine import RECIPE_CHANNELS, lab_array, region_means
+from app.services.color_recipe_runner import NumpyModelRunner, recipe_features
+
+logger = logging.getLogger(__name__)
+
+
+async def load_training_data(batch_size: int = 1000):
+    """(features, recipes) of every active completed session with a recipe and measurements."""
+    from app.db.repositories.skin_measurements_repo import SkinMeasurementsRepository
+    from app.db.repositories.treatment_sessions_repo import TreatmentSessionsRepository
+    from app.db.session import AsyncSessionLocal
+
+    session_repository = TreatmentSessionsRepository()
+    measurement_repository = SkinMeasurementsRepository()
+    features, recipes = [], []
+    after_id = 0
+    async with AsyncSessionLocal() as db:
+        while True:
+            sessions = await session_repository.get_completed_recipes_after(db, after_id=after_id, limit=batch_size)
+            if not sessions:
+                break
+            after_id = sessions[-1].id
+            sessions = [s for s in sessions if all(getattr(s, channel) is not None for channel in RECIPE_CHANNELS)]
+            position = {s.id: number for number, s in enumerate(sessions)}
+            rows = await measurement_repository.get_lab_by_session_ids(db, list(position))
+            if not rows:
+                continue
+            means, counts = region_means(
+                lab_array(rows),
+                [row.region_type for row in rows],
+                groups=np.array([position[row.session_id] for row in rows], dtype=np.intp),
+                n_groups=len(sessions),
+            )
+            measured = counts.sum(axis=1) > 0
+            features.append(recipe_features(means[measured], counts[measured]))
+            recipes.append(np.array([[getattr(s, c) for c in RECIPE_CHANNELS] for s in sessions])[measured])
+    if not features:
+        return np.empty((0, 8), dtype=np.float32), np.empty((0, 4))
+    return np.concatenate(features), np.concatenate(recipes).astype(np.float64)
+
+
+def fit_linear_model(features: np.ndarray, recipes: np.ndarray, ridge: float = 1e-3) -> dict:
+    """Ridge regression from standardized features to the four recipe channels, as `.npz` arrays."""
+    mean = features.mean(axis=0)
+    scale = features.std(axis=0)
+    scale[scale == 0] = 1.0
+    x = np.hstack([(features - mean) / scale, np.ones((len(features), 1))])
+    penalty = ridge * np.eye(x.shape[1])
+    penalty[-1, -1] = 0.0  # don't shrink the intercept
+    coefficients = np.linalg.solve(x.T @ x + penalty, x.T @ recipes)
+    return {
+        "mean": mean.astype(np.float32),
+        "scale": scale.astype(np.float32),
+        "w0": coefficients[:-1].astype(np.float32),
+        "b0": coefficients[-1].astype(np.float32),
+    }
+
+
+@click.command()
+@click.option(
+    '--output',
+    default=settings.color_recipe_model_path or "data/color_recipe_model.npz",
+    show_default=True,
+    help='Model file to write (.npz, replaced atomically)',
+)
+@click.option('--ridge', default=1e-3, show_default=True, help='L2 penalty on the standardized weights')
+@click.option('--min-sessions', default=50, show_default=True, help='Refuse to train on fewer sessions')
+@click.option('--env', default='.env', help='Environment file to load (default: .env)')
+def main(output: str, ridge: float, min_sessions: int, env: str):
+    """Fit a linear recipe model on completed sessions (serve it with COLOR_RECIPE_MODEL=local)."""
+    if os.path.exists(env):
+        from dotenv import load_dotenv
+        load_dotenv(env)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    try:
+        features, recipes = asyncio.run(load_training_data())
+    except KeyboardInterrupt:
+        logger.info("Operation cancelled by user")
+        sys.exit(1)
+    except Exception as e:
+        logger.error(f"Loading training sessions failed: {e}")
+        sys.exit(1)
+    if len(features) < min_sessions:
+        logger.error(f"Only {len(features)} completed sessions with measurements; need {min_sessions}")
+        sys.exit(1)
+
+    weights = fit_linear_model(features, recipes, ridge=ridge)
+    path = Path(output)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp.npz")
+    np.savez(tmp_path, **weights)
+    os.replace(tmp_path, path)
+
+    predicted = NumpyModelRunner(path).predict(features)
+    exact = (predicted == recipes).mean(axis=0)
+    click.echo(
+        f"sessions={len(features)} exact_match="
+        + " ".join(f"{channel}:{rate:.2f}" for channel, rate in zip(RECIPE_CHANNELS, exact))
+        + f" -> {path}"
+    )
+
+
+if __name__ == "__main__":
+    main()
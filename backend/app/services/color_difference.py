@@ -0,0 +1,157 @@
+"""Vectorized CIE color differences (CIE76 and CIEDE2000) over Lab arrays.
+
+Every function broadcasts over leading dimensions: pass (..., 3) arrays of
+L, a, b and get (...) differences back, so one call compares any number of
+pairs. NaN inputs give NaN differences.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from app.services.color_recipe_engine import lab_array, region_means
+
+_25_POW_7 = 25.0 ** 7
+
+
+def delta_e_76(lab1: np.ndarray, lab2: np.ndarray) -> np.ndarray:
+    """CIE76 ΔE*ab: Euclidean distance in Lab."""
+    diff = np.asarray(lab1, dtype=np.float64) - np.asarray(lab2, dtype=np.float64)
+    return np.sqrt((diff * diff).sum(axis=-1))
+
+
+def delta_e_2000(
+    lab1: np.ndarray,
+    lab2: np.ndarray,
+    k_l: float = 1.0,
+    k_c: float = 1.0,
+    k_h: float = 1.0,
+) -> np.ndarray:
+    """CIEDE2000 ΔE00 (Sharma, Wu & Dalal 2005), with parametric factors `k_l`, `k_c`, `k_h`."""
+    lab1 = np.asarray(lab1, dtype=np.float64)
+    lab2 = np.asarray(lab2, dtype=np.float64)
+    l1, a1, b1 = lab1[..., 0], lab1[..., 1], lab1[..., 2]
+    l2, a2, b2 = lab2[..., 0], lab2[..., 1], lab2[..., 2]
+
+    # a' stretches the a axis of near-neutral colors.
+    c_mean7 = ((np.hypot(a1, b1) + np.hypot(a2, b2)) / 2) ** 7
+    g = 0.5 * (1 - np.sqrt(c_mean7 / (c_mean7 + _25_POW_7)))
+    a1p = (1 + g) * a1
+    a2p = (1 + g) * a2
+    c1p = np.hypot(a1p, b1)
+    c2p = np.hypot(a2p, b2)
+    h1p = np.degrees(np.arctan2(b1, a1p)) % 360
+    h2p = np.degrees(np.arctan2(b2, a2p)) % 360
+    chroma_product = c1p * c2p
+    achromatic = chroma_product == 0
+
+    # Hue difference, taken the short way round the circle.
+    dhp = h2p - h1p
+    dhp = np.where(dhp > 180, dhp - 360, np.where(dhp < -180, dhp + 360, dhp))
+    dhp = np.where(achromatic, 0.0, dhp)
+    d_l = l2 - l1
+    d_c = c2p - c1p
+    d_h = 2 * np.sqrt(chroma_product) * np.sin(np.radians(dhp / 2))
+
+    # Mean hue, also taken the short way round.
+    h_sum = h1p + h2p
+    h_mean = np.where(
+        np.abs(h1p - h2p) <= 180,
+        h_sum / 2,
+        np.where(h_sum < 360, (h_sum + 360) / 2, (h_sum - 360) / 2),
+    )
+    h_mean = np.where(achromatic, h_sum, h_mean)
+    l_mean = (l1 + l2) / 2
+    c_mean = (c1p + c2p) / 2
+
+    t = (
+        1
+        - 0.17 * np.cos(np.radians(h_mean - 30))
+        + 0.24 * np.cos(np.radians(2 * h_mean))
+        + 0.32 * np.cos(np.radians(3 * h_mean + 6))
+        - 0.20 * np.cos(np.radians(4 * h_mean - 63))
+    )
+    l_offset2 = (l_mean - 50) ** 2
+    s_l = 1 + 0.015 * l_offset2 / np.sqrt(20 + l_offset2)
+    s_c = 1 + 0.045 * c_mean
+    s_h = 1 + 0.015 * c_mean * t
+    c_mean7p = c_mean ** 7
+    r_c = 2 * np.sqrt(c_mean7p / (c_mean7p + _25_POW_7))
+    r_t = -np.sin(np.radians(60 * np.exp(-(((h_mean - 275) / 25) ** 2)))) * r_c
+
+    term_l = d_l / (k_l * s_l)
+    term_c = d_c / (k_c * s_c)
+    term_h = d_h / (k_h * s_h)
+    return np.sqrt(term_l ** 2 + term_c ** 2 + term_h ** 2 + r_t * term_c * term_h)
+
+
+def session_color_differences(
+    lab: np.ndarray,
+    region_types: Sequence[Optional[str]],
+    groups: Optional[np.ndarray] = None,
+    n_groups: Optional[int] = None,
+) -> Dict[str, np.ndarray]:
+    """Lesion-vs-normal color differences per group (e.g. per session).
+
+    Compares each group's mean LESION reading with its mean NORMAL reading,
+    and each LESION reading with the NORMAL mean for the worst case. Returns
+    (G,) arrays: `normal_count`, `lesion_count`, `delta_e_2000`, `delta_e_76`
+    and `max_delta_e_2000`; differences are NaN where a region is missing.
+    """
+    lab = np.asarray(lab, dtype=np.float64).reshape(-1, 3)
+    if groups is None:
+        groups = np.zeros(len(lab), dtype=np.intp)
+    groups = np.asarray(groups, dtype=np.intp)
+    if n_groups is None:
+        n_groups = int(groups.max()) + 1 if len(groups) else 1
+    means, counts = region_means(lab, region_types, groups=groups, n_groups=n_groups)
+    normal, lesion = means[:, 0], means[:, 1]
+
+    is_lesion = np.array([region_type == "LESION" for region_type in region_types], dtype=bool)
+    per_reading = delta_e_2000(lab[is_lesion], normal[groups[is_lesion]])
+    worst = np.full(n_groups, -np.inf)
+    np.fmax.at(worst, groups[is_lesion], per_reading)
+    worst[np.isneginf(worst)] = np.nan
+
+    return {
+        "normal_count": counts[:, 0],
+        "lesion_count": counts[:, 1],
+        "delta_e_2000": delta_e_2000(lesion, normal),
+        "delta_e_76": delta_e_76(lesion, normal),
+        "max_delta_e_2000": worst,
+    }
+
+
+def summarize_sessions(measurements: Iterable) -> List[Dict[str, Any]]:
+    """Lesion-vs-normal summary per session for API responses.
+
+    Takes objects with `session_id`, `l_value`, `a_value`, `b_value` and
+    `region_type`; returns one dict per session in order of first appearance,
+    with differences rounded to 2 decimals and None where undefined.
+    """
+    measurements = list(measurements)
+    if not measurements:
+        return []
+    session_ids = list(dict.fromkeys(m.session_id for m in measurements))
+    position = {session_id: number for number, session_id in enumerate(session_ids)}
+    summary = session_color_differences(
+        lab_array(measurements),
+        [m.region_type for m in measurements],
+        groups=np.array([position[m.session_id] for m in measurements], dtype=np.intp),
+        n_groups=len(session_ids),
+    )
+
+    def rounded(value: float) -> Optional[float]:
+        return None if np.isnan(value) else round(float(value), 2)
+
+    return [
+        {
+            "session_id": session_id,
+            "normal_count": int(summary["normal_count"][number]),
+            "lesion_count": int(summary["lesion_count"][number]),
+            "delta_e_2000": rounded(summary["delta_e_2000"][number]),
+            "delta_e_76": rounded(summary["delta_e_76"][number]),
+            "max_delta_e_2000": rounded(summary["max_delta_e_2000"][number]),
+        }
+        for number, session_id in enumerate(session_ids)
+    ]
@@ -1,9 +1,18 @@
 """AI service interface for color recipe recommendation."""
 
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Any
+from typing import TYPE_CHECKING, Dict, List, Optional, Any, Sequence
 from dataclasses import dataclass
 
+import numpy as np
+
+from app.services.color_recipe_engine import DEFAULT_RECIPE, lab_array, linear_recipes, region_means, region_points
+
+if TYPE_CHECKING:
+    from app.services.color_recipe_index import RecipeNeighborIndex
+    from app.services.color_recipe_lut import RecipeLookupTable
+    from app.services.color_recipe_runner import ModelWorkerPool
+
 
 @dataclass
 class SkinMeasurementData:
@@ -27,6 +36,9 @@ class ColorRecipeRecommendation:
 class ColorRecipeAIService(ABC):
     """Abstract interface for color recipe AI recommendation service."""
     
+    # Identifies what the model computes; cached recipes from another version are recomputed.
+    model_version: str = "unversioned"
+    
     @abstractmethod
     async def recommend_color_recipe(
         self,
@@ -45,11 +57,67 @@ class ColorRecipeAIService(ABC):
             AIError: If the recommendation request fails
         """
         pass
+    
+    async def recommend_batch(
+        self,
+        lab: np.ndarray,
+        groups: Optional[np.ndarray] = None,
+        mask: Optional[np.ndarray] = None,
+        region_types: Optional[Sequence[Optional[str]]] = None,
+        n_groups: Optional[int] = None,
+        session_ids: Optional[Sequence[Optional[int]]] = None
+    ) -> np.ndarray:
+        """
+        Recommend color recipes for many measurement sets at once.
+        
+        Args:
+            lab: (N, 3) array of L, a, b values, NaN where a value is missing
+            groups: (N,) recommendation index of each measurement (all 0 if omitted)
+            mask: (N,) boolean region mask; measurements outside it are ignored
+            region_types: (N,) region type of each measurement, for models that use it
+            n_groups: Number of recommendations (defaults to max(groups) + 1)
+            session_ids: (G,) session each group is for, if any; models that
+                learn from past sessions leave that session out of its answer
+            
+        Returns:
+            np.ndarray: (G, 4) uint8 recipes (melanin, white, red, yellow), one
+            per group, equal to `recommend_color_recipe` on that group's
+            measurements
+        """
+        # Fallback for implementations without a vectorized path.
+        lab = np.asarray(lab, dtype=np.float64).reshape(-1, 3)
+        groups = np.zeros(len(lab), dtype=np.intp) if groups is None else np.asarray(groups)
+        if n_groups is None:
+            n_groups = int(groups.max()) + 1 if len(groups) else 1
+        members: List[List[SkinMeasurementData]] = [[] for _ in range(n_groups)]
+        for index, (l_value, a_value, b_value) in enumerate(lab.tolist()):
+            if mask is not None and not mask[index]:
+                continue
+            members[groups[index]].append(
+                SkinMeasurementData(
+                    l_value=None if np.isnan(l_value) else l_value,
+                    a_value=None if np.isnan(a_value) else a_value,
+                    b_value=None if np.isnan(b_value) else b_value,
+                    region_type=region_types[index] if region_types is not None else None
+                )
+            )
+        recipes = np.empty((n_groups, 4), dtype=np.uint8)
+        for index, measurements in enumerate(members):
+            recommendation = await self.recommend_color_recipe(measurements)
+            recipes[index] = (
+                recommendation.melanin,
+                recommendation.white,
+                recommendation.red,
+                recommendation.yellow
+            )
+        return recipes
 
 
 class MockColorRecipeAIService(ColorRecipeAIService):
     """Mock implementation of ColorRecipeAIService for development/testing."""
     
+    model_version = "mock-linear-1"
+    
     async def recommend_color_recipe(
         self,
         measurements: List[SkinMeasurementData]
@@ -84,14 +152,294 @@ class MockColorRecipeAIService(ColorRecipeAIService):
             red=red,
             yellow=yellow
         )
+    
+    async def recommend_batch(
+        self,
+        lab: np.ndarray,
+        groups: Optional[np.ndarray] = None,
+        mask: Optional[np.ndarray] = None,
+        region_types: Optional[Sequence[Optional[str]]] = None,
+        n_groups: Optional[int] = None,
+        session_ids: Optional[Sequence[Optional[int]]] = None
+    ) -> np.ndarray:
+        """Vectorized `recommend_color_recipe` over all groups at once."""
+        return linear_recipes(lab, groups=groups, mask=mask, n_groups=n_groups)
+
+
+class NearestNeighborColorRecipeAIService(ColorRecipeAIService):
+    """Recommend the recipes used in past completed sessions with similar readings.
+
+    Each region's mean Lab is looked up in a `RecipeNeighborIndex`; the `k`
+    nearest sessions vote on every channel with weight 1 / distance; a group's
+    own session (`session_ids`) never votes for it. Requests with no usable
+    reading, or made while the index is still empty, get the
+    `fallback` service's answer.
+    """
+    
+    def __init__(
+        self,
+        index: Optional["RecipeNeighborIndex"] = None,
+        k: int = 8,
+        fallback: Optional[ColorRecipeAIService] = None
+    ):
+        from app.services.color_recipe_index import get_recipe_index
+        
+        self.index = index if index is not None else get_recipe_index()
+        self.k = k
+        self.fallback = fallback or MockColorRecipeAIService()
+    
+    @property
+    def model_version(self) -> str:
+        return f"knn:k={self.k}:region_weight={self.index.region_weight}"
+    
+    async def recommend_color_recipe(
+        self,
+        measurements: List[SkinMeasurementData]
+    ) -> ColorRecipeRecommendation:
+        recipes = await self.recommend_batch(
+            lab_array(measurements),
+            region_types=[m.region_type for m in measurements],
+            n_groups=1
+        )
+        melanin, white, red, yellow = recipes[0].tolist()
+        return ColorRecipeRecommendation(melanin=melanin, white=white, red=red, yellow=yellow)
+    
+    async def recommend_batch(
+        self,
+        lab: np.ndarray,
+        groups: Optional[np.ndarray] = None,
+        mask: Optional[np.ndarray] = None,
+        region_types: Optional[Sequence[Optional[str]]] = None,
+        n_groups: Optional[int] = None,
+        session_ids: Optional[Sequence[Optional[int]]] = None
+    ) -> np.ndarray:
+        """Distance-weighted k-NN vote per group, answering every group with one index query."""
+        lab = np.asarray(lab, dtype=np.float64).reshape(-1, 3)
+        groups = np.zeros(len(lab), dtype=np.intp) if groups is None else np.asarray(groups, dtype=np.intp)
+        if n_groups is None:
+            n_groups = int(groups.max()) + 1 if len(groups) else 1
+        if mask is not None:
+            lab, groups = lab[mask], groups[mask]
+            if region_types is not None:
+                region_types = [region for region, keep in zip(region_types, mask) if keep]
+        
+        points, point_groups = region_points(
+            lab, region_types=region_types, groups=groups, n_groups=n_groups,
+            region_weight=self.index.region_weight
+        )
+        recipes = np.empty((n_groups, 4), dtype=np.uint8)
+        votes = np.zeros((n_groups, 4, 10), dtype=np.float64)
+        if len(points) and len(self.index):
+            exclude = None
+            if session_ids is not None:
+                # Leave-one-out: a completed session would otherwise be its own nearest neighbor.
+                exclude = np.array([-1 if s is None else s for s in session_ids], dtype=np.int64)[point_groups]
+            distances, neighbor_recipes = self.index.query(points, self.k, exclude=exclude)
+            weights = 1.0 / (distances + 1e-3)  # infinite distance (no neighbor) -> 0
+            for channel in range(4):
+                slots = point_groups[:, None] * 10 + neighbor_recipes[:, :, channel]
+                votes[:, channel] = np.bincount(
+                    slots.ravel(), weights=weights.ravel(), minlength=n_groups * 10
+                ).reshape(n_groups, 10)
+            recipes[:] = votes.argmax(axis=2)
+        
+        unanswered = votes[:, 0].sum(axis=1) == 0
+        if unanswered.any():
+            fallback = await self.fallback.recommend_batch(
+                lab, groups=groups, region_types=region_types, n_groups=n_groups, session_ids=session_ids
+            )
+            recipes[unanswered] = fallback[unanswered]
+        return recipes
+
+
+class LookupTableColorRecipeAIService(ColorRecipeAIService):
+    """Answer from a precomputed `RecipeLookupTable` instead of running the model.
+
+    The table holds the model's answer for a single reading per region, which
+    is also its answer for any request whose readings are all complete and
+    all in one region (NORMAL/untagged or LESION): the models only see the
+    per-region mean. Those requests are looked up at their mean; every other
+    request (mixed regions, missing values, no readings), and every call while
+    no table is available, goes to `fallback` (the model itself).
+    """
+    
+    def __init__(
+        self,
+        fallback: ColorRecipeAIService,
+        table: Optional["RecipeLookupTable"] = None,
+        interpolation: str = "nearest"
+    ):
+        self.fallback = fallback
+        self.table = table
+        self.interpolation = interpolation
+    
+    def _current_table(self) -> Optional["RecipeLookupTable"]:
+        if self.table is not None:
+            return self.table
+        from app.services.color_recipe_lut import get_recipe_lookup_table
+        
+        return get_recipe_lookup_table()
+    
+    @property
+    def model_version(self) -> str:
+        table = self._current_table()
+        if table is None:
+            return self.fallback.model_version
+        return f"lut:{table.header.get('model')}:{table.header.get('built_at')}:{self.interpolation}"
+    
+    async def recommend_color_recipe(
+        self,
+        measurements: List[SkinMeasurementData]
+    ) -> ColorRecipeRecommendation:
+        table = self._current_table()
+        lesion = [m.region_type == "LESION" for m in measurements]
+        complete = all(
+            m.l_value is not None and m.a_value is not None and m.b_value is not None for m in measurements
+        )
+        if table is None or not measurements or not complete or any(lesion) != all(lesion):
+            return await self.fallback.recommend_color_recipe(measurements)
+        if self.interpolation != "nearest":
+            recipes = await self.recommend_batch(
+                lab_array(measurements),
+                region_types=[m.region_type for m in measurements],
+                n_groups=1
+            )
+            melanin, white, red, yellow = recipes[0].tolist()
+        else:
+            # Single request: plain Python is cheaper than building arrays.
+            mean = [
+                sum(getattr(m, channel) for m in measurements) / len(measurements)
+                for channel in ("l_value", "a_value", "b_value")
+            ]
+            melanin, white, red, yellow = table.lookup_one(*mean, lesion=lesion[0])
+        return ColorRecipeRecommendation(melanin=melanin, white=white, red=red, yellow=yellow)
+    
+    async def recommend_batch(
+        self,
+        lab: np.ndarray,
+        groups: Optional[np.ndarray] = None,
+        mask: Optional[np.ndarray] = None,
+        region_types: Optional[Sequence[Optional[str]]] = None,
+        n_groups: Optional[int] = None,
+        session_ids: Optional[Sequence[Optional[int]]] = None
+    ) -> np.ndarray:
+        """One table lookup per single-region group; the other groups in one `fallback` call."""
+        table = self._current_table()
+        if table is None:
+            return await self.fallback.recommend_batch(
+                lab, groups=groups, mask=mask, region_types=region_types, n_groups=n_groups, session_ids=session_ids
+            )
+        lab = np.asarray(lab, dtype=np.float64).reshape(-1, 3)
+        groups = np.zeros(len(lab), dtype=np.intp) if groups is None else np.asarray(groups, dtype=np.intp)
+        if n_groups is None:
+            n_groups = int(groups.max()) + 1 if len(groups) else 1
+        if mask is not None:
+            lab, groups = lab[mask], groups[mask]
+            if region_types is not None:
+                region_types = [region for region, keep in zip(region_types, mask) if keep]
+        
+        means, counts = region_means(lab, region_types, groups=groups, n_groups=n_groups)
+        incomplete = np.bincount(groups, weights=np.isnan(lab).any(axis=1), minlength=n_groups) > 0
+        lesion = counts[:, 1] > 0
+        answered = ((counts[:, 0] > 0) != lesion) & ~incomplete
+        
+        recipes = np.empty((n_groups, 4), dtype=np.uint8)
+        recipes[answered] = table.lookup(
+            np.where(lesion[answered, None], means[answered, 1], means[answered, 0]),
+            lesion[answered],
+            self.interpolation
+        )
+        if not answered.all():
+            # Renumber the remaining groups densely for the model.
+            rest = ~answered
+            position = np.cumsum(rest) - 1
+            keep = rest[groups]
+            recipes[rest] = await self.fallback.recommend_batch(
+                lab[keep],
+                groups=position[groups[keep]],
+                region_types=None if region_types is None else [r for r, k in zip(region_types, keep) if k],
+                n_groups=int(rest.sum()),
+                session_ids=None if session_ids is None else [s for s, r in zip(session_ids, rest) if r]
+            )
+        return recipes
+
 
+class LocalModelColorRecipeAIService(ColorRecipeAIService):
+    """Run a trained model file (NumPy or ONNX) in the warm worker processes of a `ModelWorkerPool`.
 
-def get_color_recipe_ai_service() -> ColorRecipeAIService:
+    Each request is reduced to its NORMAL and LESION mean readings
+    (`recipe_features`); requests without readings get the default recipe.
+    """
+    
+    def __init__(self, pool: Optional["ModelWorkerPool"] = None):
+        from app.services.color_recipe_runner import get_model_pool
+        
+        self.pool = pool if pool is not None else get_model_pool()
+    
+    @property
+    def model_version(self) -> str:
+        return f"local:{self.pool.version}"
+    
+    async def recommend_color_recipe(
+        self,
+        measurements: List[SkinMeasurementData]
+    ) -> ColorRecipeRecommendation:
+        recipes = await self.recommend_batch(
+            lab_array(measurements),
+            region_types=[m.region_type for m in measurements],
+            n_groups=1
+        )
+        melanin, white, red, yellow = recipes[0].tolist()
+        return ColorRecipeRecommendation(melanin=melanin, white=white, red=red, yellow=yellow)
+    
+    async def recommend_batch(
+        self,
+        lab: np.ndarray,
+        groups: Optional[np.ndarray] = None,
+        mask: Optional[np.ndarray] = None,
+        region_types: Optional[Sequence[Optional[str]]] = None,
+        n_groups: Optional[int] = None,
+        session_ids: Optional[Sequence[Optional[int]]] = None
+    ) -> np.ndarray:
+        """One model row per group with readings, predicted in a single pool call."""
+        from app.services.color_recipe_runner import recipe_features
+        
+        lab = np.asarray(lab, dtype=np.float64).reshape(-1, 3)
+        groups = np.zeros(len(lab), dtype=np.intp) if groups is None else np.asarray(groups, dtype=np.intp)
+        if n_groups is None:
+            n_groups = int(groups.max()) + 1 if len(groups) else 1
+        if mask is not None:
+            lab, groups = lab[mask], groups[mask]
+            if region_types is not None:
+                region_types = [region for region, keep in zip(region_types, mask) if keep]
+        
+        means, counts = region_means(lab, region_types, groups=groups, n_groups=n_groups)
+        measured = counts.sum(axis=1) > 0
+        recipes = np.empty((n_groups, 4), dtype=np.uint8)
+        recipes[:] = DEFAULT_RECIPE
+        if measured.any():
+            recipes[measured] = await self.pool.predict(recipe_features(means[measured], counts[measured]))
+        return recipes
+
+
+def get_color_recipe_ai_service(use_lookup_table: bool = True) -> ColorRecipeAIService:
     """
     Factory function to get ColorRecipeAIService instance.
-    In production, this would return the actual AI service implementation.
+    The model is selected by `settings.color_recipe_model`: "knn" (past completed
+    sessions), "local" (the model file at `settings.color_recipe_model_path`,
+    run in worker processes) or "mock". When `settings.color_recipe_lut_path`
+    is set (and `use_lookup_table` is true) it is answered from the
+    precomputed lookup table.
     """
-    # TODO: 실제 AI 모델 서비스 구현 시 여기서 반환
-    # 예: return OpenAIColorRecipeService() 또는 CustomAIColorRecipeService()
-    return MockColorRecipeAIService()
+    from app.config import settings
+    
+    if settings.color_recipe_model == "knn":
+        service: ColorRecipeAIService = NearestNeighborColorRecipeAIService(k=settings.color_recipe_knn_k)
+    elif settings.color_recipe_model == "local":
+        service = LocalModelColorRecipeAIService()
+    else:
+        service = MockColorRecipeAIService()
+    if use_lookup_table and settings.color_recipe_lut_path:
+        return LookupTableColorRecipeAIService(service, interpolation=settings.color_recipe_lut_interpolation)
+    return service
 
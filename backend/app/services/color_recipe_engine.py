@@ -0,0 +1,152 @@
+"""Vectorized color recipe computation over arrays of Lab measurements.
+
+Measurements are passed as an (N, 3) float array of L, a, b with NaN for a
+missing value; recipes come back as uint8 arrays with the channels in
+`RECIPE_CHANNELS` order. Each kernel reproduces a scalar implementation
+exactly (same operations in the same order), so batch and per-request results
+never disagree.
+"""
+
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+RECIPE_CHANNELS = ("melanin", "white", "red", "yellow")
+DEFAULT_RECIPE = (5, 5, 5, 5)
+
+
+def lab_array(measurements: Iterable) -> np.ndarray:
+    """(N, 3) float64 array from objects with `l_value`, `a_value`, `b_value` (None -> NaN)."""
+    rows = [
+        (
+            np.nan if m.l_value is None else m.l_value,
+            np.nan if m.a_value is None else m.a_value,
+            np.nan if m.b_value is None else m.b_value,
+        )
+        for m in measurements
+    ]
+    return np.array(rows, dtype=np.float64).reshape(-1, 3)
+
+
+def region_mask(region_types: Sequence[Optional[str]], region: str) -> np.ndarray:
+    """Boolean mask of the measurements tagged with `region` (e.g. "LESION")."""
+    return np.array([region_type == region for region_type in region_types], dtype=bool)
+
+
+def _clip_recipe(values: np.ndarray) -> np.ndarray:
+    return np.clip(values, 0, 9).astype(np.uint8)
+
+
+def linear_recipes(
+    lab: np.ndarray,
+    groups: Optional[np.ndarray] = None,
+    mask: Optional[np.ndarray] = None,
+    n_groups: Optional[int] = None,
+) -> np.ndarray:
+    """Averaged-Lab linear recipe per group; `MockColorRecipeAIService.recommend_color_recipe`.
+
+    `groups[i]` is the recommendation measurement `i` belongs to (all in group 0
+    when omitted) and `mask` drops measurements (e.g. keep only one region).
+    Groups without measurements get `DEFAULT_RECIPE`. Returns (G, 4) uint8.
+    """
+    lab = np.nan_to_num(np.asarray(lab, dtype=np.float64).reshape(-1, 3), nan=0.0)
+    if groups is None:
+        groups = np.zeros(len(lab), dtype=np.intp)
+    groups = np.asarray(groups, dtype=np.intp)
+    if n_groups is None:
+        n_groups = int(groups.max()) + 1 if len(groups) else 1
+    if mask is not None:
+        lab = lab[mask]
+        groups = groups[mask]
+
+    # np.add.at accumulates in index order, like the scalar left-to-right sum,
+    # so averages match bit for bit (a pairwise sum could flip a truncation).
+    sums = np.zeros((n_groups, 3), dtype=np.float64)
+    np.add.at(sums, groups, lab)
+    counts = np.bincount(groups, minlength=n_groups)
+    present = counts > 0
+    avg = sums[present] / counts[present, None]
+
+    recipes = np.empty((n_groups, 4), dtype=np.float64)
+    recipes[:] = DEFAULT_RECIPE
+    recipes[present, 0] = np.trunc(5 + (50 - avg[:, 0]) / 10)
+    recipes[present, 1] = np.trunc(5 + (avg[:, 0] - 50) / 10)
+    recipes[present, 2] = np.trunc(5 + avg[:, 1] / 5)
+    recipes[present, 3] = np.trunc(5 + avg[:, 2] / 5)
+    return _clip_recipe(recipes)
+
+
+def measurement_recipes(lab: np.ndarray) -> np.ndarray:
+    """Per-measurement recipe used by `SkinMeasurementsService`. Returns (N, 4) uint8."""
+    lab = np.nan_to_num(np.asarray(lab, dtype=np.float64).reshape(-1, 3), nan=0.0)
+    l_value, a_value, b_value = lab[:, 0], lab[:, 1], lab[:, 2]
+    recipes = np.stack(
+        [
+            np.where(l_value != 0, (100 - l_value) / 10, 0.0),
+            l_value / 10,
+            a_value / 10,
+            b_value / 10,
+        ],
+        axis=1,
+    )
+    # np.rint rounds half to even, like the scalar round().
+    return _clip_recipe(np.rint(recipes))
+
+
+def region_means(
+    lab: np.ndarray,
+    region_types: Optional[Sequence[Optional[str]]] = None,
+    groups: Optional[np.ndarray] = None,
+    n_groups: Optional[int] = None,
+):
+    """Mean Lab per group and region, ignoring missing values.
+
+    Returns `(means, counts)`: (G, 2, 3) float64 means, with region 0 for
+    NORMAL (or untagged) and 1 for LESION readings and NaN for a channel with
+    no values, and (G, 2) reading counts.
+    """
+    lab = np.asarray(lab, dtype=np.float64).reshape(-1, 3)
+    if groups is None:
+        groups = np.zeros(len(lab), dtype=np.intp)
+    groups = np.asarray(groups, dtype=np.intp)
+    if n_groups is None:
+        n_groups = int(groups.max()) + 1 if len(groups) else 1
+    lesion = np.zeros(len(lab), dtype=np.intp)
+    if region_types is not None:
+        lesion = region_mask(region_types, "LESION").astype(np.intp)
+
+    keys = groups * 2 + lesion
+    present = ~np.isnan(lab)
+    sums = np.zeros((n_groups * 2, 3), dtype=np.float64)
+    counts = np.zeros((n_groups * 2, 3), dtype=np.float64)
+    np.add.at(sums, keys, np.where(present, lab, 0.0))
+    np.add.at(counts, keys, present)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.where(counts > 0, sums / counts, np.nan)
+    readings = np.bincount(keys, minlength=n_groups * 2)
+    return means.reshape(n_groups, 2, 3), readings.reshape(n_groups, 2)
+
+
+def region_points(
+    lab: np.ndarray,
+    region_types: Optional[Sequence[Optional[str]]] = None,
+    groups: Optional[np.ndarray] = None,
+    n_groups: Optional[int] = None,
+    region_weight: float = 100.0,
+):
+    """Nearest-neighbor features: one (L, a, b, region) point per group and region.
+
+    Each point is the mean Lab of a group's measurements in one region (missing
+    values ignored); the fourth coordinate is `region_weight` for "LESION" and
+    0 otherwise, so neighbors from the other region are penalized by that much.
+    Region means with a channel that has no values at all are dropped.
+
+    Returns `(points, point_groups)`: (P, 4) float64 and (P,) group indices.
+    """
+    means, _ = region_means(lab, region_types, groups=groups, n_groups=n_groups)
+    means = means.reshape(-1, 3)
+    usable = np.flatnonzero(~np.isnan(means).any(axis=1))
+    points = np.empty((len(usable), 4), dtype=np.float64)
+    points[:, :3] = means[usable]
+    points[:, 3] = (usable % 2) * region_weight
+    return points, usable // 2
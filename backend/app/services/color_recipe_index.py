@@ -0,0 +1,287 @@
+"""In-memory nearest-neighbor index over completed sessions' Lab readings and recipes."""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.spatial import cKDTree
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.db.repositories.skin_measurements_repo import SkinMeasurementsRepository
+from app.db.repositories.treatment_sessions_repo import TreatmentSessionsRepository
+from app.services.color_recipe_engine import RECIPE_CHANNELS, lab_array, region_points
+
+logger = logging.getLogger(__name__)
+
+# Sessions updated shortly before the previous refresh may have committed after
+# it read the table, so each refresh re-reads this much of the past.
+_REFRESH_OVERLAP = timedelta(minutes=1)
+
+
+class RecipeNeighborIndex:
+    """k-NN index of (L, a, b, region) points of completed sessions and their recipes.
+
+    Points live in a KD-tree built from a snapshot, plus a delta of sessions
+    added or changed since that is searched by brute force. Replaced or removed
+    sessions are masked out of the tree. Once the delta and masked rows together
+    exceed `rebuild_threshold` the tree is rebuilt, so a refresh costs time
+    proportional to what changed rather than to the size of the index.
+    """
+
+    def __init__(self, *, region_weight: float = 100.0, rebuild_threshold: int = 2000):
+        self.region_weight = region_weight
+        self.rebuild_threshold = rebuild_threshold
+        self.refreshed_until: Optional[datetime] = None
+        self.rebuilds = 0
+        self._sessions: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self._tree: Optional[cKDTree] = None
+        self._tree_recipes = np.empty((0, 4), dtype=np.uint8)
+        self._tree_sessions = np.empty(0, dtype=np.int64)
+        self._tree_alive = np.empty(0, dtype=bool)
+        self._tree_rows: Dict[int, np.ndarray] = {}
+        self._dead_rows = 0
+        self._delta: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self._delta_points = np.empty((0, 4), dtype=np.float64)
+        self._delta_recipes = np.empty((0, 4), dtype=np.uint8)
+        self._delta_sessions = np.empty(0, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def upsert(self, session_id: int, points: np.ndarray, recipe) -> None:
+        """Add or replace a session's points; call `commit` to make changes searchable."""
+        if len(points) == 0:
+            self.remove(session_id)
+            return
+        self._mask_tree_rows(session_id)
+        entry = (np.asarray(points, dtype=np.float64).reshape(-1, 4), np.asarray(recipe, dtype=np.uint8))
+        self._sessions[session_id] = entry
+        self._delta[session_id] = entry
+
+    def remove(self, session_id: int) -> None:
+        self._sessions.pop(session_id, None)
+        self._delta.pop(session_id, None)
+        self._mask_tree_rows(session_id)
+
+    def commit(self) -> None:
+        """Publish pending changes, rebuilding the tree if the delta has grown too large."""
+        delta_rows = sum(len(points) for points, _ in self._delta.values())
+        if self._tree is None or delta_rows + self._dead_rows > self.rebuild_threshold:
+            self.rebuild()
+            return
+        self._delta_points, self._delta_recipes, self._delta_sessions = self._stack(self._delta)
+
+    def rebuild(self) -> None:
+        points, recipes, sessions = self._stack(self._sessions)
+        self._tree = cKDTree(points) if len(points) else None
+        self._tree_recipes = recipes
+        self._tree_sessions = sessions
+        self._tree_alive = np.ones(len(points), dtype=bool)
+        self._tree_rows = {}
+        start = 0
+        for session_id, (session_points, _) in self._sessions.items():
+            self._tree_rows[session_id] = np.arange(start, start + len(session_points))
+            start += len(session_points)
+        self._dead_rows = 0
+        self._delta = {}
+        self._delta_points, self._delta_recipes, self._delta_sessions = self._stack(self._delta)
+        self.rebuilds += 1
+
+    def query(
+        self, points: np.ndarray, k: int, exclude: Optional[Sequence[int]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """The `k` nearest indexed points of each query point.
+
+        `exclude` gives, per query point, a session whose points are skipped
+        (-1 for none), so a session never counts as its own neighbor.
+        Returns distances (Q, k') and recipes (Q, k', 4) with k' <= k; slots
+        without a neighbor have an infinite distance.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 4)
+        distances = [np.full((len(points), 0), np.inf)]
+        recipes = [np.empty((len(points), 0, 4), dtype=np.uint8)]
+        sessions = [np.empty((len(points), 0), dtype=np.int64)]
+        width = k
+        if exclude is not None:
+            exclude = np.asarray(exclude, dtype=np.int64).reshape(-1)
+            # Ask for enough extra neighbors to skip every point of the excluded session.
+            excluded = [self._sessions[session_id][0] for session_id in set(exclude.tolist()) if session_id in self._sessions]
+            width += max((len(session_points) for session_points in excluded), default=0)
+
+        if self._tree is not None:
+            tree_distances, rows = self._query_tree(points, width)
+            distances.append(tree_distances)
+            recipes.append(self._tree_recipes[rows])
+            sessions.append(self._tree_sessions[rows])
+        if len(self._delta_points):
+            offsets = points[:, None, :] - self._delta_points[None, :, :]
+            distances.append(np.sqrt((offsets * offsets).sum(axis=2)))
+            recipes.append(np.broadcast_to(self._delta_recipes, (len(points),) + self._delta_recipes.shape))
+            sessions.append(np.broadcast_to(self._delta_sessions, (len(points), len(self._delta_sessions))))
+
+        distances = np.concatenate(distances, axis=1)
+        recipes = np.concatenate(recipes, axis=1)
+        if exclude is not None:
+            distances = np.where(np.concatenate(sessions, axis=1) == exclude[:, None], np.inf, distances)
+        if distances.shape[1] > k:
+            nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+            distances = np.take_along_axis(distances, nearest, axis=1)
+            recipes = np.take_along_axis(recipes, nearest[:, :, None], axis=1)
+        return distances, recipes
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self._sessions),
+            "tree_points": int(self._tree_alive.sum()),
+            "delta_points": len(self._delta_points),
+            "masked_points": self._dead_rows,
+            "rebuilds": self.rebuilds,
+            "refreshed_until": self.refreshed_until.isoformat() if self.refreshed_until else None,
+        }
+
+    def _query_tree(self, points: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        size = len(self._tree_alive)
+        width = min(k, size)
+        distances, rows = self._tree.query(points, k=width)
+        distances = distances.reshape(len(points), width)
+        rows = rows.reshape(len(points), width)
+        hit_masked = ~self._tree_alive[rows].all(axis=1)
+        if hit_masked.any():
+            # Ask again for enough neighbors to skip every masked row.
+            wide = min(k + self._dead_rows, size)
+            more_distances, more_rows = self._tree.query(points[hit_masked], k=wide)
+            more_rows = more_rows.reshape(-1, wide)
+            more_distances = np.where(self._tree_alive[more_rows], more_distances.reshape(-1, wide), np.inf)
+            nearest = np.argsort(more_distances, axis=1, kind="stable")[:, :width]
+            distances[hit_masked] = np.take_along_axis(more_distances, nearest, axis=1)
+            rows[hit_masked] = np.take_along_axis(more_rows, nearest, axis=1)
+        return np.where(self._tree_alive[rows], distances, np.inf), rows
+
+    def _mask_tree_rows(self, session_id: int) -> None:
+        rows = self._tree_rows.pop(session_id, None)
+        if rows is not None:
+            self._tree_alive[rows] = False
+            self._dead_rows += len(rows)
+
+    @staticmethod
+    def _stack(entries: Dict[int, Tuple[np.ndarray, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Points, recipes and session ids of `entries`, one row per point."""
+        if not entries:
+            return np.empty((0, 4), dtype=np.float64), np.empty((0, 4), dtype=np.uint8), np.empty(0, dtype=np.int64)
+        points = np.concatenate([session_points for session_points, _ in entries.values()])
+        recipes = np.concatenate(
+            [np.broadcast_to(recipe, (len(session_points), 4)) for session_points, recipe in entries.values()]
+        )
+        sessions = np.repeat(
+            np.fromiter(entries, dtype=np.int64, count=len(entries)),
+            [len(session_points) for session_points, _ in entries.values()],
+        )
+        return points, recipes, sessions
+
+
+def _has_recipe(row) -> bool:
+    return (
+        bool(row.is_completed)
+        and not row.is_deleted
+        and all(getattr(row, channel) is not None for channel in RECIPE_CHANNELS)
+    )
+
+
+async def refresh_recipe_index(
+    db: AsyncSession,
+    index: RecipeNeighborIndex,
+    *,
+    batch_size: int = 1000,
+    session_repository: Optional[TreatmentSessionsRepository] = None,
+    measurement_repository: Optional[SkinMeasurementsRepository] = None,
+) -> int:
+    """Load completed sessions changed since the last refresh into `index`; returns rows examined.
+
+    The first call loads every completed session. Later calls read only
+    sessions updated since, adding newly completed ones and dropping sessions
+    that were reopened, deleted or lost their recipe.
+    """
+    session_repository = session_repository or TreatmentSessionsRepository()
+    measurement_repository = measurement_repository or SkinMeasurementsRepository()
+    started_at = datetime.utcnow()
+    since = index.refreshed_until - _REFRESH_OVERLAP if index.refreshed_until else None
+
+    examined = 0
+    cursor: Tuple[Optional[datetime], int] = (since, 0)
+    while True:
+        if since is None:
+            rows = await session_repository.get_completed_recipes_after(db, after_id=cursor[1], limit=batch_size)
+        else:
+            rows = await session_repository.get_updated_since(
+                db, since=cursor[0], after_id=cursor[1], limit=batch_size
+            )
+        if not rows:
+            break
+        cursor = (rows[-1].updated_at, rows[-1].id)
+        examined += len(rows)
+
+        usable = [row for row in rows if _has_recipe(row)]
+        measurements = await measurement_repository.get_lab_by_session_ids(db, [row.id for row in usable])
+        position = {row.id: number for number, row in enumerate(usable)}
+        points, point_groups = region_points(
+            lab_array(measurements),
+            region_types=[measurement.region_type for measurement in measurements],
+            groups=np.array([position[measurement.session_id] for measurement in measurements], dtype=np.intp),
+            n_groups=max(len(usable), 1),
+            region_weight=index.region_weight,
+        )
+        for row in rows:
+            if row.id not in position:
+                index.remove(row.id)
+                continue
+            recipe = [getattr(row, channel) for channel in RECIPE_CHANNELS]
+            index.upsert(row.id, points[point_groups == position[row.id]], recipe)
+
+        if len(rows) < batch_size:
+            break
+
+    index.commit()
+    index.refreshed_until = started_at
+    return examined
+
+
+_recipe_index: Optional[RecipeNeighborIndex] = None
+
+
+def get_recipe_index() -> RecipeNeighborIndex:
+    """Get the process-wide recipe index, creating it from settings on first use."""
+    global _recipe_index
+    if _recipe_index is None:
+        _recipe_index = RecipeNeighborIndex(
+            region_weight=settings.color_recipe_knn_region_weight,
+            rebuild_threshold=settings.color_recipe_knn_rebuild_threshold,
+        )
+    return _recipe_index
+
+
+def set_recipe_index(index: Optional[RecipeNeighborIndex]) -> None:
+    """Replace the process-wide recipe index (for testing)."""
+    global _recipe_index
+    _recipe_index = index
+
+
+async def run_recipe_index_refresh_loop(stop_event: asyncio.Event) -> None:
+    """Refresh the recipe index every `color_recipe_knn_refresh_interval_sec` until `stop_event` is set."""
+    from app.db.session import AsyncSessionLocal
+
+    index = get_recipe_index()
+    while not stop_event.is_set():
+        try:
+            async with AsyncSessionLocal() as db:
+                examined = await refresh_recipe_index(db, index)
+            if examined:
+                logger.info(f"Recipe index refreshed: {examined} sessions examined, {len(index)} indexed")
+        except Exception as e:
+            logger.error(f"Recipe index refresh failed: {e}")
+        try:
+            await asyncio.wait_for(stop_event.wait(), timeout=settings.color_recipe_knn_refresh_interval_sec)
+        except asyncio.TimeoutError:
+            pass
@@ -0,0 +1,190 @@
+"""Precomputed color recipe lookup table over a quantized Lab grid.
+
+`build_lookup_table` evaluates a recipe model once per grid point and region
+and writes the recipes to a single file: a small JSON header followed by a
+C-ordered uint8 array of shape (2, L, a, b, 4) (region 0 is NORMAL, 1 is
+LESION). `RecipeLookupTable` memory-maps that file read-only, so every uvicorn
+worker on a host shares one copy through the page cache, and answers with
+nearest-grid-point or trilinear lookups.
+"""
+
+import json
+import logging
+import os
+import struct
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.services.color_recipe_engine import RECIPE_CHANNELS
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"RECIPELUT1\n"
+_ALIGN = 64
+REGIONS = ("NORMAL", "LESION")
+INTERPOLATIONS = ("nearest", "trilinear")
+
+
+def grid_axes(l_step: float = 1.0, ab_step: float = 1.0, ab_range: float = 64.0) -> Tuple[np.ndarray, ...]:
+    """Grid coordinates: L over [0, 100] and a, b over [-ab_range, ab_range]."""
+    l_axis = np.arange(0.0, 100.0 + l_step / 2, l_step)
+    ab_axis = np.arange(-ab_range, ab_range + ab_step / 2, ab_step)
+    return l_axis, ab_axis, ab_axis.copy()
+
+
+class RecipeLookupTable:
+    """Read-only, memory-mapped recipe table; see the module docstring for the layout."""
+
+    def __init__(self, table: np.ndarray, header: Dict[str, Any], path: Optional[Path] = None):
+        # A plain ndarray view of the memmap indexes several times faster
+        # (and still keeps the mapping alive through its base).
+        self.table = np.asarray(table)
+        self.header = header
+        self.path = path
+        self._start = np.array([axis[0] for axis in header["axes"]], dtype=np.float64)
+        self._step = np.array([axis[1] for axis in header["axes"]], dtype=np.float64)
+        self._last = np.array([axis[2] - 1 for axis in header["axes"]], dtype=np.intp)
+
+    @classmethod
+    def open(cls, path) -> "RecipeLookupTable":
+        path = Path(path)
+        with path.open("rb") as fp:
+            if fp.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"{path} is not a recipe lookup table")
+            (header_size,) = struct.unpack("<I", fp.read(4))
+            header = json.loads(fp.read(header_size))
+        table = np.memmap(path, dtype=np.uint8, mode="r", offset=header["data_offset"], shape=tuple(header["shape"]))
+        return cls(table, header, path)
+
+    def lookup_one(self, l_value: float, a_value: float, b_value: float, lesion: bool = False) -> Tuple[int, ...]:
+        """Nearest-grid-point recipe for a single reading, without array overhead."""
+        index = []
+        for value, (start, step, count) in zip((l_value, a_value, b_value), self.header["axes"]):
+            position = round(((value or 0.0) - start) / step)
+            index.append(min(max(position, 0), count - 1))
+        return tuple(self.table[int(lesion), index[0], index[1], index[2]].tolist())
+
+    def lookup(
+        self,
+        lab: np.ndarray,
+        lesion: Optional[np.ndarray] = None,
+        interpolation: str = "nearest",
+    ) -> np.ndarray:
+        """Recipes for (N, 3) Lab readings; `lesion` picks the LESION table per reading. Returns (N, 4) uint8.
+
+        Missing values count as 0 and readings outside the grid are clamped to its edge.
+        """
+        if interpolation not in INTERPOLATIONS:
+            raise ValueError(f"Unknown interpolation {interpolation!r}; expected one of {INTERPOLATIONS}")
+        lab = np.nan_to_num(np.asarray(lab, dtype=np.float64).reshape(-1, 3), nan=0.0)
+        region = np.zeros(len(lab), dtype=np.intp) if lesion is None else np.asarray(lesion, dtype=np.intp)
+        position = np.clip((lab - self._start) / self._step, 0, self._last)
+
+        if interpolation == "nearest":
+            index = np.rint(position).astype(np.intp)
+            return np.asarray(self.table[region, index[:, 0], index[:, 1], index[:, 2]])
+
+        low = np.minimum(np.floor(position).astype(np.intp), np.maximum(self._last - 1, 0))
+        high = np.minimum(low + 1, self._last)
+        fraction = position - low
+        recipes = np.zeros((len(lab), 4), dtype=np.float64)
+        for corner in range(8):
+            pick = [(corner >> axis) & 1 for axis in range(3)]
+            index = [np.where(pick[axis], high[:, axis], low[:, axis]) for axis in range(3)]
+            weight = np.prod([np.where(pick[axis], fraction[:, axis], 1 - fraction[:, axis]) for axis in range(3)], axis=0)
+            recipes += weight[:, None] * self.table[region, index[0], index[1], index[2]]
+        return np.clip(np.rint(recipes), 0, 9).astype(np.uint8)
+
+
+async def build_lookup_table(
+    service,
+    path,
+    *,
+    l_step: float = 1.0,
+    ab_step: float = 1.0,
+    ab_range: float = 64.0,
+    chunk_size: int = 65536,
+    model: str = "",
+) -> Dict[str, Any]:
+    """Evaluate `service` (a `ColorRecipeAIService`) over the grid and write the table to `path`.
+
+    Every grid point is one single-reading recommendation per region, computed
+    with `recommend_batch` in chunks. The file is written next to `path` and
+    renamed over it, so running workers never map a half-written table.
+    Returns the header.
+    """
+    axes = grid_axes(l_step, ab_step, ab_range)
+    shape = (len(REGIONS),) + tuple(len(axis) for axis in axes) + (len(RECIPE_CHANNELS),)
+    grid = np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1).reshape(-1, 3)
+
+    header: Dict[str, Any] = {
+        "shape": list(shape),
+        "axes": [[float(axis[0]), float(axis[1] - axis[0]), len(axis)] for axis in axes],
+        "regions": list(REGIONS),
+        "channels": list(RECIPE_CHANNELS),
+        "model": model,
+        "built_at": datetime.utcnow().isoformat(),
+    }
+    header_size = len(json.dumps(header)) + 64  # room for data_offset
+    header["data_offset"] = -(-(len(_MAGIC) + 4 + header_size) // _ALIGN) * _ALIGN
+    encoded = json.dumps(header).encode()
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        with tmp_path.open("wb") as fp:
+            fp.write(_MAGIC + struct.pack("<I", len(encoded)) + encoded)
+            fp.truncate(header["data_offset"] + int(np.prod(shape)))
+        table = np.memmap(tmp_path, dtype=np.uint8, mode="r+", offset=header["data_offset"], shape=shape)
+        for region_index, region in enumerate(REGIONS):
+            flat = table[region_index].reshape(-1, len(RECIPE_CHANNELS))
+            for start in range(0, len(grid), chunk_size):
+                chunk = grid[start:start + chunk_size]
+                flat[start:start + len(chunk)] = await service.recommend_batch(
+                    chunk, groups=np.arange(len(chunk)), region_types=[region] * len(chunk), n_groups=len(chunk)
+                )
+        table.flush()
+        del table
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return header
+
+
+_lookup_table: Optional[RecipeLookupTable] = None
+_lookup_table_key: Optional[Tuple[str, int, int]] = None
+
+
+def get_recipe_lookup_table() -> Optional[RecipeLookupTable]:
+    """The table at `settings.color_recipe_lut_path`, or None if unset or unreadable.
+
+    The file is re-mapped when it is replaced (new inode or mtime), so a
+    rebuild is picked up without restarting workers.
+    """
+    global _lookup_table, _lookup_table_key
+    path = settings.color_recipe_lut_path
+    if not path:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        if _lookup_table_key != (path, -1, -1):
+            logger.warning(f"Color recipe lookup table {path} not found; using the model directly")
+        _lookup_table, _lookup_table_key = None, (path, -1, -1)
+        return None
+    key = (path, stat.st_ino, stat.st_mtime_ns)
+    if key != _lookup_table_key:
+        try:
+            _lookup_table = RecipeLookupTable.open(path)
+            logger.info(f"Mapped color recipe lookup table {path} (model={_lookup_table.header.get('model')})")
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Failed to map color recipe lookup table {path}: {e}")
+            _lookup_table = None
+        _lookup_table_key = key
+    return _lookup_table
+
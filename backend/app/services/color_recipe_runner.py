@@ -0,0 +1,331 @@
+"""Local color recipe model served from a pool of warm worker processes.
+
+A model file is loaded once per worker process by a `ModelRunner`: a NumPy
+`.npz` multilayer perceptron (see `NumpyModelRunner`) or an ONNX graph (needs
+the optional `onnxruntime` package). Every model takes the (G, 8) float32
+features of `recipe_features` and returns either (G, 4) recipe values or
+(G, 40) scores over the 10 levels of each channel.
+
+`ModelWorkerPool` sends predict calls to the workers over IPC. Concurrent
+small calls are merged into one call (up to `max_batch` rows, waiting at most
+`max_wait_ms`), and large ones are split across the workers, so inference
+runs in parallel on all CPUs without blocking the event loop.
+"""
+
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+import numpy as np
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+N_FEATURES = 8
+N_LEVELS = 10
+
+
+def recipe_features(means: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """(G, 8) model inputs from `region_means` output.
+
+    NORMAL L, a, b, LESION L, a, b (missing values as 0), then 1.0/0.0 flags
+    for whether the group has NORMAL and LESION readings.
+    """
+    features = np.zeros((len(means), N_FEATURES), dtype=np.float32)
+    features[:, :6] = np.nan_to_num(means.reshape(-1, 6), nan=0.0)
+    features[:, 6:] = counts > 0
+    return features
+
+
+def decode_recipes(outputs: np.ndarray) -> np.ndarray:
+    """(G, 4) uint8 recipes from (G, 4) values (rounded) or (G, 40) level scores (argmax)."""
+    outputs = np.asarray(outputs, dtype=np.float64)
+    if outputs.ndim == 2 and outputs.shape[1] == 4 * N_LEVELS:
+        return outputs.reshape(-1, 4, N_LEVELS).argmax(axis=2).astype(np.uint8)
+    if outputs.ndim == 2 and outputs.shape[1] == 4:
+        return np.clip(np.rint(np.nan_to_num(outputs, nan=5.0)), 0, 9).astype(np.uint8)
+    raise ValueError(f"Model output has shape {outputs.shape}; expected (G, 4) or (G, {4 * N_LEVELS})")
+
+
+class ModelRunner(ABC):
+    """A loaded recipe model; lives inside a worker process."""
+
+    @abstractmethod
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        """(G, 8) float32 features to (G, 4) uint8 recipes."""
+
+
+class NumpyModelRunner(ModelRunner):
+    """Multilayer perceptron stored as a NumPy `.npz` file.
+
+    Layers are `w0, b0, w1, b1, ...` (weights shaped (inputs, outputs)) with
+    ReLU between them; optional `mean` and `scale` standardize the inputs.
+    """
+
+    def __init__(self, path):
+        with np.load(path) as weights:
+            self.mean = weights["mean"].astype(np.float32) if "mean" in weights else None
+            self.scale = weights["scale"].astype(np.float32) if "scale" in weights else None
+            self.layers = []
+            while f"w{len(self.layers)}" in weights:
+                number = len(self.layers)
+                self.layers.append((weights[f"w{number}"].astype(np.float32), weights[f"b{number}"].astype(np.float32)))
+        if not self.layers:
+            raise ValueError(f"{path} has no w0/b0 layer weights")
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        x = np.asarray(features, dtype=np.float32)
+        if self.mean is not None:
+            x = x - self.mean
+        if self.scale is not None:
+            x = x / self.scale
+        for number, (weight, bias) in enumerate(self.layers):
+            x = x @ weight + bias
+            if number < len(self.layers) - 1:
+                np.maximum(x, 0, out=x)
+        return decode_recipes(x)
+
+
+class OnnxModelRunner(ModelRunner):
+    """ONNX graph with one float32 (G, 8) input, run by onnxruntime on one thread per worker."""
+
+    def __init__(self, path):
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise RuntimeError("ONNX recipe models need the onnxruntime package") from e
+        options = onnxruntime.SessionOptions()
+        # The pool provides the parallelism; one thread per worker avoids oversubscription.
+        options.intra_op_num_threads = 1
+        options.inter_op_num_threads = 1
+        self.session = onnxruntime.InferenceSession(str(path), options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        (outputs, *_) = self.session.run(None, {self.input_name: np.asarray(features, dtype=np.float32)})
+        return decode_recipes(outputs)
+
+
+def load_model_runner(path) -> ModelRunner:
+    """Runner for the model file at `path`, picked by its suffix (.npz or .onnx)."""
+    suffix = Path(path).suffix.lower()
+    if suffix == ".npz":
+        return NumpyModelRunner(path)
+    if suffix == ".onnx":
+        return OnnxModelRunner(path)
+    raise ValueError(f"Unsupported recipe model file {path}; expected .npz or .onnx")
+
+
+def model_file_version(path) -> str:
+    """`<file name>@<sha256 prefix>`, so a replaced model file changes the version."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fp:
+        for chunk in iter(lambda: fp.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return f"{Path(path).name}@{digest.hexdigest()[:12]}"
+
+
+# Worker process state: the model is loaded once by the pool initializer.
+_worker_runner: Optional[ModelRunner] = None
+
+
+def _init_worker(path: str) -> None:
+    global _worker_runner
+    _worker_runner = load_model_runner(path)
+
+
+def _worker_predict(features: np.ndarray) -> np.ndarray:
+    return _worker_runner.predict(features)
+
+
+@dataclass
+class _PendingPredict:
+    features: np.ndarray
+    future: asyncio.Future
+
+
+@dataclass
+class _PredictQueue:
+    pending: List[_PendingPredict] = field(default_factory=list)
+    rows: int = 0
+    timer: Optional[asyncio.TimerHandle] = None
+
+
+class ModelWorkerPool:
+    """Warm worker processes serving batched `predict` calls for one model file."""
+
+    def __init__(self, path, workers: int = 2, max_batch: int = 256, max_wait_ms: float = 2.0):
+        self.path = str(path)
+        self.workers = max(1, workers)
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000
+        self.version = model_file_version(self.path)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._queue = _PredictQueue()
+        self._tasks: Set[asyncio.Task] = set()
+        self.calls = 0
+        self.batches = 0
+        self.rows = 0
+
+    async def start(self) -> None:
+        """Start the workers and wait until each has loaded the model."""
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._executor is not None:
+                return
+            # spawn: forking a process that runs an event loop and threads is unsafe.
+            executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.path,),
+            )
+            loop = asyncio.get_running_loop()
+            warmup = np.zeros((1, N_FEATURES), dtype=np.float32)
+            try:
+                # One call per worker starts them all; a bad model file fails here, not on a request.
+                await asyncio.gather(
+                    *(loop.run_in_executor(executor, _worker_predict, warmup) for _ in range(self.workers))
+                )
+            except BaseException:
+                executor.shutdown(cancel_futures=True)
+                raise
+            self._executor = executor
+            logger.info(f"Started {self.workers} color recipe model workers for {self.version}")
+
+    async def predict(self, features: np.ndarray) -> np.ndarray:
+        """(G, 8) features to (G, 4) uint8 recipes, computed in the workers."""
+        features = np.ascontiguousarray(features, dtype=np.float32).reshape(-1, N_FEATURES)
+        if not len(features):
+            return np.empty((0, 4), dtype=np.uint8)
+        if self._executor is None:
+            await self.start()
+        self.calls += 1
+
+        if len(features) >= self.max_batch:
+            # Large call: one chunk per worker, in parallel.
+            chunks = np.array_split(features, min(self.workers, -(-len(features) // self.max_batch)))
+            results = await asyncio.gather(*(self._run(chunk) for chunk in chunks))
+            return np.concatenate(results)
+
+        queue = self._queue
+        if queue.rows + len(features) > self.max_batch:
+            self._flush()
+        request = _PendingPredict(features, asyncio.get_running_loop().create_future())
+        queue.pending.append(request)
+        queue.rows += len(features)
+        if queue.rows >= self.max_batch:
+            self._flush()
+        elif queue.timer is None:
+            queue.timer = asyncio.get_running_loop().call_later(self.max_wait, self._flush)
+        return await request.future
+
+    async def _run(self, features: np.ndarray) -> np.ndarray:
+        self.batches += 1
+        self.rows += len(features)
+        if self._executor is None:
+            # A batch queued before another one found the pool broken; never fall
+            # back to run_in_executor(None), whose threads have no model loaded.
+            await self.start()
+        executor = self._executor
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, _worker_predict, features)
+        except BrokenProcessPool:
+            # A worker died (OOM kill, crash); the executor is unusable, so the next call starts a new one.
+            if self._executor is executor:
+                logger.error(f"Color recipe model worker died; restarting the pool for {self.version}")
+                executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+            raise
+
+    def _flush(self) -> None:
+        queue = self._queue
+        if queue.timer is not None:
+            queue.timer.cancel()
+            queue.timer = None
+        if not queue.pending:
+            return
+        batch = queue.pending
+        self._queue = _PredictQueue()
+        task = asyncio.get_running_loop().create_task(self._send(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: List[_PendingPredict]) -> None:
+        # Callers that were cancelled while queued don't need a prediction.
+        live = [request for request in batch if not request.future.done()]
+        if not live:
+            return
+        try:
+            recipes = await self._run(np.concatenate([request.features for request in live]))
+        except asyncio.CancelledError:
+            for request in live:
+                request.future.cancel()
+            raise
+        except Exception as e:
+            for request in live:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            return
+
+        offset = 0
+        for request in live:
+            end = offset + len(request.features)
+            if not request.future.done():
+                request.future.set_result(recipes[offset:end])
+            offset = end
+
+    async def close(self) -> None:
+        """Answer queued calls, then stop the workers."""
+        if self._queue.pending:
+            self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "model": self.version,
+            "workers": self.workers,
+            "started": self._executor is not None,
+            "calls": self.calls,
+            "batches": self.batches,
+            "rows": self.rows,
+            "avg_rows_per_batch": round(self.rows / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+_model_pool: Optional[ModelWorkerPool] = None
+
+
+def get_model_pool() -> ModelWorkerPool:
+    """Get the process-wide model pool for `settings.color_recipe_model_path`, creating it on first use."""
+    global _model_pool
+    if _model_pool is None:
+        if not settings.color_recipe_model_path:
+            raise RuntimeError("COLOR_RECIPE_MODEL=local needs COLOR_RECIPE_MODEL_PATH")
+        _model_pool = ModelWorkerPool(
+            settings.color_recipe_model_path,
+            workers=settings.color_recipe_model_workers,
+            max_batch=settings.color_recipe_model_max_batch,
+            max_wait_ms=settings.color_recipe_model_max_wait_ms,
+        )
+    return _model_pool
+
+
+def set_model_pool(pool: Optional[ModelWorkerPool]) -> None:
+    """Replace the process-wide model pool (for testing)."""
+    global _model_pool
+    _model_pool = pool
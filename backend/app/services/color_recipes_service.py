@@ -1,16 +1,58 @@
 """Service layer for color recipes domain."""
 
+import hashlib
+import json
+from dataclasses import dataclass
+
+import numpy as np
+
 from app.db.models.treatment_session import TreatmentSession
 from app.db.repositories.treatment_sessions_repo import TreatmentSessionsRepository
 from app.db.repositories.skin_measurements_repo import SkinMeasurementsRepository
 from app.services.color_recipe_ai_service import (
     ColorRecipeAIService,
-    SkinMeasurementData,
     get_color_recipe_ai_service
 )
+from app.services.color_difference import summarize_sessions
+from app.services.color_recipe_engine import RECIPE_CHANNELS, lab_array
 from app.core.exceptions import ForbiddenException
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Optional, Any, Dict
+from typing import AsyncIterator, Iterable, List, Optional, Any, Dict
+
+
+def measurement_fingerprint(measurements: Iterable, model_version: str) -> str:
+    """SHA-256 over the model version and each measurement's id, Lab values and region.
+    
+    Equal fingerprints mean the recipe would be recomputed from the same
+    inputs by the same model, so it can be reused.
+    """
+    payload = [model_version] + sorted(
+        [m.id, m.l_value, m.a_value, m.b_value, m.region_type] for m in measurements
+    )
+    return hashlib.sha256(json.dumps(payload).encode()).hexdigest()
+
+
+@dataclass
+class RecipeRecomputeReport:
+    """Running totals of a bulk color recipe recomputation."""
+
+    scanned: int = 0
+    updated: int = 0
+    skipped: int = 0
+    batches: int = 0
+    last_session_id: Optional[int] = None
+    dry_run: bool = False
+
+    def as_dict(self) -> dict:
+        return {
+            "scanned": self.scanned,
+            "updated": self.updated,
+            "skipped": self.skipped,
+            "batches": self.batches,
+            "last_session_id": self.last_session_id,
+            "dry_run": self.dry_run,
+        }
+
 
 class ColorRecipesService:
     """Service for color recipes domain operations."""
@@ -45,37 +87,30 @@ class ColorRecipesService:
         if not session:
             raise ForbiddenException("Treatment session not found or does not belong to your shop")
         
-        # Get skin color measurements for this session
-        measurements = await self.measurement_repository.get_all(
-            db, 
-            session_id=session_id, 
-            shop_id=shop_id
-        )
+        # Every active measurement of the session, in ID order: the same rows the
+        # recompute path fingerprints, however many there are
+        measurements = await self.measurement_repository.get_lab_by_session_ids(db, [session_id])
         
         if not measurements:
             raise ForbiddenException("No skin color measurements found for this session")
         
-        # Convert measurements to SkinMeasurementData format
-        measurement_data_list = [
-            SkinMeasurementData(
-                l_value=m.l_value,
-                a_value=m.a_value,
-                b_value=m.b_value,
-                region_type=m.region_type,
-                measurement_point=m.measurement_point
-            )
-            for m in measurements
-        ]
+        # Nothing changed since the stored recipe was computed: skip inference
+        fingerprint = measurement_fingerprint(measurements, self.ai_service.model_version)
+        if session.recipe_fingerprint == fingerprint:
+            return session
         
-        # Call AI service to get color recipe recommendation
-        recommendation = await self.ai_service.recommend_color_recipe(measurement_data_list)
+        # A one-group batch, so models built from past sessions leave this one out
+        recipes = await self.ai_service.recommend_batch(
+            lab_array(measurements),
+            region_types=[m.region_type for m in measurements],
+            n_groups=1,
+            session_ids=[session_id]
+        )
         
         # Update treatment session with recommended color recipe
         color_data = {
-            "melanin": recommendation.melanin,
-            "white": recommendation.white,
-            "red": recommendation.red,
-            "yellow": recommendation.yellow
+            **dict(zip(RECIPE_CHANNELS, recipes[0].tolist())),
+            "recipe_fingerprint": fingerprint
         }
         
         updated_session = await self.session_repository.update(db, session_id, color_data)
@@ -102,4 +137,88 @@ class ColorRecipesService:
             TreatmentSession: Treatment session with color recipe, or None if not found
         """
         return await self.session_repository.get_by_id(db, session_id, shop_id=shop_id)
-
+    
+    async def get_color_difference(self, db: AsyncSession, session_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Lesion-vs-normal color difference (CIEDE2000 / CIE76) of a session's measurements.
+        
+        Returns None when the session has no measurements.
+        """
+        rows = await self.measurement_repository.get_lab_by_session_ids(db, [session_id])
+        summaries = summarize_sessions(rows)
+        return summaries[0] if summaries else None
+    
+    async def recompute_color_recipes(
+        self,
+        db: AsyncSession,
+        shop_id: Optional[int] = None,
+        batch_size: int = 500,
+        after_id: int = 0,
+        dry_run: bool = False,
+        include_completed: bool = False
+    ) -> AsyncIterator[RecipeRecomputeReport]:
+        """
+        Recompute the color recipe of every session, yielding progress after each batch.
+        
+        Sessions are read in keyset batches of `batch_size` IDs. Each batch
+        loads its measurements with one query, runs one `recommend_batch` call
+        and writes all recipes with one bulk UPDATE and commit. Sessions
+        without measurements are skipped and keep their recipe. Pass the last
+        reported `last_session_id` as `after_id` to resume an interrupted run.
+        
+        Completed sessions keep their recipe unless `include_completed` is set:
+        it is the one actually used, and the k-NN model learns from it.
+        """
+        report = RecipeRecomputeReport(dry_run=dry_run)
+        last_id = after_id
+        while True:
+            session_ids = await self.session_repository.get_ids_after(
+                db, after_id=last_id, limit=batch_size, shop_id=shop_id, include_completed=include_completed
+            )
+            if not session_ids:
+                break
+            last_id = session_ids[-1]
+            
+            recipes = await self._recommend_for_sessions(
+                session_ids,
+                await self.measurement_repository.get_lab_by_session_ids(db, session_ids)
+            )
+            if recipes and not dry_run:
+                await self.session_repository.bulk_update_recipes(db, recipes)
+            
+            report.batches += 1
+            report.scanned += len(session_ids)
+            report.updated += len(recipes)
+            report.skipped += len(session_ids) - len(recipes)
+            report.last_session_id = last_id
+            yield report
+            
+            if len(session_ids) < batch_size:
+                break
+    
+    async def _recommend_for_sessions(self, session_ids: List[int], rows: List[Any]) -> List[Dict[str, int]]:
+        """Recipes for the sessions that have measurements, as bulk-update rows."""
+        if not rows:
+            return []
+        index = {session_id: position for position, session_id in enumerate(session_ids)}
+        groups = np.fromiter((index[row.session_id] for row in rows), dtype=np.intp, count=len(rows))
+        recipes = await self.ai_service.recommend_batch(
+            lab_array(rows),
+            groups=groups,
+            region_types=[row.region_type for row in rows],
+            n_groups=len(session_ids),
+            session_ids=session_ids
+        )
+        members: Dict[int, List[Any]] = {}
+        for row in rows:
+            members.setdefault(row.session_id, []).append(row)
+        model_version = self.ai_service.model_version
+        return [
+            {
+                "id": session_id,
+                **dict(zip(RECIPE_CHANNELS, recipes[position].tolist())),
+                "recipe_fingerprint": measurement_fingerprint(members[session_id], model_version)
+            }
+            for position, session_id in enumerate(session_ids)
+            if session_id in members
+        ]
@@ -0,0 +1,142 @@
+"""Garbage collection for orphaned and soft-deleted uploaded images."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.core.storage import BaseStorage, get_storage
+from app.db.models.uploaded_image import UploadedImage
+from app.db.repositories.uploaded_image_repo import UploadedImageRepository
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ImageGCReport:
+    """Summary of a single sweep."""
+
+    scanned: int = 0
+    deleted: int = 0
+    failed: int = 0
+    reclaimed_bytes: int = 0
+    dry_run: bool = False
+
+    def as_dict(self) -> dict:
+        return {
+            "scanned": self.scanned,
+            "deleted": self.deleted,
+            "failed": self.failed,
+            "reclaimed_bytes": self.reclaimed_bytes,
+            "dry_run": self.dry_run,
+        }
+
+
+class ImageGarbageCollector:
+    """Sweep `UploadedImage` rows that are unlinked or soft-deleted.
+
+    Candidates are read in keyset batches, their files are removed with a bounded
+    number of concurrent deletions, and the rows of every successfully cleaned
+    image are removed with one bulk DELETE per batch.
+    """
+
+    def __init__(
+        self,
+        *,
+        storage: Optional[BaseStorage] = None,
+        repository: Optional[UploadedImageRepository] = None,
+        grace_period: Optional[timedelta] = None,
+        batch_size: Optional[int] = None,
+        concurrency: Optional[int] = None,
+    ) -> None:
+        self.storage = storage or get_storage()
+        self.repository = repository or UploadedImageRepository()
+        self.grace_period = grace_period or timedelta(
+            minutes=settings.image_gc_grace_period_minutes
+        )
+        self.batch_size = max(1, batch_size or settings.image_gc_batch_size)
+        self.concurrency = max(1, concurrency or settings.image_gc_concurrency)
+
+    async def sweep(
+        self,
+        db: AsyncSession,
+        *,
+        dry_run: bool = False,
+        now: Optional[datetime] = None,
+    ) -> ImageGCReport:
+        """Run one full pass over the candidate images."""
+        cutoff = (now or datetime.utcnow()) - self.grace_period
+        report = ImageGCReport(dry_run=dry_run)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        last_id = 0
+
+        while True:
+            batch = await self.repository.get_gc_candidates(
+                db,
+                created_before=cutoff,
+                after_id=last_id,
+                limit=self.batch_size,
+            )
+            if not batch:
+                break
+            last_id = batch[-1].id
+            report.scanned += len(batch)
+
+            if dry_run:
+                report.deleted += len(batch)
+                report.reclaimed_bytes += sum(self._image_bytes(image) for image in batch)
+            else:
+                results = await asyncio.gather(
+                    *(self._delete_files(image, semaphore) for image in batch)
+                )
+                cleaned = [image for image, ok in zip(batch, results) if ok]
+                report.failed += len(batch) - len(cleaned)
+                if cleaned:
+                    await self.repository.hard_delete(db, [image.id for image in cleaned])
+                    report.deleted += len(cleaned)
+                    report.reclaimed_bytes += sum(self._image_bytes(image) for image in cleaned)
+
+            if len(batch) < self.batch_size:
+                break
+
+        logger.info(f"Image GC finished: {report.as_dict()}")
+        return report
+
+    async def _delete_files(self, image: UploadedImage, semaphore: asyncio.Semaphore) -> bool:
+        async with semaphore:
+            try:
+                if image.storage_path:
+                    await self.storage.delete(image.storage_path)
+                if image.thumbnail_storage_path:
+                    await self.storage.delete(image.thumbnail_storage_path)
+                return True
+            except Exception as e:
+                logger.warning(f"Image GC failed to delete files for image {image.id}: {e}")
+                return False
+
+    @staticmethod
+    def _image_bytes(image: UploadedImage) -> int:
+        return (image.file_size or 0) + (image.thumbnail_size or 0)
+
+
+async def run_image_gc_loop(stop_event: asyncio.Event) -> None:
+    """Periodically sweep images until `stop_event` is set."""
+    from app.db.session import AsyncSessionLocal
+
+    collector = ImageGarbageCollector()
+    while not stop_event.is_set():
+        try:
+            async with AsyncSessionLocal() as db:
+                await collector.sweep(db, dry_run=settings.image_gc_dry_run)
+        except Exception as e:
+            logger.error(f"Image GC sweep failed: {e}")
+        try:
+            await asyncio.wait_for(stop_event.wait(), timeout=settings.image_gc_interval_sec)
+        except asyncio.TimeoutError:
+            pass
@@ -0,0 +1,234 @@
+"""Skin color (CIE Lab) extraction from regions of an uploaded photo.
+
+`extract_photo_regions` decodes the image, converts the pixels of each region
+of interest from sRGB to Lab (D65) in one vectorized pass and reduces them to
+a single robust reading: clipped pixels (specular highlights, crushed
+shadows) and per-channel outliers by median absolute deviation are rejected,
+then a trimmed mean is taken. It is CPU bound, so the API runs it in a
+process pool through `extract_photo_colors`.
+
+Regions are dicts with `region_type` and either `rect` ([x, y, width,
+height]) or `polygon` ([[x, y], ...]), in pixels of the image as displayed
+(after its EXIF orientation is applied).
+"""
+
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# sRGB (D65) -> CIE XYZ, and the D65 reference white.
+_SRGB_TO_XYZ = np.array([
+    [0.4124564, 0.3575761, 0.1804375],
+    [0.2126729, 0.7151522, 0.0721750],
+    [0.0193339, 0.1191920, 0.9503041],
+])
+_D65_WHITE = np.array([0.95047, 1.0, 1.08883])
+_EPSILON = 216 / 24389
+_KAPPA = 24389 / 27
+
+# sRGB byte -> linear value; one gather instead of a pow() per pixel and channel.
+_SRGB_LINEAR = np.where(
+    np.arange(256) / 255 <= 0.04045,
+    np.arange(256) / 255 / 12.92,
+    ((np.arange(256) / 255 + 0.055) / 1.055) ** 2.4,
+)
+# Scales a MAD to a standard deviation for normally distributed values.
+_MAD_SCALE = 1.4826
+
+
+def srgb_to_lab(rgb: np.ndarray) -> np.ndarray:
+    """(..., 3) uint8 sRGB pixels to (..., 3) float64 CIE Lab under D65."""
+    linear = _SRGB_LINEAR[np.asarray(rgb, dtype=np.uint8)]
+    xyz = linear @ (_SRGB_TO_XYZ / _D65_WHITE[:, None]).T
+    f = np.where(xyz > _EPSILON, np.cbrt(xyz), (_KAPPA * xyz + 16) / 116)
+    lab = np.empty_like(f)
+    lab[..., 0] = 116 * f[..., 1] - 16
+    lab[..., 1] = 500 * (f[..., 0] - f[..., 1])
+    lab[..., 2] = 200 * (f[..., 1] - f[..., 2])
+    return lab
+
+
+def region_pixels(image: np.ndarray, region: Dict[str, Any]) -> np.ndarray:
+    """(N, 3) pixels of `image` (H, W, 3) whose centers fall inside the region.
+
+    Raises ValueError for a malformed region or one that covers no pixel.
+    """
+    height, width = image.shape[:2]
+    if region.get("rect") is not None:
+        x, y, w, h = (float(value) for value in region["rect"])
+        polygon = np.array([[x, y], [x + w, y], [x + w, y + h], [x, y + h]])
+    elif region.get("polygon") is not None:
+        polygon = np.asarray(region["polygon"], dtype=np.float64)
+        if polygon.ndim != 2 or polygon.shape[1] != 2 or len(polygon) < 3:
+            raise ValueError("polygon needs at least 3 [x, y] points")
+    else:
+        raise ValueError("region needs a rect or a polygon")
+
+    # Only test the pixels inside the polygon's bounding box.
+    x0, y0 = np.maximum(np.floor(polygon.min(axis=0)).astype(int), 0)
+    x1 = min(int(np.ceil(polygon[:, 0].max())), width)
+    y1 = min(int(np.ceil(polygon[:, 1].max())), height)
+    if x0 >= x1 or y0 >= y1:
+        raise ValueError("region lies outside the image")
+    xs = np.arange(x0, x1) + 0.5
+    ys = (np.arange(y0, y1) + 0.5)[:, None]
+
+    # Even-odd rule: count the polygon edges crossed by a ray from each pixel center.
+    inside = np.zeros((y1 - y0, x1 - x0), dtype=bool)
+    for (ax, ay), (bx, by) in zip(polygon, np.roll(polygon, -1, axis=0)):
+        if ay == by:
+            continue
+        spans = (ay > ys) != (by > ys)
+        crossing = ax + (ys - ay) * (bx - ax) / (by - ay)
+        inside ^= spans & (xs < crossing)
+
+    pixels = image[y0:y1, x0:x1][inside]
+    if not len(pixels):
+        raise ValueError("region covers no pixel")
+    return pixels
+
+
+def robust_lab(
+    lab: np.ndarray,
+    trim: float = 0.1,
+    outlier_threshold: float = 3.5,
+    keep: Optional[np.ndarray] = None,
+) -> Dict[str, Any]:
+    """Robust mean of (N, 3) Lab values.
+
+    Pixels outside `keep` (when given) and those more than `outlier_threshold`
+    scaled MADs from the channel median are dropped, then `trim` of the
+    remaining values is cut from each end of every channel before averaging.
+    Falls back to all pixels if the filters would drop everything.
+    """
+    lab = np.asarray(lab, dtype=np.float64).reshape(-1, 3)
+    candidates = lab if keep is None or not keep.any() else lab[keep]
+
+    median = np.median(candidates, axis=0)
+    deviation = np.abs(candidates - median)
+    spread = _MAD_SCALE * np.median(deviation, axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        score = np.where(deviation == 0, 0.0, deviation / spread)
+    inliers = candidates[(score <= outlier_threshold).all(axis=1)]
+    if not len(inliers):
+        inliers = candidates
+
+    cut = int(len(inliers) * trim)
+    ordered = np.sort(inliers, axis=0)
+    if cut and len(ordered) > 2 * cut:
+        ordered = ordered[cut:len(ordered) - cut]
+    return {
+        "lab": ordered.mean(axis=0),
+        "std": inliers.std(axis=0),
+        "used_count": int(len(inliers)),
+    }
+
+
+def extract_photo_regions(
+    path: str,
+    regions: Sequence[Dict[str, Any]],
+    trim: float = 0.1,
+    outlier_threshold: float = 3.5,
+    max_pixels: int = 200_000,
+) -> List[Dict[str, Any]]:
+    """One robust Lab reading per region of the image at `path`.
+
+    Regions larger than `max_pixels` are subsampled with a regular stride.
+    Returns dicts with `region_type`, `l_value`, `a_value`, `b_value`,
+    `std` (per-channel spread of the kept pixels), `pixel_count` and
+    `used_count`; raises ValueError for an unreadable image or a bad region.
+    """
+    try:
+        with Image.open(path) as image:
+            rgb = np.asarray(ImageOps.exif_transpose(image).convert("RGB"))
+    except OSError as e:
+        raise ValueError(f"cannot read image: {e}") from e
+
+    readings = []
+    for number, region in enumerate(regions):
+        try:
+            pixels = region_pixels(rgb, region)
+        except ValueError as e:
+            raise ValueError(f"region {number}: {e}") from e
+        pixel_count = len(pixels)
+        if pixel_count > max_pixels:
+            pixels = pixels[::-(-pixel_count // max_pixels)]
+        # Channels at 0 or 255 are clipped and carry no reliable color.
+        unclipped = ((pixels > 0) & (pixels < 255)).all(axis=1)
+        stats = robust_lab(srgb_to_lab(pixels), trim=trim, outlier_threshold=outlier_threshold, keep=unclipped)
+        l_value, a_value, b_value = (round(float(value), 2) for value in stats["lab"])
+        readings.append({
+            "region_type": region.get("region_type"),
+            "l_value": l_value,
+            "a_value": a_value,
+            "b_value": b_value,
+            "std": [round(float(value), 2) for value in stats["std"]],
+            "pixel_count": pixel_count,
+            "used_count": stats["used_count"],
+        })
+    return readings
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_extraction_pool() -> Optional[ProcessPoolExecutor]:
+    """Shared worker pool, created on first use; None when `photo_color_workers` is 0."""
+    global _pool
+    if settings.photo_color_workers <= 0:
+        return None
+    if _pool is None:
+        # spawn: forking a process that runs an event loop and threads is unsafe.
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.photo_color_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        logger.info(f"Started photo color extraction pool with {settings.photo_color_workers} workers")
+    return _pool
+
+
+def shutdown_extraction_pool() -> None:
+    """Stop the worker pool, if it was started."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+async def extract_photo_colors(path: str, regions: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """`extract_photo_regions` with the configured statistics, off the event loop.
+    
+    A worker that died (OOM kill, crash) breaks the pool; the call fails and
+    the next one starts a new pool.
+    """
+    global _pool
+    job = partial(
+        extract_photo_regions,
+        str(path),
+        [dict(region) for region in regions],
+        trim=settings.photo_color_trim,
+        outlier_threshold=settings.photo_color_outlier_threshold,
+        max_pixels=settings.photo_color_max_pixels,
+    )
+    pool = get_extraction_pool()
+    if pool is None:
+        return await asyncio.to_thread(job)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, job)
+    except BrokenProcessPool:
+        if _pool is pool:
+            logger.error("Photo color extraction worker died; restarting the pool")
+            pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+        raise
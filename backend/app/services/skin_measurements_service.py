@@ -1,72 +1,157 @@
 """Service layer for skin measurements domain."""
 
+from app.config import settings
+from app.core.exceptions import ForbiddenException, NotFoundException, ValidationException
+from app.core.file_serving import resolve_under_root
+from app.core.uploads import get_upload_root
 from app.db.models.skin_color_measurement import SkinColorMeasurement
 from app.db.repositories.skin_measurements_repo import SkinMeasurementsRepository
+from app.db.repositories.treatment_sessions_repo import TreatmentSessionsRepository
+from app.db.repositories.uploaded_image_repo import UploadedImageRepository
+from app.services.color_difference import summarize_sessions
+from app.services.color_recipe_engine import RECIPE_CHANNELS, measurement_recipes
+from app.services.photo_color_extraction import extract_photo_colors
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Optional, Any, Dict
+from typing import List, Optional, Any, Dict, Tuple
+
+import numpy as np
 
 class SkinMeasurementsService:
     """Service for skin measurements domain operations."""
     
     def __init__(self):
         self.repository = SkinMeasurementsRepository()
+        self.session_repository = TreatmentSessionsRepository()
 
     async def create_skin_measurement(self, db: AsyncSession, request_data: Dict[str, Any], shop_id: Optional[int] = None) -> SkinColorMeasurement:
         """Create new skin measurement."""
         # Verify that treatment session belongs to the shop
         if shop_id:
-            from app.db.models.treatment_session import TreatmentSession
-            from app.db.models.treatment import Treatment
-            from app.db.models.customer import Customer
-            from sqlalchemy import select, or_
-            from app.core.exceptions import ForbiddenException
-            
-            session_id = request_data.get("session_id")
-            if session_id:
-                result = await db.execute(
-                    select(TreatmentSession)
-                    .join(Treatment)
-                    .join(Customer)
-                    .where(TreatmentSession.id == session_id)
-                    .where(or_(TreatmentSession.is_deleted == False, TreatmentSession.is_deleted.is_(None)))
-                    .where(or_(Treatment.is_deleted == False, Treatment.is_deleted.is_(None)))
-                    .where(Customer.shop_id == shop_id)
-                )
-                session = result.scalar_one_or_none()
-                if not session:
-                    raise ForbiddenException("Treatment session not found or does not belong to your shop")
+            await self._verify_session_access(db, request_data.get("session_id"), shop_id)
         
         color_recipe = await self._infer_color_recipe(request_data)
         request_data.update(color_recipe)
+        # The session's cached recipe no longer covers all its measurements
+        if request_data.get("session_id"):
+            await self.session_repository.clear_recipe_fingerprint(db, request_data["session_id"])
         return await self.repository.create(db, request_data)
     
+    async def create_skin_measurements_from_photo(
+        self,
+        db: AsyncSession,
+        request_data: Dict[str, Any],
+        shop_id: Optional[int] = None
+    ) -> List[Tuple[SkinColorMeasurement, Dict[str, Any]]]:
+        """Create one skin measurement per region of an uploaded photo.
+        
+        `request_data` holds `session_id`, `image_id`, `regions` (dicts with
+        `region_type`, `rect` or `polygon` and optional `measurement_point`)
+        and optional `measured_at`. The measurements are saved together in one
+        commit. Returns each created measurement with the extraction
+        statistics of its region.
+        """
+        session_id = request_data["session_id"]
+        if shop_id:
+            await self._verify_session_access(db, session_id, shop_id)
+        
+        image_repository = UploadedImageRepository()
+        if shop_id:
+            image = await image_repository.get_by_id_with_shop_check(db, request_data["image_id"], shop_id)
+        else:
+            images = await image_repository.get_by_ids(db, [request_data["image_id"]])
+            image = images[0] if images and not images[0].is_deleted else None
+        path = resolve_under_root(get_upload_root(settings.upload_root), image.storage_path) if image else None
+        if path is None or not path.is_file():
+            raise NotFoundException("Uploaded image not found or does not belong to your shop")
+        
+        regions = request_data["regions"]
+        try:
+            readings = await extract_photo_colors(path, regions)
+        except ValueError as e:
+            raise ValidationException(f"Cannot extract skin color from image {image.id}: {e}")
+        
+        payloads = [
+            {
+                "session_id": session_id,
+                "region_type": reading["region_type"],
+                "l_value": reading["l_value"],
+                "a_value": reading["a_value"],
+                "b_value": reading["b_value"],
+                "measurement_point": region.get("measurement_point"),
+                "measured_at": request_data.get("measured_at"),
+            }
+            for region, reading in zip(regions, readings)
+        ]
+        for payload, recipe in zip(payloads, self._infer_payload_recipes(payloads)):
+            payload.update(recipe)
+        
+        # Committed together with the new measurements, which it no longer covers
+        await self.session_repository.clear_recipe_fingerprint(db, session_id)
+        measurements = await self.repository.create_many(db, payloads)
+        return list(zip(measurements, readings))
+    
     async def list_skin_measurements(self, db: AsyncSession, session_id: Optional[int] = None, shop_id: Optional[int] = None, skip: int = 0, limit: int = 100) -> List[SkinColorMeasurement]:
         """List all skin measurements."""
         return await self.repository.get_all(db, session_id=session_id, shop_id=shop_id, skip=skip, limit=limit)
     
+    async def summarize_color_difference(self, db: AsyncSession, measurements: List[SkinColorMeasurement]) -> List[Dict[str, Any]]:
+        """Lesion-vs-normal ΔE (CIEDE2000 / CIE76) per session of the given measurements.
+        
+        Each session is summarized from all its active measurements, not just
+        those in `measurements` (one page of a listing).
+        """
+        session_ids = list(dict.fromkeys(m.session_id for m in measurements))
+        return summarize_sessions(await self.repository.get_lab_by_session_ids(db, session_ids))
+    
     async def delete_skin_measurement(self, db: AsyncSession, measurement_id: int, shop_id: Optional[int] = None) -> bool:
         """Delete skin measurement by ID."""
         # Verify skin measurement belongs to shop
-        if shop_id:
-            measurement = await self.repository.get_by_id(db, measurement_id, shop_id=shop_id)
-            if not measurement:
-                return False
+        measurement = await self.repository.get_by_id(db, measurement_id, shop_id=shop_id)
+        if shop_id and not measurement:
+            return False
+        # The session's cached recipe was computed with this measurement
+        if measurement:
+            await self.session_repository.clear_recipe_fingerprint(db, measurement.session_id)
         return await self.repository.delete(db, measurement_id)
 
+    async def _verify_session_access(self, db: AsyncSession, session_id: Optional[int], shop_id: int) -> None:
+        """Raise ForbiddenException unless the treatment session belongs to the shop."""
+        from app.db.models.treatment_session import TreatmentSession
+        from app.db.models.treatment import Treatment
+        from app.db.models.customer import Customer
+        from sqlalchemy import select, or_
+        
+        if not session_id:
+            return
+        result = await db.execute(
+            select(TreatmentSession)
+            .join(Treatment)
+            .join(Customer)
+            .where(TreatmentSession.id == session_id)
+            .where(or_(TreatmentSession.is_deleted == False, TreatmentSession.is_deleted.is_(None)))
+            .where(or_(Treatment.is_deleted == False, Treatment.is_deleted.is_(None)))
+            .where(Customer.shop_id == shop_id)
+        )
+        session = result.scalar_one_or_none()
+        if not session:
+            raise ForbiddenException("Treatment session not found or does not belong to your shop")
+
     async def _infer_color_recipe(self, measurement_payload: Dict[str, Any]) -> Dict[str, int]:
         """Infer color recipe from measurement data via AI API (stub)."""
         # AI API 호출 자리
         # response = await ai_client.infer(measurement_payload)
         # return response["color_recipe"]
-        l_value = measurement_payload.get("l_value") or 0
-        a_value = measurement_payload.get("a_value") or 0
-        b_value = measurement_payload.get("b_value") or 0
-        def clamp(value: float) -> int:
-            return max(0, min(9, int(round(value))))
-        return {
-            "melanin": clamp((100 - float(l_value)) / 10 if l_value else 0),
-            "white": clamp(float(l_value) / 10 if l_value else 0),
-            "red": clamp(float(a_value) / 10 if a_value else 0),
-            "yellow": clamp(float(b_value) / 10 if b_value else 0),
-        }
+        (recipe,) = self._infer_payload_recipes([measurement_payload])
+        return recipe
+
+    def _infer_payload_recipes(self, payloads: List[Dict[str, Any]]) -> List[Dict[str, int]]:
+        """`infer_color_recipes` for measurement payloads (missing values count as 0)."""
+        lab = np.array(
+            [[payload.get(channel) for channel in ("l_value", "a_value", "b_value")] for payload in payloads],
+            dtype=np.float64,
+        ).reshape(-1, 3)
+        return [dict(zip(RECIPE_CHANNELS, recipe)) for recipe in self.infer_color_recipes(lab).tolist()]
 
+    def infer_color_recipes(self, lab: np.ndarray) -> np.ndarray:
+        """Per-measurement recipes for an (N, 3) Lab array; returns (N, 4) uint8."""
+        return measurement_recipes(lab)
@@ -8,6 +8,7 @@ from app.db.models.treatment_session import TreatmentSession
 from app.db.repositories.treatment_session_image_repo import TreatmentSessionImageRepository
 from app.db.repositories.treatment_sessions_repo import TreatmentSessionsRepository
 from app.db.repositories.uploaded_image_repo import UploadedImageRepository
+from app.services.color_recipe_engine import RECIPE_CHANNELS
 
 
 class TreatmentSessionsService:
@@ -112,6 +113,9 @@ class TreatmentSessionsService:
             session = await self.get_treatment_session_by_id(db, session_id, shop_id=shop_id)
             if not session:
                 return None
+        if any(channel in request_data for channel in RECIPE_CHANNELS):
+            # A hand-edited recipe is no longer the one the fingerprint vouches for
+            request_data["recipe_fingerprint"] = None
         result = await self.repository.update(db, session_id, request_data)
         if result and images_payload is not None:
             await self.set_session_images(
@@ -11,6 +11,19 @@ from app.db.repositories.uploaded_image_repo import UploadedImageRepository
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
+def serialize_image_metadata(uploaded) -> dict:
+    """Return the stored image metadata fields (incl. BlurHash placeholder) for API payloads."""
+    captured_at = getattr(uploaded, "captured_at", None) if uploaded else None
+    return {
+        "width": getattr(uploaded, "width", None) if uploaded else None,
+        "height": getattr(uploaded, "height", None) if uploaded else None,
+        "orientation": getattr(uploaded, "orientation", None) if uploaded else None,
+        "captured_at": captured_at.isoformat() if captured_at else None,
+        "perceptual_hash": getattr(uploaded, "perceptual_hash", None) if uploaded else None,
+        "blurhash": getattr(uploaded, "blurhash", None) if uploaded else None,
+    }
+
+
 class UploadService:
     """Handle image uploads and persistence of their metadata."""
 
@@ -38,6 +51,12 @@ class UploadService:
                     "content_type": stored.content_type,
                     "file_size": stored.size,
                     "thumbnail_size": stored.thumbnail_size,
+                    "width": stored.width,
+                    "height": stored.height,
+                    "orientation": stored.orientation,
+                    "captured_at": stored.captured_at,
+                    "perceptual_hash": stored.perceptual_hash,
+                    "blurhash": stored.blurhash,
                     "storage_backend": type(self._storage).__name__.replace("Storage", "").lower(),
                 }
                 record = await self._repository.create(db, payload)
@@ -0,0 +1,19 @@
+"""Fixtures for API and repository tests."""
+
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+import app.db.models  # noqa: F401  (registers every table on Base.metadata)
+from app.db.base import Base
+
+
+@pytest_asyncio.fixture
+async def sqlite_db():
+    """Async session on a fresh in-memory SQLite database with every table created."""
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        yield session
+    await engine.dispose()
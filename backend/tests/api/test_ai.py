@@ -226,6 +226,27 @@ class TestAIEndpoints:
         assert isinstance(data["response"], str)
         assert len(data["response"]) > 0
     
+    async def test_stream_chat_completion(self, client: AsyncClient, test_user):
+        """Test chat completion streamed as server-sent events."""
+        login_data = {
+            "email": "test@example.com",
+            "password": "testpassword"
+        }
+        
+        login_response = await client.post("/v1/auth/login", json=login_data)
+        assert login_response.status_code == 200
+        access_token = login_response.json()["access_token"]
+        
+        headers = {"Authorization": f"Bearer {access_token}"}
+        chat_data = {"messages": [{"role": "user", "content": "Hello there"}]}
+        
+        response = await client.post("/v1/ai/chat/stream", json=chat_data, headers=headers)
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert "data: " in response.text
+        assert "event: done" in response.text
+    
     async def test_ping_ai_service(self, client: AsyncClient):
         """Test AI service ping."""
         response = await client.get("/v1/ai/ping")
@@ -393,7 +414,7 @@ class TestAIClientResilience:
             await wrapped_function()
     
     async def test_retry_mechanism(self):
-        """Test retry mechanism with tenacity."""
+        """Test retry mechanism."""
         from app.ai.client import OpenAIClient
         import httpx
         
@@ -462,11 +483,11 @@ class TestAIClientFactory:
     
     async def test_global_client_management(self):
         """Test global AI client management."""
-        from app.ai.client import get_ai_client, set_ai_client, close_ai_client
+        from app.ai.client import get_ai_client, set_ai_client, close_ai_client, unwrap_ai_client
         
         # Test getting default client
         client1 = await get_ai_client()
-        assert isinstance(client1, MockAIClient)
+        assert isinstance(unwrap_ai_client(client1), MockAIClient)
         
         # Test setting custom client
         custom_client = MockAIClient()
@@ -479,3 +500,26 @@ class TestAIClientFactory:
         await close_ai_client()
         client3 = await get_ai_client()
         assert client3 is not custom_client  # Should create new instance
+    
+    async def test_init_ai_client_reuses_instance(self):
+        """Test the startup-created client is shared until closed."""
+        from app.ai.client import init_ai_client, get_ai_client, close_ai_client
+        
+        await close_ai_client()
+        client1 = await init_ai_client()
+        client2 = await get_ai_client()
+        assert client1 is client2
+        
+        await close_ai_client()
+    
+    async def test_http_client_uses_configured_pool_limits(self):
+        """Test provider clients share one pooled HTTP client with explicit limits."""
+        from app.ai.client import OpenAIClient
+        from app.config import settings
+        
+        client = OpenAIClient(api_key="test-key")
+        pool = client.client._transport._pool
+        assert pool._max_connections == settings.ai_max_connections
+        assert pool._max_keepalive_connections == settings.ai_max_keepalive_connections
+        
+        await client.close()
@@ -0,0 +1,96 @@
+"""Tests for the streaming color recipe recomputation endpoint."""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.api.v1 import routes_color_recipes
+from app.core.auth import get_current_shop
+from app.main import app
+from app.services.color_recipes_service import RecipeRecomputeReport
+
+
+class FakeSessionFactory:
+    def __init__(self):
+        self.sessions = []
+
+    def __call__(self):
+        session = SimpleNamespace(open=False)
+        self.sessions.append(session)
+
+        class Context:
+            async def __aenter__(self):
+                session.open = True
+                return session
+
+            async def __aexit__(self, *exc):
+                session.open = False
+
+        return Context()
+
+
+class FakeColorRecipesService:
+    def __init__(self, fail_on_batch=None):
+        self.sessions_seen = []
+        self.fail_on_batch = fail_on_batch
+
+    async def recompute_color_recipes(
+        self, db, shop_id=None, batch_size=500, after_id=0, dry_run=False, include_completed=False
+    ):
+        report = RecipeRecomputeReport(dry_run=dry_run)
+        for _batch in range(2):
+            # Every batch runs while the generator's own session is still open.
+            self.sessions_seen.append((db, db.open, shop_id))
+            if report.batches == self.fail_on_batch:
+                raise RuntimeError("database went away")
+            report.batches += 1
+            report.last_session_id = report.batches * batch_size
+            report.scanned += batch_size
+            yield report
+
+
+async def _recompute(monkeypatch, sessions, service):
+    monkeypatch.setattr(routes_color_recipes, "AsyncSessionLocal", sessions)
+    monkeypatch.setattr(routes_color_recipes, "ColorRecipesService", lambda: service)
+
+    async def override_get_current_shop():
+        return SimpleNamespace(id=7)
+
+    previous_overrides = dict(app.dependency_overrides)
+    app.dependency_overrides[get_current_shop] = override_get_current_shop
+    try:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/api/v1/color-recipes/recompute", json={"batch_size": 100})
+    finally:
+        app.dependency_overrides = previous_overrides
+
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+@pytest.mark.asyncio
+async def test_recompute_streams_with_its_own_database_session(monkeypatch):
+    sessions = FakeSessionFactory()
+    service = FakeColorRecipesService()
+
+    lines = await _recompute(monkeypatch, sessions, service)
+    assert [line["done"] for line in lines] == [False, False, True]
+    assert lines[-1]["scanned"] == 200
+    assert len(sessions.sessions) == 1
+    assert service.sessions_seen == [(sessions.sessions[0], True, 7)] * 2
+    assert sessions.sessions[0].open is False
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_ends_the_stream_with_an_error_line(monkeypatch):
+    sessions = FakeSessionFactory()
+
+    lines = await _recompute(monkeypatch, sessions, FakeColorRecipesService(fail_on_batch=1))
+
+    assert [line["done"] for line in lines] == [False, True]
+    assert lines[-1]["error"] == "database went away"
+    assert lines[-1]["last_session_id"] == 100 and lines[-1]["scanned"] == 100
+    assert sessions.sessions[0].open is False
@@ -0,0 +1,24 @@
+"""Database tests for the skin measurement repository."""
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+
+from app.db.models.skin_color_measurement import SkinColorMeasurement
+from app.db.repositories.skin_measurements_repo import SkinMeasurementsRepository
+
+
+@pytest.mark.asyncio
+async def test_create_many_keeps_nothing_when_one_row_fails(sqlite_db):
+    repository = SkinMeasurementsRepository()
+    # SQLite only autoincrements INTEGER primary keys, so ids are explicit.
+    rows = [{"id": 1, "session_id": 1, "region_type": "NORMAL", "l_value": 60.0, "a_value": 8.0, "b_value": 12.0}]
+
+    created = await repository.create_many(sqlite_db, rows + [dict(rows[0], id=2, region_type="LESION")])
+    assert [measurement.id for measurement in created] == [1, 2]
+
+    with pytest.raises(IntegrityError):
+        await repository.create_many(sqlite_db, [dict(rows[0], id=3), dict(rows[0], id=4, session_id=None)])
+
+    count = await sqlite_db.scalar(select(func.count()).select_from(SkinColorMeasurement))
+    assert count == 2
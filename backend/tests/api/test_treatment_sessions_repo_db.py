@@ -0,0 +1,77 @@
+"""Database tests for the color recipe queries of the treatment session repository."""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.db.models.treatment_session import TreatmentSession
+from app.db.repositories.treatment_sessions_repo import TreatmentSessionsRepository
+
+
+async def _add_sessions(db, updated_at):
+    # SQLite only autoincrements INTEGER primary keys, so ids are explicit.
+    db.add_all(
+        TreatmentSession(id=session_id, treatment_id=1, sequence=session_id, updated_at=updated_at[session_id])
+        for session_id in updated_at
+    )
+    await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_recipes_writes_every_row(sqlite_db):
+    now = datetime.utcnow()
+    await _add_sessions(sqlite_db, {session_id: now for session_id in range(1, 4)})
+
+    await TreatmentSessionsRepository().bulk_update_recipes(
+        sqlite_db,
+        [
+            {"id": 1, "melanin": 1, "white": 2, "red": 3, "yellow": 4, "recipe_fingerprint": "a" * 64},
+            {"id": 3, "melanin": 9, "white": 8, "red": 7, "yellow": 6, "recipe_fingerprint": "b" * 64},
+        ],
+    )
+
+    rows = (await sqlite_db.execute(
+        select(TreatmentSession.id, TreatmentSession.melanin, TreatmentSession.yellow, TreatmentSession.recipe_fingerprint)
+        .order_by(TreatmentSession.id)
+    )).all()
+    assert [tuple(row) for row in rows] == [(1, 1, 4, "a" * 64), (2, None, None, None), (3, 9, 6, "b" * 64)]
+
+
+@pytest.mark.asyncio
+async def test_get_updated_since_pages_through_equal_timestamps(sqlite_db):
+    start = datetime(2026, 1, 1)
+    # Sessions 2-4 share one timestamp, so pages must break ties on id.
+    updated_at = {1: 0, 2: 1, 3: 1, 4: 1, 5: 2}
+    updated_at = {session_id: start + timedelta(seconds=offset) for session_id, offset in updated_at.items()}
+    await _add_sessions(sqlite_db, updated_at)
+    repository = TreatmentSessionsRepository()
+
+    seen = []
+    since, after_id = start, 0
+    while True:
+        page = await repository.get_updated_since(sqlite_db, since=since, after_id=after_id, limit=2)
+        if not page:
+            break
+        seen.append([row.id for row in page])
+        since, after_id = page[-1].updated_at, page[-1].id
+
+    assert seen == [[1, 2], [3, 4], [5]]
+
+
+@pytest.mark.asyncio
+async def test_clear_recipe_fingerprint_commits_with_the_caller(sqlite_db):
+    await _add_sessions(sqlite_db, {1: datetime.utcnow(), 2: datetime.utcnow()})
+    repository = TreatmentSessionsRepository()
+    await repository.bulk_update_recipes(
+        sqlite_db, [{"id": session_id, "melanin": 5, "white": 5, "red": 5, "yellow": 5, "recipe_fingerprint": "f" * 64}
+             for session_id in (1, 2)]
+    )
+
+    await repository.clear_recipe_fingerprint(sqlite_db, 1)
+    await sqlite_db.commit()
+
+    fingerprints = (await sqlite_db.execute(
+        select(TreatmentSession.recipe_fingerprint).order_by(TreatmentSession.id)
+    )).scalars().all()
+    assert fingerprints == [None, "f" * 64]
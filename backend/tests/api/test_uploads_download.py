@@ -60,3 +60,80 @@ async def test_download_thumbnail_path(monkeypatch):
     assert response.headers["Content-Type"] == "image/png"
     assert response.headers["Cache-Control"] == "private, max-age=600"
 
+
+
+async def _direct_download(monkeypatch, tmp_path, headers=None):
+    image_path = "images/ab/cd/direct.png"
+    target = tmp_path / image_path
+    if not target.exists():
+        target.parent.mkdir(parents=True)
+        target.write_bytes(b"0123456789" * 10)
+
+    fake_image = SimpleNamespace(
+        storage_path=image_path,
+        thumbnail_storage_path=None,
+        thumbnail_url=None,
+        content_type="image/png",
+    )
+
+    async def override_get_current_shop():
+        return SimpleNamespace(id=1)
+
+    async def override_get_db():
+        yield AsyncMock()
+
+    async def mock_get_by_url(self, db, url, shop_id):
+        return fake_image
+
+    monkeypatch.setattr(routes_uploads.settings, "upload_serve_mode", "direct")
+    monkeypatch.setattr(routes_uploads, "get_upload_root", lambda _: tmp_path)
+    monkeypatch.setattr(
+        routes_uploads.UploadedImageRepository,
+        "get_by_url_with_shop_check",
+        mock_get_by_url,
+    )
+
+    previous_overrides = dict(app.dependency_overrides)
+    app.dependency_overrides[get_current_shop] = override_get_current_shop
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(
+                f"/{routes_uploads._upload_url_prefix}/{image_path}",
+                headers=headers or {},
+            )
+    finally:
+        app.dependency_overrides = previous_overrides
+
+
+@pytest.mark.asyncio
+async def test_download_direct_mode_serves_file(monkeypatch, tmp_path):
+    response = await _direct_download(monkeypatch, tmp_path)
+
+    assert response.status_code == 200
+    assert response.content == b"0123456789" * 10
+    assert "X-Accel-Redirect" not in response.headers
+    assert "immutable" in response.headers["Cache-Control"]
+    assert response.headers["Accept-Ranges"] == "bytes"
+    assert response.headers["ETag"]
+
+
+@pytest.mark.asyncio
+async def test_download_direct_mode_range(monkeypatch, tmp_path):
+    response = await _direct_download(monkeypatch, tmp_path, headers={"Range": "bytes=10-19"})
+
+    assert response.status_code == 206
+    assert response.content == b"0123456789"
+    assert response.headers["Content-Range"] == "bytes 10-19/100"
+
+
+@pytest.mark.asyncio
+async def test_download_direct_mode_conditional(monkeypatch, tmp_path):
+    first = await _direct_download(monkeypatch, tmp_path)
+    etag = first.headers["ETag"]
+
+    response = await _direct_download(monkeypatch, tmp_path, headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.content == b""
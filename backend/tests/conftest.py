@@ -1,5 +1,7 @@
 """Test configuration and fixtures."""
 
+from types import SimpleNamespace
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
@@ -88,3 +90,86 @@ def auth_headers(client, test_user):
     
     token = response.json()["access_token"]
     return {"Authorization": f"Bearer {token}"}
+
+
+def fake_session(session_id, **fields):
+    """A treatment session row for the in-memory repositories below."""
+    row = dict(
+        id=session_id, updated_at=None, is_completed=False, is_deleted=False,
+        melanin=None, white=None, red=None, yellow=None, recipe_fingerprint=None,
+    )
+    row.update(fields)
+    return SimpleNamespace(**row)
+
+
+class FakeSessionRepository:
+    """In-memory `TreatmentSessionsRepository` over `fake_session` rows."""
+
+    def __init__(self, sessions=()):
+        self.sessions = {session.id: session for session in sessions}
+        self.updates = 0
+        self.cleared = []
+
+    async def get_by_id(self, db, session_id, shop_id=None):
+        return self.sessions.get(session_id)
+
+    async def update(self, db, session_id, session_data):
+        session = self.sessions.get(session_id)
+        if session is not None:
+            for key, value in session_data.items():
+                setattr(session, key, value)
+        return session
+
+    async def clear_recipe_fingerprint(self, db, session_id):
+        self.cleared.append(session_id)
+        self.sessions[session_id].recipe_fingerprint = None
+
+    async def get_ids_after(self, db, after_id=0, limit=500, shop_id=None, include_completed=False):
+        return sorted(
+            s.id for s in self.sessions.values() if s.id > after_id and (include_completed or not s.is_completed)
+        )[:limit]
+
+    async def get_completed_recipes_after(self, db, after_id=0, limit=1000):
+        rows = [s for s in self.sessions.values() if s.is_completed and not s.is_deleted and s.id > after_id]
+        return sorted(rows, key=lambda s: s.id)[:limit]
+
+    async def get_updated_since(self, db, since, after_id=0, limit=1000):
+        rows = [s for s in self.sessions.values() if (s.updated_at, s.id) > (since, after_id)]
+        return sorted(rows, key=lambda s: (s.updated_at, s.id))[:limit]
+
+    async def bulk_update_recipes(self, db, recipes):
+        self.updates += 1
+        for row in recipes:
+            for key, value in row.items():
+                setattr(self.sessions[row["id"]], key, value)
+
+
+class FakeMeasurementRepository:
+    """In-memory `SkinMeasurementsRepository` over rows with `id` and `session_id`."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = 0
+
+    async def get_all(self, db, session_id=None, shop_id=None, skip=0, limit=100):
+        return [row for row in self.rows if row.session_id == session_id][skip:skip + limit]
+
+    async def get_by_id(self, db, measurement_id, shop_id=None):
+        return next((row for row in self.rows if row.id == measurement_id), None)
+
+    async def get_lab_by_session_ids(self, db, session_ids):
+        self.queries += 1
+        wanted = set(session_ids)
+        return [row for row in self.rows if row.session_id in wanted]
+
+    async def create(self, db, measurement_data):
+        row = SimpleNamespace(id=len(self.rows) + 1, **measurement_data)
+        self.rows.append(row)
+        return row
+
+    async def create_many(self, db, measurements_data):
+        return [await self.create(db, data) for data in measurements_data]
+
+    async def delete(self, db, measurement_id):
+        self.rows[:] = [row for row in self.rows if row.id != measurement_id]
+        return True
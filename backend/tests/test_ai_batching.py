@@ -0,0 +1,73 @@
+"""Tests for embedding micro-batching."""
+
+import asyncio
+
+import pytest
+
+from app.ai.batching import BatchingAIClient
+from app.ai.client import AIRequestError, MockAIClient
+
+
+class RecordingClient(MockAIClient):
+    def __init__(self, error=None):
+        super().__init__()
+        self.batches = []
+        self.error = error
+
+    async def embed(self, texts, **kwargs):
+        self.batches.append((list(texts), kwargs))
+        await asyncio.sleep(0.01)
+        if self.error:
+            raise self.error
+        return [[float(len(text))] for text in texts]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_upstream_batch():
+    inner = RecordingClient()
+    client = BatchingAIClient(inner, max_items=64, max_wait_ms=20)
+
+    results = await asyncio.gather(
+        client.embed(["a"]), client.embed(["bb", "ccc"]), client.embed(["dddd"])
+    )
+
+    assert results == [[[1.0]], [[2.0], [3.0]], [[4.0]]]
+    assert len(inner.batches) == 1
+    assert client.stats()["embed_batching"]["calls"] == 3
+
+
+@pytest.mark.asyncio
+async def test_batches_respect_max_items_and_options():
+    inner = RecordingClient()
+    client = BatchingAIClient(inner, max_items=2, max_wait_ms=20)
+
+    await asyncio.gather(
+        client.embed(["a"]),
+        client.embed(["b"]),
+        client.embed(["c"]),
+        client.embed(["d"], model="other"),
+    )
+
+    sizes = sorted(len(texts) for texts, _ in inner.batches)
+    assert sizes == [1, 1, 2]
+    assert {"model": "other"} in [options for _, options in inner.batches]
+
+
+@pytest.mark.asyncio
+async def test_upstream_error_reaches_every_caller_and_cancel_is_isolated():
+    inner = RecordingClient(error=AIRequestError("boom"))
+    client = BatchingAIClient(inner, max_wait_ms=20)
+
+    results = await asyncio.gather(
+        client.embed(["a"]), client.embed(["b"]), return_exceptions=True
+    )
+    assert all(isinstance(result, AIRequestError) for result in results)
+
+    inner.error = None
+    cancelled = asyncio.create_task(client.embed(["x"]))
+    kept = asyncio.create_task(client.embed(["yy"]))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+
+    assert await kept == [[2.0]]
+    assert inner.batches[-1][0] == ["yy"]
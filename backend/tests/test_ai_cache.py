@@ -0,0 +1,74 @@
+"""Tests for the AI response cache."""
+
+import pytest
+
+from app.ai.cache import AIResponseCache, CachingAIClient, make_cache_key
+from app.ai.client import MockAIClient
+
+
+class CountingClient(MockAIClient):
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    async def complete(self, prompt, max_tokens=None, temperature=None, **kwargs):
+        self.calls.append(("complete", prompt))
+        return f"completion {len(self.calls)}"
+
+    async def embed(self, texts, **kwargs):
+        self.calls.append(("embed", list(texts)))
+        return [[float(len(text))] for text in texts]
+
+
+def test_cache_key_ignores_option_order_and_unset_values():
+    first = make_cache_key("openai", "complete", {"prompt": "hi", "model": "m", "max_tokens": None})
+    second = make_cache_key("openai", "complete", {"model": "m", "prompt": "hi"})
+
+    assert first == second
+    assert first != make_cache_key("generic", "complete", {"model": "m", "prompt": "hi"})
+    assert first != make_cache_key("openai", "complete", {"model": "other", "prompt": "hi"})
+
+
+@pytest.mark.asyncio
+async def test_only_temperature_zero_completions_are_cached():
+    inner = CountingClient()
+    client = CachingAIClient(inner, AIResponseCache(max_entries=10, ttl_sec=60))
+
+    first = await client.complete("prompt", temperature=0)
+    second = await client.complete("prompt", temperature=0)
+    await client.complete("prompt", temperature=0.7)
+    await client.complete("prompt")
+
+    assert first == second
+    assert len(inner.calls) == 3
+    stats = client.stats()["cache"]
+    assert stats["hits"] == 1
+    assert stats["bypassed"] == 2
+
+
+@pytest.mark.asyncio
+async def test_embeddings_cached_per_text():
+    inner = CountingClient()
+    client = CachingAIClient(inner, AIResponseCache(max_entries=10, ttl_sec=60))
+
+    await client.embed(["a", "bb"])
+    result = await client.embed(["bb", "ccc", "ccc"])
+
+    assert result == [[2.0], [3.0], [3.0]]
+    assert inner.calls == [("embed", ["a", "bb"]), ("embed", ["ccc"])]
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction_and_disk_tier(tmp_path):
+    cache = AIResponseCache(max_entries=1, ttl_sec=60, disk_dir=str(tmp_path))
+    await cache.set("aa11", "first")
+    await cache.set("bb22", "second")
+
+    assert cache.stats()["evictions"] == 1
+    assert await cache.get("aa11") == "first"
+    assert cache.disk_hits == 1
+
+    expired = AIResponseCache(max_entries=1, ttl_sec=-1, disk_dir=str(tmp_path / "expired"))
+    await expired.set("cc33", "stale")
+    assert await expired.get("cc33") != "stale"
+    assert expired.misses == 1
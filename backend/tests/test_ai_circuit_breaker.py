@@ -0,0 +1,104 @@
+"""Tests for the sliding-window AI circuit breaker."""
+
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.ai.client import (
+    AICircuitBreakerError,
+    AIRequestError,
+    CircuitBreaker,
+    GenericHTTPClient,
+    is_upstream_failure,
+)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(
+        "app.ai.client.time", SimpleNamespace(monotonic=lambda: now[0], time=time.time)
+    )
+    return now
+
+
+def test_opens_on_error_rate_not_on_isolated_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, error_rate_threshold=0.5, window_sec=10)
+
+    for _ in range(3):
+        breaker.record_success()
+        breaker.record_success()
+        breaker.record_failure(Exception())
+    assert breaker.state == "CLOSED"
+
+    breaker.record_failure(Exception())
+    breaker.record_failure(Exception())
+    breaker.record_failure(Exception())
+    assert breaker.state == "OPEN"
+    with pytest.raises(AICircuitBreakerError):
+        breaker.before_call()
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_old_failures_leave_the_window(clock):
+    breaker = CircuitBreaker(failure_threshold=2, window_sec=10)
+
+    breaker.record_failure(Exception())
+    clock[0] += 11
+    breaker.record_failure(Exception())
+
+    assert breaker.failure_count == 1
+    assert breaker.state == "CLOSED"
+
+
+def test_half_open_allows_bounded_probes(clock):
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=5, half_open_max_calls=2)
+    breaker.record_failure(Exception())
+    assert breaker.state == "OPEN"
+
+    clock[0] += 5
+    breaker.before_call()
+    breaker.before_call()
+    assert breaker.state == "HALF_OPEN"
+    with pytest.raises(AICircuitBreakerError):
+        breaker.before_call()
+
+    breaker.record_success()
+    breaker.record_success()
+    assert breaker.state == "CLOSED"
+    assert breaker.stats()["times_opened"] == 1
+
+
+def test_client_errors_do_not_count_as_upstream_failures():
+    assert not is_upstream_failure(AIRequestError("bad prompt", status_code=400))
+    assert is_upstream_failure(AIRequestError("rate limited", status_code=429))
+    assert is_upstream_failure(AIRequestError("server", status_code=502))
+
+
+@pytest.mark.asyncio
+async def test_provider_breaker_is_per_endpoint_and_sheds_load():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        return httpx.Response(503, text="unavailable")
+
+    client = GenericHTTPClient(base_url="http://upstream", max_retries=1)
+    await client.client.aclose()
+    client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    breaker = client.circuit_breaker_for("embed")
+    breaker.failure_threshold = 2
+
+    for _ in range(2):
+        with pytest.raises(AIRequestError):
+            await client.embed(["text"])
+    with pytest.raises(AICircuitBreakerError):
+        await client.embed(["text"])
+
+    assert len(calls) == 2
+    assert client.circuit_breaker_state() == "OPEN"
+    assert client.circuit_breaker_for("chat").state == "CLOSED"
+    assert client.stats()["circuit_breakers"]["generic:embed"]["rejected"] == 1
+    await client.close()
@@ -0,0 +1,84 @@
+"""Tests for hedged AI requests."""
+
+import asyncio
+
+import pytest
+
+from app.ai.client import AIRequestError, MockAIClient
+from app.ai.hedging import HedgingAIClient, LatencyTracker
+
+
+class ScriptedClient(MockAIClient):
+    """Each call takes the next (delay, error) from `script`."""
+
+    def __init__(self, script):
+        super().__init__()
+        self.script = list(script)
+        self.started = 0
+        self.cancelled = 0
+
+    async def complete(self, prompt, max_tokens=None, temperature=None, **kwargs):
+        delay, error = self.script[self.started]
+        self.started += 1
+        call = self.started
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if error:
+            raise error
+        return f"attempt {call}"
+
+
+def _warm(client: HedgingAIClient, latency: float = 0.01, samples: int = 20) -> None:
+    for _ in range(samples):
+        client._method("complete").latency.observe(latency)
+
+
+def test_percentile_needs_min_samples():
+    tracker = LatencyTracker(percentile=90, min_samples=10)
+    for value in range(1, 10):
+        tracker.observe(value / 100)
+    assert tracker.hedge_delay() is None
+
+    tracker.observe(1.0)
+    assert tracker.hedge_delay() == pytest.approx(0.09)
+
+
+@pytest.mark.asyncio
+async def test_slow_primary_is_hedged_and_cancelled():
+    inner = ScriptedClient([(1.0, None), (0.0, None)])
+    client = HedgingAIClient(inner)
+    _warm(client)
+
+    assert await client.complete("prompt") == "attempt 2"
+    await asyncio.sleep(0)
+
+    assert inner.cancelled == 1
+    stats = client.stats()["hedging"]["complete"]
+    assert stats["hedged"] == 1
+    assert stats["hedge_wins"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_hedge_falls_back_to_primary():
+    inner = ScriptedClient([(0.05, None), (0.0, AIRequestError("boom"))])
+    client = HedgingAIClient(inner)
+    _warm(client)
+
+    assert await client.complete("prompt") == "attempt 1"
+
+
+@pytest.mark.asyncio
+async def test_budget_bounds_extra_attempts():
+    inner = ScriptedClient([(0.03, None)] * 10)
+    client = HedgingAIClient(inner, budget_ratio=0.0, budget_burst=1.0)
+    _warm(client, latency=0.001, samples=100)
+
+    for _ in range(3):
+        await client.complete("prompt")
+
+    stats = client.stats()["hedging"]["complete"]
+    assert stats["hedged"] == 1
+    assert stats["budget_exhausted"] == 2
@@ -0,0 +1,116 @@
+"""Tests for adaptive AI concurrency limiting."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.ai.client import AIOverloadedError, AIRequestError, GenericHTTPClient, MockAIClient
+from app.ai.limiter import AdaptiveLimiter, ConcurrencyLimitedAIClient
+
+
+class GatedClient(MockAIClient):
+    def __init__(self):
+        super().__init__()
+        self.active = 0
+        self.peak = 0
+        self.release = asyncio.Event()
+        self.error = None
+
+    async def complete(self, prompt, max_tokens=None, temperature=None, **kwargs):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await self.release.wait()
+            if self.error:
+                raise self.error
+            return prompt
+        finally:
+            self.active -= 1
+
+
+@pytest.mark.asyncio
+async def test_limits_in_flight_calls_and_rejects_when_queue_full():
+    inner = GatedClient()
+    client = ConcurrencyLimitedAIClient(inner, initial_limit=2, max_queue=1, queue_timeout=1)
+
+    running = [asyncio.create_task(client.complete(f"p{i}")) for i in range(3)]
+    await asyncio.sleep(0)
+
+    with pytest.raises(AIOverloadedError):
+        await client.complete("rejected")
+
+    inner.release.set()
+    assert await asyncio.gather(*running) == ["p0", "p1", "p2"]
+    assert inner.peak == 2
+    stats = client.stats()["concurrency"]["mock/default"]
+    assert stats["rejected"] == 1
+    assert stats["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_queue_timeout_rejects_waiting_caller():
+    inner = GatedClient()
+    client = ConcurrencyLimitedAIClient(inner, initial_limit=1, queue_timeout=0.01)
+
+    blocker = asyncio.create_task(client.complete("first"))
+    await asyncio.sleep(0)
+    with pytest.raises(AIOverloadedError):
+        await client.complete("second")
+
+    inner.release.set()
+    await blocker
+    assert client.limiter_for(None).in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_lowers_limit_and_success_raises_it():
+    limiter = AdaptiveLimiter("test", initial_limit=10, backoff=0.5)
+
+    await limiter.acquire()
+    limiter.release(0.1, congested=True)
+    assert int(limiter.limit) == 5
+
+    for _ in range(5):
+        await limiter.acquire()
+    for _ in range(5):
+        limiter.release(0.1, congested=False)
+    assert limiter.limit > 5
+
+
+@pytest.mark.asyncio
+async def test_429_from_upstream_counts_as_congestion():
+    inner = GatedClient()
+    inner.error = AIRequestError("too many", status_code=429)
+    inner.release.set()
+    client = ConcurrencyLimitedAIClient(inner, initial_limit=10, backoff=0.5)
+
+    with pytest.raises(AIRequestError):
+        await client.complete("x", model="m")
+
+    assert client.stats()["concurrency"]["mock/m"]["limit"] == 5
+
+
+@pytest.mark.asyncio
+async def test_retried_429_lowers_limit_and_frees_the_slot_while_waiting(monkeypatch):
+    responses = [
+        httpx.Response(429, text="slow down", headers={"Retry-After": "2"}),
+        httpx.Response(200, json={"text": "done"}),
+    ]
+    inner = GenericHTTPClient(base_url="http://upstream", max_retries=3)
+    inner.client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: responses.pop(0)))
+    client = ConcurrencyLimitedAIClient(inner, initial_limit=10, backoff=0.5)
+    in_flight_while_waiting = []
+
+    async def fake_sleep(delay):
+        in_flight_while_waiting.append(client.limiter_for(None).in_flight)
+
+    monkeypatch.setattr("app.ai.client.asyncio.sleep", fake_sleep)
+
+    assert await client.complete("prompt") == "done"
+
+    limiter = client.limiter_for(None)
+    assert in_flight_while_waiting == [0]
+    assert int(limiter.limit) == 5 and limiter.decreases == 1
+    assert limiter.in_flight == 0
+    await client.close()
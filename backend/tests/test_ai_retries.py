@@ -0,0 +1,102 @@
+"""Tests for deadline-aware AI retries."""
+
+import httpx
+import pytest
+
+from app.ai.client import AIRequestError, AITimeoutError, GenericHTTPClient, ai_deadline
+
+
+def _client(handler) -> GenericHTTPClient:
+    client = GenericHTTPClient(base_url="http://upstream", max_retries=3)
+    client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    recorded = []
+
+    async def fake_sleep(delay):
+        recorded.append(delay)
+
+    monkeypatch.setattr("app.ai.client.asyncio.sleep", fake_sleep)
+    return recorded
+
+
+@pytest.mark.asyncio
+async def test_retries_transient_errors_honouring_retry_after(sleeps):
+    responses = [
+        httpx.Response(429, text="slow down", headers={"Retry-After": "2"}),
+        httpx.Response(200, json={"text": "done"}),
+    ]
+    client = _client(lambda request: responses.pop(0))
+
+    assert await client.complete("prompt") == "done"
+    assert sleeps == [2.0]
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried(sleeps):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(400, text="bad prompt")
+
+    client = _client(handler)
+    with pytest.raises(AIRequestError) as exc_info:
+        await client.complete("prompt")
+
+    assert exc_info.value.status_code == 400
+    assert len(calls) == 1
+    assert sleeps == []
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_no_retry_when_deadline_cannot_fit_the_wait(sleeps):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503, text="busy", headers={"Retry-After": "30"})
+
+    client = _client(handler)
+    with ai_deadline(5):
+        with pytest.raises(AIRequestError):
+            await client.complete("prompt")
+
+    assert len(calls) == 1
+    assert sleeps == []
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_long_retry_after_without_deadline_is_not_waited_for(sleeps):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(429, text="slow down", headers={"Retry-After": "3600"})
+
+    client = _client(handler)
+    with pytest.raises(AIRequestError):
+        await client.complete("prompt")
+
+    assert len(calls) == 1
+    assert sleeps == []
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_expired_deadline_fails_without_calling_upstream():
+    calls = []
+    client = _client(lambda request: calls.append(request) or httpx.Response(200, json={"text": "x"}))
+
+    with ai_deadline(0):
+        with pytest.raises(AITimeoutError):
+            await client.complete("prompt")
+
+    assert calls == []
+    await client.close()
@@ -0,0 +1,66 @@
+"""Tests for latency-aware AI backend routing."""
+
+import asyncio
+
+import pytest
+
+from app.ai.client import AIRequestError, MockAIClient
+from app.ai.routing import RoutingAIClient
+
+
+class FakeBackend(MockAIClient):
+    def __init__(self, name, delay=0.0, error=None):
+        super().__init__()
+        self.name = name
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    async def complete(self, prompt, max_tokens=None, temperature=None, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.name
+
+
+@pytest.mark.asyncio
+async def test_routes_to_fastest_backend_after_measuring_both():
+    slow, fast = FakeBackend("slow", delay=0.02), FakeBackend("fast", delay=0.0)
+    router = RoutingAIClient([("slow", slow), ("fast", fast)], explore_ratio=0.0)
+
+    await router.complete("a")
+    await router.complete("b")
+    results = [await router.complete("c") for _ in range(5)]
+
+    assert results == ["fast"] * 5
+    assert slow.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_fails_over_and_takes_failing_backend_out_of_rotation():
+    broken = FakeBackend("broken", error=AIRequestError("down", status_code=503))
+    healthy = FakeBackend("healthy")
+    router = RoutingAIClient(
+        [("broken", broken), ("healthy", healthy)], explore_ratio=0.0, max_error_rate=0.3
+    )
+
+    assert await router.complete("a") == "healthy"
+    assert await router.complete("b") == "healthy"
+    await router.complete("c")
+
+    assert broken.calls == 2
+    stats = router.stats()["routing"]
+    assert stats["failovers"] == 2
+    assert stats["backends"]["broken"]["healthy"] is False
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_failed_over():
+    bad_request = FakeBackend("first", error=AIRequestError("bad prompt", status_code=400))
+    other = FakeBackend("second")
+    router = RoutingAIClient([("first", bad_request), ("second", other)], explore_ratio=0.0)
+
+    with pytest.raises(AIRequestError):
+        await router.complete("a")
+    assert other.calls == 0
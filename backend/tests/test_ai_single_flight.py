@@ -0,0 +1,67 @@
+"""Tests for single-flight coalescing of AI requests."""
+
+import asyncio
+
+import pytest
+
+from app.ai.client import MockAIClient, SingleFlightAIClient
+
+
+class SlowClient(MockAIClient):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def complete(self, prompt, max_tokens=None, temperature=None, **kwargs):
+        self.calls += 1
+        await self.release.wait()
+        return f"{prompt} #{self.calls}"
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_calls_share_one_upstream_call():
+    inner = SlowClient()
+    client = SingleFlightAIClient(inner)
+
+    tasks = [asyncio.create_task(client.complete("same", temperature=0)) for _ in range(5)]
+    other = asyncio.create_task(client.complete("different", temperature=0))
+    await asyncio.sleep(0)
+    inner.release.set()
+
+    assert await asyncio.gather(*tasks) == ["same #1"] * 5
+    assert (await other).startswith("different")
+    assert inner.calls == 2
+    assert client.stats()["single_flight"]["shared"] == 4
+    assert client.stats()["single_flight"]["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelling_one_waiter_does_not_cancel_the_others():
+    inner = SlowClient()
+    client = SingleFlightAIClient(inner)
+
+    first = asyncio.create_task(client.complete("prompt"))
+    second = asyncio.create_task(client.complete("prompt"))
+    await asyncio.sleep(0)
+    first.cancel()
+    await asyncio.sleep(0)
+    inner.release.set()
+
+    assert await second == "prompt #1"
+    assert first.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_call_is_cancelled_when_every_waiter_leaves():
+    inner = SlowClient()
+    client = SingleFlightAIClient(inner)
+
+    only = asyncio.create_task(client.complete("prompt"))
+    await asyncio.sleep(0)
+    only.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await only
+    await asyncio.sleep(0)
+
+    assert client.stats()["single_flight"]["in_flight"] == 0
@@ -0,0 +1,56 @@
+"""Tests for the local AI provider stand-in."""
+
+import httpx
+import pytest
+
+from app.ai.client import AIRequestError, GenericHTTPClient, OpenAIClient
+from app.ai.standin import StandinConfig, create_standin_app
+
+
+async def _attach(client, app, base_url):
+    await client.client.aclose()
+    client.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url=base_url)
+    return client
+
+
+@pytest.mark.asyncio
+async def test_openai_client_round_trip_and_stream():
+    app = create_standin_app(StandinConfig(latency="fixed", latency_ms=0, token_delay_ms=0))
+    client = await _attach(OpenAIClient(api_key="k", base_url="http://standin/v1"), app, "http://standin")
+
+    text = await client.chat([{"role": "user", "content": "hello"}])
+    deltas = [delta async for delta in client.stream_chat([{"role": "user", "content": "hello"}])]
+    vectors = await client.embed(["a", "b"])
+
+    assert "hello" in text
+    assert "".join(deltas) == text
+    assert len(vectors) == 2 and len(vectors[0]) == 8
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_generic_client_sees_injected_rate_limit():
+    app = create_standin_app(
+        StandinConfig(latency="fixed", latency_ms=0, rate_limit_rps=0.001, rate_limit_burst=1, retry_after_sec=0)
+    )
+    client = await _attach(GenericHTTPClient(base_url="http://standin", max_retries=1), app, "http://standin")
+
+    assert await client.complete("first")
+    with pytest.raises(AIRequestError) as exc_info:
+        await client.complete("second")
+
+    assert exc_info.value.status_code == 429
+    assert exc_info.value.retry_after == 0
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_config_can_be_changed_at_runtime():
+    app = create_standin_app(StandinConfig(latency="fixed", latency_ms=0))
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://standin") as http:
+        await http.put("/_standin/config", json={"error_rate": 1.0, "error_status": 502})
+        response = await http.post("/complete", json={"prompt": "x"})
+        stats = (await http.get("/_standin/stats")).json()
+
+    assert response.status_code == 502
+    assert stats["errors"] == 1
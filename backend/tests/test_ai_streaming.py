@@ -0,0 +1,51 @@
+"""Tests for streamed AI completions."""
+
+import httpx
+import pytest
+
+from app.ai.client import AIRequestError, MockAIClient, OpenAIClient, stream_json_events
+
+
+@pytest.mark.asyncio
+async def test_mock_client_streams_word_deltas():
+    client = MockAIClient()
+
+    deltas = [delta async for delta in client.stream_chat([{"role": "user", "content": "hi"}])]
+
+    assert len(deltas) > 1
+    assert "".join(deltas) == await client.chat([{"role": "user", "content": "hi"}])
+
+
+@pytest.mark.asyncio
+async def test_openai_stream_parses_sse_chunks():
+    body = (
+        'data: {"choices": [{"delta": {"role": "assistant"}}]}\n\n'
+        'data: {"choices": [{"delta": {"content": "Hel"}}]}\n\n'
+        ': keep-alive\n\n'
+        'data: {"choices": [{"delta": {"content": "lo"}}]}\n\n'
+        "data: [DONE]\n\n"
+    )
+    seen = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen["payload"] = request.read()
+        return httpx.Response(200, text=body, headers={"content-type": "text/event-stream"})
+
+    client = OpenAIClient(api_key="test-key", base_url="http://upstream")
+    await client.client.aclose()
+    client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    deltas = [delta async for delta in client.stream_chat([{"role": "user", "content": "hi"}])]
+
+    assert deltas == ["Hel", "lo"]
+    assert b'"stream": true' in seen["payload"] or b'"stream":true' in seen["payload"]
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_stream_http_error_is_mapped():
+    transport = httpx.MockTransport(lambda request: httpx.Response(429, text="slow down"))
+    async with httpx.AsyncClient(transport=transport) as http_client:
+        with pytest.raises(AIRequestError, match="429"):
+            async for _ in stream_json_events(http_client, "http://upstream/chat", {}, "Test"):
+                pass
@@ -0,0 +1,172 @@
+"""Tests for AI token usage accounting and budgets."""
+
+import asyncio
+from collections import defaultdict
+
+import httpx
+import pytest
+
+from app.ai.batching import BatchingAIClient
+from app.ai.client import (
+    AIBudgetExceededError,
+    AIClientWrapper,
+    AIUsage,
+    MockAIClient,
+    OpenAIClient,
+    SingleFlightAIClient,
+    UsageCollector,
+    collect_usage,
+    record_usage,
+)
+from app.ai.standin import StandinConfig, create_standin_app
+from app.ai.usage import UsageMeter
+from app.api.v1.routes_ai import _to_api_exception
+from app.schemas.common import ErrorCode
+
+
+class _MemoryUsageRepository:
+    """In-memory stand-in for `AIUsageRepository`."""
+
+    def __init__(self):
+        self.rows = []
+        self.fail = False
+
+    async def add_batch(self, db, rows):
+        if self.fail:
+            raise RuntimeError("database unavailable")
+        self.rows.extend(rows)
+
+    async def daily_totals(self, db, usage_date):
+        totals = defaultdict(int)
+        for row in self.rows:
+            if row["usage_date"] == usage_date:
+                totals[row["account"]] += row["total_tokens"]
+        return dict(totals)
+
+
+class _Session:
+    async def rollback(self):
+        pass
+
+
+def _collected(model: str, total: int) -> UsageCollector:
+    usage = UsageCollector()
+    usage.add(model, AIUsage(total // 2, total - total // 2, total))
+    return usage
+
+
+@pytest.mark.asyncio
+async def test_openai_client_reports_usage_for_calls_and_streams():
+    app = create_standin_app(StandinConfig(latency="fixed", latency_ms=0, token_delay_ms=0))
+    client = OpenAIClient(api_key="k", base_url="http://standin/v1")
+    await client.client.aclose()
+    client.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://standin")
+
+    messages = [{"role": "user", "content": "two words"}]
+    with collect_usage() as usage:
+        await client.chat(messages)
+    with collect_usage() as streamed:
+        [delta async for delta in client.stream_chat(messages)]
+
+    assert usage.as_dict()["prompt_tokens"] == 2
+    assert usage.as_dict()["total_tokens"] > 2
+    assert list(usage.by_model) == ["gpt-3.5-turbo"]
+    assert streamed.as_dict() == usage.as_dict()
+    await client.close()
+
+
+def test_usage_without_collector_is_ignored_and_bad_blocks_are_skipped():
+    record_usage("m", {"prompt_tokens": 3})
+    with collect_usage() as usage:
+        record_usage("m", None)
+        record_usage("m", {"input_tokens": 3, "output_tokens": 4})
+
+    assert usage.as_dict() == {"prompt_tokens": 3, "completion_tokens": 4, "total_tokens": 7}
+
+
+@pytest.mark.asyncio
+async def test_batched_embedding_usage_is_shared_between_callers():
+    client = BatchingAIClient(MockAIClient(), max_wait_ms=5)
+
+    async def embed(texts):
+        with collect_usage() as usage:
+            await client.embed(texts)
+        return usage.total()
+
+    short, long = await asyncio.gather(embed(["a"]), embed(["b c d e f g h i j k l m n o p"]))
+
+    assert short.prompt_tokens + long.prompt_tokens == 16
+    assert long.prompt_tokens > short.prompt_tokens
+
+
+@pytest.mark.asyncio
+async def test_budget_is_enforced_from_memory_and_reloaded_on_flush():
+    repository = _MemoryUsageRepository()
+    meter = UsageMeter(daily_budget=100, budgets={"shop:2": 1000}, repository=repository)
+
+    meter.record("shop:1", _collected("gpt", 60))
+    meter.check_budget("shop:1")
+    meter.record("shop:1", _collected("gpt", 60))
+    with pytest.raises(AIBudgetExceededError):
+        meter.check_budget("shop:1")
+    meter.record("shop:2", _collected("gpt", 500))
+    meter.check_budget("shop:2")
+
+    assert await meter.flush(_Session()) == 2
+    assert meter.used_today("shop:1") == 120
+    assert meter.stats()["pending_rows"] == 0
+
+    # Another worker's usage becomes visible at the next flush.
+    other = UsageMeter(daily_budget=100, repository=repository)
+    other.check_budget("shop:1")
+    await other.flush(_Session())
+    with pytest.raises(AIBudgetExceededError):
+        other.check_budget("shop:1")
+
+
+def test_exhausted_budget_is_a_quota_error():
+    error = _to_api_exception(AIBudgetExceededError("Daily AI token budget of 100 exhausted"), "AI request")
+
+    assert error.status_code == 429
+    assert error.error_code == ErrorCode.QUOTA_EXCEEDED
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_counts_for_the_next_one():
+    repository = _MemoryUsageRepository()
+    meter = UsageMeter(repository=repository)
+    meter.record("user:1", _collected("gpt", 10))
+    meter.record("user:1", _collected("gpt", 10))
+
+    repository.fail = True
+    with pytest.raises(RuntimeError):
+        await meter.flush(_Session())
+    repository.fail = False
+    await meter.flush(_Session())
+
+    assert len(repository.rows) == 1
+    assert repository.rows[0]["requests"] == 2
+    assert repository.rows[0]["total_tokens"] == 20
+    assert meter.stats()["flush_failures"] == 1
+
+
+@pytest.mark.asyncio
+async def test_shared_calls_are_billed_once():
+    class Counting(AIClientWrapper):
+        calls = 0
+
+        async def complete(self, prompt, max_tokens=None, temperature=None, **kwargs):
+            Counting.calls += 1
+            return await self.inner.complete(prompt, max_tokens=max_tokens, temperature=temperature, **kwargs)
+
+    client = SingleFlightAIClient(Counting(MockAIClient()))
+
+    async def complete():
+        with collect_usage() as usage:
+            await client.complete("same prompt", temperature=0)
+        return usage.total().total_tokens
+
+    totals = await asyncio.gather(complete(), complete())
+
+    assert Counting.calls == 1
+    assert sorted(totals)[0] == 0 and sorted(totals)[1] > 0
@@ -0,0 +1,125 @@
+"""Tests for the vectorized CIE76 / CIEDE2000 color differences."""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.services.color_difference import delta_e_76, delta_e_2000, session_color_differences, summarize_sessions
+from app.services.skin_measurements_service import SkinMeasurementsService
+from tests.conftest import FakeMeasurementRepository
+
+# Sharma, Wu & Dalal (2005), "The CIEDE2000 Color-Difference Formula", Table 1:
+# L1, a1, b1, L2, a2, b2, ΔE00.
+SHARMA_PAIRS = np.array([
+    [50.0000, 2.6772, -79.7751, 50.0000, 0.0000, -82.7485, 2.0425],
+    [50.0000, 3.1571, -77.2803, 50.0000, 0.0000, -82.7485, 2.8615],
+    [50.0000, 2.8361, -74.0200, 50.0000, 0.0000, -82.7485, 3.4412],
+    [50.0000, -1.3802, -84.2814, 50.0000, 0.0000, -82.7485, 1.0000],
+    [50.0000, -1.1848, -84.8006, 50.0000, 0.0000, -82.7485, 1.0000],
+    [50.0000, -0.9009, -85.5211, 50.0000, 0.0000, -82.7485, 1.0000],
+    [50.0000, 0.0000, 0.0000, 50.0000, -1.0000, 2.0000, 2.3669],
+    [50.0000, -1.0000, 2.0000, 50.0000, 0.0000, 0.0000, 2.3669],
+    [50.0000, 2.4900, -0.0010, 50.0000, -2.4900, 0.0009, 7.1792],
+    [50.0000, 2.4900, -0.0010, 50.0000, -2.4900, 0.0010, 7.1792],
+    [50.0000, 2.4900, -0.0010, 50.0000, -2.4900, 0.0011, 7.2195],
+    [50.0000, 2.4900, -0.0010, 50.0000, -2.4900, 0.0012, 7.2195],
+    [50.0000, -0.0010, 2.4900, 50.0000, 0.0009, -2.4900, 4.8045],
+    [50.0000, -0.0010, 2.4900, 50.0000, 0.0010, -2.4900, 4.8045],
+    [50.0000, -0.0010, 2.4900, 50.0000, 0.0011, -2.4900, 4.7461],
+    [50.0000, 2.5000, 0.0000, 50.0000, 0.0000, -2.5000, 4.3065],
+    [50.0000, 2.5000, 0.0000, 73.0000, 25.0000, -18.0000, 27.1492],
+    [50.0000, 2.5000, 0.0000, 61.0000, -5.0000, 29.0000, 22.8977],
+    [50.0000, 2.5000, 0.0000, 56.0000, -27.0000, -3.0000, 31.9030],
+    [50.0000, 2.5000, 0.0000, 58.0000, 24.0000, 15.0000, 19.4535],
+    [50.0000, 2.5000, 0.0000, 50.0000, 3.1736, 0.5854, 1.0000],
+    [50.0000, 2.5000, 0.0000, 50.0000, 3.2972, 0.0000, 1.0000],
+    [50.0000, 2.5000, 0.0000, 50.0000, 1.8634, 0.5757, 1.0000],
+    [50.0000, 2.5000, 0.0000, 50.0000, 3.2592, 0.3350, 1.0000],
+    [60.2574, -34.0099, 36.2677, 60.4626, -34.1751, 39.4387, 1.2644],
+    [63.0109, -31.0961, -5.8663, 62.8187, -29.7946, -4.0864, 1.2630],
+    [61.2901, 3.7196, -5.3901, 61.4292, 2.2480, -4.9620, 1.8731],
+    [35.0831, -44.1164, 3.7933, 35.0232, -40.0716, 1.5901, 1.8645],
+    [22.7233, 20.0904, -46.6940, 23.0331, 14.9730, -42.5619, 2.0373],
+    [36.4612, 47.8580, 18.3852, 36.2715, 50.5065, 21.2231, 1.4146],
+    [90.8027, -2.0831, 1.4410, 91.1528, -1.6435, 0.0447, 1.4441],
+    [90.9257, -0.5406, -0.9208, 88.6381, -0.8985, -0.7239, 1.5381],
+    [6.7747, -0.2908, -2.4247, 5.8714, -0.0985, -2.2286, 0.6377],
+    [2.0776, 0.0795, -1.1350, 0.9033, -0.0636, -0.5514, 0.9082],
+])
+
+
+def test_delta_e_2000_matches_sharma_reference_pairs():
+    lab1, lab2, expected = SHARMA_PAIRS[:, :3], SHARMA_PAIRS[:, 3:6], SHARMA_PAIRS[:, 6]
+
+    assert np.allclose(delta_e_2000(lab1, lab2), expected, atol=5e-5)
+    # The formula is symmetric.
+    assert np.allclose(delta_e_2000(lab2, lab1), expected, atol=5e-5)
+
+
+def test_differences_broadcast_and_propagate_nan():
+    reference = np.array([50.0, 2.5, 0.0])
+    samples = np.array([[[50.0, 2.5, 0.0], [61.0, -5.0, 29.0]], [[np.nan, 0.0, 0.0], [53.0, 6.5, 12.0]]])
+
+    delta_2000 = delta_e_2000(samples, reference)
+    delta_76 = delta_e_76(samples, reference)
+
+    assert delta_2000.shape == delta_76.shape == (2, 2)
+    assert delta_2000[0, 0] == 0 and np.isclose(delta_2000[0, 1], 22.8977, atol=5e-5)
+    assert np.isclose(delta_76[1, 1], 13.0)
+    assert np.isnan(delta_2000[1, 0]) and np.isnan(delta_76[1, 0])
+
+
+def test_session_color_differences_compare_lesion_with_normal_mean():
+    lab = np.array([
+        [60.0, 10.0, 15.0], [62.0, 10.0, 15.0],  # session 0 NORMAL
+        [50.0, 15.0, 20.0], [40.0, 20.0, 25.0],  # session 0 LESION
+        [55.0, 5.0, 5.0],                        # session 1 NORMAL only
+    ])
+    regions = ["NORMAL", "NORMAL", "LESION", "LESION", "NORMAL"]
+
+    summary = session_color_differences(lab, regions, groups=np.array([0, 0, 0, 0, 1]))
+
+    normal, lesions = np.array([61.0, 10.0, 15.0]), lab[2:4]
+    assert summary["normal_count"].tolist() == [2, 1]
+    assert summary["lesion_count"].tolist() == [2, 0]
+    assert np.isclose(summary["delta_e_2000"][0], delta_e_2000(lesions.mean(axis=0), normal))
+    assert np.isclose(summary["delta_e_76"][0], delta_e_76(lesions.mean(axis=0), normal))
+    assert np.isclose(summary["max_delta_e_2000"][0], delta_e_2000(lesions, normal).max())
+    assert np.isnan(summary["delta_e_2000"][1]) and np.isnan(summary["max_delta_e_2000"][1])
+
+
+def test_summarize_sessions_orders_by_first_appearance_and_uses_none_for_missing():
+    rows = [
+        SimpleNamespace(session_id=7, l_value=60.0, a_value=10.0, b_value=15.0, region_type="NORMAL"),
+        SimpleNamespace(session_id=3, l_value=55.0, a_value=5.0, b_value=5.0, region_type="LESION"),
+        SimpleNamespace(session_id=7, l_value=50.0, a_value=15.0, b_value=20.0, region_type="LESION"),
+    ]
+
+    summaries = summarize_sessions(rows)
+
+    assert [s["session_id"] for s in summaries] == [7, 3]
+    assert summaries[0]["delta_e_2000"] == round(float(delta_e_2000([50.0, 15.0, 20.0], [60.0, 10.0, 15.0])), 2)
+    assert summaries[1] == {
+        "session_id": 3, "normal_count": 0, "lesion_count": 1,
+        "delta_e_2000": None, "delta_e_76": None, "max_delta_e_2000": None,
+    }
+
+
+@pytest.mark.asyncio
+async def test_listing_summarizes_whole_sessions_not_just_the_page():
+    rows = [
+        SimpleNamespace(id=number, session_id=session_id, l_value=l_value, a_value=10.0, b_value=15.0, region_type=region)
+        for number, (session_id, l_value, region) in enumerate(
+            [(1, 60.0, "NORMAL"), (2, 62.0, "NORMAL"), (1, 45.0, "LESION"), (2, 50.0, "LESION")], start=1
+        )
+    ]
+    service = SkinMeasurementsService()
+    service.repository = FakeMeasurementRepository(rows)
+
+    page = await service.list_skin_measurements(None, session_id=1, limit=1)
+    summary = await service.summarize_color_difference(None, page)
+
+    assert [m.id for m in page] == [1]
+    assert summary == summarize_sessions([row for row in rows if row.session_id == 1])
+    assert summary[0]["delta_e_76"] == 15.0
@@ -0,0 +1,99 @@
+"""Tests that the vectorized color recipe kernels match the scalar implementations."""
+
+import random
+
+import numpy as np
+import pytest
+
+from app.services.color_recipe_ai_service import MockColorRecipeAIService, SkinMeasurementData
+from app.services.color_recipe_engine import lab_array, linear_recipes, measurement_recipes, region_mask
+from app.services.skin_measurements_service import SkinMeasurementsService
+
+
+def _random_measurements(count: int, seed: int = 7):
+    rng = random.Random(seed)
+
+    def value(low: float, high: float):
+        roll = rng.random()
+        if roll < 0.05:
+            return None
+        if roll < 0.08:
+            return 0.0
+        if roll < 0.2:
+            # Values on rounding/truncation boundaries.
+            return float(rng.randint(int(low), int(high))) + rng.choice([0.0, 0.5, -0.5])
+        return rng.uniform(low, high)
+
+    return [
+        SkinMeasurementData(
+            l_value=value(0, 100),
+            a_value=value(-60, 60),
+            b_value=value(-60, 60),
+            region_type=rng.choice(["NORMAL", "LESION", None]),
+        )
+        for _ in range(count)
+    ]
+
+
+def _as_tuple(recommendation):
+    return (recommendation.melanin, recommendation.white, recommendation.red, recommendation.yellow)
+
+
+def _scalar_measurement_recipe(l_value, a_value, b_value):
+    """The per-row formula `measurement_recipes` replaced."""
+    l_value, a_value, b_value = l_value or 0, a_value or 0, b_value or 0
+
+    def clamp(value: float) -> int:
+        return max(0, min(9, int(round(value))))
+    return [
+        clamp((100 - float(l_value)) / 10 if l_value else 0),
+        clamp(float(l_value) / 10 if l_value else 0),
+        clamp(float(a_value) / 10 if a_value else 0),
+        clamp(float(b_value) / 10 if b_value else 0),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_measurement_recipes_match_scalar_inference():
+    measurements = _random_measurements(2000)
+    service = SkinMeasurementsService.__new__(SkinMeasurementsService)
+
+    batch = service.infer_color_recipes(lab_array(measurements))
+
+    for row, m in zip(batch.tolist(), measurements):
+        assert row == _scalar_measurement_recipe(m.l_value, m.a_value, m.b_value)
+    single = await service._infer_color_recipe({"l_value": 55.5, "a_value": None, "b_value": 14.5})
+    assert list(single.values()) == _scalar_measurement_recipe(55.5, None, 14.5)
+
+
+@pytest.mark.asyncio
+async def test_recommend_batch_matches_scalar_per_group_and_region():
+    measurements = _random_measurements(3000, seed=11)
+    groups = np.array([random.Random(i).randrange(400) for i in range(len(measurements))])
+    lesion = region_mask([m.region_type for m in measurements], "LESION")
+    service = MockColorRecipeAIService()
+
+    batch = await service.recommend_batch(lab_array(measurements), groups=groups, mask=lesion, n_groups=401)
+
+    assert batch.shape == (401, 4) and batch.dtype == np.uint8
+    for group in range(401):
+        members = [m for m, g, keep in zip(measurements, groups, lesion) if g == group and keep]
+        scalar = await service.recommend_color_recipe(members)
+        assert tuple(batch[group].tolist()) == _as_tuple(scalar)
+
+
+@pytest.mark.asyncio
+async def test_default_batch_fallback_matches_vectorized_kernel():
+    measurements = _random_measurements(300, seed=3)
+    groups = np.arange(len(measurements)) % 17
+    lab = lab_array(measurements)
+
+    fallback = await super(MockColorRecipeAIService, MockColorRecipeAIService()).recommend_batch(lab, groups=groups)
+
+    assert np.array_equal(fallback, linear_recipes(lab, groups=groups))
+
+
+def test_measurement_recipes_clip_to_recipe_range():
+    recipes = measurement_recipes(np.array([[100.0, 200.0, -200.0], [np.nan, np.nan, np.nan]]))
+
+    assert recipes.tolist() == [[0, 9, 9, 0], [0, 0, 0, 0]]
@@ -0,0 +1,118 @@
+"""Tests for reusing stored color recipes by measurement fingerprint."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.color_recipe_ai_service import MockColorRecipeAIService
+from app.services.color_recipes_service import ColorRecipesService, measurement_fingerprint
+from app.services.skin_measurements_service import SkinMeasurementsService
+from app.services.treatment_sessions_service import TreatmentSessionsService
+from tests.conftest import FakeMeasurementRepository, FakeSessionRepository, fake_session
+
+
+class _CountingAIService(MockColorRecipeAIService):
+    def __init__(self):
+        self.calls = 0
+
+    async def recommend_batch(self, lab, **kwargs):
+        self.calls += 1
+        return await super().recommend_batch(lab, **kwargs)
+
+
+def _reading(measurement_id, l_value, region_type="NORMAL"):
+    return SimpleNamespace(
+        id=measurement_id, session_id=1, l_value=l_value, a_value=8.0, b_value=12.0,
+        region_type=region_type, measurement_point=None,
+    )
+
+
+def _services(rows):
+    sessions = FakeSessionRepository([fake_session(1)])
+    measurements = FakeMeasurementRepository(rows)
+    recipes = ColorRecipesService()
+    recipes.session_repository = sessions
+    recipes.measurement_repository = measurements
+    recipes.ai_service = _CountingAIService()
+    skin = SkinMeasurementsService()
+    skin.session_repository = sessions
+    skin.repository = measurements
+    return recipes, skin
+
+
+@pytest.mark.asyncio
+async def test_repeated_calls_reuse_the_stored_recipe():
+    recipes, _ = _services([_reading(1, 60.0), _reading(2, 45.0, "LESION")])
+
+    first = await recipes.create_color_recipe(None, 1)
+    fingerprint = first.recipe_fingerprint
+    second = await recipes.create_color_recipe(None, 1)
+
+    assert recipes.ai_service.calls == 1
+    assert second.recipe_fingerprint == fingerprint
+    assert (second.melanin, second.white, second.red, second.yellow) == (first.melanin, first.white, first.red, first.yellow)
+
+
+@pytest.mark.asyncio
+async def test_fingerprint_covers_every_measurement_of_a_large_session():
+    rows = [_reading(number, 40.0 + number % 30) for number in range(1, 151)]
+    recipes, _ = _services(rows)
+
+    first = await recipes.create_color_recipe(None, 1)
+    assert first.recipe_fingerprint == measurement_fingerprint(rows, recipes.ai_service.model_version)
+
+    await recipes.create_color_recipe(None, 1)
+    assert recipes.ai_service.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_changed_values_or_model_version_recompute():
+    rows = [_reading(1, 60.0)]
+    recipes, _ = _services(rows)
+    await recipes.create_color_recipe(None, 1)
+
+    rows[0].l_value = 30.0  # edited in place, without going through the service
+    await recipes.create_color_recipe(None, 1)
+    assert recipes.ai_service.calls == 2
+
+    recipes.ai_service.model_version = "mock-linear-2"
+    await recipes.create_color_recipe(None, 1)
+    assert recipes.ai_service.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_measurement_create_and_delete_invalidate_the_recipe():
+    recipes, skin = _services([_reading(1, 60.0)])
+    await recipes.create_color_recipe(None, 1)
+
+    created = await skin.create_skin_measurement(
+        None,
+        {"session_id": 1, "l_value": 40.0, "a_value": 10.0, "b_value": 15.0, "region_type": "LESION", "measurement_point": None},
+    )
+    assert recipes.session_repository.sessions[1].recipe_fingerprint is None
+    await recipes.create_color_recipe(None, 1)
+    assert recipes.ai_service.calls == 2
+
+    assert await skin.delete_skin_measurement(None, created.id)
+    assert recipes.session_repository.cleared == [1, 1]
+    await recipes.create_color_recipe(None, 1)
+    assert recipes.ai_service.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_hand_edited_recipe_is_recomputed_on_the_next_request():
+    recipes, _ = _services([_reading(1, 60.0)])
+    first = await recipes.create_color_recipe(None, 1)
+    computed = (first.melanin, first.white, first.red, first.yellow)
+    sessions = TreatmentSessionsService()
+    sessions.repository = recipes.session_repository
+
+    edited = await sessions.update_treatment_session(None, 1, {"melanin": 0, "note": "조정"})
+    assert edited.melanin == 0 and edited.recipe_fingerprint is None
+
+    again = await recipes.create_color_recipe(None, 1)
+    assert recipes.ai_service.calls == 2
+    assert (again.melanin, again.white, again.red, again.yellow) == computed
+
+    await sessions.update_treatment_session(None, 1, {"note": "메모만 수정"})
+    assert recipes.session_repository.sessions[1].recipe_fingerprint is not None
@@ -0,0 +1,155 @@
+"""Tests for the nearest-neighbor color recipe recommender and its index."""
+
+import random
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.services.color_recipe_ai_service import (
+    MockColorRecipeAIService,
+    NearestNeighborColorRecipeAIService,
+    SkinMeasurementData,
+)
+from app.services.color_recipe_engine import lab_array
+from app.services.color_recipe_index import RecipeNeighborIndex, refresh_recipe_index
+from tests.conftest import FakeMeasurementRepository, FakeSessionRepository, fake_session
+
+
+def _brute_force(index_points, point, k):
+    distances = sorted(np.sqrt(((points - point) ** 2).sum(axis=1)).min() for points in index_points.values())
+    return distances[:k]
+
+
+def test_index_matches_brute_force_through_updates_and_rebuilds():
+    rng = np.random.default_rng(3)
+    index = RecipeNeighborIndex(rebuild_threshold=60)
+    live = {}
+    for step in range(300):
+        session_id = int(rng.integers(0, 120))
+        if rng.random() < 0.2:
+            index.remove(session_id)
+            live.pop(session_id, None)
+        else:
+            points = rng.uniform(-50, 100, size=(1, 4))
+            index.upsert(session_id, points, [1, 2, 3, 4])
+            live[session_id] = points
+        if step % 10 == 9:
+            index.commit()
+            query = rng.uniform(-50, 100, size=(5, 4))
+            distances, _ = index.query(query, 6)
+            for row, point in zip(distances, query):
+                assert np.allclose(np.sort(row[np.isfinite(row)]), _brute_force(live, point, 6))
+
+    assert index.rebuilds > 1
+    assert index.stats()["sessions"] == len(live)
+
+
+def _reading(l_value, a_value, b_value, region="NORMAL"):
+    return SkinMeasurementData(l_value=l_value, a_value=a_value, b_value=b_value, region_type=region)
+
+
+@pytest.mark.asyncio
+async def test_recommends_neighbors_recipe_and_falls_back_without_neighbors():
+    index = RecipeNeighborIndex()
+    service = NearestNeighborColorRecipeAIService(index=index, k=3)
+    light = [_reading(80, 5, 10)]
+
+    empty = await service.recommend_color_recipe(light)
+    assert empty == await MockColorRecipeAIService().recommend_color_recipe(light)
+
+    for session_id, (l_value, recipe) in enumerate([(78, [1, 8, 2, 3]), (81, [1, 8, 2, 3]), (30, [9, 0, 5, 5])]):
+        index.upsert(session_id, np.array([[l_value, 5, 10, 0]]), recipe)
+    index.commit()
+
+    recommendation = await service.recommend_color_recipe(light)
+    assert (recommendation.melanin, recommendation.white, recommendation.red, recommendation.yellow) == (1, 8, 2, 3)
+    missing = await service.recommend_color_recipe([_reading(None, None, None)])
+    assert missing == await MockColorRecipeAIService().recommend_color_recipe([_reading(None, None, None)])
+
+
+@pytest.mark.asyncio
+async def test_batch_matches_per_request_recommendations():
+    rng = random.Random(9)
+    index = RecipeNeighborIndex()
+    for session_id in range(500):
+        point = [rng.uniform(20, 90), rng.uniform(-10, 30), rng.uniform(-10, 40), rng.choice([0, 100])]
+        index.upsert(session_id, np.array([point]), [rng.randrange(10) for _ in range(4)])
+    index.commit()
+    service = NearestNeighborColorRecipeAIService(index=index, k=5)
+
+    sessions = [
+        [_reading(rng.uniform(20, 90), rng.uniform(-10, 30), rng.uniform(-10, 40), rng.choice(["NORMAL", "LESION"]))
+         for _ in range(rng.randint(0, 3))]
+        for _ in range(60)
+    ]
+    measurements = [m for session in sessions for m in session]
+    groups = np.array([number for number, session in enumerate(sessions) for _ in session], dtype=np.intp)
+
+    batch = await service.recommend_batch(
+        lab_array(measurements), groups=groups, region_types=[m.region_type for m in measurements], n_groups=len(sessions)
+    )
+
+    for row, session in zip(batch.tolist(), sessions):
+        single = await service.recommend_color_recipe(session)
+        assert row == [single.melanin, single.white, single.red, single.yellow]
+
+
+@pytest.mark.asyncio
+async def test_a_session_is_not_its_own_neighbor():
+    index = RecipeNeighborIndex()
+    index.upsert(1, np.array([[60.0, 8.0, 12.0, 0.0], [45.0, 8.0, 12.0, 100.0]]), [9, 9, 9, 9])
+    for session_id, l_value in [(2, 58.0), (3, 62.0)]:
+        index.upsert(session_id, np.array([[l_value, 8.0, 12.0, 0.0]]), [1, 2, 3, 4])
+    index.commit()
+    index.upsert(4, np.array([[30.0, 8.0, 12.0, 0.0]]), [9, 9, 9, 9])  # delta, not yet in the tree
+    index.commit()
+    service = NearestNeighborColorRecipeAIService(index=index, k=3)
+    readings = [_reading(60.0, 8.0, 12.0), _reading(45.0, 8.0, 12.0, "LESION"), _reading(30.0, 8.0, 12.0)]
+    lab = lab_array(readings)
+    groups = np.array([0, 0, 1])
+    region_types = ["NORMAL", "LESION", "NORMAL"]
+
+    # Without exclusions sessions 1 and 4 sit at distance 0 and win the vote.
+    assert (await service.recommend_batch(lab, groups=groups, region_types=region_types)).tolist() == [[9, 9, 9, 9]] * 2
+    left_out = await service.recommend_batch(lab, groups=groups, region_types=region_types, session_ids=[1, 4])
+    assert left_out.tolist() == [[1, 2, 3, 4]] * 2
+
+
+def _session(session_id, updated_at, completed=True, recipe=(1, 2, 3, 4)):
+    melanin, white, red, yellow = recipe
+    return fake_session(
+        session_id, updated_at=updated_at, is_completed=completed, melanin=melanin, white=white, red=red, yellow=yellow
+    )
+
+
+@pytest.mark.asyncio
+async def test_refresh_loads_completed_sessions_then_applies_changes():
+    before = datetime.utcnow() - timedelta(hours=1)
+    session_repository = FakeSessionRepository(_session(session_id, before) for session_id in range(1, 6))
+    sessions = session_repository.sessions
+    sessions[5].is_completed = False
+    measurements = [
+        SimpleNamespace(session_id=session_id, l_value=40.0 + session_id, a_value=5.0, b_value=5.0, region_type=region)
+        for session_id in range(1, 8) for region in ("NORMAL", "LESION")
+    ]
+    repositories = dict(
+        session_repository=session_repository,
+        measurement_repository=FakeMeasurementRepository(measurements),
+    )
+    index = RecipeNeighborIndex()
+
+    assert await refresh_recipe_index(None, index, batch_size=2, **repositories) == 4
+    assert index.stats()["sessions"] == 4 and index.stats()["tree_points"] == 8
+
+    later = datetime.utcnow()
+    sessions[6] = _session(6, later, recipe=(9, 9, 9, 9))
+    sessions[2].is_completed = False
+    sessions[2].updated_at = later
+    await refresh_recipe_index(None, index, **repositories)
+
+    stats = index.stats()
+    assert stats["sessions"] == 4 and stats["delta_points"] == 2 and stats["masked_points"] == 2
+    _, recipes = index.query(np.array([[46.0, 5.0, 5.0, 0.0]]), 1)
+    assert recipes[0, 0].tolist() == [9, 9, 9, 9]
@@ -0,0 +1,146 @@
+"""Tests for the precomputed, memory-mapped color recipe lookup table."""
+
+import random
+
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.services.color_recipe_ai_service import (
+    ColorRecipeAIService,
+    LookupTableColorRecipeAIService,
+    MockColorRecipeAIService,
+    SkinMeasurementData,
+)
+from app.services.color_recipe_engine import lab_array
+from app.services.color_recipe_lut import RecipeLookupTable, build_lookup_table, grid_axes
+from app.services.skin_measurements_service import SkinMeasurementsService
+
+GRID = dict(l_step=5.0, ab_step=5.0, ab_range=20.0)
+
+
+class _RegionAwareService(MockColorRecipeAIService):
+    """Mock model that also tells LESION readings apart, to check both tables are filled."""
+
+    async def recommend_batch(self, lab, groups=None, mask=None, region_types=None, n_groups=None, session_ids=None):
+        recipes = await super().recommend_batch(lab, groups=groups, mask=mask, n_groups=n_groups)
+        if region_types is not None and region_types[0] == "LESION":
+            recipes[:, 0] = 9
+        return recipes
+
+
+@pytest.fixture
+def lut_path(tmp_path):
+    return tmp_path / "lut.bin"
+
+
+@pytest.mark.asyncio
+async def test_table_reproduces_the_model_at_grid_points(lut_path):
+    header = await build_lookup_table(_RegionAwareService(), lut_path, chunk_size=100, model="mock", **GRID)
+    table = RecipeLookupTable.open(lut_path)
+    model = MockColorRecipeAIService()
+
+    assert header["shape"] == [2, 21, 9, 9, 4]
+    l_axis, a_axis, b_axis = grid_axes(**GRID)
+    points = np.stack(np.meshgrid(l_axis, a_axis, b_axis, indexing="ij"), axis=-1).reshape(-1, 3)
+    expected = await model.recommend_batch(points, groups=np.arange(len(points)))
+
+    assert np.array_equal(table.lookup(points), expected)
+    assert np.array_equal(table.lookup(points, interpolation="trilinear"), expected)
+    lesion = table.lookup(points, np.ones(len(points), dtype=bool))
+    assert (lesion[:, 0] == 9).all() and np.array_equal(lesion[:, 1:], expected[:, 1:])
+    # Off-grid readings snap to the nearest point; out-of-range ones clamp to the edge.
+    assert table.lookup([[51.0, 2.4, -200.0]]).tolist() == table.lookup([[50.0, 0.0, -20.0]]).tolist()
+
+
+@pytest.mark.asyncio
+async def test_single_request_path_matches_batch_lookup(lut_path):
+    await build_lookup_table(_RegionAwareService(), lut_path, **GRID)
+    service = LookupTableColorRecipeAIService(MockColorRecipeAIService(), table=RecipeLookupTable.open(lut_path))
+    rng = random.Random(4)
+
+    sessions = [
+        [
+            SkinMeasurementData(
+                l_value=rng.choice([None, rng.uniform(0, 100)]),
+                a_value=rng.uniform(-30, 30),
+                b_value=rng.uniform(-30, 30),
+                region_type=rng.choice(["NORMAL", "LESION", None]),
+            )
+            for _ in range(rng.randint(0, 4))
+        ]
+        for _ in range(200)
+    ]
+    measurements = [m for session in sessions for m in session]
+    groups = np.array([number for number, session in enumerate(sessions) for _ in session], dtype=np.intp)
+    batch = await service.recommend_batch(
+        lab_array(measurements), groups=groups, region_types=[m.region_type for m in measurements], n_groups=len(sessions)
+    )
+
+    for row, session in zip(batch.tolist(), sessions):
+        single = await service.recommend_color_recipe(session)
+        assert row == [single.melanin, single.white, single.red, single.yellow]
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_the_model_without_a_table(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "color_recipe_lut_path", str(tmp_path / "missing.bin"))
+
+    class Model(ColorRecipeAIService):
+        async def recommend_color_recipe(self, measurements):
+            return await MockColorRecipeAIService().recommend_color_recipe(measurements)
+
+    service = LookupTableColorRecipeAIService(Model())
+    readings = [SkinMeasurementData(l_value=30.0, a_value=4.0, b_value=8.0, region_type="NORMAL")]
+
+    assert await service.recommend_color_recipe(readings) == await MockColorRecipeAIService().recommend_color_recipe(readings)
+
+
+@pytest.mark.asyncio
+async def test_mixed_region_and_incomplete_sessions_get_the_model_answer(lut_path):
+    await build_lookup_table(MockColorRecipeAIService(), lut_path, **GRID)
+    model = MockColorRecipeAIService()
+    service = LookupTableColorRecipeAIService(model, table=RecipeLookupTable.open(lut_path))
+    rng = random.Random(11)
+
+    sessions = [[SkinMeasurementData(70.0, 0.0, 0.0, "NORMAL"), SkinMeasurementData(40.0, 10.0, 10.0, "LESION")]]
+    sessions += [
+        [
+            SkinMeasurementData(
+                rng.choice([None, rng.uniform(0, 100)]), rng.uniform(-20, 20), rng.uniform(-20, 20), region
+            )
+            for region in ("NORMAL", "LESION", rng.choice(["NORMAL", "LESION", None]))
+        ]
+        for _ in range(100)
+    ]
+    measurements = [m for session in sessions for m in session]
+    groups = np.array([number for number, session in enumerate(sessions) for _ in session], dtype=np.intp)
+    batch = await service.recommend_batch(
+        lab_array(measurements), groups=groups, region_types=[m.region_type for m in measurements], n_groups=len(sessions)
+    )
+
+    for row, session in zip(batch.tolist(), sessions):
+        expected = await model.recommend_color_recipe(session)
+        single = await service.recommend_color_recipe(session)
+        assert row == [expected.melanin, expected.white, expected.red, expected.yellow]
+        assert single == expected
+    assert batch[0].tolist() == [4, 5, 6, 6]
+
+
+@pytest.mark.asyncio
+async def test_measurement_creation_keeps_the_per_reading_formula(monkeypatch, lut_path):
+    await build_lookup_table(_RegionAwareService(), lut_path, **GRID)
+    monkeypatch.setattr(settings, "color_recipe_lut_path", str(lut_path))
+    service = SkinMeasurementsService.__new__(SkinMeasurementsService)
+    created = []
+
+    class Repository:
+        async def create(self, db, data):
+            created.append(data)
+            return data
+
+    service.repository = Repository()
+    payload = {"l_value": 65.0, "a_value": 10.0, "b_value": 20.0, "region_type": "LESION"}
+    await service.create_skin_measurement(None, dict(payload))
+
+    assert {key: created[0][key] for key in ("melanin", "white", "red", "yellow")} == await service._infer_color_recipe(payload)
@@ -0,0 +1,105 @@
+"""Tests for bulk color recipe recomputation."""
+
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.color_recipe_ai_service import SkinMeasurementData
+from app.services.color_recipes_service import ColorRecipesService, measurement_fingerprint
+from tests.conftest import FakeMeasurementRepository, FakeSessionRepository, fake_session
+
+
+def _service(session_ids, rows):
+    service = ColorRecipesService()
+    service.session_repository = FakeSessionRepository(fake_session(session_id) for session_id in session_ids)
+    service.measurement_repository = FakeMeasurementRepository(rows)
+    return service
+
+
+def _rows(session_ids, seed=5):
+    rng = random.Random(seed)
+    rows = []
+    for session_id in session_ids:
+        if session_id % 7 == 0:
+            continue  # no measurements
+        for _ in range(rng.randint(1, 4)):
+            rows.append(
+                SimpleNamespace(
+                    id=len(rows) + 1,
+                    session_id=session_id,
+                    l_value=rng.choice([None, rng.uniform(20, 90)]),
+                    a_value=rng.uniform(-10, 30),
+                    b_value=rng.uniform(-10, 40),
+                    region_type=rng.choice(["NORMAL", "LESION"]),
+                )
+            )
+    return rows
+
+
+@pytest.mark.asyncio
+async def test_recompute_batches_and_matches_per_session_recommendation():
+    session_ids = list(range(1, 251))
+    rows = _rows(session_ids)
+    service = _service(session_ids, rows)
+
+    reports = [report.as_dict() async for report in service.recompute_color_recipes(None, batch_size=100)]
+
+    assert [report["scanned"] for report in reports] == [100, 200, 250]
+    assert service.measurement_repository.queries == 3
+    assert service.session_repository.updates == 3
+    final = reports[-1]
+    assert final["updated"] == len({row.session_id for row in rows})
+    assert final["skipped"] == 250 - final["updated"]
+    assert final["last_session_id"] == 250
+
+    for session_id in session_ids:
+        session = service.session_repository.sessions[session_id]
+        members = [
+            SkinMeasurementData(row.l_value, row.a_value, row.b_value, row.region_type)
+            for row in rows if row.session_id == session_id
+        ]
+        if not members:
+            assert session.recipe_fingerprint is None and session.melanin is None
+            continue
+        expected = await service.ai_service.recommend_color_recipe(members)
+        assert session.recipe_fingerprint == measurement_fingerprint(
+            [row for row in rows if row.session_id == session_id], service.ai_service.model_version
+        )
+        assert (session.melanin, session.white, session.red, session.yellow) == (
+            expected.melanin, expected.white, expected.red, expected.yellow
+        )
+
+
+@pytest.mark.asyncio
+async def test_recompute_resumes_after_id_and_dry_run_writes_nothing():
+    session_ids = list(range(1, 51))
+    service = _service(session_ids, _rows(session_ids))
+
+    reports = [
+        report.as_dict()
+        async for report in service.recompute_color_recipes(None, batch_size=50, after_id=30, dry_run=True)
+    ]
+
+    assert len(reports) == 1
+    assert reports[0]["scanned"] == 20
+    assert reports[0]["dry_run"] is True
+    assert service.session_repository.updates == 0
+
+
+@pytest.mark.asyncio
+async def test_completed_sessions_keep_their_recipe_unless_included():
+    service = _service([1, 2], _rows([1, 2]))
+    sessions = service.session_repository.sessions
+    sessions[1].is_completed = True
+    sessions[1].melanin, sessions[1].white, sessions[1].red, sessions[1].yellow = 0, 9, 0, 9
+
+    reports = [report.as_dict() async for report in service.recompute_color_recipes(None)]
+
+    assert reports[-1]["scanned"] == 1 and reports[-1]["last_session_id"] == 2
+    assert (sessions[1].melanin, sessions[1].white, sessions[1].red, sessions[1].yellow) == (0, 9, 0, 9)
+    assert sessions[1].recipe_fingerprint is None and sessions[2].recipe_fingerprint is not None
+
+    async for _report in service.recompute_color_recipes(None, include_completed=True):
+        pass
+    assert sessions[1].recipe_fingerprint is not None
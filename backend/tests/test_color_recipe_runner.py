@@ -0,0 +1,147 @@
+"""Tests for the local color recipe model runtime and its worker pool."""
+
+import asyncio
+import os
+import random
+import signal
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pytest
+
+from app.scripts.train_recipe_model import fit_linear_model
+from app.services.color_recipe_ai_service import LocalModelColorRecipeAIService, SkinMeasurementData
+from app.services.color_recipe_engine import lab_array, region_means
+from app.services.color_recipe_runner import (
+    ModelWorkerPool,
+    NumpyModelRunner,
+    decode_recipes,
+    load_model_runner,
+    recipe_features,
+)
+
+
+def _model(path, rng):
+    np.savez(
+        path,
+        mean=np.full(8, 10.0), scale=np.full(8, 20.0),
+        w0=rng.normal(size=(8, 16)), b0=rng.normal(size=16),
+        w1=rng.normal(size=(16, 40)), b1=rng.normal(size=40),
+    )
+    return path
+
+
+def test_numpy_runner_evaluates_the_perceptron(tmp_path):
+    rng = np.random.default_rng(2)
+    path = _model(tmp_path / "model.npz", rng)
+    features = rng.uniform(-30, 90, size=(50, 8)).astype(np.float32)
+
+    weights = np.load(path)
+    hidden = np.maximum(((features - weights["mean"]) / weights["scale"]) @ weights["w0"] + weights["b0"], 0)
+    expected = (hidden @ weights["w1"] + weights["b1"]).reshape(50, 4, 10).argmax(axis=2)
+
+    assert np.array_equal(load_model_runner(path).predict(features), expected)
+    assert decode_recipes(np.array([[-3.0, 4.4, 4.6, 12.0]])).tolist() == [[0, 4, 5, 9]]
+    with pytest.raises(ValueError):
+        load_model_runner(tmp_path / "model.pt")
+
+
+def test_linear_fit_recovers_a_linear_recipe(tmp_path):
+    rng = np.random.default_rng(4)
+    features = recipe_features(rng.uniform(0, 80, size=(500, 2, 3)), rng.integers(0, 3, size=(500, 2)))
+    recipes = np.clip(np.rint(features[:, :4] / 10), 0, 9)
+
+    np.savez(tmp_path / "linear.npz", **fit_linear_model(features, recipes))
+
+    assert (NumpyModelRunner(tmp_path / "linear.npz").predict(features) == recipes).mean() > 0.95
+
+
+@pytest.mark.asyncio
+async def test_pool_matches_in_process_predictions_and_batches_small_calls(tmp_path):
+    path = _model(tmp_path / "model.npz", np.random.default_rng(5))
+    features = np.random.default_rng(6).uniform(-30, 90, size=(600, 8)).astype(np.float32)
+    expected = load_model_runner(path).predict(features)
+    pool = ModelWorkerPool(path, workers=2, max_batch=64, max_wait_ms=20)
+
+    try:
+        await pool.start()
+        large = await pool.predict(features)
+        small = await asyncio.gather(*(pool.predict(features[i:i + 1]) for i in range(40)))
+    finally:
+        await pool.close()
+
+    assert np.array_equal(large, expected)
+    assert np.array_equal(np.concatenate(small), expected[:40])
+    stats = pool.stats()
+    assert stats["calls"] == 41 and stats["batches"] == 3  # two halves of the large call, one merged batch
+
+
+@pytest.mark.asyncio
+async def test_pool_restarts_after_a_worker_dies(tmp_path):
+    path = _model(tmp_path / "model.npz", np.random.default_rng(9))
+    features = np.random.default_rng(10).uniform(-30, 90, size=(4, 8)).astype(np.float32)
+    pool = ModelWorkerPool(path, workers=1, max_wait_ms=1)
+
+    try:
+        await pool.start()
+        (pid,) = pool._executor._processes
+        os.kill(pid, signal.SIGKILL)
+        with pytest.raises(BrokenProcessPool):
+            await pool.predict(features)
+        assert pool.stats()["started"] is False
+
+        assert np.array_equal(await pool.predict(features), load_model_runner(path).predict(features))
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_call_queued_before_the_pool_broke_runs_on_a_new_pool(tmp_path):
+    path = _model(tmp_path / "model.npz", np.random.default_rng(11))
+    features = np.random.default_rng(12).uniform(-30, 90, size=(8, 8)).astype(np.float32)
+    pool = ModelWorkerPool(path, workers=1, max_batch=4, max_wait_ms=300)
+
+    try:
+        await pool.start()
+        queued = asyncio.ensure_future(pool.predict(features[:1]))
+        await asyncio.sleep(0)  # queued, waiting for the batch timer
+        (pid,) = pool._executor._processes
+        os.kill(pid, signal.SIGKILL)
+        with pytest.raises(BrokenProcessPool):
+            await pool.predict(features)  # a full batch, sent at once
+        assert pool.stats()["started"] is False
+
+        assert np.array_equal(await queued, load_model_runner(path).predict(features[:1]))
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_service_batch_matches_single_requests(tmp_path):
+    pool = ModelWorkerPool(_model(tmp_path / "model.npz", np.random.default_rng(7)), workers=1)
+    service = LocalModelColorRecipeAIService(pool=pool)
+    rng = random.Random(8)
+    sessions = [
+        [
+            SkinMeasurementData(rng.uniform(20, 90), rng.uniform(-10, 30), rng.uniform(-10, 40), rng.choice(["NORMAL", "LESION"]))
+            for _ in range(rng.randint(0, 3))
+        ]
+        for _ in range(30)
+    ]
+    measurements = [m for session in sessions for m in session]
+    groups = np.array([number for number, session in enumerate(sessions) for _ in session], dtype=np.intp)
+
+    try:
+        batch = await service.recommend_batch(
+            lab_array(measurements), groups=groups, region_types=[m.region_type for m in measurements], n_groups=len(sessions)
+        )
+        singles = [await service.recommend_color_recipe(session) for session in sessions]
+    finally:
+        await pool.close()
+
+    means, counts = region_means(lab_array(measurements), [m.region_type for m in measurements], groups, len(sessions))
+    direct = load_model_runner(pool.path).predict(recipe_features(means, counts))
+    for number, (row, single, session) in enumerate(zip(batch.tolist(), singles, sessions)):
+        assert row == [single.melanin, single.white, single.red, single.yellow]
+        assert row == ([5, 5, 5, 5] if not session else direct[number].tolist())
+    assert service.model_version.startswith("local:model.npz@")
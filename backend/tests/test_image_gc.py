@@ -0,0 +1,125 @@
+"""Tests for the uploaded image garbage collector."""
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.image_gc_service import ImageGarbageCollector
+
+
+class FakeRepository:
+    def __init__(self, images):
+        self.images = {image.id: image for image in images}
+        self.batches = []
+        self.deleted_ids = []
+
+    async def get_gc_candidates(self, db, *, created_before, after_id=0, limit=500):
+        rows = sorted(
+            (
+                image
+                for image in self.images.values()
+                if image.id > after_id and image.created_at < created_before
+            ),
+            key=lambda image: image.id,
+        )[:limit]
+        self.batches.append([image.id for image in rows])
+        return rows
+
+    async def hard_delete(self, db, image_ids):
+        ids = list(image_ids)
+        self.deleted_ids.extend(ids)
+        for image_id in ids:
+            self.images.pop(image_id, None)
+        return len(ids)
+
+
+class FakeStorage:
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.deleted = []
+
+    async def delete(self, storage_path):
+        if storage_path in self.failing:
+            raise OSError("disk error")
+        self.deleted.append(storage_path)
+
+
+def _image(image_id, created_at, thumbnail=True):
+    return SimpleNamespace(
+        id=image_id,
+        created_at=created_at,
+        storage_path=f"images/{image_id}.jpg",
+        thumbnail_storage_path=f"images/thumbnails/{image_id}_thumb.jpg" if thumbnail else None,
+        file_size=1000,
+        thumbnail_size=100 if thumbnail else None,
+    )
+
+
+NOW = datetime(2024, 1, 2, 12, 0, 0)
+
+
+@pytest.mark.asyncio
+async def test_sweep_deletes_old_images_in_batches():
+    old = NOW - timedelta(days=2)
+    images = [_image(i, old) for i in range(1, 6)] + [_image(99, NOW)]
+    repository = FakeRepository(images)
+    storage = FakeStorage()
+    collector = ImageGarbageCollector(
+        storage=storage,
+        repository=repository,
+        grace_period=timedelta(hours=1),
+        batch_size=2,
+        concurrency=2,
+    )
+
+    report = await collector.sweep(None, now=NOW)
+
+    assert report.scanned == 5
+    assert report.deleted == 5
+    assert report.failed == 0
+    assert report.reclaimed_bytes == 5 * 1100
+    assert sorted(repository.deleted_ids) == [1, 2, 3, 4, 5]
+    assert 99 in repository.images
+    assert len(storage.deleted) == 10
+
+
+@pytest.mark.asyncio
+async def test_sweep_dry_run_keeps_files_and_rows():
+    old = NOW - timedelta(days=2)
+    repository = FakeRepository([_image(1, old), _image(2, old, thumbnail=False)])
+    storage = FakeStorage()
+    collector = ImageGarbageCollector(
+        storage=storage,
+        repository=repository,
+        grace_period=timedelta(hours=1),
+        batch_size=10,
+    )
+
+    report = await collector.sweep(None, dry_run=True, now=NOW)
+
+    assert report.dry_run is True
+    assert report.deleted == 2
+    assert report.reclaimed_bytes == 1100 + 1000
+    assert storage.deleted == []
+    assert repository.deleted_ids == []
+
+
+@pytest.mark.asyncio
+async def test_sweep_keeps_rows_when_file_delete_fails():
+    old = NOW - timedelta(days=2)
+    repository = FakeRepository([_image(1, old), _image(2, old)])
+    storage = FakeStorage(failing={"images/2.jpg"})
+    collector = ImageGarbageCollector(
+        storage=storage,
+        repository=repository,
+        grace_period=timedelta(hours=1),
+        batch_size=10,
+    )
+
+    report = await collector.sweep(None, now=NOW)
+
+    assert report.deleted == 1
+    assert report.failed == 1
+    assert repository.deleted_ids == [1]
+    assert 2 in repository.images
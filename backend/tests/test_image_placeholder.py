@@ -0,0 +1,32 @@
+"""Tests for BlurHash placeholder generation."""
+
+from PIL import Image
+
+from app.core.storage.placeholder import encode_blurhash
+
+
+def _image_from_rows(rows):
+    height, width = len(rows), len(rows[0])
+    image = Image.new("RGB", (width, height))
+    image.putdata([tuple(pixel) for row in rows for pixel in row])
+    return image
+
+
+def test_encode_blurhash_matches_reference_vector():
+    rows = [[[x * 8, y * 10, (x + y) * 4] for x in range(32)] for y in range(24)]
+
+    assert encode_blurhash(_image_from_rows(rows)) == "LxH27b2kwzX5mAWYjuf7gKfkfQfj"
+
+
+def test_encode_blurhash_solid_colour():
+    rows = [[[120, 80, 60]] * 8] * 8
+
+    assert encode_blurhash(_image_from_rows(rows)) == "L7D*kQ}?fQ}?}?s:fQs:fQfQfQfQ"
+
+
+def test_encode_blurhash_downsamples_large_images():
+    image = Image.new("RGB", (1200, 900), (10, 200, 30))
+
+    result = encode_blurhash(image)
+
+    assert len(result) == 28
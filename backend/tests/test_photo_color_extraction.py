@@ -0,0 +1,159 @@
+"""Tests for skin color extraction from photo regions."""
+
+import os
+import signal
+from concurrent.futures.process import BrokenProcessPool
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.config import settings
+from app.services import skin_measurements_service
+from app.services.photo_color_extraction import (
+    extract_photo_colors,
+    extract_photo_regions,
+    get_extraction_pool,
+    region_pixels,
+    robust_lab,
+    shutdown_extraction_pool,
+    srgb_to_lab,
+)
+from app.services.skin_measurements_service import SkinMeasurementsService
+from tests.conftest import FakeMeasurementRepository, FakeSessionRepository, fake_session
+
+SKIN = (200, 150, 120)
+LESION = (150, 95, 80)
+
+
+def test_srgb_to_lab_matches_reference_values():
+    lab = srgb_to_lab(np.array([[255, 255, 255], [255, 0, 0], [0, 0, 0], [128, 128, 128]]))
+
+    assert np.allclose(lab[0], [100.0, 0.0, 0.0], atol=1e-3)
+    assert np.allclose(lab[1], [53.241, 80.092, 67.203], atol=1e-3)
+    assert np.allclose(lab[2], [0.0, 0.0, 0.0], atol=1e-3)
+    assert np.allclose(lab[3], [53.585, 0.0, 0.0], atol=1e-3)
+
+
+def test_rect_and_polygon_select_the_same_pixels():
+    image = np.arange(20 * 30 * 3, dtype=np.uint32).reshape(20, 30, 3)
+
+    rect = region_pixels(image, {"rect": [5, 4, 10, 6]})
+    polygon = region_pixels(image, {"polygon": [[5, 4], [15, 4], [15, 10], [5, 10]]})
+    triangle = region_pixels(image, {"polygon": [[0, 0], [10, 0], [0, 10]]})
+    clipped = region_pixels(image, {"rect": [25, 15, 100, 100]})
+
+    assert len(rect) == 60 and np.array_equal(rect, polygon)
+    assert len(triangle) == 45  # pixel centers strictly below the diagonal
+    assert len(clipped) == 5 * 5
+    with pytest.raises(ValueError):
+        region_pixels(image, {"rect": [40, 40, 5, 5]})
+
+
+def test_robust_lab_ignores_outliers_and_clipped_pixels():
+    rng = np.random.default_rng(1)
+    lab = np.array([60.0, 15.0, 20.0]) + rng.normal(0, 0.5, size=(1000, 3))
+    lab[:30] = [95.0, 0.0, 2.0]  # specular highlight
+    keep = np.ones(len(lab), dtype=bool)
+    keep[:10] = False
+
+    stats = robust_lab(lab, trim=0.1, keep=keep)
+
+    assert np.allclose(stats["lab"], [60.0, 15.0, 20.0], atol=0.1)
+    assert stats["used_count"] <= 970
+
+
+def _photo(path):
+    image = np.zeros((60, 80, 3), dtype=np.uint8)
+    image[:] = SKIN
+    image[20:40, 30:50] = LESION
+    image[5:8, 5:8] = 255  # highlight inside the NORMAL region
+    Image.fromarray(image).save(path)
+    return path
+
+
+def test_extract_photo_regions_reads_each_region(tmp_path):
+    path = _photo(tmp_path / "photo.png")
+
+    normal, lesion = extract_photo_regions(
+        str(path),
+        [
+            {"region_type": "NORMAL", "rect": [0, 0, 25, 25]},
+            {"region_type": "LESION", "polygon": [[30, 20], [50, 20], [50, 40], [30, 40]]},
+        ],
+    )
+
+    expected = srgb_to_lab(np.array([SKIN, LESION]))
+    assert normal["region_type"] == "NORMAL" and lesion["region_type"] == "LESION"
+    assert np.allclose([normal["l_value"], normal["a_value"], normal["b_value"]], expected[0], atol=0.01)
+    assert np.allclose([lesion["l_value"], lesion["a_value"], lesion["b_value"]], expected[1], atol=0.01)
+    assert normal["pixel_count"] == 625 and normal["used_count"] == 625 - 9
+    with pytest.raises(ValueError, match="region 0"):
+        extract_photo_regions(str(path), [{"region_type": "NORMAL"}])
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("workers", [0, 1])
+async def test_extract_photo_colors_runs_off_the_event_loop(monkeypatch, tmp_path, workers):
+    monkeypatch.setattr(settings, "photo_color_workers", workers)
+    path = _photo(tmp_path / "photo.png")
+    regions = [{"region_type": "LESION", "rect": [30, 20, 20, 20]}]
+
+    try:
+        readings = await extract_photo_colors(path, regions)
+    finally:
+        shutdown_extraction_pool()
+
+    assert readings == extract_photo_regions(str(path), regions)
+
+
+@pytest.mark.asyncio
+async def test_extraction_pool_restarts_after_a_worker_dies(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "photo_color_workers", 1)
+    path = _photo(tmp_path / "photo.png")
+    regions = [{"region_type": "LESION", "rect": [30, 20, 20, 20]}]
+
+    try:
+        expected = await extract_photo_colors(path, regions)
+        (pid,) = get_extraction_pool()._processes
+        os.kill(pid, signal.SIGKILL)
+        with pytest.raises(BrokenProcessPool):
+            await extract_photo_colors(path, regions)
+
+        assert await extract_photo_colors(path, regions) == expected
+    finally:
+        shutdown_extraction_pool()
+
+
+@pytest.mark.asyncio
+async def test_photo_measurements_are_saved_in_one_unit_of_work(monkeypatch, tmp_path):
+    _photo(tmp_path / "photo.png")
+
+    class Images:
+        async def get_by_ids(self, db, image_ids):
+            return [SimpleNamespace(id=image_ids[0], storage_path="photo.png", is_deleted=False)]
+
+    class Measurements(FakeMeasurementRepository):
+        async def create_many(self, db, measurements_data):
+            self.batches = getattr(self, "batches", 0) + 1
+            return await super().create_many(db, measurements_data)
+
+    monkeypatch.setattr(settings, "photo_color_workers", 0)
+    monkeypatch.setattr(skin_measurements_service, "UploadedImageRepository", Images)
+    monkeypatch.setattr(skin_measurements_service, "get_upload_root", lambda root: tmp_path)
+    service = SkinMeasurementsService()
+    service.repository = Measurements([])
+    service.session_repository = FakeSessionRepository([fake_session(1, recipe_fingerprint="f" * 64)])
+    regions = [
+        {"region_type": "NORMAL", "rect": [0, 0, 25, 25]},
+        {"region_type": "LESION", "rect": [30, 20, 20, 20], "measurement_point": "볼"},
+    ]
+
+    created = await service.create_skin_measurements_from_photo(None, {"session_id": 1, "image_id": 3, "regions": regions})
+
+    assert service.repository.batches == 1 and len(service.repository.rows) == 2
+    assert service.session_repository.cleared == [1]
+    assert [measurement.region_type for measurement, _ in created] == ["NORMAL", "LESION"]
+    assert created[1][0].measurement_point == "볼"
+    assert created[1][0].melanin == (await service._infer_color_recipe(created[1][1]))["melanin"]
@@ -0,0 +1,74 @@
+"""Tests for the hash-sharded local storage layout."""
+
+import io
+
+import pytest
+from fastapi import UploadFile
+from PIL import Image
+
+from app.core.storage.local import LocalStorage, is_sharded_path, sharded_relative_path
+
+
+def _png_upload(name: str = "photo.png") -> UploadFile:
+    buffer = io.BytesIO()
+    Image.new("RGB", (300, 200), (200, 150, 120)).save(buffer, format="PNG")
+    buffer.seek(0)
+    return UploadFile(file=buffer, filename=name)
+
+
+def test_sharded_relative_path_is_stable_two_level_fan_out():
+    path = sharded_relative_path("images", "abc.jpg")
+
+    assert path == sharded_relative_path("images", "abc.jpg")
+    directory, first, second, name = path.split("/")
+    assert directory == "images"
+    assert len(first) == 2 and len(second) == 2
+    assert name == "abc.jpg"
+    assert is_sharded_path("images", path)
+    assert not is_sharded_path("images", "images/abc.jpg")
+
+
+@pytest.mark.asyncio
+async def test_local_storage_saves_new_files_in_shards(tmp_path):
+    storage = LocalStorage(root_dir=tmp_path, url_prefix="/uploads", sharded=True)
+
+    stored = await storage.save(_png_upload())
+
+    assert is_sharded_path("images", stored.storage_path)
+    assert is_sharded_path("images/thumbnails", stored.thumbnail_storage_path)
+    assert stored.public_url == f"/uploads/{stored.storage_path}"
+    assert (tmp_path / stored.storage_path).exists()
+    assert (tmp_path / stored.thumbnail_storage_path).exists()
+
+    await storage.delete(stored.storage_path)
+    assert not (tmp_path / stored.storage_path).exists()
+
+
+@pytest.mark.asyncio
+async def test_local_storage_flat_layout_still_supported(tmp_path):
+    storage = LocalStorage(root_dir=tmp_path, url_prefix="/uploads", sharded=False)
+
+    stored = await storage.save(_png_upload())
+
+    assert stored.storage_path.count("/") == 1
+    assert (tmp_path / stored.storage_path).exists()
+
+
+@pytest.mark.asyncio
+async def test_local_storage_extracts_image_metadata(tmp_path):
+    buffer = io.BytesIO()
+    image = Image.new("RGB", (320, 240), (10, 20, 30))
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    exif[0x0132] = "2024:05:01 09:30:00"
+    image.save(buffer, format="JPEG", exif=exif)
+    buffer.seek(0)
+    storage = LocalStorage(root_dir=tmp_path, url_prefix="/uploads")
+
+    stored = await storage.save(UploadFile(file=buffer, filename="exif.jpg"))
+
+    assert (stored.width, stored.height) == (320, 240)
+    assert stored.orientation == 6
+    assert stored.captured_at.isoformat() == "2024-05-01T09:30:00"
+    assert len(stored.perceptual_hash) == 16
+    assert len(stored.blurhash) == 28